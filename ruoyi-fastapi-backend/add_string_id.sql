@@ -1,6 +1,9 @@
--- 为 h5_user 表添加 string_id 字段
-ALTER TABLE h5_user ADD COLUMN string_id VARCHAR(30) UNIQUE COMMENT '字符串用户ID';
+-- 为 h5_user 表添加 string_id 字段及唯一索引
+ALTER TABLE h5_user ADD COLUMN string_id VARCHAR(30) DEFAULT NULL COMMENT '字符串用户ID' AFTER user_id;
+CREATE UNIQUE INDEX uk_h5_user_string_id ON h5_user (string_id);
 
--- 更新现有用户的 string_id 字段（这里使用一个简单的格式：'USER' + user_id）
--- 实际应用中，您可能需要使用更复杂的逻辑来生成唯一的 string_id
-UPDATE h5_user SET string_id = CONCAT('USER', LPAD(user_id, 26, '0')) WHERE string_id IS NULL;
+-- 存量用户的 string_id 需与应用层根据整数ID生成的字符串ID保持一致，无法在SQL中计算，
+-- 请在ruoyi-fastapi-backend目录下执行 python backfill_h5_user_string_id.py --env=dev 分批回填
+
+-- 如已执行过早期版本的本脚本（string_id 字段带唯一约束并以 'USER' + 补零的整数ID填充），无需重新添加字段，
+-- 先删除早期的唯一约束（ALTER TABLE h5_user DROP INDEX string_id;）并创建上面的唯一索引，再执行上述回填命令重写早期填充的值
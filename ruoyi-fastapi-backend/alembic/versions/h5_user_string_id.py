@@ -0,0 +1,85 @@
+"""h5 user string id
+
+Revision ID: h5_user_string_id
+Revises: sys_dept_closure
+Create Date: 2026-10-18 12:00:00
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+import random
+import string
+
+
+# revision identifiers, used by Alembic.
+revision = 'h5_user_string_id'
+down_revision = 'sys_dept_closure'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+INDEX_NAME = 'uk_h5_user_string_id'
+# 早期add_string_id.sql脚本以'USER'加补零的整数ID填充字符串ID，与应用层生成的字符串ID不一致，需要重新回填
+LEGACY_STRING_ID_PREFIX = 'USER'
+
+
+def generate_string_id_from_int(user_id: int) -> str:
+    """
+    从整数ID生成字符串ID，与H5UserService.generate_string_id_from_int保持一致
+    """
+    return ''.join(random.Random(user_id).choices(string.ascii_letters + string.digits, k=30))
+
+
+def upgrade():
+    connection = op.get_bind()
+    inspector = sa.inspect(connection)
+    # 已执行过add_string_id.sql脚本的数据库中string_id字段已存在
+    if 'string_id' not in {column['name'] for column in inspector.get_columns('h5_user')}:
+        op.add_column('h5_user', sa.Column('string_id', sa.String(30), nullable=True, comment='字符串用户ID'))
+    # 删除早期脚本在string_id字段上创建的唯一约束，统一使用uk_h5_user_string_id唯一索引
+    dropped_names = set()
+    for unique_constraint in inspector.get_unique_constraints('h5_user'):
+        if unique_constraint['column_names'] == ['string_id'] and unique_constraint['name'] not in (None, INDEX_NAME):
+            op.drop_constraint(unique_constraint['name'], 'h5_user', type_='unique')
+            dropped_names.add(unique_constraint['name'])
+    has_index = False
+    for index in inspector.get_indexes('h5_user'):
+        if index['name'] == INDEX_NAME:
+            has_index = True
+        elif index['column_names'] == ['string_id'] and index['unique'] and index['name'] not in dropped_names:
+            op.drop_index(index['name'], table_name='h5_user')
+
+    # 按主键顺序分批回填字符串ID为空或为早期脚本填充值的存量用户，回填完成后再创建唯一索引
+    last_user_id = 0
+    while True:
+        user_ids = (
+            connection.execute(
+                sa.text(
+                    'SELECT user_id FROM h5_user WHERE user_id > :last_user_id '
+                    'AND (string_id IS NULL OR string_id LIKE :legacy_pattern) '
+                    'ORDER BY user_id LIMIT :batch_size'
+                ),
+                {
+                    'last_user_id': last_user_id,
+                    'legacy_pattern': f'{LEGACY_STRING_ID_PREFIX}%',
+                    'batch_size': BATCH_SIZE,
+                },
+            )
+            .scalars()
+            .all()
+        )
+        if not user_ids:
+            break
+        connection.execute(
+            sa.text('UPDATE h5_user SET string_id = :string_id WHERE user_id = :user_id'),
+            [{'user_id': user_id, 'string_id': generate_string_id_from_int(user_id)} for user_id in user_ids],
+        )
+        last_user_id = user_ids[-1]
+    if not has_index:
+        op.create_index(INDEX_NAME, 'h5_user', ['string_id'], unique=True)
+
+
+def downgrade():
+    op.drop_index(INDEX_NAME, table_name='h5_user')
+    op.drop_column('h5_user', 'string_id')
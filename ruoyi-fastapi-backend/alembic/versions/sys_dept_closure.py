@@ -0,0 +1,47 @@
+"""sys dept closure
+
+Revision ID: sys_dept_closure
+Revises: user_id_to_string
+Create Date: 2026-10-18 10:00:00
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'sys_dept_closure'
+down_revision = 'user_id_to_string'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    closure_table = op.create_table(
+        'sys_dept_closure',
+        sa.Column('ancestor_id', sa.Integer, primary_key=True, nullable=False, comment='祖先部门id'),
+        sa.Column('descendant_id', sa.Integer, primary_key=True, nullable=False, comment='后代部门id'),
+        sa.Column('depth', sa.Integer, nullable=False, server_default='0', comment='层级距离（0表示自身）'),
+        comment='部门闭包表',
+    )
+    op.create_index('idx_sys_dept_closure_descendant', 'sys_dept_closure', ['descendant_id', 'depth'])
+
+    # 根据部门表的父部门关系生成闭包数据
+    connection = op.get_bind()
+    depts = connection.execute(sa.text("SELECT dept_id, parent_id FROM sys_dept WHERE del_flag = '0'")).fetchall()
+    parent_mapping = {dept_id: parent_id for dept_id, parent_id in depts}
+    rows = []
+    for dept_id in parent_mapping:
+        ancestor_id, depth, visited = dept_id, 0, set()
+        while ancestor_id in parent_mapping and ancestor_id not in visited:
+            visited.add(ancestor_id)
+            rows.append({'ancestor_id': ancestor_id, 'descendant_id': dept_id, 'depth': depth})
+            ancestor_id, depth = parent_mapping[ancestor_id], depth + 1
+    if rows:
+        op.bulk_insert(closure_table, rows)
+
+
+def downgrade():
+    op.drop_index('idx_sys_dept_closure_descendant', table_name='sys_dept_closure')
+    op.drop_table('sys_dept_closure')
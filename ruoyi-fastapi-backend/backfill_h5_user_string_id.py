@@ -0,0 +1,25 @@
+"""
+为存量H5用户分批回填字符串用户ID
+
+在ruoyi-fastapi-backend目录下执行：python backfill_h5_user_string_id.py --env=dev
+"""
+
+import asyncio
+from config.database import AsyncSessionLocal
+from module_h5.service.user_service import H5UserService
+from utils.log_util import logger
+
+
+async def backfill_h5_user_string_id():
+    """
+    为h5_user表中string_id为空或为早期脚本填充值的用户按主键顺序分批回填字符串用户ID
+
+    :return:
+    """
+    async with AsyncSessionLocal() as session:
+        backfill_count = await H5UserService.backfill_string_id(session)
+    logger.info(f'H5用户字符串ID回填成功，共回填{backfill_count}个用户')
+
+
+if __name__ == '__main__':
+    asyncio.run(backfill_h5_user_string_id())
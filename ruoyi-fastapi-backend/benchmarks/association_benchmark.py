@@ -0,0 +1,167 @@
+"""
+关联关系写入基准测试：逐条新增、全量删除后重建的原实现与
+比对差集后以一条多行INSERT及一条DELETE ... IN维护关联关系的批量实现对比
+
+在ruoyi-fastapi-backend目录下执行：python -m benchmarks.association_benchmark
+可通过环境变量调整数据规模及数据库：
+    BENCHMARK_ASSOCIATION_COUNT     角色分配的菜单数量及批量分配角色、批量删除的用户数量，默认2000
+    BENCHMARK_DB_URL                异步数据库连接地址，默认使用内存sqlite（需安装aiosqlite）；
+                                    请勿指向业务数据库，测试会重建角色菜单、用户角色及用户岗位关联表
+语句数为发送到数据库的语句执行次数，executemany计为一次，内存sqlite无网络往返，远程数据库上两种实现的差距会随语句数进一步放大
+"""
+
+import asyncio
+import os
+import time
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+from module_admin.dao.role_dao import RoleDao
+from module_admin.dao.user_dao import UserDao
+from module_admin.entity.do.role_do import SysRoleMenu
+from module_admin.entity.do.user_do import SysUserPost, SysUserRole
+
+ASSOCIATION_COUNT = int(os.environ.get('BENCHMARK_ASSOCIATION_COUNT', 2000))
+DB_URL = os.environ.get('BENCHMARK_DB_URL', 'sqlite+aiosqlite://')
+ROLE_ID = 2
+POST_ID = 1
+TABLE_LIST = [SysRoleMenu.__table__, SysUserRole.__table__, SysUserPost.__table__]
+
+
+async def reset_data(engine):
+    """
+    重建关联表，角色已关联前一半菜单，前一半用户已分配角色及岗位
+    """
+    async with engine.begin() as conn:
+        for table in TABLE_LIST:
+            await conn.run_sync(table.drop, checkfirst=True)
+            await conn.run_sync(table.create)
+        half_count = ASSOCIATION_COUNT // 2
+        await conn.execute(
+            insert(SysRoleMenu), [dict(role_id=ROLE_ID, menu_id=menu_id) for menu_id in range(1, half_count + 1)]
+        )
+        await conn.execute(
+            insert(SysUserRole), [dict(user_id=user_id, role_id=ROLE_ID) for user_id in range(1, half_count + 1)]
+        )
+        await conn.execute(
+            insert(SysUserPost), [dict(user_id=user_id, post_id=POST_ID) for user_id in range(1, half_count + 1)]
+        )
+
+
+async def legacy_edit_role_menu(session: AsyncSession, menu_id_list):
+    """
+    原实现：删除角色的全部菜单关联后逐条新增
+    """
+    await session.execute(delete(SysRoleMenu).where(SysRoleMenu.role_id.in_([ROLE_ID])))
+    for menu_id in menu_id_list:
+        session.add(SysRoleMenu(role_id=ROLE_ID, menu_id=menu_id))
+
+
+async def batch_edit_role_menu(session: AsyncSession, menu_id_list):
+    """
+    批量实现：比对差集后新增缺少的关联并删除多余的关联
+    """
+    await RoleDao.sync_role_menu_dao(session, ROLE_ID, menu_id_list)
+
+
+async def legacy_add_role_user(session: AsyncSession, user_id_list):
+    """
+    原实现：逐个用户查询是否已分配角色，未分配时逐条新增
+    """
+    for user_id in user_id_list:
+        user_role = (
+            (
+                await session.execute(
+                    select(SysUserRole).where(SysUserRole.user_id == user_id, SysUserRole.role_id == ROLE_ID).distinct()
+                )
+            )
+            .scalars()
+            .first()
+        )
+        if not user_role:
+            session.add(SysUserRole(user_id=user_id, role_id=ROLE_ID))
+
+
+async def batch_add_role_user(session: AsyncSession, user_id_list):
+    """
+    批量实现：一次查询已分配角色的用户后批量新增
+    """
+    await UserDao.add_role_user_batch_dao(session, ROLE_ID, user_id_list)
+
+
+async def legacy_delete_user(session: AsyncSession, user_id_list):
+    """
+    原实现：逐个用户删除角色及岗位关联
+    """
+    for user_id in user_id_list:
+        await session.execute(delete(SysUserRole).where(SysUserRole.user_id.in_([user_id])))
+        await session.execute(delete(SysUserPost).where(SysUserPost.user_id.in_([user_id])))
+
+
+async def batch_delete_user(session: AsyncSession, user_id_list):
+    """
+    批量实现：以DELETE ... IN一次删除全部用户的角色及岗位关联
+    """
+    await UserDao.delete_user_role_by_user_ids_dao(session, user_id_list)
+    await UserDao.delete_user_post_by_user_ids_dao(session, user_id_list)
+
+
+async def measure(engine, write_func, id_list):
+    """
+    执行关联关系写入并提交，返回耗时（毫秒）、语句执行次数及写入后的关联数量
+    """
+    await reset_data(engine)
+    statement_count = 0
+
+    def count_statement(*args):
+        nonlocal statement_count
+        statement_count += 1
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', count_statement)
+    try:
+        start_time = time.perf_counter()
+        async with AsyncSession(bind=engine, autoflush=False) as session:
+            await write_func(session, id_list)
+            await session.commit()
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+    finally:
+        event.remove(engine.sync_engine, 'before_cursor_execute', count_statement)
+    async with engine.connect() as conn:
+        row_count = 0
+        for table in TABLE_LIST:
+            row_count += (await conn.execute(select(func.count()).select_from(table))).scalar()
+    return elapsed_ms, statement_count, row_count
+
+
+async def main():
+    engine = (
+        create_async_engine(DB_URL, poolclass=StaticPool)
+        if DB_URL.startswith('sqlite')
+        else create_async_engine(DB_URL)
+    )
+    # 期望集合与已有关联重叠一半：角色菜单保留后一半并新增同等数量，分配角色及删除的用户覆盖全部已分配用户
+    half_count = ASSOCIATION_COUNT // 2
+    menu_id_list = list(range(half_count + 1, ASSOCIATION_COUNT + half_count + 1))
+    user_id_list = list(range(1, ASSOCIATION_COUNT + 1))
+    print(f'数据库：{engine.dialect.name}，关联数量：{ASSOCIATION_COUNT}（已存在{half_count}）')
+    try:
+        for scene, legacy_func, batch_func, id_list in [
+            ('角色分配菜单', legacy_edit_role_menu, batch_edit_role_menu, menu_id_list),
+            ('批量分配用户角色', legacy_add_role_user, batch_add_role_user, user_id_list),
+            ('批量删除用户关联', legacy_delete_user, batch_delete_user, user_id_list),
+        ]:
+            results = []
+            for name, write_func in [('原实现', legacy_func), ('批量实现', batch_func)]:
+                elapsed_ms, statement_count, row_count = await measure(engine, write_func, id_list)
+                results.append(row_count)
+                print(f'{scene}-{name}：耗时{elapsed_ms:.0f}ms，语句{statement_count}条')
+            assert results[0] == results[1], results
+    finally:
+        async with engine.begin() as conn:
+            for table in TABLE_LIST:
+                await conn.run_sync(table.drop, checkfirst=True)
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
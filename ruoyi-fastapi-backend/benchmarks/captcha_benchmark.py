@@ -0,0 +1,130 @@
+"""
+验证码生成吞吐量基准测试：每次加载字体并在事件循环中绘制、缓存字体后各图片格式的绘制耗时及图片大小、从验证码池取出的获取耗时
+
+在ruoyi-fastapi-backend目录下执行：python -m benchmarks.captcha_benchmark
+可通过环境变量调整测试规模及Redis：
+    BENCHMARK_CAPTCHA_COUNT     每种方式生成的验证码数量，默认500
+    BENCHMARK_REDIS_URL         Redis连接地址，如redis://127.0.0.1:6379/15，默认使用fakeredis；
+                                请勿指向业务Redis，测试会写入captcha_codes:*键
+"""
+
+import asyncio
+import base64
+import io
+import os
+import random
+import time
+import uuid
+from datetime import timedelta
+from PIL import Image, ImageDraw, ImageFont
+from config.enums import RedisInitKeyConfig
+from config.env import AppConfig
+from module_admin.service.captcha_service import CaptchaService
+
+CAPTCHA_COUNT = int(os.environ.get('BENCHMARK_CAPTCHA_COUNT', 500))
+REDIS_URL = os.environ.get('BENCHMARK_REDIS_URL', '')
+
+
+async def create_redis():
+    """
+    创建测试Redis连接
+    """
+    if REDIS_URL:
+        from redis import asyncio as aioredis
+
+        return aioredis.from_url(REDIS_URL, decode_responses=True)
+    import fakeredis
+
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+async def legacy_create_captcha_image():
+    """
+    原实现：每次从磁盘加载字体，在事件循环中绘制并编码为png
+    """
+    image = Image.new('RGB', (160, 60), color='#EAEAEA')
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.truetype(os.path.join(os.path.abspath(os.getcwd()), 'assets', 'font', 'Arial.ttf'), size=30)
+    num1 = random.randint(0, 9)
+    num2 = random.randint(0, 9)
+    operational_character = random.choice(['+', '-', '*'])
+    if operational_character == '+':
+        result = num1 + num2
+    elif operational_character == '-':
+        result = num1 - num2
+    else:
+        result = num1 * num2
+    draw.text((25, 15), f'{num1} {operational_character} {num2} = ?', fill='blue', font=font)
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return [base64.b64encode(buffer.getvalue()).decode(), result]
+
+
+async def serve(redis, create_func):
+    """
+    模拟获取验证码接口：生成验证码并写入redis，返回每次获取的耗时列表（毫秒）及总耗时（毫秒）
+    """
+    latencies = []
+    start_time = time.perf_counter()
+    for _ in range(CAPTCHA_COUNT):
+        request_start_time = time.perf_counter()
+        image, computed_result = await create_func()
+        await redis.set(
+            f'{RedisInitKeyConfig.CAPTCHA_CODES.key}:{uuid.uuid4()}', computed_result, ex=timedelta(minutes=2)
+        )
+        latencies.append((time.perf_counter() - request_start_time) * 1000)
+    return latencies, (time.perf_counter() - start_time) * 1000
+
+
+def report(name: str, latencies, elapsed_ms: float):
+    """
+    输出吞吐量及耗时分位数
+    """
+    ordered = sorted(latencies)
+    print(
+        f'{name}：{CAPTCHA_COUNT / elapsed_ms * 1000:.0f}次/秒，'
+        f'p50 {ordered[len(ordered) // 2]:.3f}ms，p99 {ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]:.3f}ms'
+    )
+
+
+async def main():
+    redis = await create_redis()
+    print(f'Redis：{REDIS_URL or "fakeredis"}，每种方式生成验证码数量：{CAPTCHA_COUNT}')
+    try:
+        report('原实现（每次加载字体，事件循环中绘制png）', *await serve(redis, legacy_create_captcha_image))
+
+        for image_format in ['png', 'png8', 'webp']:
+            CaptchaService.get_font()
+            start_time = time.perf_counter()
+            images = [CaptchaService.render_captcha(image_format)[0] for _ in range(CAPTCHA_COUNT)]
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            average_size = sum(len(image) for image in images) / len(images)
+            print(
+                f'缓存字体绘制{image_format}：每张{elapsed_ms / CAPTCHA_COUNT:.3f}ms，'
+                f'base64图片平均{average_size:.0f}字节'
+            )
+
+        # 验证码池容量与测试数量一致，等待后台任务填满后测试取出耗时
+        AppConfig.app_captcha_pool_size = CAPTCHA_COUNT
+        await CaptchaService.init_captcha_pool()
+        try:
+            start_time = time.perf_counter()
+            while CaptchaService.get_pool_size() < CAPTCHA_COUNT:
+                await asyncio.sleep(0.01)
+            print(
+                f'验证码池后台填满{CAPTCHA_COUNT}张（{AppConfig.app_captcha_image_format}，'
+                f'{AppConfig.app_captcha_render_workers}个绘制线程）：{(time.perf_counter() - start_time) * 1000:.0f}ms'
+            )
+            report('验证码池取出', *await serve(redis, CaptchaService.create_captcha_image_service))
+        finally:
+            await CaptchaService.close_captcha_pool()
+        if not REDIS_URL:
+            print('fakeredis在进程内执行命令，不包含网络往返耗时，请通过BENCHMARK_REDIS_URL指定本地Redis测试')
+    finally:
+        async for key in redis.scan_iter(match=f'{RedisInitKeyConfig.CAPTCHA_CODES.key}:*', count=1000):
+            await redis.delete(key)
+        await redis.aclose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
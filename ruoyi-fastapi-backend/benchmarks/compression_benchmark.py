@@ -0,0 +1,195 @@
+"""
+响应压缩基准测试：所有响应固定以gzip 9级在事件循环中压缩的原实现与
+按Accept-Encoding协商、按大小分级、大响应体在线程池中压缩并缓存可缓存响应压缩结果的实现对比
+
+在ruoyi-fastapi-backend目录下执行：python -m benchmarks.compression_benchmark
+可通过环境变量调整测试规模：
+    BENCHMARK_COMPRESSION_ROW_COUNTS      逗号分隔的列表接口行数，默认20,500,10000
+    BENCHMARK_COMPRESSION_REQUEST_COUNT   每种响应的请求次数，默认20
+    BENCHMARK_COMPRESSION_ACCEPT_ENCODING 请求头Accept-Encoding，默认gzip, deflate, br, zstd
+静态文件及列表导出流式响应同样参与对比，计时前先比对解压后的响应体与未压缩的响应体一致；
+事件循环最大阻塞时间为请求期间每1ms唤醒一次的后台任务观测到的最大唤醒延迟
+"""
+
+import asyncio
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import zlib
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from httpx import ASGITransport, AsyncClient
+from starlette.middleware.gzip import GZipMiddleware
+from middlewares.compression_middleware import COMPRESSORS, CompressionMiddleware
+from utils.response_util import ResponseUtil
+
+ROW_COUNTS = [int(count) for count in os.environ.get('BENCHMARK_COMPRESSION_ROW_COUNTS', '20,500,10000').split(',')]
+REQUEST_COUNT = int(os.environ.get('BENCHMARK_COMPRESSION_REQUEST_COUNT', 20))
+ACCEPT_ENCODING = os.environ.get('BENCHMARK_COMPRESSION_ACCEPT_ENCODING', 'gzip, deflate, br, zstd')
+STATIC_FILE_NAME = 'chunk-vendors.js'
+
+
+def decompress(content_encoding: str, body: bytes):
+    """
+    解压响应体
+    """
+    if content_encoding == 'gzip':
+        return zlib.decompress(body, 47)
+    if content_encoding == 'br':
+        import brotli
+
+        return brotli.decompress(body)
+    if content_encoding == 'zstd':
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    return body
+
+
+def generate_rows(row_count: int):
+    """
+    生成操作日志列表行
+    """
+    return [
+        {
+            'operId': index,
+            'title': '用户管理',
+            'businessType': index % 10,
+            'method': 'module_admin.controller.user_controller.get_system_user_list()',
+            'requestMethod': 'GET',
+            'operName': f'user{index % 100}',
+            'operUrl': '/system/user/list',
+            'operIp': f'192.168.{index // 256 % 256}.{index % 256}',
+            'operLocation': '内网IP',
+            'operParam': f'{{"pageNum": {index % 50}, "pageSize": 10}}',
+            'jsonResult': '{"code": 200, "msg": "查询成功"}',
+            'status': '0',
+            'operTime': f'2024-01-01 08:{index // 60 % 60:02d}:{index % 60:02d}',
+            'costTime': index * 7 % 500,
+        }
+        for index in range(row_count)
+    ]
+
+
+def create_app(static_dir: str, legacy: bool):
+    """
+    创建测试应用
+    """
+    app = FastAPI()
+    rows_dict = {row_count: generate_rows(row_count) for row_count in ROW_COUNTS}
+
+    @app.get('/list/{row_count}')
+    async def get_list(row_count: int):
+        return ResponseUtil.success(rows=rows_dict[row_count], dict_content={'total': row_count})
+
+    @app.get('/export')
+    async def export():
+        async def generate():
+            for chunk_index in range(20):
+                yield ''.join(
+                    f'{chunk_index * 500 + index},用户{index},user{index}@example.com,2024-01-01 08:30:00\n'
+                    for index in range(500)
+                ).encode('utf-8')
+
+        return StreamingResponse(generate(), media_type='text/csv')
+
+    app.mount('/static', StaticFiles(directory=static_dir), name='static')
+    if legacy:
+        app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=9)
+    else:
+        app.add_middleware(CompressionMiddleware)
+
+    return app
+
+
+async def watch_loop(stop_event: asyncio.Event, stall_list: list):
+    """
+    每1ms唤醒一次，记录唤醒延迟
+    """
+    while not stop_event.is_set():
+        start_time = time.perf_counter()
+        await asyncio.sleep(0.001)
+        stall_list.append(time.perf_counter() - start_time - 0.001)
+
+
+async def measure(client: AsyncClient, url: str):
+    """
+    执行多次请求，返回平均耗时、响应字节数及事件循环最大阻塞时间（毫秒）
+    """
+    stop_event = asyncio.Event()
+    stall_list = []
+    watcher = asyncio.create_task(watch_loop(stop_event, stall_list))
+    elapsed_list = []
+    size = 0
+    for _ in range(REQUEST_COUNT):
+        # 让出事件循环，使后台任务在每次请求前恢复计时
+        await asyncio.sleep(0.005)
+        start_time = time.perf_counter()
+        async with client.stream('GET', url, headers={'Accept-Encoding': ACCEPT_ENCODING}) as response:
+            size = sum([len(chunk) for chunk in [chunk async for chunk in response.aiter_raw()]])
+        elapsed_list.append((time.perf_counter() - start_time) * 1000)
+    await asyncio.sleep(0.005)
+    stop_event.set()
+    await watcher
+
+    return statistics.mean(elapsed_list), size, max(stall_list, default=0) * 1000
+
+
+async def check_body(client: AsyncClient, url: str):
+    """
+    比对解压后的响应体与未压缩的响应体，返回使用的压缩方式
+    """
+    identity_response = await client.get(url, headers={'Accept-Encoding': 'identity'})
+    async with client.stream('GET', url, headers={'Accept-Encoding': ACCEPT_ENCODING}) as response:
+        raw_body = b''.join([chunk async for chunk in response.aiter_raw()])
+        content_encoding = response.headers.get('content-encoding', 'identity')
+    body = decompress(content_encoding, raw_body)
+    if url.startswith('/list'):
+        # 响应时间字段取值不同，比对时去除
+        body, identity_body = body.split(b'"time":')[0], identity_response.content.split(b'"time":')[0]
+    else:
+        identity_body = identity_response.content
+    assert body == identity_body, f'{url}解压后的响应体不一致'
+
+    return content_encoding
+
+
+async def main():
+    static_dir = tempfile.mkdtemp()
+    try:
+        with open(os.path.join(static_dir, STATIC_FILE_NAME), 'w', encoding='utf-8') as f:
+            f.write(
+                ''.join(
+                    f'function component{index}(props) {{ '
+                    f'return h("div", {{ class: "item-{index % 97}" }}, props); }}\n'
+                    for index in range(20000)
+                )
+            )
+        print(f'可用压缩方式：{",".join(COMPRESSORS)}，请求头Accept-Encoding：{ACCEPT_ENCODING}')
+        url_list = [f'/list/{row_count}' for row_count in ROW_COUNTS] + [f'/static/{STATIC_FILE_NAME}', '/export']
+        transport_dict = {
+            label: ASGITransport(app=create_app(static_dir, legacy))
+            for label, legacy in [('原实现gzip9级', True), ('自适应压缩', False)]
+        }
+        for url in url_list:
+            print(url)
+            for label, transport in transport_dict.items():
+                async with AsyncClient(transport=transport, base_url='http://test') as client:
+                    content_encoding = await check_body(client, url)
+                    elapsed_ms, size, stall_ms = await measure(client, url)
+                print(
+                    f'    {label}：{content_encoding}，响应{size / 1024:.1f}KB，平均每次{elapsed_ms:.2f}ms，'
+                    f'事件循环最大阻塞{stall_ms:.2f}ms'
+                )
+        print('自适应压缩按路由统计：')
+        for metrics in CompressionMiddleware.get_metrics():
+            print(f'    {metrics}')
+    finally:
+        shutil.rmtree(static_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
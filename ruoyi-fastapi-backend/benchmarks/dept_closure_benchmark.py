@@ -0,0 +1,153 @@
+"""
+部门闭包表与find_in_set祖级列表扫描的子树查询耗时基准测试
+
+在ruoyi-fastapi-backend目录下执行：python -m benchmarks.dept_closure_benchmark
+可通过环境变量调整数据规模及数据库：
+    BENCHMARK_DEPT_COUNT   部门数量，默认50000
+    BENCHMARK_USER_COUNT   用户数量，默认1000000
+    BENCHMARK_DB_URL       同步数据库连接地址，默认使用内存sqlite；请勿指向业务数据库，测试会重建相关表
+"""
+
+import os
+import random
+import time
+from sqlalchemy import create_engine, event, func, insert, or_, select
+from module_admin.entity.do.dept_do import SysDept, SysDeptClosure
+from module_admin.entity.do.user_do import SysUser
+from module_admin.service.dept_service import DeptService
+
+DEPT_COUNT = int(os.environ.get('BENCHMARK_DEPT_COUNT', 50000))
+USER_COUNT = int(os.environ.get('BENCHMARK_USER_COUNT', 1000000))
+DB_URL = os.environ.get('BENCHMARK_DB_URL', 'sqlite://')
+# 每个部门的子部门数量，50000个部门时树深度为6
+BRANCH_FACTOR = 10
+BATCH_SIZE = 10000
+TABLE_LIST = [SysDept.__table__, SysDeptClosure.__table__, SysUser.__table__]
+
+
+def create_benchmark_engine():
+    """
+    创建测试数据库连接，sqlite下注册与mysql行为一致的find_in_set函数
+    """
+    engine = create_engine(DB_URL)
+    if engine.dialect.name == 'sqlite':
+
+        @event.listens_for(engine, 'connect')
+        def register_find_in_set(dbapi_connection, connection_record):
+            dbapi_connection.create_function(
+                'find_in_set',
+                2,
+                lambda value, value_list: (
+                    value_list.split(',').index(str(value)) + 1
+                    if value_list and str(value) in value_list.split(',')
+                    else 0
+                ),
+                deterministic=True,
+            )
+
+    return engine
+
+
+def generate_data(engine):
+    """
+    生成部门树、部门闭包表及用户数据
+    """
+    dept_list = []
+    ancestors_mapping = {0: '0'}
+    for dept_id in range(1, DEPT_COUNT + 1):
+        parent_id = (dept_id - 2) // BRANCH_FACTOR + 1 if dept_id > 1 else 0
+        ancestors = ancestors_mapping[parent_id] if parent_id == 0 else f'{ancestors_mapping[parent_id]},{parent_id}'
+        ancestors_mapping[dept_id] = ancestors
+        dept_list.append(dict(dept_id=dept_id, parent_id=parent_id, ancestors=ancestors, dept_name=f'部门{dept_id}'))
+    dept_closure_list = DeptService.generate_dept_closure_list(
+        [(dept['dept_id'], dept['parent_id']) for dept in dept_list]
+    )
+    random.seed(0)
+    with engine.begin() as conn:
+        for table in reversed(TABLE_LIST):
+            table.drop(conn, checkfirst=True)
+        for table in TABLE_LIST:
+            table.create(conn)
+        for index in range(0, len(dept_list), BATCH_SIZE):
+            conn.execute(insert(SysDept), dept_list[index : index + BATCH_SIZE])
+        for index in range(0, len(dept_closure_list), BATCH_SIZE):
+            conn.execute(insert(SysDeptClosure), dept_closure_list[index : index + BATCH_SIZE])
+        for index in range(0, USER_COUNT, BATCH_SIZE):
+            conn.execute(
+                insert(SysUser),
+                [
+                    dict(user_name=f'user{user_id}', nick_name=f'user{user_id}', dept_id=random.randint(1, DEPT_COUNT))
+                    for user_id in range(index, min(index + BATCH_SIZE, USER_COUNT))
+                ],
+            )
+    return len(dept_closure_list)
+
+
+def build_query_cases(dept_id: int):
+    """
+    构建原实现与闭包表实现的子树查询语句
+    """
+    return [
+        (
+            '子部门列表',
+            select(SysDept.dept_id).where(func.find_in_set(dept_id, SysDept.ancestors)),
+            select(SysDept.dept_id)
+            .join(SysDeptClosure, SysDeptClosure.descendant_id == SysDept.dept_id)
+            .where(SysDeptClosure.ancestor_id == dept_id, SysDeptClosure.depth > 0),
+        ),
+        (
+            '本部门及子部门id集合',
+            select(SysDept.dept_id).where(
+                or_(SysDept.dept_id == dept_id, func.find_in_set(dept_id, SysDept.ancestors))
+            ),
+            select(SysDeptClosure.descendant_id).where(SysDeptClosure.ancestor_id == dept_id),
+        ),
+        (
+            '按部门筛选用户数量',
+            select(func.count('*')).where(
+                or_(
+                    SysUser.dept_id == dept_id,
+                    SysUser.dept_id.in_(select(SysDept.dept_id).where(func.find_in_set(dept_id, SysDept.ancestors))),
+                )
+            ),
+            select(func.count('*')).where(
+                SysUser.dept_id.in_(select(SysDeptClosure.descendant_id).where(SysDeptClosure.ancestor_id == dept_id))
+            ),
+        ),
+    ]
+
+
+def measure(conn, query, number: int):
+    """
+    执行查询并返回平均耗时（毫秒）及结果
+    """
+    result = conn.execute(query).all()
+    start_time = time.perf_counter()
+    for _ in range(number):
+        conn.execute(query).all()
+    return (time.perf_counter() - start_time) / number * 1000, result
+
+
+def main(number: int = 5):
+    engine = create_benchmark_engine()
+    start_time = time.perf_counter()
+    closure_count = generate_data(engine)
+    print(
+        f'数据库：{engine.dialect.name}，部门数量：{DEPT_COUNT}，闭包关系数量：{closure_count}，用户数量：{USER_COUNT}，'
+        f'数据生成耗时：{time.perf_counter() - start_time:.1f}s'
+    )
+    # 分别选取第二层及第四层的部门作为查询对象
+    with engine.connect() as conn:
+        for dept_id in [2, 2 + BRANCH_FACTOR + BRANCH_FACTOR**2]:
+            for name, legacy_query, closure_query in build_query_cases(dept_id):
+                legacy_ms, legacy_result = measure(conn, legacy_query, number)
+                closure_ms, closure_result = measure(conn, closure_query, number)
+                assert sorted(legacy_result) == sorted(closure_result)
+                print(
+                    f'部门{dept_id} {name}：find_in_set {legacy_ms:.2f}ms，闭包表 {closure_ms:.2f}ms，'
+                    f'加速比 {legacy_ms / closure_ms:.1f}x，结果行数 {len(closure_result)}'
+                )
+
+
+if __name__ == '__main__':
+    main()
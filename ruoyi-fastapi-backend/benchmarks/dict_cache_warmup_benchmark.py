@@ -0,0 +1,193 @@
+"""
+数据字典缓存预热耗时基准测试：逐字典类型查询及写入与一次查询、管道写入并整体替换的对比
+
+在ruoyi-fastapi-backend目录下执行：python -m benchmarks.dict_cache_warmup_benchmark
+可通过环境变量调整数据规模、数据库及Redis：
+    BENCHMARK_DICT_TYPE_COUNT   字典类型数量，默认1000
+    BENCHMARK_DICT_DATA_COUNT   每个字典类型的字典数据数量，默认10
+    BENCHMARK_DB_URL            异步数据库连接地址，默认使用内存sqlite（需安装aiosqlite）；
+                                请勿指向业务数据库，测试会重建相关表
+    BENCHMARK_REDIS_URL         Redis连接地址，如redis://127.0.0.1:6379/15，默认使用fakeredis；
+                                请勿指向业务Redis，测试会替换sys_dict:*键
+"""
+
+import asyncio
+import json
+import os
+import time
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+from config.enums import RedisInitKeyConfig
+from module_admin.dao.dict_dao import DictDataDao, DictTypeDao
+from module_admin.entity.do.dict_do import SysDictData, SysDictType
+from module_admin.service.dict_service import DictDataService
+from utils.common_util import CamelCaseUtil
+
+DICT_TYPE_COUNT = int(os.environ.get('BENCHMARK_DICT_TYPE_COUNT', 1000))
+DICT_DATA_COUNT = int(os.environ.get('BENCHMARK_DICT_DATA_COUNT', 10))
+DB_URL = os.environ.get('BENCHMARK_DB_URL', 'sqlite+aiosqlite://')
+REDIS_URL = os.environ.get('BENCHMARK_REDIS_URL', '')
+TABLE_LIST = [SysDictType.__table__, SysDictData.__table__]
+BATCH_SIZE = 10000
+
+
+async def create_redis():
+    """
+    创建测试Redis连接
+    """
+    if REDIS_URL:
+        from redis import asyncio as aioredis
+
+        return aioredis.from_url(REDIS_URL, decode_responses=True)
+    import fakeredis
+
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+async def generate_data(engine):
+    """
+    生成字典类型及字典数据，每10个字典类型中有1个为停用状态
+    """
+    dict_data_list = [
+        dict(
+            dict_sort=data_index,
+            dict_label=f'标签{data_index}',
+            dict_value=str(data_index),
+            dict_type=f'benchmark_type_{type_index}',
+            status='0' if data_index % 5 else '1',
+        )
+        for type_index in range(DICT_TYPE_COUNT)
+        for data_index in range(DICT_DATA_COUNT)
+    ]
+    async with engine.begin() as conn:
+        for table in reversed(TABLE_LIST):
+            await conn.run_sync(table.drop, checkfirst=True)
+        for table in TABLE_LIST:
+            await conn.run_sync(table.create)
+        await conn.execute(
+            insert(SysDictType),
+            [
+                dict(
+                    dict_name=f'字典{index}',
+                    dict_type=f'benchmark_type_{index}',
+                    status='1' if index % 10 == 9 else '0',
+                )
+                for index in range(DICT_TYPE_COUNT)
+            ],
+        )
+        for index in range(0, len(dict_data_list), BATCH_SIZE):
+            await conn.execute(insert(SysDictData), dict_data_list[index : index + BATCH_SIZE])
+
+
+async def legacy_init_cache_sys_dict(query_db, redis):
+    """
+    原实现：删除全部字典缓存后逐字典类型查询字典数据并写入
+    """
+    keys = await redis.keys(f'{RedisInitKeyConfig.SYS_DICT.key}:*')
+    if keys:
+        await redis.delete(*keys)
+    dict_type_all = await DictTypeDao.get_all_dict_type(query_db)
+    for dict_type_obj in [item for item in dict_type_all if item.status == '0']:
+        dict_type = dict_type_obj.dict_type
+        dict_data_list = await DictDataDao.query_dict_data_list(query_db, dict_type)
+        dict_data = [CamelCaseUtil.transform_result(row) for row in dict_data_list if row]
+        await redis.set(
+            f'{RedisInitKeyConfig.SYS_DICT.key}:{dict_type}',
+            json.dumps(dict_data, ensure_ascii=False, default=str),
+        )
+
+
+async def snapshot(redis):
+    """
+    读取全部字典缓存
+    """
+    keys = [key async for key in redis.scan_iter(match=f'{RedisInitKeyConfig.SYS_DICT.key}:*', count=1000)]
+    values = await redis.mget(keys) if keys else []
+    return {key: json.loads(value) for key, value in zip(keys, values)}
+
+
+async def watch_reader(redis, stop_event: asyncio.Event):
+    """
+    预热期间持续读取字典缓存，记录读到空缓存的次数
+    """
+    read_count, miss_count = 0, 0
+    key = f'{RedisInitKeyConfig.SYS_DICT.key}:benchmark_type_0'
+    while not stop_event.is_set():
+        read_count += 1
+        if await redis.get(key) is None:
+            miss_count += 1
+        await asyncio.sleep(0)
+    return read_count, miss_count
+
+
+async def measure(engine, redis, warmup_func):
+    """
+    执行缓存预热并返回耗时（毫秒）、数据库查询次数及预热期间读到空缓存的次数
+    """
+    statement_count = 0
+
+    def count_statement(*args):
+        nonlocal statement_count
+        statement_count += 1
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', count_statement)
+    stop_event = asyncio.Event()
+    reader = asyncio.create_task(watch_reader(redis, stop_event))
+    await asyncio.sleep(0)
+    try:
+        async with engine.connect() as conn:
+            async with AsyncSession(bind=conn, autoflush=False) as session:
+                start_time = time.perf_counter()
+                await warmup_func(session, redis)
+                elapsed_ms = (time.perf_counter() - start_time) * 1000
+    finally:
+        stop_event.set()
+        event.remove(engine.sync_engine, 'before_cursor_execute', count_statement)
+    read_count, miss_count = await reader
+    return elapsed_ms, statement_count, read_count, miss_count
+
+
+async def main():
+    engine = (
+        create_async_engine(DB_URL, poolclass=StaticPool)
+        if DB_URL.startswith('sqlite')
+        else create_async_engine(DB_URL)
+    )
+    redis = await create_redis()
+    await generate_data(engine)
+    print(
+        f'数据库：{engine.dialect.name}，Redis：{REDIS_URL or "fakeredis"}，'
+        f'字典类型数量：{DICT_TYPE_COUNT}，每个字典类型的字典数据数量：{DICT_DATA_COUNT}'
+    )
+    try:
+        legacy_ms, legacy_statements, legacy_reads, legacy_misses = await measure(
+            engine, redis, legacy_init_cache_sys_dict
+        )
+        legacy_snapshot = await snapshot(redis)
+        # 预热时不存在失效通知订阅，进程内缓存不生效
+        swap_ms, swap_statements, swap_reads, swap_misses = await measure(
+            engine, redis, DictDataService.init_cache_sys_dict_services
+        )
+        swap_snapshot = await snapshot(redis)
+        assert legacy_snapshot == swap_snapshot
+        print(
+            f'原实现：{legacy_ms:.0f}ms，数据库查询{legacy_statements}次，'
+            f'预热期间读取{legacy_reads}次其中{legacy_misses}次读到空缓存'
+        )
+        print(
+            f'一次查询+管道整体替换：{swap_ms:.0f}ms，数据库查询{swap_statements}次，'
+            f'预热期间读取{swap_reads}次其中{swap_misses}次读到空缓存'
+        )
+        print(f'加速比 {legacy_ms / swap_ms:.1f}x，缓存键数量 {len(swap_snapshot)}，两种实现缓存内容一致')
+        if not REDIS_URL:
+            print('fakeredis在进程内执行命令，不包含网络往返耗时，请通过BENCHMARK_REDIS_URL指定本地Redis测试')
+    finally:
+        async for key in redis.scan_iter(match=f'{RedisInitKeyConfig.SYS_DICT.key}:*', count=1000):
+            await redis.delete(key)
+        await redis.aclose()
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
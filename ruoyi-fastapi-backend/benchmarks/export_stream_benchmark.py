@@ -0,0 +1,130 @@
+"""
+列表导出内存占用基准测试：一次性查询全部数据并通过pandas生成excel与服务端游标分批读取、流式生成xlsx/csv的对比
+
+在ruoyi-fastapi-backend目录下执行：python -m benchmarks.export_stream_benchmark
+可通过环境变量调整数据规模及数据库：
+    BENCHMARK_EXPORT_ROW_COUNT  登录日志数量，默认20000
+    BENCHMARK_DB_URL            异步数据库连接地址，默认使用内存sqlite（需安装aiosqlite）；
+                                请勿指向业务数据库，测试会重建登录日志表
+内存占用为tracemalloc统计的python内存分配峰值，开启统计会使耗时偏长，仅用于对比
+"""
+
+import asyncio
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+from module_admin.entity.do.log_do import SysLogininfor
+from module_admin.entity.vo.log_vo import LoginLogPageQueryModel
+from module_admin.service.log_service import LoginLogService
+from utils.excel_util import ExcelUtil
+
+ROW_COUNT = int(os.environ.get('BENCHMARK_EXPORT_ROW_COUNT', 20000))
+DB_URL = os.environ.get('BENCHMARK_DB_URL', 'sqlite+aiosqlite://')
+BATCH_SIZE = 10000
+
+
+async def generate_data(engine):
+    """
+    生成登录日志数据
+    """
+    login_time = datetime(2024, 1, 1)
+    async with engine.begin() as conn:
+        await conn.run_sync(SysLogininfor.__table__.drop, checkfirst=True)
+        await conn.run_sync(SysLogininfor.__table__.create)
+        for start in range(0, ROW_COUNT, BATCH_SIZE):
+            await conn.execute(
+                insert(SysLogininfor),
+                [
+                    dict(
+                        user_name=f'user{index % 1000}',
+                        ipaddr=f'192.168.{index // 256 % 256}.{index % 256}',
+                        login_location='内网IP',
+                        browser='Chrome 120',
+                        os='Windows 10',
+                        status='0' if index % 7 else '1',
+                        msg='登录成功' if index % 7 else '密码错误',
+                        login_time=login_time + timedelta(seconds=index),
+                    )
+                    for index in range(start, min(start + BATCH_SIZE, ROW_COUNT))
+                ],
+            )
+
+
+async def legacy_export(session: AsyncSession):
+    """
+    原实现：一次性查询全部数据，转换后通过pandas生成完整的excel二进制数据
+    """
+    login_log_list = await LoginLogService.get_login_log_list_services(
+        session, LoginLogPageQueryModel(**dict()), is_page=False
+    )
+    mapping_dict = {
+        'infoId': '访问编号',
+        'userName': '用户名称',
+        'ipaddr': '登录地址',
+        'loginLocation': '登录地点',
+        'browser': '浏览器',
+        'os': '操作系统',
+        'status': '登录状态',
+        'msg': '操作信息',
+        'loginTime': '登录日期',
+    }
+    for item in login_log_list:
+        item['status'] = '成功' if item.get('status') == '0' else '失败'
+    return len(ExcelUtil.export_list2excel(login_log_list, mapping_dict))
+
+
+async def stream_export(session: AsyncSession, export_format: str):
+    """
+    流式实现：服务端游标分批读取，逐批写入文件并分块返回
+    """
+    login_log_chunks = await LoginLogService.get_login_log_list_services(
+        session, LoginLogPageQueryModel(**dict()), is_page=False, is_stream=True
+    )
+    size = 0
+    async for content in await LoginLogService.export_login_log_list_services(login_log_chunks, export_format):
+        size += len(content)
+    return size
+
+
+async def measure(engine, export_func, *args):
+    """
+    执行导出并返回耗时（毫秒）、内存分配峰值（MB）及文件大小（MB）
+    """
+    async with AsyncSession(bind=engine, autoflush=False) as session:
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        size = await export_func(session, *args)
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed_ms, peak / 1024 / 1024, size / 1024 / 1024
+
+
+async def main():
+    engine = (
+        create_async_engine(DB_URL, poolclass=StaticPool)
+        if DB_URL.startswith('sqlite')
+        else create_async_engine(DB_URL)
+    )
+    await generate_data(engine)
+    print(f'数据库：{engine.dialect.name}，登录日志数量：{ROW_COUNT}')
+    try:
+        for name, export_func, args in [
+            ('原实现（全量查询+pandas生成xlsx）', legacy_export, ()),
+            ('流式生成xlsx', stream_export, ('xlsx',)),
+            ('流式生成csv', stream_export, ('csv',)),
+        ]:
+            elapsed_ms, peak_mb, size_mb = await measure(engine, export_func, *args)
+            print(f'{name}：耗时{elapsed_ms:.0f}ms，内存分配峰值{peak_mb:.1f}MB，文件大小{size_mb:.1f}MB')
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(SysLogininfor.__table__.drop, checkfirst=True)
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,151 @@
+"""
+文件下载基准测试：按换行符迭代二进制文件并以StreamingResponse返回的原实现与按固定大小分块读取、支持Range及If-None-Match的文件响应实现对比
+
+在ruoyi-fastapi-backend目录下执行：python -m benchmarks.file_download_benchmark
+可通过环境变量调整测试规模：
+    BENCHMARK_DOWNLOAD_FILE_MB         测试文件大小（MB），默认50
+    BENCHMARK_DOWNLOAD_REQUEST_COUNT   每种方式的下载次数，默认5
+测试文件为随机二进制数据（模拟视频等媒体文件），计时前先校验两种实现下载的内容一致，并校验断点续传及协商缓存
+"""
+
+import asyncio
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from utils.response_util import ResponseUtil
+
+FILE_MB = int(os.environ.get('BENCHMARK_DOWNLOAD_FILE_MB', 50))
+REQUEST_COUNT = int(os.environ.get('BENCHMARK_DOWNLOAD_REQUEST_COUNT', 5))
+FILE_NAME = 'carousel.mp4'
+
+
+def legacy_generate_file(filepath: str):
+    """
+    原实现：以二进制模式打开文件后按换行符迭代
+    """
+    with open(filepath, 'rb') as response_file:
+        yield from response_file
+
+
+def create_app(filepath: str):
+    """
+    创建测试应用
+    """
+    app = FastAPI()
+
+    @app.get('/legacy')
+    async def legacy_download():
+        return StreamingResponse(content=legacy_generate_file(filepath))
+
+    @app.get('/file')
+    async def file_download(request: Request):
+        return ResponseUtil.file(path=filepath, request=request, filename=FILE_NAME)
+
+    return app
+
+
+async def download(app: FastAPI, url: str, headers: dict = None):
+    """
+    直接以ASGI接口请求下载，返回状态码、响应头、内容及每个响应体分块的字节数
+    """
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': url,
+        'raw_path': url.encode(),
+        'root_path': '',
+        'query_string': b'',
+        'headers': [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()],
+        'client': ('127.0.0.1', 10000),
+        'server': ('test', 80),
+    }
+    request_sent = False
+    response_start = {}
+    chunk_list = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response_start.update(message)
+        elif message['type'] == 'http.response.body' and message.get('body'):
+            chunk_list.append(message['body'])
+
+    await app(scope, receive, send)
+    response_headers = {key.decode(): value.decode() for key, value in response_start['headers']}
+
+    return response_start['status'], response_headers, b''.join(chunk_list), [len(chunk) for chunk in chunk_list]
+
+
+async def check_file_response(app: FastAPI, expected: bytes):
+    """
+    校验响应头、断点续传及协商缓存
+    """
+    _, headers, content, _ = await download(app, '/file')
+    assert content == expected, '下载内容不一致'
+    assert int(headers['content-length']) == len(expected), 'Content-Length不正确'
+    assert headers['content-type'] == 'video/mp4', 'Content-Type不正确'
+    assert headers['accept-ranges'] == 'bytes', '未声明支持Range'
+    etag = headers['etag']
+    # 模拟下载中断后从中断位置续传
+    offset = len(expected) // 3
+    status_code, headers, content, _ = await download(app, '/file', {'Range': f'bytes={offset}-', 'If-Range': etag})
+    assert status_code == 206, '续传未返回206'
+    assert headers['content-range'] == f'bytes {offset}-{len(expected) - 1}/{len(expected)}'
+    assert expected[:offset] + content == expected, '续传内容不一致'
+    status_code, _, content, _ = await download(app, '/file', {'Range': 'bytes=0-99', 'If-Range': '"changed"'})
+    assert status_code == 200 and content == expected, 'If-Range不匹配时未返回完整文件'
+    status_code, headers, content, _ = await download(app, '/file', {'If-None-Match': f'"other", W/{etag}'})
+    assert status_code == 304 and not content and headers['etag'] == etag, '协商缓存未返回304'
+
+
+async def measure(app: FastAPI, url: str):
+    """
+    执行多次下载，返回平均耗时、分块数量及最小、最大分块字节数
+    """
+    elapsed_list = []
+    chunk_size_list = []
+    for _ in range(REQUEST_COUNT):
+        start_time = time.perf_counter()
+        _, _, _, chunk_size_list = await download(app, url)
+        elapsed_list.append((time.perf_counter() - start_time) * 1000)
+
+    return statistics.mean(elapsed_list), chunk_size_list
+
+
+async def main():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        filepath = os.path.join(temp_dir, FILE_NAME)
+        expected = os.urandom(FILE_MB * 1024 * 1024)
+        with open(filepath, 'wb') as f:
+            f.write(expected)
+        app = create_app(filepath)
+        _, _, legacy_content, _ = await download(app, '/legacy')
+        assert legacy_content == expected, '原实现下载内容不一致'
+        await check_file_response(app, expected)
+        print(f'测试文件：{FILE_MB}MB随机二进制数据，断点续传及协商缓存校验通过')
+        for label, url in [('原实现', '/legacy'), ('文件响应', '/file')]:
+            elapsed_ms, chunk_size_list = await measure(app, url)
+            print(
+                f'    {label}：平均每次{elapsed_ms:.1f}ms（{FILE_MB / elapsed_ms * 1000:.0f}MB/s），'
+                f'分块{len(chunk_size_list)}个，最小{min(chunk_size_list)}字节，最大{max(chunk_size_list)}字节'
+            )
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
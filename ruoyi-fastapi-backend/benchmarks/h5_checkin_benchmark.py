@@ -0,0 +1,135 @@
+"""
+H5用户签到原子性验证及Redis位图签到吞吐基准测试
+
+在ruoyi-fastapi-backend目录下执行：python -m benchmarks.h5_checkin_benchmark
+可通过环境变量调整测试参数：
+    BENCHMARK_REDIS_URL      Redis连接地址，如redis://127.0.0.1:6379/15，默认使用fakeredis（需安装fakeredis[lua]）；
+                             请勿指向业务Redis，测试会写入h5:user:checkin:*键
+    BENCHMARK_USER_COUNT     吞吐测试的用户数量，默认10000
+    BENCHMARK_CONCURRENCY    同一用户并发签到的请求数量，默认100
+"""
+
+import asyncio
+import os
+import time
+from datetime import date, timedelta
+from module_h5.service.checkin_service import H5CheckinService
+
+REDIS_URL = os.environ.get('BENCHMARK_REDIS_URL', '')
+USER_COUNT = int(os.environ.get('BENCHMARK_USER_COUNT', 10000))
+CONCURRENCY = int(os.environ.get('BENCHMARK_CONCURRENCY', 100))
+# 测试使用的用户id起始值，避免与真实用户重叠
+BASE_USER_ID = 900000000
+LEGACY_CHECKIN_KEY = 'h5:user:checkin:'
+
+
+async def create_redis():
+    """
+    创建测试Redis连接
+    """
+    if REDIS_URL:
+        from redis import asyncio as aioredis
+
+        return aioredis.from_url(REDIS_URL, decode_responses=True)
+    import fakeredis
+
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+async def clear_keys(redis):
+    """
+    删除测试写入的键
+    """
+    async for key in redis.scan_iter(match='h5:user:checkin:*', count=1000):
+        await redis.delete(key)
+
+
+async def legacy_checkin(redis, user_id: int, checkin_date: date):
+    """
+    原实现：先判断当天签到键是否存在，再写入签到键
+    """
+    redis_key = f'{LEGACY_CHECKIN_KEY}{user_id}:{checkin_date}'
+    if await redis.exists(redis_key):
+        return False
+    # 模拟判断与写入之间的数据库读写
+    await asyncio.sleep(0)
+    await redis.set(redis_key, '1', ex=86400)
+    return True
+
+
+async def verify_concurrent_checkin(redis):
+    """
+    同一用户并发签到，验证只有一次签到成功
+    """
+    today = date.today()
+    legacy_results = await asyncio.gather(*[legacy_checkin(redis, BASE_USER_ID, today) for _ in range(CONCURRENCY)])
+    results = await asyncio.gather(
+        *[H5CheckinService.claim_checkin(redis, BASE_USER_ID, today, {}) for _ in range(CONCURRENCY)]
+    )
+    claimed_count = len([result for result in results if result])
+    assert claimed_count == 1
+    print(f'同一用户{CONCURRENCY}次并发签到：原实现成功{sum(legacy_results)}次，Lua脚本成功{claimed_count}次')
+
+
+async def verify_streak(redis):
+    """
+    验证连续签到天数在中断后重新计算，经验值及累计天数持续累加
+    """
+    user_id = BASE_USER_ID + 1
+    start_date = date.today() - timedelta(days=20)
+    seed = dict(checkin_days=5, continuous_checkin_days=2, exp_points=50)
+    seed['last_checkin_offset'] = H5CheckinService.date_to_offset(start_date - timedelta(days=1))
+    result = None
+    for day in list(range(0, 10)) + list(range(12, 15)):
+        result = await H5CheckinService.claim_checkin(redis, user_id, start_date + timedelta(days=day), seed)
+        if day == 9:
+            assert result['continuous_checkin_days'] == 12
+    assert result == dict(checkin_days=18, continuous_checkin_days=3, total_exp=180)
+    print(f'连续签到验证通过：{result}')
+
+
+async def measure_throughput(redis):
+    """
+    多用户签到吞吐
+    """
+    today = date.today()
+    start_time = time.perf_counter()
+    for index in range(0, USER_COUNT, CONCURRENCY):
+        await asyncio.gather(
+            *[
+                legacy_checkin(redis, BASE_USER_ID + 10 + user_index, today)
+                for user_index in range(index, min(index + CONCURRENCY, USER_COUNT))
+            ]
+        )
+    legacy_seconds = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    for index in range(0, USER_COUNT, CONCURRENCY):
+        await asyncio.gather(
+            *[
+                H5CheckinService.claim_checkin(redis, BASE_USER_ID + 10 + user_index, today, {})
+                for user_index in range(index, min(index + CONCURRENCY, USER_COUNT))
+            ]
+        )
+    seconds = time.perf_counter() - start_time
+    print(
+        f'{USER_COUNT}个用户签到：原实现 {USER_COUNT / legacy_seconds:.0f}次/s，Lua脚本 {USER_COUNT / seconds:.0f}次/s'
+    )
+    if not REDIS_URL:
+        print('fakeredis在进程内模拟Lua脚本执行，吞吐数据仅供参考，请通过BENCHMARK_REDIS_URL指定本地Redis测试')
+
+
+async def main():
+    redis = await create_redis()
+    print(f'Redis：{REDIS_URL or "fakeredis"}')
+    await clear_keys(redis)
+    try:
+        await verify_concurrent_checkin(redis)
+        await verify_streak(redis)
+        await measure_throughput(redis)
+    finally:
+        await clear_keys(redis)
+        await redis.aclose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+"""
+H5用户字符串ID查找的全表扫描与唯一索引查询耗时基准测试
+
+在ruoyi-fastapi-backend目录下执行：python -m benchmarks.h5_user_string_id_benchmark
+可通过环境变量调整数据规模及数据库：
+    BENCHMARK_USER_COUNTS  用户数量列表，以逗号分隔，默认100000,1000000
+    BENCHMARK_DB_URL       同步数据库连接地址，默认使用内存sqlite；请勿指向业务数据库，测试会重建h5_user表
+"""
+
+import os
+import random
+import string
+import time
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.orm import Session
+from module_h5.entity.do.user_do import H5User
+from module_h5.service.user_service import H5UserService
+
+USER_COUNTS = [int(count) for count in os.environ.get('BENCHMARK_USER_COUNTS', '100000,1000000').split(',')]
+DB_URL = os.environ.get('BENCHMARK_DB_URL', 'sqlite://')
+BATCH_SIZE = 10000
+LOOKUP_NUMBER = 1000
+
+
+def legacy_generate_string_id_from_int(user_id: int) -> str:
+    """
+    原实现：重置全局random模块的种子后生成字符串ID
+    """
+    random.seed(user_id)
+    string_id = ''.join(random.choices(string.ascii_letters + string.digits, k=30))
+    random.seed()
+    return string_id
+
+
+def legacy_find_user_by_string_id(session: Session, string_id: str):
+    """
+    原实现：查询全部用户并在内存中逐个生成字符串ID进行匹配
+    """
+    for user in session.execute(select(H5User)).scalars().all():
+        if legacy_generate_string_id_from_int(user.user_id) == string_id:
+            return user
+    return None
+
+
+def indexed_find_user_by_string_id(session: Session, string_id: str):
+    """
+    新实现：通过string_id唯一索引查询
+    """
+    return session.execute(select(H5User).where(H5User.string_id == string_id)).scalars().first()
+
+
+def generate_data(engine, user_count: int):
+    """
+    生成未回填字符串ID的用户数据，返回分批回填字符串ID的耗时（秒）
+    """
+    with engine.begin() as conn:
+        H5User.__table__.drop(conn, checkfirst=True)
+        H5User.__table__.create(conn)
+        for index in range(0, user_count, BATCH_SIZE):
+            conn.execute(
+                insert(H5User),
+                [
+                    dict(user_id=user_id, username=f'user{user_id}', nickname=f'user{user_id}', password='')
+                    for user_id in range(index + 1, min(index + BATCH_SIZE, user_count) + 1)
+                ],
+            )
+    start_time = time.perf_counter()
+    # 与H5UserService.backfill_string_id相同，按主键批量更新
+    with Session(engine) as session:
+        for index in range(0, user_count, BATCH_SIZE):
+            session.execute(
+                update(H5User),
+                [
+                    dict(user_id=user_id, string_id=H5UserService.generate_string_id_from_int(user_id))
+                    for user_id in range(index + 1, min(index + BATCH_SIZE, user_count) + 1)
+                ],
+            )
+            session.commit()
+    return time.perf_counter() - start_time
+
+
+def main():
+    engine = create_engine(DB_URL)
+    print(f'数据库：{engine.dialect.name}')
+    random.seed(0)
+    for user_count in USER_COUNTS:
+        backfill_seconds = generate_data(engine, user_count)
+        target_user_ids = [random.randint(1, user_count) for _ in range(LOOKUP_NUMBER)]
+        with Session(engine) as session:
+            # 原实现每次查找均为全表扫描，只取一次最坏情况（目标为最后一个用户）计时
+            string_id = H5UserService.generate_string_id_from_int(user_count)
+            start_time = time.perf_counter()
+            assert legacy_find_user_by_string_id(session, string_id).user_id == user_count
+            legacy_ms = (time.perf_counter() - start_time) * 1000
+            session.expunge_all()
+            start_time = time.perf_counter()
+            for user_id in target_user_ids:
+                user = indexed_find_user_by_string_id(session, H5UserService.generate_string_id_from_int(user_id))
+                assert user.user_id == user_id
+            indexed_ms = (time.perf_counter() - start_time) / LOOKUP_NUMBER * 1000
+        print(
+            f'用户数量：{user_count}，回填字符串ID耗时：{backfill_seconds:.1f}s，'
+            f'全表扫描查找：{legacy_ms:.1f}ms，唯一索引查找：{indexed_ms:.3f}ms，加速比 {legacy_ms / indexed_ms:.0f}x'
+        )
+
+
+if __name__ == '__main__':
+    main()
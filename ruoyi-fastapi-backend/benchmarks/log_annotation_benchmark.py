@@ -0,0 +1,134 @@
+"""
+日志装饰器单次调用元数据解析耗时基准测试
+
+在ruoyi-fastapi-backend目录下执行：python -m benchmarks.log_annotation_benchmark
+"""
+
+import importlib
+import inspect
+import os
+import pkgutil
+import timeit
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Callable
+from module_admin.annotation.log_annotation import get_operator_type
+
+USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36'
+)
+CONTROLLER_PACKAGES = ['module_admin.controller', 'module_generator.controller', 'module_h5.controller']
+
+
+def collect_log_endpoints():
+    """
+    收集所有被日志装饰器装饰的接口函数
+
+    :return: 被装饰的接口函数列表
+    """
+    endpoint_list = []
+    for package_name in CONTROLLER_PACKAGES:
+        package = importlib.import_module(package_name)
+        for module_info in pkgutil.iter_modules(package.__path__):
+            try:
+                module = importlib.import_module(f'{package_name}.{module_info.name}')
+            except Exception as e:
+                print(f'跳过{package_name}.{module_info.name}：{e}')
+                continue
+            for _, obj in inspect.getmembers(module, inspect.iscoroutinefunction):
+                if hasattr(obj, 'request_accessor') and obj not in endpoint_list:
+                    endpoint_list.append(obj)
+    return endpoint_list
+
+
+def legacy_get_function_parameters_name_by_type(func: Callable, param_type: Any):
+    """
+    原实现：每次调用时通过函数签名获取函数指定类型的参数名称
+
+    :param func: 函数
+    :param arg_type: 参数类型
+    :return: 函数指定类型的参数名称
+    """
+    # 获取函数的参数信息
+    parameters = inspect.signature(func).parameters
+    # 找到指定类型的参数名称
+    parameters_name_list = []
+    for name, param in parameters.items():
+        if param.annotation == param_type:
+            parameters_name_list.append(name)
+    return parameters_name_list
+
+
+def legacy_get_function_parameters_value_by_name(func: Callable, name: str, *args, **kwargs):
+    """
+    原实现：每次调用时绑定函数签名获取函数指定参数的值
+
+    :param func: 函数
+    :param name: 参数名
+    :return: 参数值
+    """
+    # 获取参数值
+    bound_parameters = inspect.signature(func).bind(*args, **kwargs)
+    bound_parameters.apply_defaults()
+    parameters_value = bound_parameters.arguments.get(name)
+
+    return parameters_value
+
+
+def legacy_resolve(func, kwargs):
+    """
+    原实现中每次调用的元数据解析逻辑
+    """
+    file_path = inspect.getfile(func)
+    relative_path = os.path.relpath(file_path, start=os.getcwd())[0:-2].replace('\\', '.').replace('/', '.')
+    func_path = f'{relative_path}{func.__name__}()'
+    request_name_list = legacy_get_function_parameters_name_by_type(func, Request)
+    request = legacy_get_function_parameters_value_by_name(func, request_name_list[0], **kwargs)
+    # 不使用数据库会话的接口（如改为后台任务导入的批量导入用户接口）没有AsyncSession类型的参数
+    session_name_list = legacy_get_function_parameters_name_by_type(func, AsyncSession)
+    query_db = (
+        legacy_get_function_parameters_value_by_name(func, session_name_list[0], **kwargs)
+        if session_name_list
+        else None
+    )
+    operator_type = 0
+    if 'Windows' in USER_AGENT or 'Macintosh' in USER_AGENT or 'Linux' in USER_AGENT:
+        operator_type = 1
+    if 'Mobile' in USER_AGENT or 'Android' in USER_AGENT or 'iPhone' in USER_AGENT:
+        operator_type = 2
+    return func_path, request, query_db, operator_type
+
+
+def compiled_resolve(wrapper, kwargs):
+    """
+    预编译后每次调用的元数据解析逻辑
+    """
+    request = wrapper.request_accessor.get_value(**kwargs)
+    query_db = wrapper.session_accessor.get_value(**kwargs)
+    return wrapper.func_path, request, query_db, get_operator_type(USER_AGENT)
+
+
+def main(number: int = 2000):
+    endpoint_list = collect_log_endpoints()
+    case_list = []
+    for wrapper in endpoint_list:
+        func = inspect.unwrap(wrapper)
+        kwargs = {name: object() for name in inspect.signature(func).parameters}
+        case_list.append((wrapper, func, kwargs))
+        assert legacy_resolve(func, kwargs) == compiled_resolve(wrapper, kwargs)
+
+    legacy_seconds = timeit.timeit(
+        lambda: [legacy_resolve(func, kwargs) for _, func, kwargs in case_list], number=number
+    )
+    compiled_seconds = timeit.timeit(
+        lambda: [compiled_resolve(wrapper, kwargs) for wrapper, _, kwargs in case_list], number=number
+    )
+    call_count = number * len(case_list)
+    print(f'接口数量：{len(case_list)}，每个接口调用次数：{number}')
+    print(f'原实现单次调用耗时：{legacy_seconds / call_count * 1e6:.2f}us')
+    print(f'预编译单次调用耗时：{compiled_seconds / call_count * 1e6:.2f}us')
+    print(f'加速比：{legacy_seconds / compiled_seconds:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
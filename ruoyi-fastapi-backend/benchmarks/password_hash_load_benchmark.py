@@ -0,0 +1,114 @@
+"""
+密码校验压力测试：登录高峰期间其他接口的响应耗时，对比在事件循环中直接校验密码与在密码计算线程池中校验密码
+
+在ruoyi-fastapi-backend目录下执行：python -m benchmarks.password_hash_load_benchmark
+可通过环境变量调整测试规模：
+    BENCHMARK_LOGIN_COUNT       登录请求总数，默认32
+    BENCHMARK_LOGIN_CONCURRENCY 同时发起的登录请求数，默认16
+    BENCHMARK_PING_INTERVAL     登录期间请求其他接口的间隔（秒），默认0.005
+密码加密强度及线程池大小读取APP_PASSWORD_BCRYPT_ROUNDS、APP_PASSWORD_HASH_WORKERS等应用配置
+"""
+
+import asyncio
+import os
+import time
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from config.env import AppConfig
+from utils.pwd_util import PwdUtil
+
+LOGIN_COUNT = int(os.environ.get('BENCHMARK_LOGIN_COUNT', 32))
+LOGIN_CONCURRENCY = int(os.environ.get('BENCHMARK_LOGIN_CONCURRENCY', 16))
+PING_INTERVAL = float(os.environ.get('BENCHMARK_PING_INTERVAL', 0.005))
+PASSWORD = 'admin123'
+
+
+def create_app(hashed_password: str):
+    """
+    创建测试应用，包含与密码无关的接口及两种实现的登录接口
+    """
+    app = FastAPI()
+
+    @app.get('/ping')
+    async def ping():
+        return dict(code=200)
+
+    @app.post('/login/legacy')
+    async def login_legacy():
+        return dict(code=200 if PwdUtil.verify_password(PASSWORD, hashed_password) else 500)
+
+    @app.post('/login/pool')
+    async def login_pool():
+        return dict(code=200 if await PwdUtil.async_verify_password(PASSWORD, hashed_password) else 500)
+
+    return app
+
+
+def percentile(values, percent: float):
+    """
+    计算百分位数
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent))]
+
+
+async def measure(client: AsyncClient, login_path: str):
+    """
+    并发发起登录请求，同时按固定间隔请求/ping，返回/ping按计划发起时间计算的耗时列表（毫秒）及登录总耗时（毫秒）
+    """
+    ping_latencies = []
+    semaphore = asyncio.Semaphore(LOGIN_CONCURRENCY)
+    stop_event = asyncio.Event()
+
+    async def login():
+        async with semaphore:
+            response = await client.post(login_path)
+            assert response.json().get('code') == 200
+
+    async def ping():
+        scheduled_time = time.perf_counter()
+        while True:
+            await asyncio.sleep(max(0.0, scheduled_time - time.perf_counter()))
+            send_time = time.perf_counter()
+            await client.get('/ping')
+            done_time = time.perf_counter()
+            # 事件循环被阻塞期间未能按计划发起的请求，耗时从计划发起时间开始计算
+            while scheduled_time <= send_time:
+                ping_latencies.append((done_time - scheduled_time) * 1000)
+                scheduled_time += PING_INTERVAL
+            if stop_event.is_set():
+                break
+
+    pinger = asyncio.create_task(ping())
+    await asyncio.sleep(0)
+    start_time = time.perf_counter()
+    await asyncio.gather(*[login() for _ in range(LOGIN_COUNT)])
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    stop_event.set()
+    await pinger
+    return ping_latencies, elapsed_ms
+
+
+async def main():
+    hashed_password = PwdUtil.get_password_hash(PASSWORD)
+    app = create_app(hashed_password)
+    print(
+        f'bcrypt加密强度：{AppConfig.app_password_bcrypt_rounds}，线程池线程数：{AppConfig.app_password_hash_workers}，'
+        f'登录请求总数：{LOGIN_COUNT}，同时登录数：{LOGIN_CONCURRENCY}'
+    )
+    await PwdUtil.init_pwd_executor()
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url='http://benchmark') as client:
+            for name, login_path in [('事件循环中直接校验', '/login/legacy'), ('密码计算线程池中校验', '/login/pool')]:
+                ping_latencies, elapsed_ms = await measure(client, login_path)
+                print(
+                    f'{name}：登录总耗时{elapsed_ms:.0f}ms，登录期间/ping计划请求{len(ping_latencies)}次，'
+                    f'p50 {percentile(ping_latencies, 0.5):.1f}ms，p99 {percentile(ping_latencies, 0.99):.1f}ms，'
+                    f'最大 {max(ping_latencies):.1f}ms'
+                )
+    finally:
+        await PwdUtil.close_pwd_executor()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+"""
+响应序列化基准测试：jsonable_encoder转换后由JSONResponse序列化的原实现与orjson直接序列化的实现对比
+
+在ruoyi-fastapi-backend目录下执行：python -m benchmarks.response_encode_benchmark
+可通过环境变量调整测试规模：
+    BENCHMARK_RESPONSE_ROW_COUNTS   逗号分隔的列表行数，默认1000,10000
+    BENCHMARK_RESPONSE_ROUNDS       每种方式的重复次数，取中位数，默认5
+分别测试字典行（如操作日志、登录日志、字典数据列表）及pydantic模型行（如用户列表）两类负载，计时前先比对两种实现的响应内容一致
+"""
+
+import os
+import re
+import statistics
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from module_admin.entity.vo.dept_vo import DeptModel
+from module_admin.entity.vo.user_vo import UserInfoModel
+from utils.page_util import PageResponseModel
+from utils.response_util import ResponseUtil
+
+ROW_COUNTS = [int(count) for count in os.environ.get('BENCHMARK_RESPONSE_ROW_COUNTS', '1000,10000').split(',')]
+ROUNDS = int(os.environ.get('BENCHMARK_RESPONSE_ROUNDS', 5))
+TIME_PATTERN = re.compile(rb'"time":"[^"]*"')
+
+
+def generate_dict_rows(row_count: int):
+    """
+    生成字典行，模拟CamelCaseUtil转换后的操作日志
+    """
+    oper_time = datetime(2024, 1, 1, 8, 30, 0)
+    return [
+        {
+            'operId': index,
+            'title': '用户管理',
+            'businessType': index % 10,
+            'method': 'module_admin.controller.user_controller.get_system_user_list()',
+            'requestMethod': 'GET',
+            'operName': f'user{index % 100}',
+            'operUrl': '/system/user/list',
+            'operIp': f'192.168.{index // 256 % 256}.{index % 256}',
+            'operLocation': '内网IP',
+            'operParam': '{"pageNum": 1, "pageSize": 10}',
+            'jsonResult': '{"code": 200, "msg": "查询成功"}',
+            'status': '0',
+            'errorMsg': None,
+            'operTime': oper_time + timedelta(seconds=index, microseconds=index % 3 * 1000),
+            'costTime': index % 500,
+            'ratio': Decimal('0.25') * (index % 4),
+        }
+        for index in range(row_count)
+    ]
+
+
+def generate_model_rows(row_count: int):
+    """
+    生成pydantic模型行，模拟用户列表
+    """
+    create_time = datetime(2024, 1, 1, 8, 30, 0)
+    return [
+        UserInfoModel(
+            userId=index,
+            deptId=100 + index % 10,
+            userName=f'user{index}',
+            nickName=f'用户{index}',
+            email=f'user{index}@example.com',
+            phonenumber=f'138{index:08d}',
+            sex=str(index % 3),
+            status='0',
+            delFlag='0',
+            loginIp='127.0.0.1',
+            loginDate=create_time + timedelta(hours=index),
+            createBy='admin',
+            createTime=create_time,
+            updateTime=create_time + timedelta(minutes=index),
+            dept=DeptModel(deptId=100 + index % 10, deptName=f'部门{index % 10}', leader='若依'),
+        )
+        for index in range(row_count)
+    ]
+
+
+def build_response(payload_type: str, rows, fast_encode: bool):
+    """
+    按列表接口的方式生成响应
+    """
+    if payload_type == 'dict':
+        return ResponseUtil.success(data=rows, fast_encode=fast_encode)
+    return ResponseUtil.success(
+        model_content=PageResponseModel(rows=rows, pageNum=1, pageSize=len(rows), total=len(rows), hasNext=False),
+        fast_encode=fast_encode,
+    )
+
+
+def measure(payload_type: str, rows, fast_encode: bool):
+    """
+    返回多次生成响应耗时的中位数（毫秒）
+    """
+    elapsed_list = []
+    for _ in range(ROUNDS):
+        start_time = time.perf_counter()
+        build_response(payload_type, rows, fast_encode)
+        elapsed_list.append((time.perf_counter() - start_time) * 1000)
+    return statistics.median(elapsed_list)
+
+
+def main():
+    for row_count in ROW_COUNTS:
+        for payload_type, rows in [('dict', generate_dict_rows(row_count)), ('model', generate_model_rows(row_count))]:
+            legacy_body = build_response(payload_type, rows, False).body
+            fast_body = build_response(payload_type, rows, True).body
+            # 响应时间字段取值不同，比对时替换为相同的值
+            assert TIME_PATTERN.sub(b'"time":""', legacy_body) == TIME_PATTERN.sub(b'"time":""', fast_body), (
+                f'{payload_type}行{row_count}条响应内容不一致'
+            )
+            legacy_ms = measure(payload_type, rows, False)
+            fast_ms = measure(payload_type, rows, True)
+            print(
+                f'{"字典" if payload_type == "dict" else "pydantic模型"}行{row_count}条'
+                f'（{len(fast_body) / 1024:.0f}KB）：'
+                f'原实现{legacy_ms:.1f}ms，orjson直接序列化{fast_ms:.1f}ms，提升{legacy_ms / fast_ms:.1f}倍'
+            )
+
+
+if __name__ == '__main__':
+    main()
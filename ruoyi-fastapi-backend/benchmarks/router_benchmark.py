@@ -0,0 +1,284 @@
+"""
+获取路由信息基准测试：每次查询完整用户信息并逐层扫描全部菜单生成路由树的原实现与按角色集合缓存序列化路由的实现对比
+
+在ruoyi-fastapi-backend目录下执行：python -m benchmarks.router_benchmark
+可通过环境变量调整数据规模、数据库及Redis：
+    BENCHMARK_ROUTER_MENU_COUNT     目录及菜单数量，默认1000
+    BENCHMARK_ROUTER_REQUEST_COUNT  每种方式的请求次数，默认200
+    BENCHMARK_DB_URL                异步数据库连接地址，默认使用内存sqlite（需安装aiosqlite）；
+                                    请勿指向业务数据库，测试会重建用户、角色、菜单等表
+    BENCHMARK_REDIS_URL             Redis连接地址，如redis://127.0.0.1:6379/15，默认使用fakeredis；
+                                    请勿指向业务Redis，测试会写入并清理user_router相关键
+两种实现生成的路由信息会先比对一致后再计时
+"""
+
+import asyncio
+import json
+import os
+import time
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+from types import SimpleNamespace
+from typing import List
+from config.constant import MenuConstant
+from config.enums import RedisInitKeyConfig
+from module_admin.dao.user_dao import UserDao
+from module_admin.entity.do.dept_do import SysDept
+from module_admin.entity.do.menu_do import SysMenu
+from module_admin.entity.do.post_do import SysPost
+from module_admin.entity.do.role_do import SysRole, SysRoleMenu
+from module_admin.entity.do.user_do import SysUser, SysUserPost, SysUserRole
+from module_admin.entity.vo.login_vo import MenuTreeModel, MetaModel, RouterModel
+from module_admin.entity.vo.user_vo import CurrentUserModel
+from module_admin.service.login_service import LoginService, RouterUtil
+from utils.common_util import CamelCaseUtil
+from utils.local_cache_util import LocalCacheUtil
+from utils.response_util import ResponseUtil
+
+MENU_COUNT = int(os.environ.get('BENCHMARK_ROUTER_MENU_COUNT', 1000))
+REQUEST_COUNT = int(os.environ.get('BENCHMARK_ROUTER_REQUEST_COUNT', 200))
+DB_URL = os.environ.get('BENCHMARK_DB_URL', 'sqlite+aiosqlite://')
+REDIS_URL = os.environ.get('BENCHMARK_REDIS_URL', '')
+ROLE_ID = 2
+USER_ID = 2
+TABLE_LIST = [
+    SysDept.__table__,
+    SysUser.__table__,
+    SysRole.__table__,
+    SysUserRole.__table__,
+    SysPost.__table__,
+    SysUserPost.__table__,
+    SysMenu.__table__,
+    SysRoleMenu.__table__,
+]
+
+
+async def create_redis():
+    """
+    创建测试Redis连接
+    """
+    if REDIS_URL:
+        from redis import asyncio as aioredis
+
+        return aioredis.from_url(REDIS_URL, decode_responses=True)
+    import fakeredis
+
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+async def reset_data(engine):
+    """
+    重建表并生成两级目录、菜单及按钮，普通角色拥有除每7个菜单中的1个以外的全部菜单
+    """
+    top_count = max(MENU_COUNT // 50, 1)
+    dir_count = max(MENU_COUNT // 10, 1)
+    menu_list = []
+    for index in range(MENU_COUNT):
+        menu_id = index + 1
+        if index < top_count:
+            parent_id, menu_type, path = 0, MenuConstant.TYPE_DIR, f'top{index}'
+        elif index < top_count + dir_count:
+            parent_id, menu_type, path = index % top_count + 1, MenuConstant.TYPE_DIR, f'dir{index}'
+        else:
+            parent_id, menu_type, path = top_count + index % dir_count + 1, MenuConstant.TYPE_MENU, f'menu{index}'
+        menu_list.append(
+            dict(
+                menu_id=menu_id,
+                menu_name=f'菜单{index}',
+                parent_id=parent_id,
+                order_num=(index * 7919) % MENU_COUNT,
+                path=path,
+                component=f'system/menu{index}/index' if menu_type == MenuConstant.TYPE_MENU else None,
+                route_name='',
+                is_frame=MenuConstant.NO_FRAME,
+                is_cache=index % 2,
+                menu_type=menu_type,
+                visible='0',
+                status='0',
+                perms=f'system:menu{index}:list',
+                icon='system',
+            )
+        )
+    button_list = [
+        dict(
+            menu_id=MENU_COUNT + index + 1,
+            menu_name=f'按钮{index}',
+            parent_id=top_count + dir_count + index + 1,
+            order_num=1,
+            path='',
+            is_frame=MenuConstant.NO_FRAME,
+            menu_type=MenuConstant.TYPE_BUTTON,
+            visible='0',
+            status='0',
+            perms=f'system:menu{index}:edit',
+        )
+        for index in range(MENU_COUNT - top_count - dir_count)
+    ]
+    async with engine.begin() as conn:
+        for table in TABLE_LIST:
+            await conn.run_sync(table.drop, checkfirst=True)
+            await conn.run_sync(table.create)
+        await conn.execute(insert(SysDept), [dict(dept_id=100, parent_id=0, ancestors='0', dept_name='部门')])
+        await conn.execute(
+            insert(SysUser),
+            [
+                dict(user_id=1, user_name='admin', nick_name='超级管理员', dept_id=100),
+                dict(user_id=USER_ID, user_name='user', nick_name='普通用户', dept_id=100),
+            ],
+        )
+        await conn.execute(
+            insert(SysRole),
+            [
+                dict(role_id=1, role_name='超级管理员', role_key='admin', role_sort=1, status='0'),
+                dict(role_id=ROLE_ID, role_name='普通角色', role_key='common', role_sort=2, status='0'),
+            ],
+        )
+        await conn.execute(insert(SysUserRole), [dict(user_id=1, role_id=1), dict(user_id=USER_ID, role_id=ROLE_ID)])
+        await conn.execute(insert(SysMenu), menu_list)
+        await conn.execute(insert(SysMenu), button_list)
+        await conn.execute(
+            insert(SysRoleMenu),
+            [
+                dict(role_id=ROLE_ID, menu_id=menu['menu_id'])
+                for menu in menu_list + button_list
+                if menu['menu_id'] % 7 != 0 or menu['menu_id'] <= top_count
+            ],
+        )
+
+
+def legacy_generate_menus(pid: int, permission_list: List[SysMenu]):
+    """
+    原实现：每个节点扫描全部菜单查找子菜单，并逐个转换为菜单树模型
+    """
+    menu_list: List[MenuTreeModel] = []
+    for permission in permission_list:
+        if permission.parent_id == pid:
+            children = legacy_generate_menus(permission.menu_id, permission_list)
+            menu_list_data = MenuTreeModel(**CamelCaseUtil.transform_result(permission))
+            if children:
+                menu_list_data.children = children
+            menu_list.append(menu_list_data)
+
+    return menu_list
+
+
+def legacy_generate_user_router_menu(permission_list: List[MenuTreeModel]):
+    """
+    原实现：根据菜单树生成路由模型，基准测试数据中不包含外链及内链菜单，仅保留目录及菜单的处理逻辑
+    """
+    router_list: List[RouterModel] = []
+    for permission in permission_list:
+        router = RouterModel(
+            hidden=True if permission.visible == '1' else False,
+            name=RouterUtil.get_router_name(permission),
+            path=RouterUtil.get_router_path(permission),
+            component=RouterUtil.get_component(permission),
+            query=permission.query,
+            meta=MetaModel(
+                title=permission.menu_name,
+                icon=permission.icon,
+                noCache=True if permission.is_cache == 1 else False,
+                link=permission.path if RouterUtil.is_http(permission.path) else None,
+            ),
+        )
+        c_menus = permission.children
+        if c_menus and permission.menu_type == MenuConstant.TYPE_DIR:
+            router.always_show = True
+            router.redirect = 'noRedirect'
+            router.children = legacy_generate_user_router_menu(c_menus)
+        router_list.append(router)
+
+    return router_list
+
+
+async def legacy_get_routers(engine, redis, user_id: int, role_ids: str):
+    """
+    原实现：查询完整用户信息后生成路由树，通过ResponseUtil序列化响应
+    """
+    async with AsyncSession(bind=engine, autoflush=False) as session:
+        query_user = await UserDao.get_user_by_id(session, user_id=user_id)
+    user_router_menu = sorted(
+        [
+            row
+            for row in query_user.get('user_menu_info')
+            if row.menu_type in [MenuConstant.TYPE_DIR, MenuConstant.TYPE_MENU]
+        ],
+        key=lambda x: x.order_num,
+    )
+    menus = legacy_generate_menus(0, user_router_menu)
+    user_router = legacy_generate_user_router_menu(menus)
+    return ResponseUtil.success(
+        data=[router.model_dump(exclude_unset=True, by_alias=True) for router in user_router]
+    ).body
+
+
+async def cached_get_routers(engine, redis, user_id: int, role_ids: str):
+    """
+    缓存实现：按角色集合读取缓存，未命中时查询角色菜单生成路由树
+    """
+    current_user = CurrentUserModel.model_construct(user=SimpleNamespace(user_id=user_id, role_ids=role_ids))
+    async with AsyncSession(bind=engine, autoflush=False) as session:
+        user_routers = await LoginService.get_current_user_routers(
+            SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(redis=redis))), current_user, session
+        )
+    return ResponseUtil.success(serialized_data=user_routers).body
+
+
+async def clear_router_cache(redis):
+    """
+    清除路由缓存及进程内缓存
+    """
+    async for key in redis.scan_iter(match=f'{RedisInitKeyConfig.USER_ROUTER.key}:*', count=1000):
+        await redis.delete(key)
+    LocalCacheUtil.invalidate(RedisInitKeyConfig.USER_ROUTER.key)
+
+
+async def measure(get_func, engine, redis, user_id: int, role_ids: str, before_request=None):
+    """
+    执行多次请求，返回每次请求的平均耗时（毫秒）
+    """
+    start_time = time.perf_counter()
+    for _ in range(REQUEST_COUNT):
+        if before_request:
+            await before_request(redis)
+        await get_func(engine, redis, user_id, role_ids)
+    return (time.perf_counter() - start_time) * 1000 / REQUEST_COUNT
+
+
+async def main():
+    engine = (
+        create_async_engine(DB_URL, poolclass=StaticPool)
+        if DB_URL.startswith('sqlite')
+        else create_async_engine(DB_URL)
+    )
+    redis = await create_redis()
+    await LocalCacheUtil.init_local_cache(redis)
+    print(f'数据库：{engine.dialect.name}，Redis：{REDIS_URL or "fakeredis"}，目录及菜单数量：{MENU_COUNT}')
+    try:
+        await reset_data(engine)
+        for name, user_id, role_ids in [('超级管理员', 1, '1'), ('普通用户', USER_ID, str(ROLE_ID))]:
+            await clear_router_cache(redis)
+            legacy_routers = json.loads(await legacy_get_routers(engine, redis, user_id, role_ids))['data']
+            cached_routers = json.loads(await cached_get_routers(engine, redis, user_id, role_ids))['data']
+            assert legacy_routers == cached_routers, f'{name}路由信息不一致'
+            print(f'{name}：一级路由{len(cached_routers)}个，序列化后{len(json.dumps(cached_routers))}字节')
+            for label, get_func, before_request in [
+                ('原实现', legacy_get_routers, None),
+                ('缓存未命中', cached_get_routers, clear_router_cache),
+                ('缓存命中', cached_get_routers, None),
+            ]:
+                elapsed_ms = await measure(get_func, engine, redis, user_id, role_ids, before_request)
+                print(f'    {label}：平均每次{elapsed_ms:.3f}ms')
+    finally:
+        await clear_router_cache(redis)
+        await LocalCacheUtil.close_local_cache()
+        await redis.aclose()
+        async with engine.begin() as conn:
+            for table in TABLE_LIST:
+                await conn.run_sync(table.drop, checkfirst=True)
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
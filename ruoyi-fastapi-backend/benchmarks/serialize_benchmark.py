@@ -0,0 +1,213 @@
+"""
+查询结果序列化基准测试：逐行复制模型属性并逐个键名转换小驼峰的原实现与按模型类及Row字段组合预先生成键名映射的实现对比
+
+在ruoyi-fastapi-backend目录下执行：python -m benchmarks.serialize_benchmark
+可通过环境变量调整数据规模及数据库：
+    BENCHMARK_SERIALIZE_ROW_COUNT   每种查询结果的行数，默认500
+    BENCHMARK_SERIALIZE_ROUNDS      每种方式的重复次数，取中位数，默认20
+    BENCHMARK_DB_URL                异步数据库连接地址，默认使用内存sqlite（需安装aiosqlite）；
+                                    请勿指向业务数据库，测试会重建用户、部门及代码生成表
+分别测试模型对象列表、多模型Row列表、字段Row列表及带一对多关联的模型对象列表，计时前先比对两种实现的结果（含键顺序）一致
+"""
+
+import asyncio
+import json
+import os
+import statistics
+import time
+from datetime import datetime
+from sqlalchemy import insert, select
+from sqlalchemy.engine.row import Row
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.collections import InstrumentedList
+from sqlalchemy.pool import StaticPool
+from typing import Any
+from config.database import Base
+from module_admin.entity.do.dept_do import SysDept
+from module_admin.entity.do.user_do import SysUser
+from module_generator.entity.do.gen_do import GenTable, GenTableColumn
+from utils.common_util import CamelCaseUtil
+
+ROW_COUNT = int(os.environ.get('BENCHMARK_SERIALIZE_ROW_COUNT', 500))
+ROUNDS = int(os.environ.get('BENCHMARK_SERIALIZE_ROUNDS', 20))
+DB_URL = os.environ.get('BENCHMARK_DB_URL', 'sqlite+aiosqlite://')
+DEPT_COUNT = 10
+COLUMN_COUNT = 10
+TABLE_LIST = [SysDept.__table__, SysUser.__table__, GenTable.__table__, GenTableColumn.__table__]
+
+
+def legacy_snake_to_camel(snake_str: str):
+    """
+    原实现：每次转换都分割字符串并逐词首字母大写
+    """
+    words = snake_str.split('_')
+    return words[0] + ''.join(word.capitalize() for word in words[1:])
+
+
+def legacy_base_to_dict(obj: Any):
+    """
+    原实现：复制模型对象全部属性，逐个检查是否为关联列表并逐个转换键名
+    """
+    if isinstance(obj, Base):
+        base_dict = obj.__dict__.copy()
+        base_dict.pop('_sa_instance_state', None)
+        for name, value in base_dict.items():
+            if isinstance(value, InstrumentedList):
+                base_dict[name] = legacy_transform_result(value)
+    elif isinstance(obj, dict):
+        base_dict = obj.copy()
+    return {legacy_snake_to_camel(k): v for k, v in base_dict.items()}
+
+
+def legacy_transform_result(result: Any):
+    """
+    原实现：Row结果先后以all及any扫描全部元素判断是否为模型对象
+    """
+    if isinstance(result, (Base, dict)):
+        return legacy_base_to_dict(result)
+    elif isinstance(result, list):
+        return [legacy_transform_result(row) for row in result]
+    elif isinstance(result, Row):
+        if all([isinstance(row, Base) for row in result]):
+            return [legacy_base_to_dict(row) for row in result]
+        elif any([isinstance(row, Base) for row in result]):
+            return [legacy_transform_result(row) for row in result]
+        else:
+            return {legacy_snake_to_camel(k): v for k, v in result._asdict().items()}
+    return result
+
+
+async def reset_data(engine):
+    """
+    重建表并生成用户、部门及代码生成表数据
+    """
+    now = datetime(2024, 1, 1, 8, 30, 0)
+    async with engine.begin() as conn:
+        for table in TABLE_LIST:
+            await conn.run_sync(table.drop, checkfirst=True)
+            await conn.run_sync(table.create)
+        await conn.execute(
+            insert(SysDept),
+            [
+                dict(dept_id=100 + index, parent_id=0, ancestors='0', dept_name=f'部门{index}', create_time=now)
+                for index in range(DEPT_COUNT)
+            ],
+        )
+        await conn.execute(
+            insert(SysUser),
+            [
+                dict(
+                    user_id=index + 1,
+                    dept_id=100 + index % (DEPT_COUNT + 1),
+                    user_name=f'user{index}',
+                    nick_name=f'用户{index}',
+                    email=f'user{index}@example.com',
+                    phonenumber=f'138{index:08d}',
+                    login_date=now,
+                    create_time=now,
+                    update_time=now,
+                )
+                for index in range(ROW_COUNT)
+            ],
+        )
+        table_count = max(ROW_COUNT // COLUMN_COUNT, 1)
+        await conn.execute(
+            insert(GenTable),
+            [
+                dict(table_id=index + 1, table_name=f'table{index}', class_name=f'Table{index}', create_time=now)
+                for index in range(table_count)
+            ],
+        )
+        await conn.execute(
+            insert(GenTableColumn),
+            [
+                dict(
+                    table_id=index // COLUMN_COUNT + 1,
+                    column_name=f'column_{index}',
+                    python_field=f'column{index}',
+                    sort=index % COLUMN_COUNT,
+                    create_time=now,
+                )
+                for index in range(table_count * COLUMN_COUNT)
+            ],
+        )
+
+
+async def load_results(engine):
+    """
+    查询各类结果，模型对象在会话关闭后保持已加载的属性
+    """
+    async with AsyncSession(bind=engine, autoflush=False, expire_on_commit=False) as session:
+        return [
+            ('模型对象列表', (await session.execute(select(SysUser))).scalars().all()),
+            (
+                '多模型Row列表',
+                (
+                    await session.execute(
+                        select(SysUser, SysDept).outerjoin(SysDept, SysUser.dept_id == SysDept.dept_id)
+                    )
+                ).all(),
+            ),
+            (
+                '字段Row列表',
+                (
+                    await session.execute(
+                        select(
+                            SysUser.user_id,
+                            SysUser.user_name,
+                            SysUser.nick_name,
+                            SysUser.phonenumber,
+                            SysUser.login_date,
+                            SysDept.dept_name,
+                        ).outerjoin(SysDept, SysUser.dept_id == SysDept.dept_id)
+                    )
+                ).all(),
+            ),
+            (
+                '一对多关联模型对象列表',
+                (await session.execute(select(GenTable).options(selectinload(GenTable.columns)))).scalars().all(),
+            ),
+        ]
+
+
+def measure(transform_func, result):
+    """
+    返回多次转换耗时的中位数（毫秒）
+    """
+    elapsed_list = []
+    for _ in range(ROUNDS):
+        start_time = time.perf_counter()
+        transform_func(result)
+        elapsed_list.append((time.perf_counter() - start_time) * 1000)
+    return statistics.median(elapsed_list)
+
+
+async def main():
+    engine = (
+        create_async_engine(DB_URL, poolclass=StaticPool)
+        if DB_URL.startswith('sqlite')
+        else create_async_engine(DB_URL)
+    )
+    print(f'数据库：{engine.dialect.name}，行数：{ROW_COUNT}')
+    try:
+        await reset_data(engine)
+        for name, result in await load_results(engine):
+            legacy_json = json.dumps(legacy_transform_result(result), default=str, ensure_ascii=False)
+            fast_json = json.dumps(CamelCaseUtil.transform_result(result), default=str, ensure_ascii=False)
+            assert legacy_json == fast_json, f'{name}转换结果不一致'
+            legacy_ms = measure(legacy_transform_result, result)
+            fast_ms = measure(CamelCaseUtil.transform_result, result)
+            print(
+                f'{name}（{len(result)}行）：原实现{legacy_ms:.2f}ms，预生成键名映射{fast_ms:.2f}ms，'
+                f'提升{legacy_ms / fast_ms:.1f}倍'
+            )
+    finally:
+        async with engine.begin() as conn:
+            for table in TABLE_LIST:
+                await conn.run_sync(table.drop, checkfirst=True)
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
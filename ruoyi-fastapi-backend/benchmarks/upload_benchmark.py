@@ -0,0 +1,225 @@
+"""
+文件上传基准测试：在接口中同步创建目录、探测文件名冲突并以阻塞方式写入文件的原实现与写入及SHA-256计算在线程池中执行、按内容去重的实现对比
+
+在ruoyi-fastapi-backend目录下执行：python -m benchmarks.upload_benchmark
+可通过环境变量调整测试规模：
+    BENCHMARK_UPLOAD_FILE_MB          测试文件大小（MB），默认100
+    BENCHMARK_UPLOAD_CONCURRENCY      同名文件并发上传数量，默认8
+    BENCHMARK_REDIS_URL               Redis连接地址，如redis://127.0.0.1:6379/15，默认使用fakeredis；请勿指向业务Redis，测试会写入upload_chunk相关键
+上传目录使用临时目录，测试完成后删除；除计时外还会校验同名文件并发上传不互相覆盖、相同内容去重、分片上传中断后续传及合并结果一致；
+事件循环最大阻塞时间为上传期间每1ms唤醒一次的后台任务观测到的最大唤醒延迟
+"""
+
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from fastapi import FastAPI, File, Request, UploadFile
+from httpx import ASGITransport, AsyncClient
+from types import SimpleNamespace
+from config.env import AppConfig, UploadConfig
+from exceptions.handle import handle_exception
+from module_admin.controller.common_controller import commonController
+from module_admin.entity.vo.user_vo import CurrentUserModel
+from module_admin.service.login_service import LoginService
+from module_admin.service.upload_service import UploadService
+from utils.response_util import ResponseUtil
+
+FILE_MB = int(os.environ.get('BENCHMARK_UPLOAD_FILE_MB', 100))
+CONCURRENCY = int(os.environ.get('BENCHMARK_UPLOAD_CONCURRENCY', 8))
+REDIS_URL = os.environ.get('BENCHMARK_REDIS_URL', '')
+FILE_NAME = 'carousel.mp4'
+
+
+async def create_redis():
+    """
+    创建测试Redis连接
+    """
+    if REDIS_URL:
+        from redis import asyncio as aioredis
+
+        return aioredis.from_url(REDIS_URL, decode_responses=True)
+    import fakeredis
+
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+async def legacy_upload(request: Request, file: UploadFile = File(...)):
+    """
+    原实现：同步创建目录、逐个探测可用文件名后以阻塞方式按10MB写入
+    """
+    relative_path = (
+        f'upload/{datetime.now().strftime("%Y")}/{datetime.now().strftime("%m")}/{datetime.now().strftime("%d")}'
+    )
+    dir_path = os.path.join(UploadConfig.UPLOAD_PATH, relative_path)
+    try:
+        os.makedirs(dir_path)
+    except FileExistsError:
+        pass
+    filename = file.filename
+    filepath = os.path.join(dir_path, filename)
+    if os.path.exists(filepath):
+        counter = 1
+        name_parts = filename.rsplit('.', 1)
+        while os.path.exists(filepath):
+            filename = f'{name_parts[0]}_{counter}.{name_parts[1]}'
+            filepath = os.path.join(dir_path, filename)
+            counter += 1
+    with open(filepath, 'wb') as f:
+        for chunk in iter(lambda: file.file.read(1024 * 1024 * 10), b''):
+            f.write(chunk)
+
+    return ResponseUtil.success(data={'newFileName': filename})
+
+
+def create_app(redis):
+    """
+    创建测试应用，使用通用模块的上传接口
+    """
+    app = FastAPI()
+    app.state.redis = redis
+    handle_exception(app)
+    app.include_router(commonController)
+    app.post('/legacy/upload')(legacy_upload)
+    app.dependency_overrides[LoginService.get_current_user] = lambda: CurrentUserModel.model_construct(
+        user=SimpleNamespace(user_name='admin', admin=True)
+    )
+
+    return app
+
+
+async def watch_loop(stop_event: asyncio.Event, stall_list: list):
+    """
+    每1ms唤醒一次，记录唤醒延迟
+    """
+    while not stop_event.is_set():
+        start_time = time.perf_counter()
+        await asyncio.sleep(0.001)
+        stall_list.append(time.perf_counter() - start_time - 0.001)
+
+
+async def measure_upload(client: AsyncClient, url: str, content: bytes):
+    """
+    上传文件，返回响应数据、耗时及事件循环最大阻塞时间（毫秒）
+    """
+    stop_event = asyncio.Event()
+    stall_list = []
+    watcher = asyncio.create_task(watch_loop(stop_event, stall_list))
+    await asyncio.sleep(0.005)
+    start_time = time.perf_counter()
+    response = await client.post(url, files={'file': (FILE_NAME, content)})
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    await asyncio.sleep(0.005)
+    stop_event.set()
+    await watcher
+
+    return response.json(), elapsed_ms, max(stall_list, default=0) * 1000
+
+
+def get_upload_path(file_name: str):
+    """
+    根据接口返回的文件映射路径获取文件路径
+    """
+    return file_name.replace(UploadConfig.UPLOAD_PREFIX, UploadConfig.UPLOAD_PATH)
+
+
+async def check_concurrent_upload(client: AsyncClient):
+    """
+    并发上传同名文件，校验文件名各不相同且内容未被覆盖
+    """
+    content_list = [f'content-{index}'.encode() * 1000 for index in range(CONCURRENCY)]
+    response_list = await asyncio.gather(
+        *[client.post('/common/upload', files={'file': ('same.txt', content)}) for content in content_list]
+    )
+    result_list = [response.json() for response in response_list]
+    assert len({result['newFileName'] for result in result_list}) == CONCURRENCY, '并发上传的同名文件出现重名'
+    for result, content in zip(result_list, content_list):
+        with open(get_upload_path(result['fileName']), 'rb') as f:
+            assert f.read() == content, '并发上传的同名文件内容被覆盖'
+
+
+async def check_chunk_upload(client: AsyncClient, content: bytes, first_upload_path: str):
+    """
+    分片上传：上传部分分片后模拟中断，查询已上传的分片后继续上传并合并，校验合并结果
+    """
+    init_result = (
+        await client.post('/common/upload/chunk', json={'fileName': FILE_NAME, 'fileSize': len(content)})
+    ).json()['data']
+    upload_id, chunk_size, chunk_count = init_result['uploadId'], init_result['chunkSize'], init_result['chunkCount']
+
+    async def upload_chunk(index: int):
+        response = await client.post(
+            f'/common/upload/chunk/{upload_id}',
+            data={'index': str(index)},
+            files={'file': ('blob', content[index * chunk_size : (index + 1) * chunk_size])},
+        )
+        return response.json()
+
+    start_time = time.perf_counter()
+    for index in range(0, chunk_count, 2):
+        await upload_chunk(index)
+    merge_result = (await client.post(f'/common/upload/chunk/{upload_id}/merge')).json()
+    assert merge_result['code'] != 200, '分片未上传完成时合并成功'
+    # 模拟中断后续传：查询已上传的分片，只上传缺少的分片
+    uploaded_chunk_set = set((await client.get(f'/common/upload/chunk/{upload_id}')).json()['data']['uploadedChunks'])
+    assert uploaded_chunk_set == set(range(0, chunk_count, 2)), '已上传分片不正确'
+    bad_result = (
+        await client.post(f'/common/upload/chunk/{upload_id}', data={'index': '1'}, files={'file': ('blob', b'x')})
+    ).json()
+    assert bad_result['code'] != 200, '分片大小不正确时上传成功'
+    for index in range(chunk_count):
+        if index not in uploaded_chunk_set:
+            await upload_chunk(index)
+    merge_result = (await client.post(f'/common/upload/chunk/{upload_id}/merge')).json()
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    merged_path = get_upload_path(merge_result['fileName'])
+    with open(merged_path, 'rb') as f:
+        assert hashlib.sha256(f.read()).digest() == hashlib.sha256(content).digest(), '合并后的文件内容不一致'
+    assert os.stat(merged_path).st_ino == os.stat(first_upload_path).st_ino, '分片上传的相同内容未去重'
+    assert not os.path.exists(os.path.join(UploadConfig.UPLOAD_PATH, UploadService.CHUNK_DIR, upload_id)), (
+        '合并后分片未删除'
+    )
+
+    return chunk_count, elapsed_ms
+
+
+async def main():
+    upload_dir = tempfile.mkdtemp()
+    UploadConfig.UPLOAD_PATH = upload_dir
+    redis = await create_redis()
+    try:
+        content = os.urandom(FILE_MB * 1024 * 1024)
+        async with AsyncClient(transport=ASGITransport(app=create_app(redis)), base_url='http://test') as client:
+            print(f'测试文件：{FILE_MB}MB，读写块大小：{AppConfig.app_upload_chunk_size}字节')
+            for label, url in [('原实现', '/legacy/upload'), ('线程池写入', '/common/upload')]:
+                result, elapsed_ms, stall_ms = await measure_upload(client, url, content)
+                print(f'    {label}：耗时{elapsed_ms:.1f}ms，事件循环最大阻塞{stall_ms:.2f}ms')
+            first_result, _, _ = await measure_upload(client, '/common/upload', content)
+            second_result, elapsed_ms, _ = await measure_upload(client, '/common/upload', content)
+            first_path, second_path = (
+                get_upload_path(first_result['fileName']),
+                get_upload_path(second_result['fileName']),
+            )
+            assert first_path != second_path, '同名文件被覆盖'
+            assert os.stat(first_path).st_ino == os.stat(second_path).st_ino, '相同内容未去重'
+            print(
+                f'    相同内容重复上传：耗时{elapsed_ms:.1f}ms，'
+                f'{second_result["newFileName"]}与{first_result["newFileName"]}共用存储'
+            )
+            await check_concurrent_upload(client)
+            print(f'    {CONCURRENCY}个同名文件并发上传：文件名互不相同，内容未被覆盖')
+            chunk_count, elapsed_ms = await check_chunk_upload(client, content, first_path)
+            print(f'    分片上传：{chunk_count}个分片，中断后续传并合并耗时{elapsed_ms:.1f}ms，合并结果一致并已去重')
+        print(f'上传统计：{UploadService.get_metrics()}')
+    finally:
+        async for key in redis.scan_iter(match='upload_chunk:*', count=1000):
+            await redis.delete(key)
+        await redis.aclose()
+        shutil.rmtree(upload_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,253 @@
+"""
+用户批量导入基准测试：逐行查询、逐行写入并在事件循环中加密密码的原实现与按列校验、批量查询、多行写入并在进程池中加密密码的后台导入任务对比
+
+在ruoyi-fastapi-backend目录下执行：python -m benchmarks.user_import_benchmark
+可通过环境变量调整数据规模及数据库：
+    BENCHMARK_USER_IMPORT_ROW_COUNT     导入用户数量，默认2000，其中一半为已存在的用户
+    BENCHMARK_DB_URL                    异步数据库连接地址，默认使用内存sqlite（需安装aiosqlite）；
+                                        请勿指向业务数据库，测试会重建用户及部门表
+    BENCHMARK_REDIS_URL                 Redis连接地址，如redis://127.0.0.1:6379/15，默认使用fakeredis；
+                                        请勿指向业务Redis，测试会写入并清理sys_config、user_import_task及principal_version相关键
+密码加密强度及进程池大小读取APP_PASSWORD_BCRYPT_ROUNDS、APP_USER_IMPORT_HASH_WORKERS等应用配置，
+两种实现均为每个新增用户单独加密，默认加密强度下加密耗时占绝大部分，可设置APP_PASSWORD_BCRYPT_ROUNDS=4对比其余部分的耗时
+"""
+
+import asyncio
+import io
+import os
+import time
+import pandas as pd
+from datetime import datetime
+from sqlalchemy import func, insert, select, true
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from types import SimpleNamespace
+from config.enums import RedisInitKeyConfig
+from config.env import AppConfig
+from module_admin.dao.user_dao import UserDao
+from module_admin.entity.do.dept_do import SysDept
+from module_admin.entity.do.user_do import SysUser
+from module_admin.entity.vo.user_vo import CurrentUserModel, UserModel
+from module_admin.service import user_import_service
+from module_admin.service.user_import_service import UserImportService
+from utils.pwd_util import PwdUtil
+
+ROW_COUNT = int(os.environ.get('BENCHMARK_USER_IMPORT_ROW_COUNT', 2000))
+DB_URL = os.environ.get('BENCHMARK_DB_URL', 'sqlite+aiosqlite://')
+REDIS_URL = os.environ.get('BENCHMARK_REDIS_URL', '')
+DEPT_COUNT = 20
+INIT_PASSWORD = 'admin123'
+
+
+async def create_redis():
+    """
+    创建测试Redis连接
+    """
+    if REDIS_URL:
+        from redis import asyncio as aioredis
+
+        return aioredis.from_url(REDIS_URL, decode_responses=True)
+    import fakeredis
+
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+def generate_excel():
+    """
+    生成导入文件，偶数行为已存在的用户
+    """
+    df = pd.DataFrame(
+        dict(
+            部门编号=[100 + index % DEPT_COUNT for index in range(ROW_COUNT)],
+            登录名称=[f'user{index}' for index in range(ROW_COUNT)],
+            用户名称=[f'用户{index}' for index in range(ROW_COUNT)],
+            用户邮箱=[f'user{index}@example.com' for index in range(ROW_COUNT)],
+            手机号码=[f'138{index:08d}' for index in range(ROW_COUNT)],
+            用户性别=['男', '女'] * (ROW_COUNT // 2) + ['未知'] * (ROW_COUNT % 2),
+            帐号状态=['正常'] * ROW_COUNT,
+        )
+    )
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+async def reset_data(engine):
+    """
+    重建用户及部门表并写入超级管理员及已存在的用户
+    """
+    async with engine.begin() as conn:
+        for table in [SysUser.__table__, SysDept.__table__]:
+            await conn.run_sync(table.drop, checkfirst=True)
+            await conn.run_sync(table.create)
+        await conn.execute(
+            insert(SysDept),
+            [
+                dict(dept_id=100 + index, parent_id=0, ancestors='0', dept_name=f'部门{index}', del_flag='0')
+                for index in range(DEPT_COUNT)
+            ],
+        )
+        await conn.execute(
+            insert(SysUser),
+            [dict(user_id=1, user_name='admin', nick_name='超级管理员', dept_id=100, del_flag='0')]
+            + [
+                dict(
+                    user_id=2 + index // 2,
+                    user_name=f'user{index}',
+                    nick_name=f'旧用户{index}',
+                    dept_id=100,
+                    del_flag='0',
+                )
+                for index in range(0, ROW_COUNT, 2)
+            ],
+        )
+
+
+async def legacy_import(engine, contents: bytes):
+    """
+    原实现：逐行查询用户是否存在，逐行加密密码并写入，全部写入后统一提交
+    """
+    header_dict = {
+        '部门编号': 'dept_id',
+        '登录名称': 'user_name',
+        '用户名称': 'nick_name',
+        '用户邮箱': 'email',
+        '手机号码': 'phonenumber',
+        '用户性别': 'sex',
+        '帐号状态': 'status',
+    }
+    sex_dict = {'男': '0', '女': '1', '未知': '2'}
+    status_dict = {'正常': '0', '停用': '1'}
+    df = pd.read_excel(io.BytesIO(contents))
+    df.rename(columns=header_dict, inplace=True)
+    async with AsyncSession(bind=engine, autoflush=False) as session:
+        for _, row in df.iterrows():
+            add_user = UserModel(
+                deptId=row['dept_id'],
+                userName=row['user_name'],
+                password=PwdUtil.get_password_hash(INIT_PASSWORD),
+                nickName=row['nick_name'],
+                email=row['email'],
+                phonenumber=str(row['phonenumber']),
+                sex=sex_dict.get(row['sex'], row['sex']),
+                status=status_dict.get(row['status'], row['status']),
+                createBy='admin',
+                createTime=datetime.now(),
+                updateBy='admin',
+                updateTime=datetime.now(),
+            )
+            user_info = await UserDao.get_user_by_info(session, UserModel(userName=row['user_name']))
+            if user_info:
+                edit_user_model = UserModel(
+                    userId=user_info.user_id,
+                    deptId=row['dept_id'],
+                    userName=row['user_name'],
+                    nickName=row['nick_name'],
+                    email=row['email'],
+                    phonenumber=str(row['phonenumber']),
+                    sex=add_user.sex,
+                    status=add_user.status,
+                    updateBy='admin',
+                    updateTime=datetime.now(),
+                )
+                edit_user_model.validate_fields()
+                await UserDao.edit_user_dao(session, edit_user_model.model_dump(exclude_unset=True))
+            else:
+                add_user.validate_fields()
+                await UserDao.add_user_dao(session, add_user)
+        await session.commit()
+
+
+async def task_import(engine, contents: bytes):
+    """
+    后台导入任务：提交任务后等待任务完成
+    """
+
+    class ImportFile:
+        async def read(self):
+            return contents
+
+        async def close(self):
+            pass
+
+    from server import app
+
+    request = SimpleNamespace(app=app)
+    current_user = CurrentUserModel.model_construct(user=SimpleNamespace(admin=True, user_name='admin'))
+    import_task = await UserImportService.submit_import_task_services(
+        request, ImportFile(), True, current_user, true(), true()
+    )
+    await asyncio.gather(*UserImportService._tasks)
+    result = await UserImportService.get_import_task_services(app.state.redis, import_task.task_id, current_user)
+    assert result.status == 'success' and result.fail_count == 0, result
+
+
+async def measure(engine, import_func, contents: bytes):
+    """
+    执行导入，同时记录事件循环的最长停顿时间，返回耗时（毫秒）及最长停顿时间（毫秒）
+    """
+    await reset_data(engine)
+    max_stall = 0.0
+    stop_event = asyncio.Event()
+
+    async def ticker():
+        nonlocal max_stall
+        last_time = time.perf_counter()
+        while not stop_event.is_set():
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            max_stall = max(max_stall, now - last_time - 0.005)
+            last_time = now
+
+    ticker_task = asyncio.create_task(ticker())
+    start_time = time.perf_counter()
+    await import_func(engine, contents)
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    stop_event.set()
+    await ticker_task
+    async with engine.connect() as conn:
+        user_count = (await conn.execute(select(func.count()).select_from(SysUser))).scalar()
+        assert user_count == ROW_COUNT + 1, user_count
+    return elapsed_ms, max_stall * 1000
+
+
+async def main():
+    engine = (
+        create_async_engine(DB_URL, poolclass=StaticPool)
+        if DB_URL.startswith('sqlite')
+        else create_async_engine(DB_URL)
+    )
+    # 后台导入任务使用的数据库会话指向测试数据库
+    user_import_service.AsyncSessionLocal = async_sessionmaker(bind=engine, autoflush=False)
+    from server import app
+
+    app.state.redis = await create_redis()
+    await app.state.redis.set(f'{RedisInitKeyConfig.SYS_CONFIG.key}:sys.user.initPassword', INIT_PASSWORD)
+    contents = generate_excel()
+    print(
+        f'数据库：{engine.dialect.name}，导入用户数量：{ROW_COUNT}（已存在{(ROW_COUNT + 1) // 2}），'
+        f'bcrypt加密强度：{AppConfig.app_password_bcrypt_rounds}，加密进程数：{AppConfig.app_user_import_hash_workers}，'
+        f'每批写入数量：{AppConfig.app_user_import_batch_size}'
+    )
+    try:
+        for name, import_func in [('原实现（逐行查询及写入）', legacy_import), ('后台导入任务', task_import)]:
+            elapsed_ms, max_stall_ms = await measure(engine, import_func, contents)
+            print(
+                f'{name}：耗时{elapsed_ms:.0f}ms，{ROW_COUNT / elapsed_ms * 1000:.0f}行/秒，'
+                f'事件循环最长停顿{max_stall_ms:.0f}ms'
+            )
+    finally:
+        await UserImportService.close_user_import()
+        for key_prefix in [RedisInitKeyConfig.USER_IMPORT_TASK.key, RedisInitKeyConfig.PRINCIPAL_VERSION.key]:
+            async for key in app.state.redis.scan_iter(match=f'{key_prefix}:*', count=1000):
+                await app.state.redis.delete(key)
+        await app.state.redis.delete(f'{RedisInitKeyConfig.SYS_CONFIG.key}:sys.user.initPassword')
+        await app.state.redis.aclose()
+        async with engine.begin() as conn:
+            for table in [SysUser.__table__, SysDept.__table__]:
+                await conn.run_sync(table.drop, checkfirst=True)
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -49,3 +49,12 @@ class RedisInitKeyConfig(Enum):
     ACCOUNT_LOCK = {'key': 'account_lock', 'remark': '用户锁定'}
     PASSWORD_ERROR_COUNT = {'key': 'password_error_count', 'remark': '密码错误次数'}
     SMS_CODE = {'key': 'sms_code', 'remark': '短信验证码'}
+    USER_PRINCIPAL = {'key': 'user_principal', 'remark': '登录用户身份信息'}
+    PRINCIPAL_VERSION = {'key': 'principal_version', 'remark': '登录用户身份信息版本号'}
+    IP_LOCATION = {'key': 'ip_location', 'remark': 'IP归属区域'}
+    ONLINE_SESSION_INDEX = {'key': 'online_session_index', 'remark': '在线会话索引'}
+    ONLINE_SESSION_INFO = {'key': 'online_session_info', 'remark': '在线会话信息'}
+    LOCAL_CACHE_VERSION = {'key': 'local_cache_version', 'remark': '进程内缓存失效版本号'}
+    USER_IMPORT_TASK = {'key': 'user_import_task', 'remark': '用户导入任务'}
+    USER_ROUTER = {'key': 'user_router', 'remark': '用户路由信息'}
+    UPLOAD_CHUNK = {'key': 'upload_chunk', 'remark': '分片上传任务'}
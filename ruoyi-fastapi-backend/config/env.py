@@ -21,7 +21,38 @@ class AppSettings(BaseSettings):
     app_version: str = '1.0.0'
     app_reload: bool = True
     app_ip_location_query: bool = True
+    app_ip_location_api_url: str = 'https://qifu-api.baidubce.com/ip/geo/v1/district?ip={ip}'
+    app_ip_location_timeout: float = 2.0
+    app_ip_location_cache_expire_seconds: int = 86400
+    app_ip_location_local_cache_size: int = 4096
+    app_ip_location_offline_db: str = ''
     app_same_time_login: bool = True
+    app_log_queue_max_size: int = 10000
+    app_log_batch_size: int = 200
+    app_log_flush_interval: float = 1.0
+    app_log_overflow_policy: Literal['block', 'drop', 'spill'] = 'spill'
+    app_log_spill_path: str = 'logs/log_spill.jsonl'
+    app_log_dead_letter_path: str = 'logs/log_dead_letter.jsonl'
+    app_log_replay_max_attempts: int = 10
+    app_local_cache_enabled: bool = True
+    app_local_cache_expire_seconds: int = 300
+    app_password_bcrypt_rounds: int = 12
+    app_password_hash_workers: int = 4
+    app_password_hash_queue_timeout: float = 5.0
+    app_captcha_pool_size: int = 200
+    app_captcha_render_workers: int = 2
+    app_captcha_image_format: Literal['png', 'png8', 'webp'] = 'png'
+    app_user_import_batch_size: int = 1000
+    app_user_import_hash_workers: int = 2
+    app_response_orjson_enabled: bool = True
+    app_compress_encodings: str = 'zstd,br,gzip'
+    app_compress_minimum_size: int = 1000
+    app_compress_offload_size: int = 262144
+    app_compress_cache_max_bytes: int = 67108864
+    app_compress_cache_max_entry_size: int = 8388608
+    app_upload_chunk_size: int = 5242880
+    app_upload_chunk_expire_seconds: int = 86400
+    app_upload_dedup_enabled: bool = True
 
 
 class JwtSettings(BaseSettings):
@@ -22,3 +22,15 @@ async def init_create_table():
     async with async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     logger.info('数据库连接成功')
+
+
+async def init_dept_closure():
+    """
+    应用启动时检查部门闭包表，为空时根据部门表重建
+
+    :return:
+    """
+    from module_admin.service.dept_service import DeptService
+
+    async with AsyncSessionLocal() as session:
+        await DeptService.init_dept_closure_services(session)
@@ -123,3 +123,30 @@ class RedisUtil:
         """
         from server import app
         return await app.state.redis.delete(key)
+
+    @classmethod
+    async def incr(cls, key):
+        """
+        键值自增
+
+        :param key: 键名
+        :return: 自增后的值
+        """
+        from server import app
+        return await app.state.redis.incr(key)
+
+    @classmethod
+    async def incr_many(cls, key_list):
+        """
+        使用一次管道往返批量自增多个键值
+
+        :param key_list: 键名列表
+        :return: 自增后的值列表
+        """
+        if not key_list:
+            return []
+        from server import app
+        async with app.state.redis.pipeline(transaction=False) as pipe:
+            for key in key_list:
+                pipe.incr(key)
+            return await pipe.execute()
@@ -0,0 +1,474 @@
+import asyncio
+import hashlib
+import time
+import zlib
+from collections import OrderedDict
+from fastapi import FastAPI
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Callable, Dict, List, Optional, Tuple
+from config.env import AppConfig
+from utils.log_util import logger
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class BrotliCompressObj:
+    """
+    brotli流式压缩对象，提供与zlib压缩对象一致的compress及flush方法
+    """
+
+    def __init__(self, level: int):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.finish()
+
+
+# 支持的压缩方式，值为(一次性压缩方法, 流式压缩对象创建方法)，依赖未安装的压缩方式不可用
+COMPRESSORS: Dict[str, Tuple[Callable[[bytes, int], bytes], Callable[[int], object]]] = dict(
+    gzip=(
+        lambda body, level: zlib.compress(body, level, wbits=31),
+        lambda level: zlib.compressobj(level, zlib.DEFLATED, 31),
+    )
+)
+if brotli is not None:
+    COMPRESSORS['br'] = (lambda body, level: brotli.compress(body, quality=level), BrotliCompressObj)
+if zstandard is not None:
+    COMPRESSORS['zstd'] = (
+        lambda body, level: zstandard.ZstdCompressor(level=level).compress(body),
+        lambda level: zstandard.ZstdCompressor(level=level).compressobj(),
+    )
+
+# 按响应体大小分级的压缩级别，响应体越大压缩级别越低，未知长度的流式响应使用最后一级
+COMPRESS_LEVEL_TIERS = (
+    (64 * 1024, dict(zstd=6, br=5, gzip=6)),
+    (1024 * 1024, dict(zstd=3, br=4, gzip=5)),
+    (None, dict(zstd=1, br=2, gzip=4)),
+)
+
+COMPRESSIBLE_CONTENT_TYPES = {
+    'application/json',
+    'application/javascript',
+    'application/x-javascript',
+    'application/xml',
+    'image/svg+xml',
+}
+
+
+class CompressionMiddleware:
+    """
+    响应压缩中间件
+
+    根据Accept-Encoding协商zstd、br、gzip压缩方式，按响应体大小选择压缩级别，超过阈值的响应体在线程池中压缩，
+    带ETag或允许公共缓存的响应会缓存压缩结果，并按路由统计压缩率及压缩耗费的CPU时间
+    """
+
+    _cache: 'OrderedDict[tuple, bytes]' = OrderedDict()
+    _cache_bytes: int = 0
+    _metrics: Dict[str, Dict[str, float]] = {}
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.encoding_list = []
+        for encoding in AppConfig.app_compress_encodings.split(','):
+            encoding = encoding.strip().lower()
+            if encoding in COMPRESSORS:
+                self.encoding_list.append(encoding)
+            elif encoding:
+                logger.warning(f'响应压缩方式{encoding}不受支持或未安装对应依赖，已忽略')
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or scope['method'] == 'HEAD':
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self.select_encoding(Headers(scope=scope).get('accept-encoding', ''))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(scope, send, encoding)
+        await self.app(scope, receive, responder)
+
+    def select_encoding(self, accept_encoding: str):
+        """
+        根据请求头Accept-Encoding选择压缩方式，权重相同时按配置的顺序优先
+
+        :param accept_encoding: 请求头Accept-Encoding
+        :return: 压缩方式，客户端不接受任何可用的压缩方式时返回None
+        """
+        if not accept_encoding:
+            return None
+        accepted_dict = {}
+        for item in accept_encoding.split(','):
+            name, _, params = item.partition(';')
+            quality = 1.0
+            for param in params.split(';'):
+                key, _, value = param.strip().partition('=')
+                if key == 'q':
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            accepted_dict[name.strip().lower()] = quality
+        selected_encoding, selected_quality = None, 0.0
+        for encoding in self.encoding_list:
+            quality = accepted_dict.get(encoding, accepted_dict.get('*', 0.0))
+            if quality > selected_quality:
+                selected_encoding, selected_quality = encoding, quality
+
+        return selected_encoding
+
+    @classmethod
+    def get_cached(cls, key: tuple):
+        """
+        获取缓存的压缩结果
+
+        :param key: 缓存键
+        :return: 压缩结果，未缓存时返回None
+        """
+        compressed_body = cls._cache.get(key)
+        if compressed_body is not None:
+            cls._cache.move_to_end(key)
+
+        return compressed_body
+
+    @classmethod
+    def set_cached(cls, key: tuple, compressed_body: bytes):
+        """
+        缓存压缩结果，超过缓存容量时淘汰最久未使用的压缩结果
+
+        :param key: 缓存键
+        :param compressed_body: 压缩结果
+        :return:
+        """
+        if key in cls._cache:
+            return
+        cls._cache[key] = compressed_body
+        cls._cache_bytes += len(compressed_body)
+        while cls._cache_bytes > AppConfig.app_compress_cache_max_bytes and cls._cache:
+            _, evicted_body = cls._cache.popitem(last=False)
+            cls._cache_bytes -= len(evicted_body)
+
+    @classmethod
+    def record_metrics(
+        cls,
+        route: str,
+        original_size: int,
+        compressed_size: int,
+        cpu_time: float,
+        offloaded: bool = False,
+        cache_hit: bool = False,
+    ):
+        """
+        记录路由的压缩统计信息
+
+        :param route: 路由路径
+        :param original_size: 压缩前字节数
+        :param compressed_size: 压缩后字节数
+        :param cpu_time: 压缩耗费的CPU时间（秒）
+        :param offloaded: 是否在线程池中压缩
+        :param cache_hit: 是否命中压缩结果缓存
+        :return:
+        """
+        metrics = cls._metrics.setdefault(
+            route, dict(responses=0, original_bytes=0, compressed_bytes=0, cpu_time=0.0, offloaded=0, cache_hits=0)
+        )
+        metrics['responses'] += 1
+        metrics['original_bytes'] += original_size
+        metrics['compressed_bytes'] += compressed_size
+        metrics['cpu_time'] += cpu_time
+        metrics['offloaded'] += int(offloaded)
+        metrics['cache_hits'] += int(cache_hit)
+
+    @classmethod
+    def get_metrics(cls):
+        """
+        获取当前工作进程按路由统计的压缩信息
+
+        :return: 压缩统计信息列表，按压缩耗费的CPU时间降序排列
+        """
+        metrics_list = [
+            dict(
+                route=route,
+                responses=metrics['responses'],
+                original_bytes=metrics['original_bytes'],
+                compressed_bytes=metrics['compressed_bytes'],
+                ratio=round(metrics['original_bytes'] / metrics['compressed_bytes'], 2)
+                if metrics['compressed_bytes']
+                else None,
+                cpu_ms=round(metrics['cpu_time'] * 1000, 3),
+                avg_cpu_ms=round(metrics['cpu_time'] * 1000 / metrics['responses'], 3),
+                offloaded=metrics['offloaded'],
+                cache_hits=metrics['cache_hits'],
+            )
+            for route, metrics in cls._metrics.items()
+        ]
+
+        return sorted(metrics_list, key=lambda x: x['cpu_ms'], reverse=True)
+
+
+class CompressionResponder:
+    """
+    单个响应的压缩处理，响应头延迟到收到第一段响应体后发送，以便根据响应体决定是否压缩
+    """
+
+    def __init__(self, scope: Scope, send: Send, encoding: str) -> None:
+        self.scope = scope
+        self.send = send
+        self.encoding = encoding
+        self.start_message: Optional[Message] = None
+        self.mode: Optional[str] = None
+        self.level = 0
+        self.cache_key: Optional[tuple] = None
+        self.body_list: List[bytes] = []
+        self.compressobj = None
+        self.original_size = 0
+        self.compressed_size = 0
+        self.cpu_time = 0.0
+        self.offloaded = False
+
+    async def __call__(self, message: Message) -> None:
+        if message['type'] == 'http.response.start':
+            self.start_message = message
+            return
+        if self.mode is None:
+            if message['type'] == 'http.response.body':
+                self.mode = await self.__start(message)
+                return
+            self.mode = 'passthrough'
+            await self.send(self.start_message)
+        if self.mode == 'passthrough' or message['type'] != 'http.response.body':
+            await self.send(message)
+        elif self.mode == 'buffer':
+            self.body_list.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                await self.__send_whole_body(b''.join(self.body_list))
+        elif self.mode == 'stream':
+            await self.__send_stream_chunk(message)
+
+    async def __start(self, message: Message):
+        """
+        收到第一段响应体时决定处理方式
+
+        :param message: 第一段响应体消息
+        :return: 处理方式，passthrough不压缩，drain已发送缓存的压缩结果，buffer读取完整响应体后压缩，stream流式压缩
+        """
+        headers = Headers(raw=self.start_message['headers'])
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+        content_length = headers.get('content-length')
+        body_size = len(body) if not more_body else int(content_length) if content_length else None
+        if (
+            self.start_message['status'] != 200
+            or 'content-encoding' in headers
+            or 'content-range' in headers
+            or not self.__is_compressible(headers.get('content-type', ''))
+            or (body_size is not None and body_size < AppConfig.app_compress_minimum_size)
+        ):
+            await self.send(self.start_message)
+            await self.send(message)
+            return 'passthrough'
+
+        self.level = self.__get_level(body_size)[self.encoding]
+        cacheable = (
+            AppConfig.app_compress_cache_max_bytes > 0
+            and body_size is not None
+            and body_size <= AppConfig.app_compress_cache_max_entry_size
+            and self.__is_cacheable(headers)
+        )
+        etag = headers.get('etag')
+        if cacheable and etag:
+            self.cache_key = (self.scope['path'], etag, self.encoding, self.level)
+            compressed_body = CompressionMiddleware.get_cached(self.cache_key)
+            if compressed_body is not None:
+                await self.__send_compressed(compressed_body, body_size, cache_hit=True)
+                return 'drain'
+        elif cacheable and not more_body:
+            self.cache_key = (
+                self.scope['path'],
+                hashlib.blake2b(body, digest_size=16).digest(),
+                self.encoding,
+                self.level,
+            )
+
+        if not more_body:
+            await self.__send_whole_body(body)
+            return 'done'
+        if cacheable:
+            self.body_list.append(body)
+            return 'buffer'
+        self.compressobj = COMPRESSORS[self.encoding][1](self.level)
+        headers = MutableHeaders(raw=self.start_message['headers'])
+        self.__set_encoding_headers(headers)
+        del headers['content-length']
+        await self.send(self.start_message)
+        await self.__send_stream_chunk(message)
+        return 'stream'
+
+    async def __send_whole_body(self, body: bytes):
+        """
+        压缩并发送完整的响应体
+
+        :param body: 完整的响应体
+        :return:
+        """
+        compressed_body = CompressionMiddleware.get_cached(self.cache_key) if self.cache_key else None
+        if compressed_body is not None:
+            await self.__send_compressed(compressed_body, len(body), cache_hit=True)
+            return
+        compressed_body = await self.__compress(COMPRESSORS[self.encoding][0], body, self.level)
+        if self.cache_key:
+            CompressionMiddleware.set_cached(self.cache_key, compressed_body)
+        await self.__send_compressed(compressed_body, len(body))
+
+    async def __send_compressed(self, compressed_body: bytes, original_size: int, cache_hit: bool = False):
+        """
+        发送压缩后的完整响应体并记录统计信息
+
+        :param compressed_body: 压缩后的响应体
+        :param original_size: 压缩前字节数
+        :param cache_hit: 是否命中压缩结果缓存
+        :return:
+        """
+        headers = MutableHeaders(raw=self.start_message['headers'])
+        self.__set_encoding_headers(headers)
+        headers['Content-Length'] = str(len(compressed_body))
+        await self.send(self.start_message)
+        await self.send({'type': 'http.response.body', 'body': compressed_body})
+        CompressionMiddleware.record_metrics(
+            self.__get_route(), original_size, len(compressed_body), self.cpu_time, self.offloaded, cache_hit
+        )
+
+    async def __send_stream_chunk(self, message: Message):
+        """
+        流式压缩并发送一段响应体
+
+        :param message: 响应体消息
+        :return:
+        """
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+        self.original_size += len(body)
+        compressed_chunk = await self.__compress(self.compressobj.compress, body) if body else b''
+        if not more_body:
+            compressed_chunk += self.compressobj.flush()
+        self.compressed_size += len(compressed_chunk)
+        if compressed_chunk or not more_body:
+            await self.send({'type': 'http.response.body', 'body': compressed_chunk, 'more_body': more_body})
+        if not more_body:
+            CompressionMiddleware.record_metrics(
+                self.__get_route(), self.original_size, self.compressed_size, self.cpu_time, self.offloaded
+            )
+
+    async def __compress(self, compress_func: Callable, body: bytes, *args):
+        """
+        执行压缩并累计CPU时间，超过阈值的数据在线程池中压缩，避免阻塞事件循环
+
+        :param compress_func: 压缩方法
+        :param body: 待压缩数据
+        :return: 压缩结果
+        """
+
+        def compress():
+            start_time = time.thread_time()
+            result = compress_func(body, *args)
+            return result, time.thread_time() - start_time
+
+        if len(body) >= AppConfig.app_compress_offload_size:
+            self.offloaded = True
+            compressed_body, cpu_time = await asyncio.to_thread(compress)
+        else:
+            compressed_body, cpu_time = compress()
+        self.cpu_time += cpu_time
+
+        return compressed_body
+
+    def __set_encoding_headers(self, headers: MutableHeaders):
+        """
+        设置压缩后的响应头，压缩后的内容与原内容不同，强ETag改为弱ETag
+
+        :param headers: 响应头
+        :return:
+        """
+        headers['Content-Encoding'] = self.encoding
+        headers.add_vary_header('Accept-Encoding')
+        etag = headers.get('etag')
+        if etag and not etag.startswith('W/'):
+            headers['ETag'] = f'W/{etag}'
+
+    def __get_route(self):
+        """
+        获取统计使用的路由路径，挂载的子应用按挂载路径统计，未匹配到路由的请求统一归类，避免统计项无限增长
+
+        :return: 路由路径
+        """
+        route_path = getattr(self.scope.get('route'), 'path', None)
+        if route_path:
+            return route_path
+        if 'endpoint' in self.scope:
+            return f'{self.scope["root_path"][len(self.scope.get("app_root_path", "")) :]}/*'
+
+        return 'unmatched'
+
+    @staticmethod
+    def __get_level(body_size: Optional[int]):
+        """
+        根据响应体大小获取压缩级别
+
+        :param body_size: 响应体字节数，流式响应未知长度时为None
+        :return: 压缩级别
+        """
+        for max_size, level_dict in COMPRESS_LEVEL_TIERS:
+            if max_size is None or (body_size is not None and body_size <= max_size):
+                return level_dict
+
+    @staticmethod
+    def __is_compressible(content_type: str):
+        """
+        判断内容类型是否需要压缩，图片、压缩包等已压缩的内容及事件流不压缩
+
+        :param content_type: 响应头Content-Type
+        :return: 是否需要压缩
+        """
+        media_type = content_type.split(';', 1)[0].strip().lower()
+        if media_type.startswith('text/'):
+            return media_type != 'text/event-stream'
+
+        return media_type in COMPRESSIBLE_CONTENT_TYPES or media_type.endswith(('+json', '+xml'))
+
+    @staticmethod
+    def __is_cacheable(headers: Headers):
+        """
+        判断响应的压缩结果是否可以缓存，带ETag或允许公共缓存且未禁止缓存的响应可以缓存
+
+        :param headers: 响应头
+        :return: 是否可以缓存
+        """
+        cache_control = headers.get('cache-control', '').lower()
+        if 'no-store' in cache_control or 'private' in cache_control:
+            return False
+
+        return 'etag' in headers or 'public' in cache_control
+
+
+def add_compression_middleware(app: FastAPI):
+    """
+    添加响应压缩中间件
+
+    :param app: FastAPI对象
+    :return:
+    """
+    app.add_middleware(CompressionMiddleware)
@@ -1,6 +1,6 @@
 from fastapi import FastAPI
 from middlewares.cors_middleware import add_cors_middleware
-from middlewares.gzip_middleware import add_gzip_middleware
+from middlewares.compression_middleware import add_compression_middleware
 from middlewares.trace_middleware import add_trace_middleware
 
 
@@ -10,7 +10,7 @@ def handle_middleware(app: FastAPI):
     """
     # 加载跨域中间件
     add_cors_middleware(app)
-    # 加载gzip压缩中间件
-    add_gzip_middleware(app)
+    # 加载响应压缩中间件
+    add_compression_middleware(app)
     # 加载trace中间件
     add_trace_middleware(app)
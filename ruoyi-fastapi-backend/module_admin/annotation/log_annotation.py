@@ -1,7 +1,6 @@
 import inspect
 import json
 import os
-import requests
 import time
 from datetime import datetime
 from fastapi import Request
@@ -14,8 +13,9 @@ from config.enums import BusinessType
 from config.env import AppConfig
 from exceptions.exception import LoginException, ServiceException, ServiceWarning
 from module_admin.entity.vo.log_vo import LogininforModel, OperLogModel
-from module_admin.service.log_service import LoginLogService, OperationLogService
+from module_admin.service.log_writer_service import LogWriterService
 from module_admin.service.login_service import LoginService
+from utils.ip_location_util import IpLocationUtil
 from utils.log_util import logger
 from utils.response_util import ResponseUtil
 
@@ -44,37 +44,28 @@ class Log:
         self.log_type = log_type
 
     def __call__(self, func):
+        # 在装饰时一次性解析被装饰函数的路径及Request、AsyncSession参数位置，避免每次调用时重复反射
+        func_path = get_function_path(func)
+        request_accessor = FunctionParameterAccessor(func, Request)
+        session_accessor = FunctionParameterAccessor(func, AsyncSession)
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
             start_time = time.time()
-            # 获取被装饰函数的文件路径
-            file_path = inspect.getfile(func)
-            # 获取项目根路径
-            project_root = os.getcwd()
-            # 处理文件路径，去除项目根路径部分
-            relative_path = os.path.relpath(file_path, start=project_root)[0:-2].replace('\\', '.').replace('/', '.')
-            # 获取当前被装饰函数所在路径
-            func_path = f'{relative_path}{func.__name__}()'
             # 获取上下文信息
-            request_name_list = get_function_parameters_name_by_type(func, Request)
-            request = get_function_parameters_value_by_name(func, request_name_list[0], *args, **kwargs)
+            request = request_accessor.get_value(*args, **kwargs)
             token = request.headers.get('Authorization')
-            session_name_list = get_function_parameters_name_by_type(func, AsyncSession)
-            query_db = get_function_parameters_value_by_name(func, session_name_list[0], *args, **kwargs)
+            query_db = session_accessor.get_value(*args, **kwargs)
             request_method = request.method
-            operator_type = 0
-            user_agent = request.headers.get('User-Agent')
-            if 'Windows' in user_agent or 'Macintosh' in user_agent or 'Linux' in user_agent:
-                operator_type = 1
-            if 'Mobile' in user_agent or 'Android' in user_agent or 'iPhone' in user_agent:
-                operator_type = 2
+            user_agent = request.headers.get('User-Agent') or ''
+            operator_type = get_operator_type(user_agent)
             # 获取请求的url
             oper_url = request.url.path
             # 获取请求的ip及ip归属区域
             oper_ip = request.headers.get('X-Forwarded-For')
             oper_location = '内网IP'
             if AppConfig.app_ip_location_query:
-                oper_location = get_ip_location(oper_ip)
+                oper_location = await IpLocationUtil.get_ip_location(oper_ip)
             # 根据不同的请求类型使用不同的方法获取请求参数
             content_type = request.headers.get('Content-Type')
             if content_type and (
@@ -101,13 +92,7 @@ class Log:
             # 此处在登录之前向原始函数传递一些登录信息，用于监测在线用户的相关信息
             login_log = {}
             if self.log_type == 'login':
-                user_agent_info = parse(user_agent)
-                browser = f'{user_agent_info.browser.family}'
-                system_os = f'{user_agent_info.os.family}'
-                if user_agent_info.browser.version != ():
-                    browser += f' {user_agent_info.browser.version[0]}'
-                if user_agent_info.os.version != ():
-                    system_os += f' {user_agent_info.os.version[0]}'
+                browser, system_os = get_browser_and_os(user_agent)
                 login_log = dict(
                     ipaddr=oper_ip,
                     loginLocation=oper_location,
@@ -173,9 +158,12 @@ class Log:
                     login_log['status'] = str(status)
                     login_log['msg'] = result_dict.get('msg')
 
-                    await LoginLogService.add_login_log_services(query_db, LogininforModel(**login_log))
+                    await LogWriterService.enqueue(LogininforModel(**login_log))
             else:
-                current_user = await LoginService.get_current_user(request, token, query_db)
+                # 优先复用接口鉴权时已获取的当前用户信息，避免重复查询
+                current_user = getattr(request.state, 'current_user', None)
+                if current_user is None:
+                    current_user = await LoginService.get_current_user(request, token, query_db)
                 oper_name = current_user.user.user_name
                 dept_name = current_user.user.dept.dept_name if current_user.user.dept else None
                 operation_log = OperLogModel(
@@ -196,66 +184,109 @@ class Log:
                     operTime=oper_time,
                     costTime=int(cost_time),
                 )
-                await OperationLogService.add_operation_log_services(query_db, operation_log)
+                await LogWriterService.enqueue(operation_log)
 
             return result
 
+        wrapper.func_path = func_path
+        wrapper.request_accessor = request_accessor
+        wrapper.session_accessor = session_accessor
+
         return wrapper
 
 
-@lru_cache()
-def get_ip_location(oper_ip: str):
-    """
-    查询ip归属区域
+# 操作类别判断规则，按顺序匹配，后匹配的规则覆盖先匹配的规则（1后台用户 2手机端用户）
+OPERATOR_TYPE_RULES = (
+    (1, ('Windows', 'Macintosh', 'Linux')),
+    (2, ('Mobile', 'Android', 'iPhone')),
+)
+
 
-    :param oper_ip: 需要查询的ip
-    :return: ip归属区域
+class FunctionParameterAccessor:
     """
-    oper_location = '内网IP'
-    try:
-        if oper_ip != '127.0.0.1' and oper_ip != 'localhost':
-            oper_location = '未知'
-            ip_result = requests.get(f'https://qifu-api.baidubce.com/ip/geo/v1/district?ip={oper_ip}')
-            if ip_result.status_code == 200:
-                prov = ip_result.json().get('data').get('prov')
-                city = ip_result.json().get('data').get('city')
-                if prov or city:
-                    oper_location = f'{prov}-{city}'
-    except Exception as e:
-        oper_location = '未知'
-        print(e)
-    return oper_location
-
-
-def get_function_parameters_name_by_type(func: Callable, param_type: Any):
+    函数参数取值器，装饰时解析指定类型参数的名称及位置，调用时直接按关键字或位置取值
     """
-    获取函数指定类型的参数名称
+
+    __slots__ = ('name', 'index', 'default')
+
+    def __init__(self, func: Callable, param_type: Any):
+        """
+        解析函数中第一个指定类型参数的名称、位置及默认值
+
+        :param func: 函数
+        :param param_type: 参数类型
+        :return:
+        """
+        self.name = None
+        self.index = None
+        self.default = None
+        for index, (name, param) in enumerate(inspect.signature(func).parameters.items()):
+            if param.annotation == param_type:
+                self.name = name
+                self.index = index
+                if param.default is not inspect.Parameter.empty:
+                    self.default = param.default
+                break
+
+    def get_value(self, *args, **kwargs):
+        """
+        获取本次调用中该参数的值
+
+        :return: 参数值
+        """
+        if self.name in kwargs:
+            return kwargs[self.name]
+        if self.index is not None and self.index < len(args):
+            return args[self.index]
+        return self.default
+
+
+def get_function_path(func: Callable):
+    """
+    获取函数相对于项目根路径的调用路径
 
     :param func: 函数
-    :param arg_type: 参数类型
-    :return: 函数指定类型的参数名称
+    :return: 函数调用路径
     """
-    # 获取函数的参数信息
-    parameters = inspect.signature(func).parameters
-    # 找到指定类型的参数名称
-    parameters_name_list = []
-    for name, param in parameters.items():
-        if param.annotation == param_type:
-            parameters_name_list.append(name)
-    return parameters_name_list
+    # 获取函数的文件路径
+    file_path = inspect.getfile(func)
+    # 获取项目根路径
+    project_root = os.getcwd()
+    # 处理文件路径，去除项目根路径部分
+    relative_path = os.path.relpath(file_path, start=project_root)[0:-2].replace('\\', '.').replace('/', '.')
+
+    return f'{relative_path}{func.__name__}()'
 
 
-def get_function_parameters_value_by_name(func: Callable, name: str, *args, **kwargs):
+def get_operator_type(user_agent: str):
     """
-    获取函数指定参数的值
+    根据User-Agent判断操作类别
 
-    :param func: 函数
-    :param name: 参数名
-    :return: 参数值
+    :param user_agent: User-Agent
+    :return: 操作类别（0其它 1后台用户 2手机端用户）
+    """
+    operator_type = 0
+    for rule_operator_type, keywords in OPERATOR_TYPE_RULES:
+        if any(keyword in user_agent for keyword in keywords):
+            operator_type = rule_operator_type
+
+    return operator_type
+
+
+@lru_cache(maxsize=1024)
+def get_browser_and_os(user_agent: str):
+    """
+    解析User-Agent中的浏览器及操作系统，相同的User-Agent只解析一次
+
+    :param user_agent: User-Agent
+    :return: 浏览器及操作系统
     """
-    # 获取参数值
-    bound_parameters = inspect.signature(func).bind(*args, **kwargs)
-    bound_parameters.apply_defaults()
-    parameters_value = bound_parameters.arguments.get(name)
+    user_agent_info = parse(user_agent)
+    browser = f'{user_agent_info.browser.family}'
+    system_os = f'{user_agent_info.os.family}'
+    if user_agent_info.browser.version != ():
+        browser += f' {user_agent_info.browser.version[0]}'
+    if user_agent_info.os.version != ():
+        system_os += f' {user_agent_info.os.version[0]}'
 
-    return parameters_value
+    return browser, system_os
@@ -1,12 +1,19 @@
-from fastapi import Depends
-from typing import Optional
+from collections import OrderedDict
+from fastapi import Depends, Request
+from sqlalchemy import ColumnElement, false, or_, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Hashable, Optional, Tuple, Type, Union
+from config.database import Base
+from config.get_db import get_db
+from module_admin.dao.dept_dao import DeptDao
+from module_admin.dao.role_dao import RoleDao
 from module_admin.entity.vo.user_vo import CurrentUserModel
 from module_admin.service.login_service import LoginService
 
 
 class GetDataScope:
     """
-    获取当前用户数据权限对应的查询sql语句
+    获取当前用户数据权限对应的查询条件
     """
 
     DATA_SCOPE_ALL = '1'
@@ -15,18 +22,23 @@ class GetDataScope:
     DATA_SCOPE_DEPT_AND_CHILD = '4'
     DATA_SCOPE_SELF = '5'
 
+    # 查询条件缓存的最大条目数
+    CACHE_MAX_SIZE = 1024
+
+    _cache: 'OrderedDict[Hashable, ColumnElement[bool]]' = OrderedDict()
+
     def __init__(
         self,
-        query_alias: Optional[str] = '',
+        query_alias: Optional[Union[str, Type[Base]]] = '',
         db_alias: Optional[str] = 'db',
         user_alias: Optional[str] = 'user_id',
         dept_alias: Optional[str] = 'dept_id',
     ):
         """
-        获取当前用户数据权限对应的查询sql语句
+        获取当前用户数据权限对应的查询条件
 
-        :param query_alias: 所要查询表对应的sqlalchemy模型名称，默认为''
-        :param db_alias: orm对象别名，默认为'db'
+        :param query_alias: 所要查询表对应的sqlalchemy模型或模型名称，默认为''
+        :param db_alias: orm对象别名，默认为'db'，保留该参数以兼容原有调用方式
         :param user_alias: 用户id字段别名，默认为'user_id'
         :param dept_alias: 部门id字段别名，默认为'dept_id'
         """
@@ -34,42 +46,90 @@ class GetDataScope:
         self.db_alias = db_alias
         self.user_alias = user_alias
         self.dept_alias = dept_alias
+        self._query_model: Optional[Type[Base]] = None
+
+    async def __call__(
+        self,
+        request: Request,
+        current_user: CurrentUserModel = Depends(LoginService.get_current_user),
+        query_db: AsyncSession = Depends(get_db),
+    ) -> ColumnElement[bool]:
+        user = current_user.user
+        role_list = tuple(sorted((role.role_id, role.data_scope) for role in user.role))
+        data_scope_set = {data_scope for _, data_scope in role_list}
+        # 身份信息版本号在角色、部门变更时递增，作为缓存键的一部分可使变更前生成的查询条件自动失效
+        cache_key = (
+            getattr(request.state, 'principal_version', None),
+            self.query_model,
+            self.user_alias,
+            self.dept_alias,
+            user.admin,
+            role_list,
+            user.dept_id,
+            user.user_id if self.DATA_SCOPE_SELF in data_scope_set else None,
+        )
+        data_scope = self._cache.get(cache_key)
+        if data_scope is None:
+            data_scope = await self.__build_data_scope(query_db, current_user, role_list)
+            self._cache[cache_key] = data_scope
+            while len(self._cache) > self.CACHE_MAX_SIZE:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(cache_key)
+
+        return data_scope
 
-    def __call__(self, current_user: CurrentUserModel = Depends(LoginService.get_current_user)):
+    @property
+    def query_model(self) -> Optional[Type[Base]]:
+        """
+        获取所要查询表对应的sqlalchemy模型，模型名称在首次使用时解析
+
+        :return: sqlalchemy模型
+        """
+        if self._query_model is None:
+            if isinstance(self.query_alias, str):
+                self._query_model = next(
+                    (mapper.class_ for mapper in Base.registry.mappers if mapper.class_.__name__ == self.query_alias),
+                    None,
+                )
+            else:
+                self._query_model = self.query_alias
+        return self._query_model
+
+    async def __build_data_scope(
+        self, query_db: AsyncSession, current_user: CurrentUserModel, role_list: Tuple[Tuple[int, str], ...]
+    ) -> ColumnElement[bool]:
+        """
+        根据当前用户角色的数据权限生成查询条件，部门范围在生成时预先计算为部门id集合
+
+        :param query_db: orm对象
+        :param current_user: 当前用户对象
+        :param role_list: 当前用户的角色id及数据权限列表
+        :return: 数据权限对应的查询条件
+        """
         user_id = current_user.user.user_id
         dept_id = current_user.user.dept_id
+        user_column = getattr(self.query_model, self.user_alias, None)
+        dept_column = getattr(self.query_model, self.dept_alias, None)
         custom_data_scope_role_id_list = [
-            item.role_id for item in current_user.user.role if item.data_scope == self.DATA_SCOPE_CUSTOM
+            role_id for role_id, data_scope in role_list if data_scope == self.DATA_SCOPE_CUSTOM
         ]
-        param_sql_list = []
-        for role in current_user.user.role:
-            if current_user.user.admin or role.data_scope == self.DATA_SCOPE_ALL:
-                param_sql_list = ['1 == 1']
-                break
-            elif role.data_scope == self.DATA_SCOPE_CUSTOM:
-                if len(custom_data_scope_role_id_list) > 1:
-                    param_sql_list.append(
-                        f"{self.query_alias}.{self.dept_alias}.in_(select(SysRoleDept.dept_id).where(SysRoleDept.role_id.in_({custom_data_scope_role_id_list}))) if hasattr({self.query_alias}, '{self.dept_alias}') else 1 == 0"
-                    )
-                else:
-                    param_sql_list.append(
-                        f"{self.query_alias}.{self.dept_alias}.in_(select(SysRoleDept.dept_id).where(SysRoleDept.role_id == {role.role_id})) if hasattr({self.query_alias}, '{self.dept_alias}') else 1 == 0"
-                    )
-            elif role.data_scope == self.DATA_SCOPE_DEPT:
-                param_sql_list.append(
-                    f"{self.query_alias}.{self.dept_alias} == {dept_id} if hasattr({self.query_alias}, '{self.dept_alias}') else 1 == 0"
-                )
-            elif role.data_scope == self.DATA_SCOPE_DEPT_AND_CHILD:
-                param_sql_list.append(
-                    f"{self.query_alias}.{self.dept_alias}.in_(select(SysDept.dept_id).where(or_(SysDept.dept_id == {dept_id}, func.find_in_set({dept_id}, SysDept.ancestors)))) if hasattr({self.query_alias}, '{self.dept_alias}') else 1 == 0"
+        data_scope_list = list(dict.fromkeys(data_scope for _, data_scope in role_list))
+        if current_user.user.admin or self.DATA_SCOPE_ALL in data_scope_list:
+            return true()
+        condition_list = []
+        for data_scope in data_scope_list:
+            if data_scope == self.DATA_SCOPE_CUSTOM and dept_column is not None:
+                condition_list.append(
+                    dept_column.in_(await RoleDao.get_role_dept_id_list_dao(query_db, custom_data_scope_role_id_list))
                 )
-            elif role.data_scope == self.DATA_SCOPE_SELF:
-                param_sql_list.append(
-                    f"{self.query_alias}.{self.user_alias} == {user_id} if hasattr({self.query_alias}, '{self.user_alias}') else 1 == 0"
-                )
-            else:
-                param_sql_list.append('1 == 0')
-        param_sql_list = list(dict.fromkeys(param_sql_list))
-        param_sql = f"or_({', '.join(param_sql_list)})"
+            elif data_scope == self.DATA_SCOPE_DEPT and dept_column is not None and dept_id is not None:
+                condition_list.append(dept_column == dept_id)
+            elif data_scope == self.DATA_SCOPE_DEPT_AND_CHILD and dept_column is not None and dept_id is not None:
+                condition_list.append(dept_column.in_(await DeptDao.get_dept_and_child_id_list_dao(query_db, dept_id)))
+            elif data_scope == self.DATA_SCOPE_SELF and user_column is not None:
+                condition_list.append(user_column == user_id)
+        if not condition_list:
+            return false()
 
-        return param_sql
+        return or_(*condition_list)
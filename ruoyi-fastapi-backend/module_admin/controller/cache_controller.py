@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, Request
-from typing import List
+from typing import List, Optional
 from module_admin.aspect.interface_auth import CheckUserInterfaceAuth
-from module_admin.entity.vo.cache_vo import CacheInfoModel, CacheMonitorModel
+from module_admin.entity.vo.cache_vo import CacheInfoModel, CacheKeyPageQueryModel, CacheMonitorModel
 from module_admin.service.cache_service import CacheService
 from module_admin.service.login_service import LoginService
 from utils.log_util import logger
+from utils.page_util import CursorPageResponseModel
 from utils.response_util import ResponseUtil
 
 
@@ -48,6 +49,25 @@ async def get_monitor_cache_key(request: Request, cache_name: str):
     return ResponseUtil.success(data=cache_key_list_result)
 
 
+@cacheController.get(
+    '/getKeyPage/{cache_name}',
+    response_model=CursorPageResponseModel,
+    dependencies=[Depends(CheckUserInterfaceAuth('monitor:cache:list'))],
+)
+async def get_monitor_cache_key_page(
+    request: Request,
+    cache_name: str,
+    cache_key_page_query: CacheKeyPageQueryModel = Depends(CacheKeyPageQueryModel.as_query),
+):
+    # 获取游标分页数据
+    cache_key_page_query_result = await CacheService.get_cache_monitor_cache_key_page_services(
+        request, cache_name, cache_key_page_query
+    )
+    logger.info('获取成功')
+
+    return ResponseUtil.success(model_content=cache_key_page_query_result)
+
+
 @cacheController.get(
     '/getValue/{cache_name}/{cache_key}',
     response_model=CacheInfoModel,
@@ -74,8 +94,8 @@ async def clear_monitor_cache_name(request: Request, cache_name: str):
 @cacheController.delete(
     '/clearCacheKey/{cache_key}', dependencies=[Depends(CheckUserInterfaceAuth('monitor:cache:list'))]
 )
-async def clear_monitor_cache_key(request: Request, cache_key: str):
-    clear_cache_key_result = await CacheService.clear_cache_monitor_cache_key_services(request, cache_key)
+async def clear_monitor_cache_key(request: Request, cache_key: str, cache_name: Optional[str] = None):
+    clear_cache_key_result = await CacheService.clear_cache_monitor_cache_key_services(request, cache_key, cache_name)
     logger.info(clear_cache_key_result.message)
 
     return ResponseUtil.success(msg=clear_cache_key_result.message)
@@ -4,6 +4,7 @@ from fastapi import APIRouter, Request
 from config.enums import RedisInitKeyConfig
 from module_admin.entity.vo.login_vo import CaptchaCode
 from module_admin.service.captcha_service import CaptchaService
+from module_admin.service.config_service import ConfigService
 from utils.response_util import ResponseUtil
 from utils.log_util import logger
 
@@ -15,13 +16,18 @@ captchaController = APIRouter()
 async def get_captcha_image(request: Request):
     captcha_enabled = (
         True
-        if await request.app.state.redis.get(f'{RedisInitKeyConfig.SYS_CONFIG.key}:sys.account.captchaEnabled')
+        if await ConfigService.query_config_list_from_cache_services(
+            request.app.state.redis, 'sys.account.captchaEnabled'
+        )
         == 'true'
         else False
     )
     register_enabled = (
         True
-        if await request.app.state.redis.get(f'{RedisInitKeyConfig.SYS_CONFIG.key}:sys.account.registerUser') == 'true'
+        if await ConfigService.query_config_list_from_cache_services(
+            request.app.state.redis, 'sys.account.registerUser'
+        )
+        == 'true'
         else False
     )
     session_id = str(uuid.uuid4())
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, BackgroundTasks, Depends, File, Query, Request, UploadFile
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, Query, Request, UploadFile
+from module_admin.entity.vo.common_vo import UploadChunkInitModel, UploadChunkTaskModel, UploadResponseModel
+from module_admin.entity.vo.user_vo import CurrentUserModel
 from module_admin.service.common_service import CommonService
 from module_admin.service.login_service import LoginService
+from module_admin.service.upload_service import UploadService
 from utils.log_util import logger
 from utils.response_util import ResponseUtil
 
@@ -15,6 +18,56 @@ async def common_upload(request: Request, file: UploadFile = File(...), overwrit
     return ResponseUtil.success(model_content=upload_result.result)
 
 
+@commonController.post('/upload/chunk', response_model=UploadChunkTaskModel)
+async def common_init_chunk_upload(
+    request: Request,
+    chunk_init: UploadChunkInitModel,
+    current_user: CurrentUserModel = Depends(LoginService.get_current_user),
+):
+    chunk_task_result = await UploadService.init_chunk_upload_services(
+        request.app.state.redis, chunk_init, current_user
+    )
+    logger.info(f'分片上传任务{chunk_task_result.upload_id}创建成功')
+
+    return ResponseUtil.success(data=chunk_task_result)
+
+
+@commonController.get('/upload/chunk/{upload_id}', response_model=UploadChunkTaskModel)
+async def common_get_chunk_upload(
+    request: Request, upload_id: str, current_user: CurrentUserModel = Depends(LoginService.get_current_user)
+):
+    chunk_task_result = await UploadService.get_chunk_upload_services(request.app.state.redis, upload_id, current_user)
+    logger.info('获取成功')
+
+    return ResponseUtil.success(data=chunk_task_result)
+
+
+@commonController.post('/upload/chunk/{upload_id}', response_model=UploadChunkTaskModel)
+async def common_upload_chunk(
+    request: Request,
+    upload_id: str,
+    index: int = Form(),
+    file: UploadFile = File(...),
+    current_user: CurrentUserModel = Depends(LoginService.get_current_user),
+):
+    chunk_task_result = await UploadService.upload_chunk_services(
+        request.app.state.redis, upload_id, index, file, current_user
+    )
+    logger.info(f'分片{index}上传成功')
+
+    return ResponseUtil.success(data=chunk_task_result)
+
+
+@commonController.post('/upload/chunk/{upload_id}/merge', response_model=UploadResponseModel)
+async def common_merge_chunk(
+    request: Request, upload_id: str, current_user: CurrentUserModel = Depends(LoginService.get_current_user)
+):
+    merge_result = await UploadService.merge_chunk_services(request, upload_id, current_user)
+    logger.info('上传成功')
+
+    return ResponseUtil.success(model_content=merge_result)
+
+
 @commonController.get('/download')
 async def common_download(
     request: Request,
@@ -25,7 +78,7 @@ async def common_download(
     download_result = await CommonService.download_services(background_tasks, file_name, delete)
     logger.info(download_result.message)
 
-    return ResponseUtil.streaming(data=download_result.result)
+    return ResponseUtil.file(path=download_result.result, request=request, filename=file_name.rsplit('/', 1)[-1])
 
 
 @commonController.get('/download/resource')
@@ -33,4 +86,6 @@ async def common_download_resource(request: Request, resource: str = Query()):
     download_resource_result = await CommonService.download_resource_services(resource)
     logger.info(download_resource_result.message)
 
-    return ResponseUtil.streaming(data=download_resource_result.result)
+    return ResponseUtil.file(
+        path=download_resource_result.result, request=request, filename=resource.rsplit('/', 1)[-1]
+    )
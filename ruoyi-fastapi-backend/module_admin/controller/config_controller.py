@@ -1,7 +1,8 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, Form, Request
+from fastapi import APIRouter, Depends, Form, Query, Request
 from pydantic_validation_decorator import ValidateFields
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal
 from config.enums import BusinessType
 from config.get_db import get_db
 from module_admin.annotation.log_annotation import Log
@@ -10,7 +11,7 @@ from module_admin.entity.vo.config_vo import ConfigModel, ConfigPageQueryModel,
 from module_admin.entity.vo.user_vo import CurrentUserModel
 from module_admin.service.config_service import ConfigService
 from module_admin.service.login_service import LoginService
-from utils.common_util import bytes2file_response
+from utils.excel_util import ExcelUtil
 from utils.log_util import logger
 from utils.page_util import PageResponseModel
 from utils.response_util import ResponseUtil
@@ -113,11 +114,14 @@ async def query_system_config(request: Request, config_key: str):
 async def export_system_config_list(
     request: Request,
     config_page_query: ConfigPageQueryModel = Form(),
+    export_format: Literal['xlsx', 'csv'] = Query(default='xlsx', alias='exportFormat'),
     query_db: AsyncSession = Depends(get_db),
 ):
     # 获取全量数据
-    config_query_result = await ConfigService.get_config_list_services(query_db, config_page_query, is_page=False)
-    config_export_result = await ConfigService.export_config_list_services(config_query_result)
+    config_query_result = await ConfigService.get_config_list_services(
+        query_db, config_page_query, is_page=False, is_stream=True
+    )
+    config_export_result = await ConfigService.export_config_list_services(config_query_result, export_format)
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(config_export_result))
+    return ResponseUtil.streaming(data=config_export_result, media_type=ExcelUtil.get_export_media_type(export_format))
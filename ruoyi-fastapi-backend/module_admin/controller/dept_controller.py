@@ -1,6 +1,7 @@
 from datetime import datetime
 from fastapi import APIRouter, Depends, Request
 from pydantic_validation_decorator import ValidateFields
+from sqlalchemy import ColumnElement
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from config.enums import BusinessType
@@ -28,7 +29,7 @@ async def get_system_dept_tree_for_edit_option(
     request: Request,
     dept_id: int,
     query_db: AsyncSession = Depends(get_db),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     dept_query = DeptModel(deptId=dept_id)
     dept_query_result = await DeptService.get_dept_for_edit_option_services(query_db, dept_query, data_scope_sql)
@@ -44,7 +45,7 @@ async def get_system_dept_list(
     request: Request,
     dept_query: DeptQueryModel = Depends(DeptQueryModel.as_query),
     query_db: AsyncSession = Depends(get_db),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     dept_query_result = await DeptService.get_dept_list_services(query_db, dept_query, data_scope_sql)
     logger.info('获取成功')
@@ -79,7 +80,7 @@ async def edit_system_dept(
     edit_dept: DeptModel,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     if not current_user.user.admin:
         await DeptService.check_dept_data_scope_services(query_db, edit_dept.dept_id, data_scope_sql)
@@ -98,7 +99,7 @@ async def delete_system_dept(
     dept_ids: str,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     dept_id_list = dept_ids.split(',') if dept_ids else []
     if dept_id_list:
@@ -122,7 +123,7 @@ async def query_detail_system_dept(
     dept_id: int,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     if not current_user.user.admin:
         await DeptService.check_dept_data_scope_services(query_db, dept_id, data_scope_sql)
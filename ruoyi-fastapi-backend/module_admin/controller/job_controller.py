@@ -1,7 +1,8 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, Form, Request
+from fastapi import APIRouter, Depends, Form, Query, Request
 from pydantic_validation_decorator import ValidateFields
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal
 from config.enums import BusinessType
 from config.get_db import get_db
 from module_admin.annotation.log_annotation import Log
@@ -18,7 +19,7 @@ from module_admin.entity.vo.user_vo import CurrentUserModel
 from module_admin.service.job_log_service import JobLogService
 from module_admin.service.job_service import JobService
 from module_admin.service.login_service import LoginService
-from utils.common_util import bytes2file_response
+from utils.excel_util import ExcelUtil
 from utils.log_util import logger
 from utils.page_util import PageResponseModel
 from utils.response_util import ResponseUtil
@@ -133,14 +134,15 @@ async def query_detail_system_job(request: Request, job_id: int, query_db: Async
 async def export_system_job_list(
     request: Request,
     job_page_query: JobPageQueryModel = Form(),
+    export_format: Literal['xlsx', 'csv'] = Query(default='xlsx', alias='exportFormat'),
     query_db: AsyncSession = Depends(get_db),
 ):
     # 获取全量数据
-    job_query_result = await JobService.get_job_list_services(query_db, job_page_query, is_page=False)
-    job_export_result = await JobService.export_job_list_services(request, job_query_result)
+    job_query_result = await JobService.get_job_list_services(query_db, job_page_query, is_page=False, is_stream=True)
+    job_export_result = await JobService.export_job_list_services(request, job_query_result, export_format)
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(job_export_result))
+    return ResponseUtil.streaming(data=job_export_result, media_type=ExcelUtil.get_export_media_type(export_format))
 
 
 @jobController.get(
@@ -184,11 +186,16 @@ async def delete_system_job_log(request: Request, job_log_ids: str, query_db: As
 async def export_system_job_log_list(
     request: Request,
     job_log_page_query: JobLogPageQueryModel = Form(),
+    export_format: Literal['xlsx', 'csv'] = Query(default='xlsx', alias='exportFormat'),
     query_db: AsyncSession = Depends(get_db),
 ):
     # 获取全量数据
-    job_log_query_result = await JobLogService.get_job_log_list_services(query_db, job_log_page_query, is_page=False)
-    job_log_export_result = await JobLogService.export_job_log_list_services(request, job_log_query_result)
+    job_log_query_result = await JobLogService.get_job_log_list_services(
+        query_db, job_log_page_query, is_page=False, is_stream=True
+    )
+    job_log_export_result = await JobLogService.export_job_log_list_services(
+        request, job_log_query_result, export_format
+    )
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(job_log_export_result))
+    return ResponseUtil.streaming(data=job_log_export_result, media_type=ExcelUtil.get_export_media_type(export_format))
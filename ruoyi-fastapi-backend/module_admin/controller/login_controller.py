@@ -11,7 +11,9 @@ from module_admin.annotation.log_annotation import Log
 from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.login_vo import UserLogin, UserRegister, Token
 from module_admin.entity.vo.user_vo import CurrentUserModel, EditUserModel
+from module_admin.service.config_service import ConfigService
 from module_admin.service.login_service import CustomOAuth2PasswordRequestForm, LoginService, oauth2_scheme
+from module_admin.service.online_service import OnlineService
 from module_admin.service.user_service import UserService
 from utils.log_util import logger
 from utils.response_util import ResponseUtil
@@ -27,7 +29,9 @@ async def login(
 ):
     captcha_enabled = (
         True
-        if await request.app.state.redis.get(f'{RedisInitKeyConfig.SYS_CONFIG.key}:sys.account.captchaEnabled')
+        if await ConfigService.query_config_list_from_cache_services(
+            request.app.state.redis, 'sys.account.captchaEnabled'
+        )
         == 'true'
         else False
     )
@@ -42,29 +46,25 @@ async def login(
     result = await LoginService.authenticate_user(request, query_db, user)
     access_token_expires = timedelta(minutes=JwtConfig.jwt_expire_minutes)
     session_id = str(uuid.uuid4())
-    access_token = await LoginService.create_access_token(
-        data={
-            'user_id': str(result[0].user_id),
-            'user_name': result[0].user_name,
-            'dept_name': result[1].dept_name if result[1] else None,
-            'session_id': session_id,
-            'login_info': user.login_info,
-        },
-        expires_delta=access_token_expires,
-    )
+    token_payload = {
+        'user_id': str(result[0].user_id),
+        'user_name': result[0].user_name,
+        'dept_name': result[1].dept_name if result[1] else None,
+        'session_id': session_id,
+        'login_info': user.login_info,
+    }
+    access_token = await LoginService.create_access_token(data=token_payload, expires_delta=access_token_expires)
     if AppConfig.app_same_time_login:
-        await request.app.state.redis.set(
-            f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{session_id}',
-            access_token,
-            ex=timedelta(minutes=JwtConfig.jwt_redis_expire_minutes),
-        )
+        token_id = session_id
     else:
         # 此方法可实现同一账号同一时间只能登录一次
-        await request.app.state.redis.set(
-            f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{result[0].user_id}',
-            access_token,
-            ex=timedelta(minutes=JwtConfig.jwt_redis_expire_minutes),
-        )
+        token_id = str(result[0].user_id)
+    await request.app.state.redis.set(
+        f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{token_id}',
+        access_token,
+        ex=timedelta(minutes=JwtConfig.jwt_redis_expire_minutes),
+    )
+    await OnlineService.register_online_session(request.app.state.redis, token_id, token_payload)
     await UserService.edit_user_services(
         query_db, EditUserModel(userId=result[0].user_id, loginDate=datetime.now(), type='status')
     )
@@ -93,9 +93,9 @@ async def get_login_user_routers(
     query_db: AsyncSession = Depends(get_db),
 ):
     logger.info('获取成功')
-    user_routers = await LoginService.get_current_user_routers(current_user.user.user_id, query_db)
+    user_routers = await LoginService.get_current_user_routers(request, current_user, query_db)
 
-    return ResponseUtil.success(data=user_routers)
+    return ResponseUtil.success(serialized_data=user_routers)
 
 
 @loginController.post('/register', response_model=CrudResponseModel)
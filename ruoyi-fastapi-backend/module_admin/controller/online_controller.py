@@ -21,13 +21,11 @@ onlineController = APIRouter(prefix='/monitor/online', dependencies=[Depends(Log
 async def get_monitor_online_list(
     request: Request, online_page_query: OnlineQueryModel = Depends(OnlineQueryModel.as_query)
 ):
-    # 获取全量数据
+    # 未传入分页参数时获取全量数据
     online_query_result = await OnlineService.get_online_list_services(request, online_page_query)
     logger.info('获取成功')
 
-    return ResponseUtil.success(
-        model_content=PageResponseModel(rows=online_query_result, total=len(online_query_result))
-    )
+    return ResponseUtil.success(model_content=online_query_result)
 
 
 @onlineController.delete('/{token_ids}', dependencies=[Depends(CheckUserInterfaceAuth('monitor:online:forceLogout'))])
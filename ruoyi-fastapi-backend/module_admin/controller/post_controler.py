@@ -1,7 +1,8 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, Form, Request
+from fastapi import APIRouter, Depends, Form, Query, Request
 from pydantic_validation_decorator import ValidateFields
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal
 from config.enums import BusinessType
 from config.get_db import get_db
 from module_admin.annotation.log_annotation import Log
@@ -10,7 +11,7 @@ from module_admin.service.login_service import LoginService
 from module_admin.service.post_service import PostService
 from module_admin.entity.vo.post_vo import DeletePostModel, PostModel, PostPageQueryModel
 from module_admin.entity.vo.user_vo import CurrentUserModel
-from utils.common_util import bytes2file_response
+from utils.excel_util import ExcelUtil
 from utils.log_util import logger
 from utils.page_util import PageResponseModel
 from utils.response_util import ResponseUtil
@@ -95,11 +96,14 @@ async def query_detail_system_post(request: Request, post_id: int, query_db: Asy
 async def export_system_post_list(
     request: Request,
     post_page_query: PostPageQueryModel = Form(),
+    export_format: Literal['xlsx', 'csv'] = Query(default='xlsx', alias='exportFormat'),
     query_db: AsyncSession = Depends(get_db),
 ):
     # 获取全量数据
-    post_query_result = await PostService.get_post_list_services(query_db, post_page_query, is_page=False)
-    post_export_result = await PostService.export_post_list_services(post_query_result)
+    post_query_result = await PostService.get_post_list_services(
+        query_db, post_page_query, is_page=False, is_stream=True
+    )
+    post_export_result = await PostService.export_post_list_services(post_query_result, export_format)
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(post_export_result))
+    return ResponseUtil.streaming(data=post_export_result, media_type=ExcelUtil.get_export_media_type(export_format))
@@ -1,7 +1,9 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, Form, Request
+from fastapi import APIRouter, Depends, Form, Query, Request
 from pydantic_validation_decorator import ValidateFields
+from sqlalchemy import ColumnElement
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal
 from config.enums import BusinessType
 from config.get_db import get_db
 from module_admin.annotation.log_annotation import Log
@@ -14,7 +16,7 @@ from module_admin.service.dept_service import DeptService
 from module_admin.service.login_service import LoginService
 from module_admin.service.role_service import RoleService
 from module_admin.service.user_service import UserService
-from utils.common_util import bytes2file_response
+from utils.excel_util import ExcelUtil
 from utils.log_util import logger
 from utils.page_util import PageResponseModel
 from utils.response_util import ResponseUtil
@@ -28,7 +30,7 @@ async def get_system_role_dept_tree(
     request: Request,
     role_id: int,
     query_db: AsyncSession = Depends(get_db),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     dept_query_result = await DeptService.get_dept_tree_services(query_db, DeptModel(**{}), data_scope_sql)
     role_dept_query_result = await RoleService.get_role_dept_tree_services(query_db, role_id)
@@ -45,7 +47,7 @@ async def get_system_role_list(
     request: Request,
     role_page_query: RolePageQueryModel = Depends(RolePageQueryModel.as_query),
     query_db: AsyncSession = Depends(get_db),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     role_page_query_result = await RoleService.get_role_list_services(
         query_db, role_page_query, data_scope_sql, is_page=True
@@ -82,7 +84,7 @@ async def edit_system_role(
     edit_role: AddRoleModel,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     await RoleService.check_role_allowed_services(edit_role)
     if not current_user.user.admin:
@@ -102,7 +104,7 @@ async def edit_system_role_datascope(
     role_data_scope: AddRoleModel,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     await RoleService.check_role_allowed_services(role_data_scope)
     if not current_user.user.admin:
@@ -128,7 +130,7 @@ async def delete_system_role(
     role_ids: str,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     role_id_list = role_ids.split(',') if role_ids else []
     if role_id_list:
@@ -151,7 +153,7 @@ async def query_detail_system_role(
     role_id: int,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     if not current_user.user.admin:
         await RoleService.check_role_data_scope_services(query_db, str(role_id), data_scope_sql)
@@ -166,17 +168,18 @@ async def query_detail_system_role(
 async def export_system_role_list(
     request: Request,
     role_page_query: RolePageQueryModel = Form(),
+    export_format: Literal['xlsx', 'csv'] = Query(default='xlsx', alias='exportFormat'),
     query_db: AsyncSession = Depends(get_db),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     # 获取全量数据
     role_query_result = await RoleService.get_role_list_services(
-        query_db, role_page_query, data_scope_sql, is_page=False
+        query_db, role_page_query, data_scope_sql, is_page=False, is_stream=True
     )
-    role_export_result = await RoleService.export_role_list_services(role_query_result)
+    role_export_result = await RoleService.export_role_list_services(role_query_result, export_format)
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(role_export_result))
+    return ResponseUtil.streaming(data=role_export_result, media_type=ExcelUtil.get_export_media_type(export_format))
 
 
 @roleController.put('/changeStatus', dependencies=[Depends(CheckUserInterfaceAuth('system:role:edit'))])
@@ -186,7 +189,7 @@ async def reset_system_role_status(
     change_role: AddRoleModel,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     await RoleService.check_role_allowed_services(change_role)
     if not current_user.user.admin:
@@ -213,7 +216,7 @@ async def get_system_allocated_user_list(
     request: Request,
     user_role: UserRolePageQueryModel = Depends(UserRolePageQueryModel.as_query),
     query_db: AsyncSession = Depends(get_db),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
     role_user_allocated_page_query_result = await RoleService.get_role_user_allocated_list_services(
         query_db, user_role, data_scope_sql, is_page=True
@@ -232,7 +235,7 @@ async def get_system_unallocated_user_list(
     request: Request,
     user_role: UserRolePageQueryModel = Depends(UserRolePageQueryModel.as_query),
     query_db: AsyncSession = Depends(get_db),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
     role_user_unallocated_page_query_result = await RoleService.get_role_user_unallocated_list_services(
         query_db, user_role, data_scope_sql, is_page=True
@@ -249,7 +252,7 @@ async def add_system_role_user(
     add_role_user: CrudUserRoleModel = Depends(CrudUserRoleModel.as_query),
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     if not current_user.user.admin:
         await RoleService.check_role_data_scope_services(query_db, str(add_role_user.role_id), data_scope_sql)
@@ -1,6 +1,7 @@
 import os
 from datetime import datetime
 from fastapi import APIRouter, Depends, File, Form, Query, Request, UploadFile
+from sqlalchemy import ColumnElement
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Literal, Optional, Union
 from pydantic_validation_decorator import ValidateFields
@@ -20,6 +21,7 @@ from module_admin.entity.vo.user_vo import (
     ResetPasswordModel,
     ResetUserModel,
     UserDetailModel,
+    UserImportTaskModel,
     UserInfoModel,
     UserModel,
     UserPageQueryModel,
@@ -29,9 +31,11 @@ from module_admin.entity.vo.user_vo import (
 )
 from module_admin.service.login_service import LoginService
 from module_admin.service.user_service import UserService
+from module_admin.service.user_import_service import UserImportService
 from module_admin.service.role_service import RoleService
 from module_admin.service.dept_service import DeptService
 from utils.common_util import bytes2file_response
+from utils.excel_util import ExcelUtil
 from utils.log_util import logger
 from utils.page_util import PageResponseModel
 from utils.pwd_util import PwdUtil
@@ -44,7 +48,9 @@ userController = APIRouter(prefix='/system/user', dependencies=[Depends(LoginSer
 
 @userController.get('/deptTree', dependencies=[Depends(CheckUserInterfaceAuth('system:user:list'))])
 async def get_system_dept_tree(
-    request: Request, query_db: AsyncSession = Depends(get_db), data_scope_sql: str = Depends(GetDataScope('SysDept'))
+    request: Request,
+    query_db: AsyncSession = Depends(get_db),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     dept_query_result = await DeptService.get_dept_tree_services(query_db, DeptModel(**{}), data_scope_sql)
     logger.info('获取成功')
@@ -59,7 +65,7 @@ async def get_system_user_list(
     request: Request,
     user_page_query: UserPageQueryModel = Depends(UserPageQueryModel.as_query),
     query_db: AsyncSession = Depends(get_db),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
     # 获取分页数据
     user_page_query_result = await UserService.get_user_list_services(
@@ -78,15 +84,15 @@ async def add_system_user(
     add_user: AddUserModel,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    dept_data_scope_sql: str = Depends(GetDataScope('SysDept')),
-    role_data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    dept_data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
+    role_data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     if not current_user.user.admin:
         await DeptService.check_dept_data_scope_services(query_db, add_user.dept_id, dept_data_scope_sql)
         await RoleService.check_role_data_scope_services(
             query_db, ','.join([str(item) for item in add_user.role_ids]), role_data_scope_sql
         )
-    add_user.password = PwdUtil.get_password_hash(add_user.password)
+    add_user.password = await PwdUtil.async_get_password_hash(add_user.password)
     add_user.create_by = current_user.user.user_name
     add_user.create_time = datetime.now()
     add_user.update_by = current_user.user.user_name
@@ -105,9 +111,9 @@ async def edit_system_user(
     edit_user: EditUserModel,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    user_data_scope_sql: str = Depends(GetDataScope('SysUser')),
-    dept_data_scope_sql: str = Depends(GetDataScope('SysDept')),
-    role_data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    user_data_scope_sql: ColumnElement = Depends(GetDataScope('SysUser')),
+    dept_data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
+    role_data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     await UserService.check_user_allowed_services(edit_user)
     if not current_user.user.admin:
@@ -131,7 +137,7 @@ async def delete_system_user(
     user_ids: str,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
     user_id_list = user_ids.split(',') if user_ids else []
     if user_id_list:
@@ -157,14 +163,14 @@ async def reset_system_user_pwd(
     reset_user: EditUserModel,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
     await UserService.check_user_allowed_services(reset_user)
     if not current_user.user.admin:
         await UserService.check_user_data_scope_services(query_db, reset_user.user_id, data_scope_sql)
     edit_user = EditUserModel(
         userId=reset_user.user_id,
-        password=PwdUtil.get_password_hash(reset_user.password),
+        password=await PwdUtil.async_get_password_hash(reset_user.password),
         updateBy=current_user.user.user_name,
         updateTime=datetime.now(),
         type='pwd',
@@ -182,7 +188,7 @@ async def change_system_user_status(
     change_user: EditUserModel,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
     await UserService.check_user_allowed_services(change_user)
     if not current_user.user.admin:
@@ -223,7 +229,7 @@ async def query_detail_system_user(
     user_id: Optional[Union[int, Literal['']]] = '',
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
     if user_id and not current_user.user.admin:
         await UserService.check_user_data_scope_services(query_db, user_id, data_scope_sql)
@@ -313,23 +319,58 @@ async def reset_system_user_password(
     return ResponseUtil.success(msg=reset_user_result.message)
 
 
-@userController.post('/importData', dependencies=[Depends(CheckUserInterfaceAuth('system:user:import'))])
+@userController.post(
+    '/importData',
+    response_model=UserImportTaskModel,
+    dependencies=[Depends(CheckUserInterfaceAuth('system:user:import'))],
+)
 @Log(title='用户管理', business_type=BusinessType.IMPORT)
 async def batch_import_system_user(
     request: Request,
     file: UploadFile = File(...),
     update_support: bool = Query(alias='updateSupport'),
-    query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    user_data_scope_sql: str = Depends(GetDataScope('SysUser')),
-    dept_data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    user_data_scope_sql: ColumnElement = Depends(GetDataScope('SysUser')),
+    dept_data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
+):
+    import_task_result = await UserImportService.submit_import_task_services(
+        request, file, update_support, current_user, user_data_scope_sql, dept_data_scope_sql
+    )
+    logger.info(f'用户导入任务{import_task_result.task_id}提交成功')
+
+    return ResponseUtil.success(
+        msg=f'导入任务已提交，共{import_task_result.total}条数据，正在后台导入', data=import_task_result
+    )
+
+
+@userController.get(
+    '/importData/{task_id}',
+    response_model=UserImportTaskModel,
+    dependencies=[Depends(CheckUserInterfaceAuth('system:user:import'))],
+)
+async def query_system_user_import_task(
+    request: Request, task_id: str, current_user: CurrentUserModel = Depends(LoginService.get_current_user)
+):
+    import_task_result = await UserImportService.get_import_task_services(
+        request.app.state.redis, task_id, current_user
+    )
+    logger.info('获取成功')
+
+    return ResponseUtil.success(data=import_task_result)
+
+
+@userController.post(
+    '/importData/{task_id}/errorReport', dependencies=[Depends(CheckUserInterfaceAuth('system:user:import'))]
+)
+async def export_system_user_import_error(
+    request: Request, task_id: str, current_user: CurrentUserModel = Depends(LoginService.get_current_user)
 ):
-    batch_import_result = await UserService.batch_import_user_services(
-        request, query_db, file, update_support, current_user, user_data_scope_sql, dept_data_scope_sql
+    import_error_result = await UserImportService.export_import_error_services(
+        request.app.state.redis, task_id, current_user
     )
-    logger.info(batch_import_result.message)
+    logger.info('导出成功')
 
-    return ResponseUtil.success(msg=batch_import_result.message)
+    return ResponseUtil.streaming(data=bytes2file_response(import_error_result))
 
 
 @userController.post('/importTemplate', dependencies=[Depends(CheckUserInterfaceAuth('system:user:import'))])
@@ -345,17 +386,18 @@ async def export_system_user_template(request: Request, query_db: AsyncSession =
 async def export_system_user_list(
     request: Request,
     user_page_query: UserPageQueryModel = Form(),
+    export_format: Literal['xlsx', 'csv'] = Query(default='xlsx', alias='exportFormat'),
     query_db: AsyncSession = Depends(get_db),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
     # 获取全量数据
     user_query_result = await UserService.get_user_list_services(
-        query_db, user_page_query, data_scope_sql, is_page=False
+        query_db, user_page_query, data_scope_sql, is_page=False, is_stream=True
     )
-    user_export_result = await UserService.export_user_list_services(user_query_result)
+    user_export_result = await UserService.export_user_list_services(user_query_result, export_format)
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(user_export_result))
+    return ResponseUtil.streaming(data=user_export_result, media_type=ExcelUtil.get_export_media_type(export_format))
 
 
 @userController.get(
@@ -385,8 +427,8 @@ async def update_system_role_user(
     role_ids: str = Query(alias='roleIds'),
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    user_data_scope_sql: str = Depends(GetDataScope('SysUser')),
-    role_data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    user_data_scope_sql: ColumnElement = Depends(GetDataScope('SysUser')),
+    role_data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     if not current_user.user.admin:
         await UserService.check_user_data_scope_services(query_db, user_id, user_data_scope_sql)
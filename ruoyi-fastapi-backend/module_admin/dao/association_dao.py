@@ -0,0 +1,160 @@
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+from typing import Iterable, List, Optional, Set, Union
+
+
+class AssociationDao:
+    """
+    关联表批量维护数据库操作层
+    比对期望的关联集合与数据库中当前的关联集合，新增部分以一条多行INSERT语句写入，移除部分以一条DELETE ... IN语句删除
+    """
+
+    @classmethod
+    async def get_target_id_set(
+        cls,
+        db: AsyncSession,
+        owner_column: InstrumentedAttribute,
+        owner_id: int,
+        target_column: InstrumentedAttribute,
+        target_id_list: Optional[List[int]] = None,
+    ):
+        """
+        获取关联主体当前关联的目标id集合
+
+        :param db: orm对象
+        :param owner_column: 关联主体id字段，如SysRoleMenu.role_id
+        :param owner_id: 关联主体id
+        :param target_column: 关联目标id字段，如SysRoleMenu.menu_id
+        :param target_id_list: 需要查询的目标id列表，为None时查询全部
+        :return: 当前关联的目标id集合
+        """
+        query = select(target_column).where(owner_column == owner_id)
+        if target_id_list is not None:
+            query = query.where(target_column.in_(target_id_list))
+
+        return set((await db.execute(query)).scalars().all())
+
+    @classmethod
+    async def sync_association_dao(
+        cls,
+        db: AsyncSession,
+        owner_column: InstrumentedAttribute,
+        owner_id: int,
+        target_column: InstrumentedAttribute,
+        target_id_list: Optional[Iterable[Union[int, str]]],
+    ):
+        """
+        将关联主体的关联关系同步为期望的目标id集合，仅新增缺少的关联并删除多余的关联
+
+        :param db: orm对象
+        :param owner_column: 关联主体id字段
+        :param owner_id: 关联主体id
+        :param target_column: 关联目标id字段
+        :param target_id_list: 期望的目标id列表，为空时删除全部关联
+        :return: 新增的目标id集合及删除的目标id集合
+        """
+        desired_id_set = cls.__to_id_set(target_id_list)
+        current_id_set = await cls.get_target_id_set(db, owner_column, owner_id, target_column)
+        removed_id_set = current_id_set - desired_id_set
+        added_id_set = desired_id_set - current_id_set
+        if removed_id_set:
+            await db.execute(
+                delete(owner_column.class_).where(owner_column == owner_id, target_column.in_(removed_id_set))
+            )
+        await cls.__insert_association(db, owner_column, owner_id, target_column, added_id_set)
+
+        return added_id_set, removed_id_set
+
+    @classmethod
+    async def append_association_dao(
+        cls,
+        db: AsyncSession,
+        owner_column: InstrumentedAttribute,
+        owner_id: int,
+        target_column: InstrumentedAttribute,
+        target_id_list: Optional[Iterable[Union[int, str]]],
+    ):
+        """
+        为关联主体追加关联关系，已存在的关联保持不变
+
+        :param db: orm对象
+        :param owner_column: 关联主体id字段
+        :param owner_id: 关联主体id
+        :param target_column: 关联目标id字段
+        :param target_id_list: 需要追加的目标id列表
+        :return: 新增的目标id集合
+        """
+        desired_id_set = cls.__to_id_set(target_id_list)
+        if not desired_id_set:
+            return set()
+        current_id_set = await cls.get_target_id_set(db, owner_column, owner_id, target_column, list(desired_id_set))
+        added_id_set = desired_id_set - current_id_set
+        await cls.__insert_association(db, owner_column, owner_id, target_column, added_id_set)
+
+        return added_id_set
+
+    @classmethod
+    async def delete_association_dao(
+        cls,
+        db: AsyncSession,
+        owner_column: InstrumentedAttribute,
+        owner_id_list: Iterable[Union[int, str]],
+        target_column: Optional[InstrumentedAttribute] = None,
+        target_id_list: Optional[Iterable[Union[int, str]]] = None,
+    ):
+        """
+        以一条DELETE ... IN语句删除多个关联主体的关联关系
+
+        :param db: orm对象
+        :param owner_column: 关联主体id字段
+        :param owner_id_list: 关联主体id列表
+        :param target_column: 关联目标id字段，为None时删除关联主体的全部关联
+        :param target_id_list: 需要删除的目标id列表
+        :return:
+        """
+        owner_id_set = cls.__to_id_set(owner_id_list)
+        if not owner_id_set:
+            return
+        query = delete(owner_column.class_).where(owner_column.in_(owner_id_set))
+        if target_column is not None:
+            target_id_set = cls.__to_id_set(target_id_list)
+            if not target_id_set:
+                return
+            query = query.where(target_column.in_(target_id_set))
+        await db.execute(query)
+
+    @classmethod
+    async def __insert_association(
+        cls,
+        db: AsyncSession,
+        owner_column: InstrumentedAttribute,
+        owner_id: int,
+        target_column: InstrumentedAttribute,
+        target_id_set: Set[int],
+    ):
+        """
+        以executemany方式写入关联关系，语句只编译一次，MySQL驱动会将其改写为一条多行INSERT语句
+
+        :param db: orm对象
+        :param owner_column: 关联主体id字段
+        :param owner_id: 关联主体id
+        :param target_column: 关联目标id字段
+        :param target_id_set: 需要新增的目标id集合
+        :return:
+        """
+        if target_id_set:
+            await db.execute(
+                insert(owner_column.class_),
+                [{owner_column.key: owner_id, target_column.key: target_id} for target_id in sorted(target_id_set)],
+            )
+
+    @staticmethod
+    def __to_id_set(id_list: Optional[Iterable[Union[int, str]]]):
+        """
+        将id列表转换为去重后的整数id集合
+
+        :param id_list: id列表，兼容前端传入的字符串id
+        :return: 整数id集合
+        """
+        return {int(item_id) for item_id in id_list or [] if item_id is not None and str(item_id) != ''}
@@ -49,13 +49,16 @@ class ConfigDao:
         return config_info
 
     @classmethod
-    async def get_config_list(cls, db: AsyncSession, query_object: ConfigPageQueryModel, is_page: bool = False):
+    async def get_config_list(
+        cls, db: AsyncSession, query_object: ConfigPageQueryModel, is_page: bool = False, is_stream: bool = False
+    ):
         """
         根据查询参数获取参数配置列表信息
 
         :param db: orm对象
         :param query_object: 查询参数对象
         :param is_page: 是否开启分页
+        :param is_stream: 是否使用服务端游标分批读取全部数据，开启时返回分批数据列表的异步迭代器
         :return: 参数配置列表信息对象
         """
         query = (
@@ -74,6 +77,8 @@ class ConfigDao:
             .order_by(SysConfig.config_id)
             .distinct()
         )
+        if is_stream:
+            return PageUtil.stream(db, query)
         config_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
 
         return config_list
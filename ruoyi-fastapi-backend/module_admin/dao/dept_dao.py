@@ -1,9 +1,9 @@
-from sqlalchemy import bindparam, func, or_, select, update  # noqa: F401
+from sqlalchemy import ColumnElement, bindparam, delete, func, insert, literal, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 from sqlalchemy.util import immutabledict
-from typing import List
-from module_admin.entity.do.dept_do import SysDept
-from module_admin.entity.do.role_do import SysRoleDept  # noqa: F401
+from typing import Dict, List
+from module_admin.entity.do.dept_do import SysDept, SysDeptClosure
 from module_admin.entity.do.user_do import SysUser
 from module_admin.entity.vo.dept_vo import DeptModel
 
@@ -68,13 +68,13 @@ class DeptDao:
         return dept_info
 
     @classmethod
-    async def get_dept_info_for_edit_option(cls, db: AsyncSession, dept_info: DeptModel, data_scope_sql: str):
+    async def get_dept_info_for_edit_option(cls, db: AsyncSession, dept_info: DeptModel, data_scope_sql: ColumnElement):
         """
         获取部门编辑对应的在用部门列表信息
 
         :param db: orm对象
         :param dept_info: 部门对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_sql: 数据权限对应的查询条件
         :return: 部门列表信息
         """
         dept_result = (
@@ -84,11 +84,11 @@ class DeptDao:
                     .where(
                         SysDept.dept_id != dept_info.dept_id,
                         ~SysDept.dept_id.in_(
-                            select(SysDept.dept_id).where(func.find_in_set(dept_info.dept_id, SysDept.ancestors))
+                            select(SysDeptClosure.descendant_id).where(SysDeptClosure.ancestor_id == dept_info.dept_id)
                         ),
                         SysDept.del_flag == '0',
                         SysDept.status == '0',
-                        eval(data_scope_sql),
+                        data_scope_sql,
                     )
                     .order_by(SysDept.order_num)
                     .distinct()
@@ -110,19 +110,44 @@ class DeptDao:
         :return: 子部门信息列表
         """
         dept_result = (
-            (await db.execute(select(SysDept).where(func.find_in_set(dept_id, SysDept.ancestors)))).scalars().all()
+            (
+                await db.execute(
+                    select(SysDept)
+                    .join(SysDeptClosure, SysDeptClosure.descendant_id == SysDept.dept_id)
+                    .where(SysDeptClosure.ancestor_id == dept_id, SysDeptClosure.depth > 0)
+                )
+            )
+            .scalars()
+            .all()
         )
 
         return dept_result
 
     @classmethod
-    async def get_dept_list_for_tree(cls, db: AsyncSession, dept_info: DeptModel, data_scope_sql: str):
+    async def get_dept_and_child_id_list_dao(cls, db: AsyncSession, dept_id: int):
+        """
+        根据部门id查询当前部门及其所有子部门的id列表
+
+        :param db: orm对象
+        :param dept_id: 部门id
+        :return: 当前部门及其所有子部门的id列表
+        """
+        dept_id_list = (
+            (await db.execute(select(SysDeptClosure.descendant_id).where(SysDeptClosure.ancestor_id == dept_id)))
+            .scalars()
+            .all()
+        )
+
+        return list(dept_id_list)
+
+    @classmethod
+    async def get_dept_list_for_tree(cls, db: AsyncSession, dept_info: DeptModel, data_scope_sql: ColumnElement):
         """
         获取所有在用部门列表信息
 
         :param db: orm对象
         :param dept_info: 部门对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_sql: 数据权限对应的查询条件
         :return: 在用部门列表信息
         """
         dept_result = (
@@ -133,7 +158,7 @@ class DeptDao:
                         SysDept.status == '0',
                         SysDept.del_flag == '0',
                         SysDept.dept_name.like(f'%{dept_info.dept_name}%') if dept_info.dept_name else True,
-                        eval(data_scope_sql),
+                        data_scope_sql,
                     )
                     .order_by(SysDept.order_num)
                     .distinct()
@@ -146,13 +171,39 @@ class DeptDao:
         return dept_result
 
     @classmethod
-    async def get_dept_list(cls, db: AsyncSession, page_object: DeptModel, data_scope_sql: str):
+    async def get_dept_id_list_by_data_scope(
+        cls, db: AsyncSession, dept_id_list: List[int], data_scope_sql: ColumnElement
+    ):
+        """
+        根据部门id列表批量获取存在且有数据权限的部门id
+
+        :param db: orm对象
+        :param dept_id_list: 部门id列表
+        :param data_scope_sql: 数据权限对应的查询条件
+        :return: 存在且有数据权限的部门id列表
+        """
+        dept_id_list = (
+            (
+                await db.execute(
+                    select(SysDept.dept_id).where(
+                        SysDept.del_flag == '0', SysDept.dept_id.in_(dept_id_list), data_scope_sql
+                    )
+                )
+            )
+            .scalars()
+            .all()
+        )
+
+        return dept_id_list
+
+    @classmethod
+    async def get_dept_list(cls, db: AsyncSession, page_object: DeptModel, data_scope_sql: ColumnElement):
         """
         根据查询参数获取部门列表信息
 
         :param db: orm对象
         :param page_object: 不分页查询参数对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_sql: 数据权限对应的查询条件
         :return: 部门列表信息对象
         """
         dept_result = (
@@ -164,7 +215,7 @@ class DeptDao:
                         SysDept.dept_id == page_object.dept_id if page_object.dept_id is not None else True,
                         SysDept.status == page_object.status if page_object.status else True,
                         SysDept.dept_name.like(f'%{page_object.dept_name}%') if page_object.dept_name else True,
-                        eval(data_scope_sql),
+                        data_scope_sql,
                     )
                     .order_by(SysDept.order_num)
                     .distinct()
@@ -263,7 +314,13 @@ class DeptDao:
             await db.execute(
                 select(func.count('*'))
                 .select_from(SysDept)
-                .where(SysDept.status == '0', SysDept.del_flag == '0', func.find_in_set(dept_id, SysDept.ancestors))
+                .join(SysDeptClosure, SysDeptClosure.descendant_id == SysDept.dept_id)
+                .where(
+                    SysDept.status == '0',
+                    SysDept.del_flag == '0',
+                    SysDeptClosure.ancestor_id == dept_id,
+                    SysDeptClosure.depth > 0,
+                )
             )
         ).scalar()
 
@@ -305,3 +362,113 @@ class DeptDao:
         ).scalar()
 
         return dept_user_count
+
+    @classmethod
+    async def add_dept_closure_dao(cls, db: AsyncSession, dept_id: int, parent_id: int):
+        """
+        新增部门时写入部门闭包关系，即父部门的所有祖先关系加上自身关系
+
+        :param db: orm对象
+        :param dept_id: 部门id
+        :param parent_id: 父部门id
+        :return:
+        """
+        await db.execute(
+            insert(SysDeptClosure).from_select(
+                ['ancestor_id', 'descendant_id', 'depth'],
+                select(SysDeptClosure.ancestor_id, literal(dept_id), SysDeptClosure.depth + 1)
+                .where(SysDeptClosure.descendant_id == parent_id)
+                .union_all(select(literal(dept_id), literal(dept_id), literal(0))),
+            )
+        )
+
+    @classmethod
+    async def move_dept_closure_dao(cls, db: AsyncSession, dept_id: int, parent_id: int):
+        """
+        移动部门时更新部门闭包关系，先删除子树与原祖先部门的关系，再建立子树与新祖先部门的关系
+
+        :param db: orm对象
+        :param dept_id: 部门id
+        :param parent_id: 新的父部门id
+        :return:
+        """
+        subtree_id_list = await cls.get_dept_and_child_id_list_dao(db, dept_id)
+        old_ancestor_id_list = (
+            (
+                await db.execute(
+                    select(SysDeptClosure.ancestor_id).where(
+                        SysDeptClosure.descendant_id == dept_id, SysDeptClosure.depth > 0
+                    )
+                )
+            )
+            .scalars()
+            .all()
+        )
+        if old_ancestor_id_list:
+            await db.execute(
+                delete(SysDeptClosure).where(
+                    SysDeptClosure.descendant_id.in_(subtree_id_list),
+                    SysDeptClosure.ancestor_id.in_(old_ancestor_id_list),
+                )
+            )
+        new_ancestor = aliased(SysDeptClosure)
+        subtree = aliased(SysDeptClosure)
+        await db.execute(
+            insert(SysDeptClosure).from_select(
+                ['ancestor_id', 'descendant_id', 'depth'],
+                select(new_ancestor.ancestor_id, subtree.descendant_id, new_ancestor.depth + subtree.depth + 1).where(
+                    new_ancestor.descendant_id == parent_id, subtree.ancestor_id == dept_id
+                ),
+            )
+        )
+
+    @classmethod
+    async def delete_dept_closure_dao(cls, db: AsyncSession, dept_id: int):
+        """
+        删除部门时删除该部门作为后代部门的闭包关系
+
+        :param db: orm对象
+        :param dept_id: 部门id
+        :return:
+        """
+        await db.execute(delete(SysDeptClosure).where(SysDeptClosure.descendant_id == dept_id))
+
+    @classmethod
+    async def get_dept_parent_list_dao(cls, db: AsyncSession):
+        """
+        获取所有未删除部门的id及父部门id，用于重建部门闭包表
+
+        :param db: orm对象
+        :return: 部门id及父部门id列表
+        """
+        dept_parent_list = (
+            await db.execute(select(SysDept.dept_id, SysDept.parent_id).where(SysDept.del_flag == '0'))
+        ).all()
+
+        return dept_parent_list
+
+    @classmethod
+    async def count_dept_closure_dao(cls, db: AsyncSession):
+        """
+        查询部门闭包表的记录数量
+
+        :param db: orm对象
+        :return: 部门闭包表的记录数量
+        """
+        dept_closure_count = (await db.execute(select(func.count('*')).select_from(SysDeptClosure))).scalar()
+
+        return dept_closure_count
+
+    @classmethod
+    async def rebuild_dept_closure_dao(cls, db: AsyncSession, dept_closure_list: List[Dict], batch_size: int = 5000):
+        """
+        清空并批量写入部门闭包表
+
+        :param db: orm对象
+        :param dept_closure_list: 部门闭包关系列表
+        :param batch_size: 单次批量写入的最大条数
+        :return:
+        """
+        await db.execute(delete(SysDeptClosure))
+        for index in range(0, len(dept_closure_list), batch_size):
+            await db.execute(insert(SysDeptClosure), dept_closure_list[index : index + batch_size])
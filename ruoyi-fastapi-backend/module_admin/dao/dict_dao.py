@@ -62,13 +62,16 @@ class DictTypeDao:
         return list_format_datetime(dict_type_info)
 
     @classmethod
-    async def get_dict_type_list(cls, db: AsyncSession, query_object: DictTypePageQueryModel, is_page: bool = False):
+    async def get_dict_type_list(
+        cls, db: AsyncSession, query_object: DictTypePageQueryModel, is_page: bool = False, is_stream: bool = False
+    ):
         """
         根据查询参数获取字典类型列表信息
 
         :param db: orm对象
         :param query_object: 查询参数对象
         :param is_page: 是否开启分页
+        :param is_stream: 是否使用服务端游标分批读取全部数据，开启时返回分批数据列表的异步迭代器
         :return: 字典类型列表信息对象
         """
         query = (
@@ -87,6 +90,8 @@ class DictTypeDao:
             .order_by(SysDictType.dict_id)
             .distinct()
         )
+        if is_stream:
+            return PageUtil.stream(db, query)
         dict_type_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
 
         return dict_type_list
@@ -175,13 +180,16 @@ class DictDataDao:
         return dict_data_info
 
     @classmethod
-    async def get_dict_data_list(cls, db: AsyncSession, query_object: DictDataPageQueryModel, is_page: bool = False):
+    async def get_dict_data_list(
+        cls, db: AsyncSession, query_object: DictDataPageQueryModel, is_page: bool = False, is_stream: bool = False
+    ):
         """
         根据查询参数获取字典数据列表信息
 
         :param db: orm对象
         :param query_object: 查询参数对象
         :param is_page: 是否开启分页
+        :param is_stream: 是否使用服务端游标分批读取全部数据，开启时返回分批数据列表的异步迭代器
         :return: 字典数据列表信息对象
         """
         query = (
@@ -194,6 +202,8 @@ class DictDataDao:
             .order_by(SysDictData.dict_sort)
             .distinct()
         )
+        if is_stream:
+            return PageUtil.stream(db, query)
         dict_data_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
 
         return dict_data_list
@@ -228,6 +238,30 @@ class DictDataDao:
 
         return dict_data_list
 
+    @classmethod
+    async def get_all_enabled_dict_data(cls, db: AsyncSession):
+        """
+        一次查询获取所有正常状态字典类型及其正常状态的字典数据，未配置字典数据的字典类型对应的字典数据为None
+
+        :param db: orm对象
+        :return: 字典类型与字典数据组成的列表，按字典类型及字典排序排列
+        """
+        dict_data_list = (
+            await db.execute(
+                select(SysDictType.dict_type, SysDictData)
+                .select_from(SysDictType)
+                .where(SysDictType.status == '0')
+                .join(
+                    SysDictData,
+                    and_(SysDictType.dict_type == SysDictData.dict_type, SysDictData.status == '0'),
+                    isouter=True,
+                )
+                .order_by(SysDictType.dict_type, SysDictData.dict_sort, SysDictData.dict_code)
+            )
+        ).all()
+
+        return dict_data_list
+
     @classmethod
     async def add_dict_data_dao(cls, db: AsyncSession, dict_data: DictDataModel):
         """
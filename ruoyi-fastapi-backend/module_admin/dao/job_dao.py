@@ -53,13 +53,16 @@ class JobDao:
         return job_info
 
     @classmethod
-    async def get_job_list(cls, db: AsyncSession, query_object: JobPageQueryModel, is_page: bool = False):
+    async def get_job_list(
+        cls, db: AsyncSession, query_object: JobPageQueryModel, is_page: bool = False, is_stream: bool = False
+    ):
         """
         根据查询参数获取定时任务列表信息
 
         :param db: orm对象
         :param query_object: 查询参数对象
         :param is_page: 是否开启分页
+        :param is_stream: 是否使用服务端游标分批读取全部数据，开启时返回分批数据列表的异步迭代器
         :return: 定时任务列表信息对象
         """
         query = (
@@ -72,6 +75,8 @@ class JobDao:
             .order_by(SysJob.job_id)
             .distinct()
         )
+        if is_stream:
+            return PageUtil.stream(db, query)
         job_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
 
         return job_list
@@ -13,13 +13,16 @@ class JobLogDao:
     """
 
     @classmethod
-    async def get_job_log_list(cls, db: AsyncSession, query_object: JobLogPageQueryModel, is_page: bool = False):
+    async def get_job_log_list(
+        cls, db: AsyncSession, query_object: JobLogPageQueryModel, is_page: bool = False, is_stream: bool = False
+    ):
         """
         根据查询参数获取定时任务日志列表信息
 
         :param db: orm对象
         :param query_object: 查询参数对象
         :param is_page: 是否开启分页
+        :param is_stream: 是否使用服务端游标分批读取全部数据，开启时返回分批数据列表的异步迭代器
         :return: 定时任务日志列表信息对象
         """
         query = (
@@ -36,8 +39,18 @@ class JobLogDao:
                 else True,
             )
             .order_by(desc(SysJobLog.create_time))
-            .distinct()
         )
+        if is_stream:
+            return PageUtil.stream(db, query)
+        if is_page and query_object.page_mode == 'cursor':
+            return await PageUtil.keyset_paginate(
+                db,
+                query,
+                [desc(SysJobLog.create_time), desc(SysJobLog.job_log_id)],
+                query_object.page_size,
+                query_object.cursor,
+                query_object.count_mode,
+            )
         job_log_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
 
         return job_log_list
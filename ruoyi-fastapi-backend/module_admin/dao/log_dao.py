@@ -1,6 +1,7 @@
 from datetime import datetime, time
-from sqlalchemy import asc, delete, desc, select
+from sqlalchemy import asc, delete, desc, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
 from module_admin.entity.do.log_do import SysLogininfor, SysOperLog
 from module_admin.entity.vo.log_vo import LogininforModel, LoginLogPageQueryModel, OperLogModel, OperLogPageQueryModel
 from utils.common_util import SnakeCaseUtil
@@ -14,13 +15,16 @@ class OperationLogDao:
     """
 
     @classmethod
-    async def get_operation_log_list(cls, db: AsyncSession, query_object: OperLogPageQueryModel, is_page: bool = False):
+    async def get_operation_log_list(
+        cls, db: AsyncSession, query_object: OperLogPageQueryModel, is_page: bool = False, is_stream: bool = False
+    ):
         """
         根据查询参数获取操作日志列表信息
 
         :param db: orm对象
         :param query_object: 查询参数对象
         :param is_page: 是否开启分页
+        :param is_stream: 是否使用服务端游标分批读取全部数据，开启时返回分批数据列表的异步迭代器
         :return: 操作日志列表信息对象
         """
         if query_object.is_asc == 'ascending':
@@ -45,9 +49,23 @@ class OperationLogDao:
                 if query_object.begin_time and query_object.end_time
                 else True,
             )
-            .distinct()
             .order_by(order_by_column)
         )
+        if is_stream:
+            return PageUtil.stream(db, query)
+        if is_page and query_object.page_mode == 'cursor':
+            # 游标分页以主键作为排序键的最后一项，保证排序字段值相同时游标位置唯一
+            tiebreaker_column = (
+                asc(SysOperLog.oper_id) if query_object.is_asc == 'ascending' else desc(SysOperLog.oper_id)
+            )
+            return await PageUtil.keyset_paginate(
+                db,
+                query,
+                [order_by_column, tiebreaker_column],
+                query_object.page_size,
+                query_object.cursor,
+                query_object.count_mode,
+            )
         operation_log_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
 
         return operation_log_list
@@ -67,6 +85,21 @@ class OperationLogDao:
 
         return db_operation_log
 
+    @classmethod
+    async def add_operation_log_batch_dao(cls, db: AsyncSession, operation_log_list: List[OperLogModel]):
+        """
+        批量新增操作日志数据库操作，使用单条多行INSERT语句写入
+
+        :param db: orm对象
+        :param operation_log_list: 操作日志对象列表
+        :return:
+        """
+        await db.execute(
+            insert(SysOperLog).values(
+                [operation_log.model_dump(exclude={'oper_id'}) for operation_log in operation_log_list]
+            )
+        )
+
     @classmethod
     async def delete_operation_log_dao(cls, db: AsyncSession, operation_log: OperLogModel):
         """
@@ -95,13 +128,16 @@ class LoginLogDao:
     """
 
     @classmethod
-    async def get_login_log_list(cls, db: AsyncSession, query_object: LoginLogPageQueryModel, is_page: bool = False):
+    async def get_login_log_list(
+        cls, db: AsyncSession, query_object: LoginLogPageQueryModel, is_page: bool = False, is_stream: bool = False
+    ):
         """
         根据查询参数获取登录日志列表信息
 
         :param db: orm对象
         :param query_object: 查询参数对象
         :param is_page: 是否开启分页
+        :param is_stream: 是否使用服务端游标分批读取全部数据，开启时返回分批数据列表的异步迭代器
         :return: 登录日志列表信息对象
         """
         if query_object.is_asc == 'ascending':
@@ -127,9 +163,23 @@ class LoginLogDao:
                 if query_object.begin_time and query_object.end_time
                 else True,
             )
-            .distinct()
             .order_by(order_by_column)
         )
+        if is_stream:
+            return PageUtil.stream(db, query)
+        if is_page and query_object.page_mode == 'cursor':
+            # 游标分页以主键作为排序键的最后一项，保证排序字段值相同时游标位置唯一
+            tiebreaker_column = (
+                asc(SysLogininfor.info_id) if query_object.is_asc == 'ascending' else desc(SysLogininfor.info_id)
+            )
+            return await PageUtil.keyset_paginate(
+                db,
+                query,
+                [order_by_column, tiebreaker_column],
+                query_object.page_size,
+                query_object.cursor,
+                query_object.count_mode,
+            )
         login_log_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
 
         return login_log_list
@@ -149,6 +199,19 @@ class LoginLogDao:
 
         return db_login_log
 
+    @classmethod
+    async def add_login_log_batch_dao(cls, db: AsyncSession, login_log_list: List[LogininforModel]):
+        """
+        批量新增登录日志数据库操作，使用单条多行INSERT语句写入
+
+        :param db: orm对象
+        :param login_log_list: 登录日志对象列表
+        :return:
+        """
+        await db.execute(
+            insert(SysLogininfor).values([login_log.model_dump(exclude={'info_id'}) for login_log in login_log_list])
+        )
+
     @classmethod
     async def delete_login_log_dao(cls, db: AsyncSession, login_log: LogininforModel):
         """
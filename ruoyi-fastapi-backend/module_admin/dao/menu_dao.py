@@ -1,5 +1,6 @@
 from sqlalchemy import and_, delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
 from module_admin.entity.do.menu_do import SysMenu
 from module_admin.entity.do.role_do import SysRole, SysRoleMenu
 from module_admin.entity.do.user_do import SysUser, SysUserRole
@@ -93,6 +94,35 @@ class MenuDao:
 
         return menu_query_all
 
+    @classmethod
+    async def get_menu_list_by_role_ids(
+        cls, db: AsyncSession, role_id_list: List[int], menu_type_list: List[str], is_admin: bool = False
+    ):
+        """
+        根据角色id列表获取角色拥有的在用菜单列表信息
+
+        :param db: orm对象
+        :param role_id_list: 角色id列表
+        :param menu_type_list: 菜单类型列表
+        :param is_admin: 是否为超级管理员，超级管理员拥有全部菜单
+        :return: 按显示顺序排序的菜单列表信息
+        """
+        query = select(SysMenu).where(SysMenu.status == '0', SysMenu.menu_type.in_(menu_type_list))
+        if not is_admin:
+            if not role_id_list:
+                return []
+            query = (
+                query.join(SysRoleMenu, SysRoleMenu.menu_id == SysMenu.menu_id)
+                .join(
+                    SysRole,
+                    and_(SysRoleMenu.role_id == SysRole.role_id, SysRole.status == '0', SysRole.del_flag == '0'),
+                )
+                .where(SysRoleMenu.role_id.in_(role_id_list))
+            )
+        menu_query_all = (await db.execute(query.order_by(SysMenu.order_num).distinct())).scalars().all()
+
+        return menu_query_all
+
     @classmethod
     async def get_menu_list(cls, db: AsyncSession, page_object: MenuQueryModel, user_id: int, role: list):
         """
@@ -67,13 +67,16 @@ class PostDao:
         return post_info
 
     @classmethod
-    async def get_post_list(cls, db: AsyncSession, query_object: PostPageQueryModel, is_page: bool = False):
+    async def get_post_list(
+        cls, db: AsyncSession, query_object: PostPageQueryModel, is_page: bool = False, is_stream: bool = False
+    ):
         """
         根据查询参数获取岗位列表信息
 
         :param db: orm对象
         :param query_object: 查询参数对象
         :param is_page: 是否开启分页
+        :param is_stream: 是否使用服务端游标分批读取全部数据，开启时返回分批数据列表的异步迭代器
         :return: 岗位列表信息对象
         """
         query = (
@@ -86,6 +89,8 @@ class PostDao:
             .order_by(SysPost.post_sort)
             .distinct()
         )
+        if is_stream:
+            return PageUtil.stream(db, query)
         post_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
 
         return post_list
@@ -1,11 +1,13 @@
 from datetime import datetime, time
-from sqlalchemy import and_, delete, desc, func, or_, select, update  # noqa: F401
+from sqlalchemy import ColumnElement, and_, desc, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from module_admin.dao.association_dao import AssociationDao
 from module_admin.entity.do.dept_do import SysDept
 from module_admin.entity.do.menu_do import SysMenu
 from module_admin.entity.do.role_do import SysRole, SysRoleMenu, SysRoleDept
 from module_admin.entity.do.user_do import SysUser, SysUserRole
-from module_admin.entity.vo.role_vo import RoleDeptModel, RoleMenuModel, RoleModel, RolePageQueryModel
+from module_admin.entity.vo.role_vo import RoleModel, RolePageQueryModel
 from utils.page_util import PageUtil
 
 
@@ -126,15 +128,21 @@ class RoleDao:
 
     @classmethod
     async def get_role_list(
-        cls, db: AsyncSession, query_object: RolePageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls,
+        db: AsyncSession,
+        query_object: RolePageQueryModel,
+        data_scope_sql: ColumnElement,
+        is_page: bool = False,
+        is_stream: bool = False,
     ):
         """
         根据查询参数获取角色列表信息
 
         :param db: orm对象
         :param query_object: 查询参数对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_sql: 数据权限对应的查询条件
         :param is_page: 是否开启分页
+        :param is_stream: 是否使用服务端游标分批读取全部数据，开启时返回分批数据列表的异步迭代器
         :return: 角色列表信息对象
         """
         query = (
@@ -154,11 +162,13 @@ class RoleDao:
                 )
                 if query_object.begin_time and query_object.end_time
                 else True,
-                eval(data_scope_sql),
+                data_scope_sql,
             )
             .order_by(SysRole.role_sort)
             .distinct()
         )
+        if is_stream:
+            return PageUtil.stream(db, query)
         role_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
 
         return role_list
@@ -241,27 +251,27 @@ class RoleDao:
         return role_menu_query_all
 
     @classmethod
-    async def add_role_menu_dao(cls, db: AsyncSession, role_menu: RoleMenuModel):
+    async def sync_role_menu_dao(cls, db: AsyncSession, role_id: int, menu_id_list: List[int]):
         """
-        新增角色菜单关联信息数据库操作
+        同步角色菜单关联信息数据库操作，仅新增缺少的关联并删除多余的关联
 
         :param db: orm对象
-        :param role_menu: 用户角色菜单关联对象
+        :param role_id: 角色id
+        :param menu_id_list: 角色期望关联的菜单id列表
         :return:
         """
-        db_role_menu = SysRoleMenu(**role_menu.model_dump())
-        db.add(db_role_menu)
+        await AssociationDao.sync_association_dao(db, SysRoleMenu.role_id, role_id, SysRoleMenu.menu_id, menu_id_list)
 
     @classmethod
-    async def delete_role_menu_dao(cls, db: AsyncSession, role_menu: RoleMenuModel):
+    async def delete_role_menu_by_role_ids_dao(cls, db: AsyncSession, role_id_list: List[int]):
         """
-        删除角色菜单关联信息数据库操作
+        根据角色id列表批量删除角色菜单关联信息数据库操作
 
         :param db: orm对象
-        :param role_menu: 角色菜单关联对象
+        :param role_id_list: 角色id列表
         :return:
         """
-        await db.execute(delete(SysRoleMenu).where(SysRoleMenu.role_id.in_([role_menu.role_id])))
+        await AssociationDao.delete_association_dao(db, SysRoleMenu.role_id, role_id_list)
 
     @classmethod
     async def get_role_dept_dao(cls, db: AsyncSession, role: RoleModel):
@@ -300,27 +310,44 @@ class RoleDao:
         return role_dept_query_all
 
     @classmethod
-    async def add_role_dept_dao(cls, db: AsyncSession, role_dept: RoleDeptModel):
+    async def get_role_dept_id_list_dao(cls, db: AsyncSession, role_id_list: List[int]):
+        """
+        根据角色id列表获取角色关联的部门id列表
+
+        :param db: orm对象
+        :param role_id_list: 角色id列表
+        :return: 角色关联的部门id列表
+        """
+        dept_id_list = (
+            (await db.execute(select(SysRoleDept.dept_id).where(SysRoleDept.role_id.in_(role_id_list)).distinct()))
+            .scalars()
+            .all()
+        )
+
+        return list(dept_id_list)
+
+    @classmethod
+    async def sync_role_dept_dao(cls, db: AsyncSession, role_id: int, dept_id_list: List[int]):
         """
-        新增角色部门关联信息数据库操作
+        同步角色部门关联信息数据库操作，仅新增缺少的关联并删除多余的关联
 
         :param db: orm对象
-        :param role_dept: 用户角色部门关联对象
+        :param role_id: 角色id
+        :param dept_id_list: 角色期望关联的部门id列表
         :return:
         """
-        db_role_dept = SysRoleDept(**role_dept.dict())
-        db.add(db_role_dept)
+        await AssociationDao.sync_association_dao(db, SysRoleDept.role_id, role_id, SysRoleDept.dept_id, dept_id_list)
 
     @classmethod
-    async def delete_role_dept_dao(cls, db: AsyncSession, role_dept: RoleDeptModel):
+    async def delete_role_dept_by_role_ids_dao(cls, db: AsyncSession, role_id_list: List[int]):
         """
-        删除角色部门关联信息数据库操作
+        根据角色id列表批量删除角色部门关联信息数据库操作
 
         :param db: orm对象
-        :param role_dept: 角色部门关联对象
+        :param role_id_list: 角色id列表
         :return:
         """
-        await db.execute(delete(SysRoleDept).where(SysRoleDept.role_id.in_([role_dept.role_id])))
+        await AssociationDao.delete_association_dao(db, SysRoleDept.role_id, role_id_list)
 
     @classmethod
     async def count_user_role_dao(cls, db: AsyncSession, role_id: int):
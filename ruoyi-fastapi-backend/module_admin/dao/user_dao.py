@@ -1,15 +1,16 @@
 from datetime import datetime, time
-from sqlalchemy import and_, delete, desc, func, or_, select, update
+from sqlalchemy import ColumnElement, and_, delete, desc, insert, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from module_admin.entity.do.dept_do import SysDept
+from typing import Dict, List, Union
+from module_admin.dao.association_dao import AssociationDao
+from module_admin.entity.do.dept_do import SysDept, SysDeptClosure
 from module_admin.entity.do.menu_do import SysMenu
 from module_admin.entity.do.post_do import SysPost
-from module_admin.entity.do.role_do import SysRole, SysRoleDept, SysRoleMenu  # noqa: F401
+from module_admin.entity.do.role_do import SysRole, SysRoleMenu
 from module_admin.entity.do.user_do import SysUser, SysUserPost, SysUserRole
 from module_admin.entity.vo.user_vo import (
     UserModel,
     UserPageQueryModel,
-    UserPostModel,
     UserRoleModel,
     UserRolePageQueryModel,
     UserRoleQueryModel,
@@ -275,26 +276,29 @@ class UserDao:
 
     @classmethod
     async def get_user_list(
-        cls, db: AsyncSession, query_object: UserPageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls,
+        db: AsyncSession,
+        query_object: UserPageQueryModel,
+        data_scope_sql: ColumnElement,
+        is_page: bool = False,
+        is_stream: bool = False,
     ):
         """
         根据查询参数获取用户列表信息
 
         :param db: orm对象
         :param query_object: 查询参数对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_sql: 数据权限对应的查询条件
         :param is_page: 是否开启分页
+        :param is_stream: 是否使用服务端游标分批读取全部数据，开启时返回分批数据列表的异步迭代器
         :return: 用户列表信息对象
         """
         query = (
             select(SysUser, SysDept)
             .where(
                 SysUser.del_flag == '0',
-                or_(
-                    SysUser.dept_id == query_object.dept_id,
-                    SysUser.dept_id.in_(
-                        select(SysDept.dept_id).where(func.find_in_set(query_object.dept_id, SysDept.ancestors))
-                    ),
+                SysUser.dept_id.in_(
+                    select(SysDeptClosure.descendant_id).where(SysDeptClosure.ancestor_id == query_object.dept_id)
                 )
                 if query_object.dept_id
                 else True,
@@ -311,7 +315,7 @@ class UserDao:
                 )
                 if query_object.begin_time and query_object.end_time
                 else True,
-                eval(data_scope_sql),
+                data_scope_sql,
             )
             .join(
                 SysDept,
@@ -321,6 +325,8 @@ class UserDao:
             .order_by(SysUser.user_id)
             .distinct()
         )
+        if is_stream:
+            return PageUtil.stream(db, query)
         user_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
 
         return user_list
@@ -352,18 +358,89 @@ class UserDao:
         await db.execute(update(SysUser), [user])
 
     @classmethod
-    async def delete_user_dao(cls, db: AsyncSession, user: UserModel):
+    async def get_user_id_list_by_user_names(cls, db: AsyncSession, user_name_list: List[str]):
         """
-        删除用户数据库操作
+        根据用户账号列表批量获取用户账号及用户id
 
         :param db: orm对象
-        :param user: 用户对象
+        :param user_name_list: 用户账号列表
+        :return: 用户账号及用户id列表，按创建时间升序排列
+        """
+        user_id_list = (
+            await db.execute(
+                select(SysUser.user_name, SysUser.user_id)
+                .where(SysUser.del_flag == '0', SysUser.user_name.in_(user_name_list))
+                .order_by(SysUser.create_time)
+            )
+        ).all()
+
+        return user_id_list
+
+    @classmethod
+    async def get_user_id_list_by_data_scope(
+        cls, db: AsyncSession, user_id_list: List[int], data_scope_sql: ColumnElement
+    ):
+        """
+        根据用户id列表批量获取有数据权限的用户id
+
+        :param db: orm对象
+        :param user_id_list: 用户id列表
+        :param data_scope_sql: 数据权限对应的查询条件
+        :return: 有数据权限的用户id列表
+        """
+        user_id_list = (
+            (
+                await db.execute(
+                    select(SysUser.user_id).where(
+                        SysUser.del_flag == '0', SysUser.user_id.in_(user_id_list), data_scope_sql
+                    )
+                )
+            )
+            .scalars()
+            .all()
+        )
+
+        return user_id_list
+
+    @classmethod
+    async def add_user_batch_dao(cls, db: AsyncSession, user_list: List[Dict]):
+        """
+        批量新增用户数据库操作，以executemany方式写入，语句只编译一次，MySQL驱动会将其改写为多行INSERT语句
+
+        :param db: orm对象
+        :param user_list: 需要新增的用户字典列表
+        :return:
+        """
+        await db.execute(insert(SysUser), user_list)
+
+    @classmethod
+    async def edit_user_batch_dao(cls, db: AsyncSession, user_list: List[Dict]):
+        """
+        批量编辑用户数据库操作，按主键批量更新
+
+        :param db: orm对象
+        :param user_list: 需要更新的用户字典列表
+        :return:
+        """
+        await db.execute(update(SysUser), user_list)
+
+    @classmethod
+    async def delete_user_batch_dao(
+        cls, db: AsyncSession, user_id_list: List[Union[int, str]], update_by: str, update_time: datetime
+    ):
+        """
+        批量删除用户数据库操作
+
+        :param db: orm对象
+        :param user_id_list: 用户id列表
+        :param update_by: 更新者
+        :param update_time: 更新时间
         :return:
         """
         await db.execute(
             update(SysUser)
-            .where(SysUser.user_id == user.user_id)
-            .values(del_flag='2', update_by=user.update_by, update_time=user.update_time)
+            .where(SysUser.user_id.in_([int(user_id) for user_id in user_id_list]))
+            .values(del_flag='2', update_by=update_by, update_time=update_time)
         )
 
     @classmethod
@@ -399,14 +476,18 @@ class UserDao:
 
     @classmethod
     async def get_user_role_allocated_list_by_role_id(
-        cls, db: AsyncSession, query_object: UserRolePageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls,
+        db: AsyncSession,
+        query_object: UserRolePageQueryModel,
+        data_scope_sql: ColumnElement,
+        is_page: bool = False,
     ):
         """
         根据角色id获取已分配的用户列表信息
 
         :param db: orm对象
         :param query_object: 用户角色查询对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_sql: 数据权限对应的查询条件
         :param is_page: 是否开启分页
         :return: 角色已分配的用户列表信息
         """
@@ -420,7 +501,7 @@ class UserDao:
                 SysUser.user_name == query_object.user_name if query_object.user_name else True,
                 SysUser.phonenumber == query_object.phonenumber if query_object.phonenumber else True,
                 SysRole.role_id == query_object.role_id,
-                eval(data_scope_sql),
+                data_scope_sql,
             )
             .distinct()
         )
@@ -430,14 +511,18 @@ class UserDao:
 
     @classmethod
     async def get_user_role_unallocated_list_by_role_id(
-        cls, db: AsyncSession, query_object: UserRolePageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls,
+        db: AsyncSession,
+        query_object: UserRolePageQueryModel,
+        data_scope_sql: ColumnElement,
+        is_page: bool = False,
     ):
         """
         根据角色id获取未分配的用户列表信息
 
         :param db: orm对象
         :param query_object: 用户角色查询对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_sql: 数据权限对应的查询条件
         :param is_page: 是否开启分页
         :return: 角色未分配的用户列表信息
         """
@@ -459,7 +544,7 @@ class UserDao:
                         and_(SysUserRole.user_id == SysUser.user_id, SysUserRole.role_id == query_object.role_id),
                     )
                 ),
-                eval(data_scope_sql),
+                data_scope_sql,
             )
             .distinct()
         )
@@ -470,43 +555,65 @@ class UserDao:
         return unallocated_user_list
 
     @classmethod
-    async def add_user_role_dao(cls, db: AsyncSession, user_role: UserRoleModel):
+    async def delete_user_role_by_user_and_role_dao(cls, db: AsyncSession, user_role: UserRoleModel):
         """
-        新增用户角色关联信息数据库操作
+        根据用户id及角色id删除用户角色关联信息数据库操作
 
         :param db: orm对象
         :param user_role: 用户角色关联对象
         :return:
         """
-        db_user_role = SysUserRole(**user_role.model_dump())
-        db.add(db_user_role)
+        await db.execute(
+            delete(SysUserRole).where(
+                SysUserRole.user_id == user_role.user_id if user_role.user_id else True,
+                SysUserRole.role_id == user_role.role_id if user_role.role_id else True,
+            )
+        )
 
     @classmethod
-    async def delete_user_role_dao(cls, db: AsyncSession, user_role: UserRoleModel):
+    async def sync_user_role_dao(cls, db: AsyncSession, user_id: int, role_id_list: List[Union[int, str]]):
         """
-        删除用户角色关联信息数据库操作
+        同步用户角色关联信息数据库操作，仅新增缺少的关联并删除多余的关联
 
         :param db: orm对象
-        :param user_role: 用户角色关联对象
+        :param user_id: 用户id
+        :param role_id_list: 用户期望关联的角色id列表
         :return:
         """
-        await db.execute(delete(SysUserRole).where(SysUserRole.user_id.in_([user_role.user_id])))
+        await AssociationDao.sync_association_dao(db, SysUserRole.user_id, user_id, SysUserRole.role_id, role_id_list)
 
     @classmethod
-    async def delete_user_role_by_user_and_role_dao(cls, db: AsyncSession, user_role: UserRoleModel):
+    async def add_role_user_batch_dao(cls, db: AsyncSession, role_id: int, user_id_list: List[Union[int, str]]):
         """
-        根据用户id及角色id删除用户角色关联信息数据库操作
+        为多个用户批量分配同一角色数据库操作，已分配该角色的用户保持不变
 
         :param db: orm对象
-        :param user_role: 用户角色关联对象
+        :param role_id: 角色id
+        :param user_id_list: 用户id列表
+        :return: 新增关联的用户id集合
+        """
+        return await AssociationDao.append_association_dao(
+            db, SysUserRole.role_id, role_id, SysUserRole.user_id, user_id_list
+        )
+
+    @classmethod
+    async def delete_user_role_by_user_ids_dao(
+        cls, db: AsyncSession, user_id_list: List[Union[int, str]], role_id: Union[int, None] = None
+    ):
+        """
+        根据用户id列表批量删除用户角色关联信息数据库操作
+
+        :param db: orm对象
+        :param user_id_list: 用户id列表
+        :param role_id: 角色id，为None时删除用户的全部角色关联
         :return:
         """
-        await db.execute(
-            delete(SysUserRole).where(
-                SysUserRole.user_id == user_role.user_id if user_role.user_id else True,
-                SysUserRole.role_id == user_role.role_id if user_role.role_id else True,
+        if role_id:
+            await AssociationDao.delete_association_dao(
+                db, SysUserRole.role_id, [role_id], SysUserRole.user_id, user_id_list
             )
-        )
+        else:
+            await AssociationDao.delete_association_dao(db, SysUserRole.user_id, user_id_list)
 
     @classmethod
     async def get_user_role_detail(cls, db: AsyncSession, user_role: UserRoleModel):
@@ -532,27 +639,27 @@ class UserDao:
         return user_role_info
 
     @classmethod
-    async def add_user_post_dao(cls, db: AsyncSession, user_post: UserPostModel):
+    async def sync_user_post_dao(cls, db: AsyncSession, user_id: int, post_id_list: List[Union[int, str]]):
         """
-        新增用户岗位关联信息数据库操作
+        同步用户岗位关联信息数据库操作，仅新增缺少的关联并删除多余的关联
 
         :param db: orm对象
-        :param user_post: 用户岗位关联对象
+        :param user_id: 用户id
+        :param post_id_list: 用户期望关联的岗位id列表
         :return:
         """
-        db_user_post = SysUserPost(**user_post.model_dump())
-        db.add(db_user_post)
+        await AssociationDao.sync_association_dao(db, SysUserPost.user_id, user_id, SysUserPost.post_id, post_id_list)
 
     @classmethod
-    async def delete_user_post_dao(cls, db: AsyncSession, user_post: UserPostModel):
+    async def delete_user_post_by_user_ids_dao(cls, db: AsyncSession, user_id_list: List[Union[int, str]]):
         """
-        删除用户岗位关联信息数据库操作
+        根据用户id列表批量删除用户岗位关联信息数据库操作
 
         :param db: orm对象
-        :param user_post: 用户岗位关联对象
+        :param user_id_list: 用户id列表
         :return:
         """
-        await db.execute(delete(SysUserPost).where(SysUserPost.user_id.in_([user_post.user_id])))
+        await AssociationDao.delete_association_dao(db, SysUserPost.user_id, user_id_list)
 
     @classmethod
     async def get_user_dept_info(cls, db: AsyncSession, dept_id: int):
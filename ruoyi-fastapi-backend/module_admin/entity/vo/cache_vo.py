@@ -0,0 +1,57 @@
+from pydantic import BaseModel, ConfigDict, Field
+from pydantic.alias_generators import to_camel
+from typing import Any, List, Optional
+from module_admin.annotation.pydantic_annotation import as_query
+
+
+class CacheMonitorModel(BaseModel):
+    """
+    缓存监控信息对应pydantic模型
+    """
+
+    model_config = ConfigDict(alias_generator=to_camel)
+
+    command_stats: Optional[List] = Field(default=[], description='命令统计')
+    db_size: Optional[int] = Field(default=None, description='Key数量')
+    info: Optional[dict] = Field(default={}, description='Redis信息')
+    local_cache_stats: Optional[dict] = Field(default={}, description='当前工作进程的进程内缓存统计信息')
+
+
+class CacheInfoModel(BaseModel):
+    """
+    缓存监控对象对应pydantic模型
+    """
+
+    model_config = ConfigDict(alias_generator=to_camel)
+
+    cache_key: Optional[str] = Field(default=None, description='缓存键名')
+    cache_name: Optional[str] = Field(default=None, description='缓存名称')
+    cache_value: Optional[Any] = Field(default=None, description='缓存内容')
+    remark: Optional[str] = Field(default=None, description='备注')
+
+
+class CacheKeyModel(BaseModel):
+    """
+    缓存键名信息对应pydantic模型
+    """
+
+    model_config = ConfigDict(alias_generator=to_camel)
+
+    cache_name: Optional[str] = Field(default=None, description='缓存名称')
+    cache_key: Optional[str] = Field(default=None, description='缓存键名')
+    type: Optional[str] = Field(default=None, description='数据类型')
+    ttl: Optional[int] = Field(default=None, description='剩余有效期（秒），-1为永不过期')
+    memory_usage: Optional[int] = Field(default=None, description='占用内存（字节）')
+
+
+@as_query
+class CacheKeyPageQueryModel(BaseModel):
+    """
+    缓存键名游标分页查询模型
+    """
+
+    model_config = ConfigDict(alias_generator=to_camel)
+
+    cursor: Optional[str] = Field(default=None, description='上一页返回的游标，为空时查询第一页')
+    page_size: int = Field(default=50, description='每页记录数，按SCAN语义返回的数量可能略多于该值')
+    cache_key: Optional[str] = Field(default=None, description='缓存键名前缀')
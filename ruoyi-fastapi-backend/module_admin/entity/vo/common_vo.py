@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict, Field
 from pydantic.alias_generators import to_camel
-from typing import Any, Optional
+from typing import Any, List, Optional
 
 
 class CrudResponseModel(BaseModel):
@@ -24,3 +24,30 @@ class UploadResponseModel(BaseModel):
     new_file_name: Optional[str] = Field(default=None, description='新文件名称')
     original_filename: Optional[str] = Field(default=None, description='原文件名称')
     url: Optional[str] = Field(default=None, description='新文件url')
+
+
+class UploadChunkInitModel(BaseModel):
+    """
+    分片上传初始化模型
+    """
+
+    model_config = ConfigDict(alias_generator=to_camel)
+
+    file_name: str = Field(description='原文件名称')
+    file_size: int = Field(description='文件大小（字节）')
+
+
+class UploadChunkTaskModel(BaseModel):
+    """
+    分片上传任务模型
+    """
+
+    model_config = ConfigDict(alias_generator=to_camel)
+
+    upload_id: str = Field(description='分片上传任务ID')
+    file_name: str = Field(description='文件名称')
+    original_filename: Optional[str] = Field(default=None, description='原文件名称')
+    file_size: int = Field(description='文件大小（字节）')
+    chunk_size: int = Field(description='分片大小（字节），最后一个分片为剩余的字节数')
+    chunk_count: int = Field(description='分片数量')
+    uploaded_chunks: List[int] = Field(default=[], description='已上传的分片序号，从0开始')
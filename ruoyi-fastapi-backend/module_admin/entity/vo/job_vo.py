@@ -122,6 +122,13 @@ class JobLogPageQueryModel(JobLogQueryModel):
 
     page_num: int = Field(default=1, description='当前页码')
     page_size: int = Field(default=10, description='每页记录数')
+    page_mode: Literal['offset', 'cursor'] = Field(
+        default='offset', description='分页方式（offset页码分页 cursor游标分页）'
+    )
+    cursor: Optional[str] = Field(default=None, description='游标分页时上一页返回的游标，为空时查询第一页')
+    count_mode: Literal['exact', 'estimated', 'none'] = Field(
+        default='exact', description='游标分页时总数统计方式（exact精确统计 estimated估算 none不统计）'
+    )
 
 
 class DeleteJobLogModel(BaseModel):
@@ -25,11 +25,13 @@ class OnlineModel(BaseModel):
 @as_query
 class OnlineQueryModel(OnlineModel):
     """
-    岗位管理不分页查询模型
+    在线用户查询模型，未传入分页参数时返回全部在线用户
     """
 
     begin_time: Optional[str] = Field(default=None, description='开始时间')
     end_time: Optional[str] = Field(default=None, description='结束时间')
+    page_num: Optional[int] = Field(default=None, description='当前页码')
+    page_size: Optional[int] = Field(default=None, description='每页记录数')
 
 
 class DeleteOnlineModel(BaseModel):
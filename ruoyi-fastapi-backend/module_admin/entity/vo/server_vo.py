@@ -53,6 +53,53 @@ class SysFiles(BaseModel):
     usage: Optional[str] = Field(default=None, description='资源的使用率')
 
 
+class LogQueueInfo(BaseModel):
+    model_config = ConfigDict(alias_generator=to_camel)
+
+    queue_depth: Optional[int] = Field(default=None, description='队列当前长度')
+    queue_max_size: Optional[int] = Field(default=None, description='队列最大长度')
+    enqueued: Optional[int] = Field(default=None, description='入队日志数')
+    written: Optional[int] = Field(default=None, description='已写入日志数')
+    dropped: Optional[int] = Field(default=None, description='丢弃日志数')
+    spilled: Optional[int] = Field(default=None, description='写入溢出文件日志数')
+    replayed: Optional[int] = Field(default=None, description='溢出文件补写日志数')
+    dead_lettered: Optional[int] = Field(default=None, description='写入死信文件日志数')
+    failed_flushes: Optional[int] = Field(default=None, description='批量写入失败次数')
+    last_flush_ms: Optional[float] = Field(default=None, description='最近一次批量写入耗时（毫秒）')
+
+
+class CompressionInfo(BaseModel):
+    model_config = ConfigDict(alias_generator=to_camel)
+
+    route: Optional[str] = Field(default=None, description='路由路径')
+    responses: Optional[int] = Field(default=None, description='压缩响应数')
+    original_bytes: Optional[int] = Field(default=None, description='压缩前字节数')
+    compressed_bytes: Optional[int] = Field(default=None, description='压缩后字节数')
+    ratio: Optional[float] = Field(default=None, description='压缩率（压缩前字节数/压缩后字节数）')
+    cpu_ms: Optional[float] = Field(default=None, description='压缩耗费的CPU时间（毫秒）')
+    avg_cpu_ms: Optional[float] = Field(default=None, description='平均每个响应压缩耗费的CPU时间（毫秒）')
+    offloaded: Optional[int] = Field(default=None, description='在线程池中压缩的响应数')
+    cache_hits: Optional[int] = Field(default=None, description='命中压缩结果缓存的响应数')
+
+
+class UploadInfo(BaseModel):
+    model_config = ConfigDict(alias_generator=to_camel)
+
+    upload_count: Optional[int] = Field(default=None, description='普通上传文件数')
+    upload_bytes: Optional[int] = Field(default=None, description='普通上传字节数')
+    upload_throughput: Optional[float] = Field(default=None, description='普通上传吞吐量（MB/s）')
+    chunk_count: Optional[int] = Field(default=None, description='上传分片数')
+    chunk_bytes: Optional[int] = Field(default=None, description='上传分片字节数')
+    chunk_throughput: Optional[float] = Field(default=None, description='分片上传吞吐量（MB/s）')
+    merge_count: Optional[int] = Field(default=None, description='分片合并文件数')
+    merge_bytes: Optional[int] = Field(default=None, description='分片合并字节数')
+    merge_throughput: Optional[float] = Field(default=None, description='分片合并吞吐量（MB/s）')
+    dedup_hits: Optional[int] = Field(default=None, description='内容与已存储文件重复的上传文件数')
+    dedup_bytes: Optional[int] = Field(default=None, description='去重节省的存储字节数')
+    blob_removed: Optional[int] = Field(default=None, description='已清理的未引用去重存储文件数')
+    blob_removed_bytes: Optional[int] = Field(default=None, description='已清理的未引用去重存储文件字节数')
+
+
 class ServerMonitorModel(BaseModel):
     """
     服务监控对应pydantic模型
@@ -65,3 +112,8 @@ class ServerMonitorModel(BaseModel):
     mem: Optional[MemoryInfo] = Field(description='內存相关信息')
     sys: Optional[SysInfo] = Field(description='服务器相关信息')
     sys_files: Optional[List[SysFiles]] = Field(description='磁盘相关信息')
+    log_queue: Optional[LogQueueInfo] = Field(default=None, description='日志异步写入队列相关信息')
+    compression: Optional[List[CompressionInfo]] = Field(
+        default=None, description='当前工作进程按路由统计的响应压缩相关信息'
+    )
+    upload: Optional[UploadInfo] = Field(default=None, description='当前工作进程的文件上传相关信息')
@@ -280,3 +280,24 @@ class CrudUserRoleModel(BaseModel):
     user_ids: Optional[str] = Field(default=None, description='用户ID信息')
     role_id: Optional[int] = Field(default=None, description='角色ID')
     role_ids: Optional[str] = Field(default=None, description='角色ID信息')
+
+
+class UserImportTaskModel(BaseModel):
+    """
+    用户导入任务进度模型
+    """
+
+    model_config = ConfigDict(alias_generator=to_camel)
+
+    task_id: str = Field(description='导入任务ID')
+    status: Literal['running', 'success', 'failed'] = Field(
+        description='任务状态（running导入中 success已完成 failed失败）'
+    )
+    total: int = Field(default=0, description='导入数据总数')
+    processed: int = Field(default=0, description='已处理数量')
+    add_count: int = Field(default=0, description='新增数量')
+    update_count: int = Field(default=0, description='更新数量')
+    fail_count: int = Field(default=0, description='失败数量')
+    message: Optional[str] = Field(default=None, description='任务信息')
+    create_by: Optional[str] = Field(default=None, description='创建者')
+    error_list: List[str] = Field(default=[], description='失败信息')
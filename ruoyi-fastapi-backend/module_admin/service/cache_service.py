@@ -1,8 +1,14 @@
+import re
 from fastapi import Request
+from redis import asyncio as aioredis
+from typing import Optional
 from config.enums import RedisInitKeyConfig
 from config.get_redis import RedisUtil
-from module_admin.entity.vo.cache_vo import CacheInfoModel, CacheMonitorModel
+from exceptions.exception import ServiceException
+from module_admin.entity.vo.cache_vo import CacheInfoModel, CacheKeyModel, CacheKeyPageQueryModel, CacheMonitorModel
 from module_admin.entity.vo.common_vo import CrudResponseModel
+from utils.local_cache_util import LocalCacheUtil
+from utils.page_util import CursorPageResponseModel
 
 
 class CacheService:
@@ -10,6 +16,34 @@ class CacheService:
     缓存监控模块服务层
     """
 
+    # SCAN每次迭代的COUNT参数
+    SCAN_COUNT = 1000
+    # 游标分页每页最大记录数
+    MAX_PAGE_SIZE = 1000
+    # 每条UNLINK命令删除的键数量
+    UNLINK_BATCH_SIZE = 500
+    # 每个管道累计的UNLINK命令数量
+    PIPELINE_COMMAND_COUNT = 20
+    # 同时缓存在进程内的缓存名称，清除时需通知各工作进程失效
+    LOCAL_CACHE_NAME_LIST = [
+        RedisInitKeyConfig.SYS_CONFIG.key,
+        RedisInitKeyConfig.SYS_DICT.key,
+        RedisInitKeyConfig.USER_ROUTER.key,
+    ]
+    # 需要一并清除的缓存名称，按列表顺序清除；缓存的登录用户身份信息在其版本号与当前版本号相同时才有效，
+    # 只清除版本号会使版本号从0重新计数，此前缓存的身份信息在版本号再次计数到相同值时重新生效，
+    # 因此必须先清除版本号再清除身份信息
+    LINKED_CACHE_NAME_MAPPING = {
+        RedisInitKeyConfig.PRINCIPAL_VERSION.key: [
+            RedisInitKeyConfig.PRINCIPAL_VERSION.key,
+            RedisInitKeyConfig.USER_PRINCIPAL.key,
+        ],
+        RedisInitKeyConfig.USER_PRINCIPAL.key: [
+            RedisInitKeyConfig.PRINCIPAL_VERSION.key,
+            RedisInitKeyConfig.USER_PRINCIPAL.key,
+        ],
+    }
+
     @classmethod
     async def get_cache_monitor_statistical_info_services(cls, request: Request):
         """
@@ -24,7 +58,9 @@ class CacheService:
         command_stats = [
             dict(name=key.split('_')[1], value=str(value.get('calls'))) for key, value in command_stats_dict.items()
         ]
-        result = CacheMonitorModel(commandStats=command_stats, dbSize=db_size, info=info)
+        result = CacheMonitorModel(
+            commandStats=command_stats, dbSize=db_size, info=info, localCacheStats=LocalCacheUtil.get_stats()
+        )
 
         return result
 
@@ -57,11 +93,64 @@ class CacheService:
         :param cache_name: 缓存名称
         :return: 缓存键名列表信息
         """
-        cache_keys = await request.app.state.redis.keys(f'{cache_name}*')
-        cache_key_list = [key.split(':', 1)[1] for key in cache_keys if key.startswith(f'{cache_name}:')]
+        cache_key_list = [
+            key.split(':', 1)[1]
+            async for key in request.app.state.redis.scan_iter(
+                match=f'{cls.__escape_pattern(cache_name)}:*', count=cls.SCAN_COUNT
+            )
+        ]
 
         return cache_key_list
 
+    @classmethod
+    async def get_cache_monitor_cache_key_page_services(
+        cls, request: Request, cache_name: str, query_object: CacheKeyPageQueryModel
+    ):
+        """
+        使用SCAN游标分页获取缓存键名及其有效期、占用内存信息service
+
+        :param request: Request对象
+        :param cache_name: 缓存名称
+        :param query_object: 查询参数对象
+        :return: 缓存键名游标分页信息
+        """
+        redis = request.app.state.redis
+        page_size = min(max(query_object.page_size, 1), cls.MAX_PAGE_SIZE)
+        try:
+            cursor = int(query_object.cursor) if query_object.cursor else 0
+        except ValueError:
+            raise ServiceException(message='分页游标无效，请从第一页重新查询')
+        match = f'{cls.__escape_pattern(cache_name)}:{cls.__escape_pattern(query_object.cache_key or "")}*'
+        cache_keys = []
+        # SCAN每次返回的数量不固定，持续迭代直至凑满一页或遍历结束，同一批返回的键不截断以免丢失
+        while True:
+            cursor, keys = await redis.scan(cursor=cursor, match=match, count=page_size)
+            cache_keys.extend(keys)
+            if cursor == 0 or len(cache_keys) >= page_size:
+                break
+        async with redis.pipeline(transaction=False) as pipe:
+            for key in cache_keys:
+                pipe.type(key)
+                pipe.ttl(key)
+                pipe.memory_usage(key)
+            result = await pipe.execute(raise_on_error=False)
+        rows = [
+            CacheKeyModel(
+                cacheName=cache_name,
+                cacheKey=key.split(':', 1)[1],
+                type=key_type,
+                ttl=ttl if isinstance(ttl, int) else None,
+                memoryUsage=memory_usage if isinstance(memory_usage, int) else None,
+            )
+            for key, key_type, ttl, memory_usage in zip(cache_keys, result[0::3], result[1::3], result[2::3])
+            # 迭代过程中已过期或被删除的键
+            if key_type != 'none'
+        ]
+
+        return CursorPageResponseModel(
+            rows=rows, pageSize=page_size, hasNext=cursor != 0, nextCursor=str(cursor) if cursor != 0 else None
+        )
+
     @classmethod
     async def get_cache_monitor_cache_value_services(cls, request: Request, cache_name: str, cache_key: str):
         """
@@ -85,40 +174,107 @@ class CacheService:
         :param cache_name: 缓存名称
         :return: 操作缓存响应信息
         """
-        cache_keys = await request.app.state.redis.keys(f'{cache_name}*')
-        if cache_keys:
-            await request.app.state.redis.delete(*cache_keys)
+        if cache_name not in cls.get_cache_namespace_list():
+            raise ServiceException(message=f'{cache_name}不是系统缓存名称')
+        for name in cls.LINKED_CACHE_NAME_MAPPING.get(cache_name, [cache_name]):
+            await cls.__unlink_namespace(request.app.state.redis, name)
+            if name in cls.LOCAL_CACHE_NAME_LIST:
+                await LocalCacheUtil.publish_invalidation(request.app.state.redis, name)
 
         return CrudResponseModel(is_success=True, message=f'{cache_name}对应键值清除成功')
 
     @classmethod
-    async def clear_cache_monitor_cache_key_services(cls, request: Request, cache_key: str):
+    async def clear_cache_monitor_cache_key_services(
+        cls, request: Request, cache_key: str, cache_name: Optional[str] = None
+    ):
         """
-        清除缓存名称对应所有键值service
+        清除缓存键名对应键值service，未指定缓存名称时清除所有系统缓存名称下的该键名
 
         :param request: Request对象
         :param cache_key: 缓存键名
+        :param cache_name: 缓存名称
         :return: 操作缓存响应信息
         """
-        cache_keys = await request.app.state.redis.keys(f'*{cache_key}')
-        if cache_keys:
-            await request.app.state.redis.delete(*cache_keys)
+        if cache_name:
+            cache_keys = [f'{cache_name}:{cache_key}']
+        else:
+            cache_name_list = cls.get_cache_namespace_list()
+            cache_keys = [f'{name}:{cache_key}' for name in cache_name_list]
+            # 兼容传入带缓存名称前缀的完整键名
+            if cache_key.split(':', 1)[0] in cache_name_list:
+                cache_keys.append(cache_key)
+        await request.app.state.redis.unlink(*cache_keys)
+        for key in cache_keys:
+            name, local_cache_key = key.split(':', 1)
+            if name in cls.LOCAL_CACHE_NAME_LIST:
+                await LocalCacheUtil.publish_invalidation(request.app.state.redis, name, [local_cache_key])
+        # 身份信息按会话缓存，无法确定版本号对应的会话，清除版本号时清除全部缓存的身份信息
+        if any(key.startswith(f'{RedisInitKeyConfig.PRINCIPAL_VERSION.key}:') for key in cache_keys):
+            await cls.__unlink_namespace(request.app.state.redis, RedisInitKeyConfig.USER_PRINCIPAL.key)
 
         return CrudResponseModel(is_success=True, message=f'{cache_key}清除成功')
 
     @classmethod
     async def clear_cache_monitor_all_services(cls, request: Request):
         """
-        清除所有缓存service
+        清除所有缓存service，仅清除系统缓存名称前缀下的键值，不影响共用同一Redis库的其他数据
 
         :param request: Request对象
         :return: 操作缓存响应信息
         """
-        cache_keys = await request.app.state.redis.keys()
-        if cache_keys:
-            await request.app.state.redis.delete(*cache_keys)
+        cache_name_list = cls.get_cache_namespace_list()
+        # 先清除身份信息版本号再清除身份信息，原因见LINKED_CACHE_NAME_MAPPING
+        cache_name_list.remove(RedisInitKeyConfig.PRINCIPAL_VERSION.key)
+        cache_name_list.insert(0, RedisInitKeyConfig.PRINCIPAL_VERSION.key)
+        for cache_name in cache_name_list:
+            await cls.__unlink_namespace(request.app.state.redis, cache_name)
 
         await RedisUtil.init_sys_dict(request.app.state.redis)
         await RedisUtil.init_sys_config(request.app.state.redis)
 
         return CrudResponseModel(is_success=True, message='所有缓存清除成功')
+
+    @classmethod
+    def get_cache_namespace_list(cls):
+        """
+        获取系统缓存名称列表，系统缓存的键名为缓存名称本身或以“缓存名称:”为前缀
+
+        :return: 系统缓存名称列表
+        """
+        return [key_config.key for key_config in RedisInitKeyConfig]
+
+    @classmethod
+    async def __unlink_namespace(cls, redis: aioredis.Redis, cache_name: str):
+        """
+        使用SCAN遍历缓存名称前缀下的键，按批次通过UNLINK在后台线程中释放内存
+
+        :param redis: redis对象
+        :param cache_name: 缓存名称
+        :return: 清除的键数量
+        """
+        unlink_count = await redis.unlink(cache_name)
+        async with redis.pipeline(transaction=False) as pipe:
+            batch_keys = []
+            async for key in redis.scan_iter(match=f'{cls.__escape_pattern(cache_name)}:*', count=cls.SCAN_COUNT):
+                batch_keys.append(key)
+                if len(batch_keys) >= cls.UNLINK_BATCH_SIZE:
+                    pipe.unlink(*batch_keys)
+                    batch_keys = []
+                if len(pipe) >= cls.PIPELINE_COMMAND_COUNT:
+                    unlink_count += sum(await pipe.execute())
+            if batch_keys:
+                pipe.unlink(*batch_keys)
+            if len(pipe):
+                unlink_count += sum(await pipe.execute())
+
+        return unlink_count
+
+    @classmethod
+    def __escape_pattern(cls, value: str):
+        """
+        转义SCAN匹配模式中的通配符
+
+        :param value: 原始字符串
+        :return: 转义后的字符串
+        """
+        return re.sub(r'([\\*?\[\]])', r'\\\1', value)
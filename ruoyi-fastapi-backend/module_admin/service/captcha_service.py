@@ -1,26 +1,125 @@
+import asyncio
 import base64
 import io
 import os
 import random
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from PIL import Image, ImageDraw, ImageFont
+from typing import Deque, List, Optional, Tuple
+from config.env import AppConfig
+from utils.log_util import logger
 
 
 class CaptchaService:
     """
     验证码模块服务层
+
+    验证码图片在独立线程池中绘制，并由后台任务预先生成一批存放在进程内的验证码池中，
+    获取验证码时直接从池中取出，池中验证码不足时通知后台任务补充，池为空时才在请求中即时绘制
     """
 
+    # 每次在绘制线程池中批量绘制的数量
+    REFILL_BATCH_SIZE = 20
+    WEBP_QUALITY = 80
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _refill_task: Optional[asyncio.Task] = None
+    _refill_event: Optional[asyncio.Event] = None
+    # 预先生成的验证码（base64图片, 计算结果）
+    _pool: Deque[Tuple[str, int]] = deque()
+
+    @classmethod
+    async def init_captcha_pool(cls):
+        """
+        应用启动时初始化验证码绘制线程池及验证码池补充任务
+
+        :return:
+        """
+        cls._executor = ThreadPoolExecutor(
+            max_workers=AppConfig.app_captcha_render_workers, thread_name_prefix='captcha-render'
+        )
+        if AppConfig.app_captcha_pool_size > 0:
+            cls._refill_event = asyncio.Event()
+            cls._refill_event.set()
+            cls._refill_task = asyncio.create_task(cls.__refill())
+        logger.info('验证码池初始化成功')
+
+    @classmethod
+    async def close_captcha_pool(cls):
+        """
+        应用关闭时停止验证码池补充任务并关闭绘制线程池
+
+        :return:
+        """
+        if cls._refill_task is not None:
+            cls._refill_task.cancel()
+            try:
+                await cls._refill_task
+            except asyncio.CancelledError:
+                pass
+            cls._refill_task = None
+            cls._refill_event = None
+        cls._pool.clear()
+        if cls._executor is not None:
+            executor = cls._executor
+            cls._executor = None
+            await asyncio.to_thread(executor.shutdown, wait=True)
+        logger.info('验证码池已关闭')
+
     @classmethod
     async def create_captcha_image_service(cls):
+        """
+        获取验证码图片及计算结果service，优先从验证码池中取出
+
+        :return: [base64图片, 计算结果]
+        """
+        try:
+            captcha = cls._pool.popleft()
+        except IndexError:
+            captcha = None
+        if cls._refill_event is not None and len(cls._pool) < AppConfig.app_captcha_pool_size // 2:
+            cls._refill_event.set()
+        if captcha is None:
+            captcha = await cls.__render_off_loop()
+
+        return list(captcha)
+
+    @classmethod
+    def get_pool_size(cls):
+        """
+        获取验证码池中剩余的验证码数量
+
+        :return: 验证码数量
+        """
+        return len(cls._pool)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_font(size: int = 30):
+        """
+        获取验证码字体，字体文件只加载一次
+
+        :param size: 字体大小
+        :return: 字体对象
+        """
+        return ImageFont.truetype(os.path.join(os.path.abspath(os.getcwd()), 'assets', 'font', 'Arial.ttf'), size=size)
+
+    @classmethod
+    def render_captcha(cls, image_format: str = None) -> Tuple[str, int]:
+        """
+        绘制验证码图片
+
+        :param image_format: 图片格式，png、png8（调色板png）或webp，默认读取应用配置
+        :return: base64图片及计算结果
+        """
         # 创建空白图像
         image = Image.new('RGB', (160, 60), color='#EAEAEA')
 
         # 创建绘图对象
         draw = ImageDraw.Draw(image)
 
-        # 设置字体
-        font = ImageFont.truetype(os.path.join(os.path.abspath(os.getcwd()), 'assets', 'font', 'Arial.ttf'), size=30)
-
         # 生成两个0-9之间的随机整数
         num1 = random.randint(0, 9)
         num2 = random.randint(0, 9)
@@ -36,13 +135,62 @@ class CaptchaService:
             result = num1 * num2
         # 绘制文本
         text = f'{num1} {operational_character} {num2} = ?'
-        draw.text((25, 15), text, fill='blue', font=font)
+        draw.text((25, 15), text, fill='blue', font=cls.get_font())
 
         # 将图像数据保存到内存中
         buffer = io.BytesIO()
-        image.save(buffer, format='PNG')
+        image_format = image_format or AppConfig.app_captcha_image_format
+        if image_format == 'png8':
+            image.convert('P', palette=Image.Palette.ADAPTIVE, colors=16).save(buffer, format='PNG', optimize=True)
+        elif image_format == 'webp':
+            image.save(buffer, format='WEBP', quality=cls.WEBP_QUALITY)
+        else:
+            image.save(buffer, format='PNG')
 
         # 将图像数据转换为base64字符串
         base64_string = base64.b64encode(buffer.getvalue()).decode()
 
-        return [base64_string, result]
+        return base64_string, result
+
+    @classmethod
+    def render_captcha_batch(cls, count: int) -> List[Tuple[str, int]]:
+        """
+        批量绘制验证码图片
+
+        :param count: 数量
+        :return: base64图片及计算结果列表
+        """
+        return [cls.render_captcha() for _ in range(count)]
+
+    @classmethod
+    async def __render_off_loop(cls):
+        """
+        在绘制线程池中绘制验证码，线程池未初始化时（如脚本中调用）直接绘制
+
+        :return: base64图片及计算结果
+        """
+        if cls._executor is None:
+            return cls.render_captcha()
+        return await asyncio.get_running_loop().run_in_executor(cls._executor, cls.render_captcha)
+
+    @classmethod
+    async def __refill(cls):
+        """
+        后台补充验证码池任务，每次在绘制线程池中批量绘制，直至验证码池填满
+
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await cls._refill_event.wait()
+            cls._refill_event.clear()
+            try:
+                while len(cls._pool) < AppConfig.app_captcha_pool_size:
+                    count = min(cls.REFILL_BATCH_SIZE, AppConfig.app_captcha_pool_size - len(cls._pool))
+                    cls._pool.extend(await loop.run_in_executor(cls._executor, cls.render_captcha_batch, count))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f'验证码池补充失败，详细错误信息：{e}')
+                await asyncio.sleep(1)
+                cls._refill_event.set()
@@ -1,9 +1,9 @@
 import os
-from datetime import datetime
 from fastapi import BackgroundTasks, Request, UploadFile
 from config.env import UploadConfig
 from exceptions.exception import ServiceException
-from module_admin.entity.vo.common_vo import CrudResponseModel, UploadResponseModel
+from module_admin.entity.vo.common_vo import CrudResponseModel
+from module_admin.service.upload_service import UploadService
 from utils.upload_util import UploadUtil
 
 
@@ -24,48 +24,9 @@ class CommonService:
         """
         if not UploadUtil.check_file_extension(file):
             raise ServiceException(message='文件类型不合法')
-        else:
-            relative_path = f'upload/{datetime.now().strftime("%Y")}/{datetime.now().strftime("%m")}/{datetime.now().strftime("%d")}'
-            dir_path = os.path.join(UploadConfig.UPLOAD_PATH, relative_path)
-            try:
-                os.makedirs(dir_path)
-            except FileExistsError:
-                pass
-            
-            # 使用原始文件名，不添加时间戳和随机字符
-            filename = file.filename
-            
-            # 检查文件是否已存在
-            filepath = os.path.join(dir_path, filename)
-            
-            # 如果文件已存在且不覆盖，则添加计数器
-            if os.path.exists(filepath) and not overwrite:
-                counter = 1
-                name_parts = filename.rsplit(".", 1)
-                
-                while os.path.exists(filepath):
-                    if len(name_parts) > 1:
-                        filename = f"{name_parts[0]}_{counter}.{name_parts[1]}"
-                    else:
-                        filename = f"{name_parts[0]}_{counter}"
-                    filepath = os.path.join(dir_path, filename)
-                    counter += 1
-            
-            with open(filepath, 'wb') as f:
-                # 流式写出大型文件，这里的10代表10MB
-                for chunk in iter(lambda: file.file.read(1024 * 1024 * 10), b''):
-                    f.write(chunk)
+        upload_result = await UploadService.upload_file_services(request, file, overwrite)
 
-            return CrudResponseModel(
-                is_success=True,
-                result=UploadResponseModel(
-                    fileName=f'{UploadConfig.UPLOAD_PREFIX}/{relative_path}/{filename}',
-                    newFileName=filename,
-                    originalFilename=file.filename,
-                    url=f'{request.base_url}{UploadConfig.UPLOAD_PREFIX[1:]}/{relative_path}/{filename}',
-                ),
-                message='上传成功',
-            )
+        return CrudResponseModel(is_success=True, result=upload_result, message='上传成功')
 
     @classmethod
     async def download_services(cls, background_tasks: BackgroundTasks, file_name, delete: bool):
@@ -75,7 +36,7 @@ class CommonService:
         :param background_tasks: 后台任务对象
         :param file_name: 下载的文件名称
         :param delete: 是否在下载完成后删除文件
-        :return: 上传结果
+        :return: 下载结果，result为文件路径
         """
         filepath = os.path.join(UploadConfig.DOWNLOAD_PATH, file_name)
         if '..' in file_name:
@@ -85,7 +46,7 @@ class CommonService:
         else:
             if delete:
                 background_tasks.add_task(UploadUtil.delete_file, filepath)
-            return CrudResponseModel(is_success=True, result=UploadUtil.generate_file(filepath), message='下载成功')
+            return CrudResponseModel(is_success=True, result=filepath, message='下载成功')
 
     @classmethod
     async def download_resource_services(cls, resource: str):
@@ -93,7 +54,7 @@ class CommonService:
         下载上传目录文件service
 
         :param resource: 下载的文件名称
-        :return: 上传结果
+        :return: 下载结果，result为文件路径
         """
         filepath = os.path.join(resource.replace(UploadConfig.UPLOAD_PREFIX, UploadConfig.UPLOAD_PATH))
         filename = resource.rsplit('/', 1)[-1]
@@ -107,4 +68,4 @@ class CommonService:
         elif not UploadUtil.check_file_exists(filepath):
             raise ServiceException(message='文件不存在')
         else:
-            return CrudResponseModel(is_success=True, result=UploadUtil.generate_file(filepath), message='下载成功')
+            return CrudResponseModel(is_success=True, result=filepath, message='下载成功')
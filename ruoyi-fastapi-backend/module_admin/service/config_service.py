@@ -1,14 +1,16 @@
 from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import AsyncIterable, Dict, List, Literal
 from config.constant import CommonConstant
 from config.enums import RedisInitKeyConfig
 from exceptions.exception import ServiceException
 from module_admin.dao.config_dao import ConfigDao
 from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.config_vo import ConfigModel, ConfigPageQueryModel, DeleteConfigModel
+from utils.cache_swap_util import CacheSwapUtil
 from utils.common_util import CamelCaseUtil
 from utils.excel_util import ExcelUtil
+from utils.local_cache_util import LocalCacheUtil
 
 
 class ConfigService:
@@ -18,7 +20,7 @@ class ConfigService:
 
     @classmethod
     async def get_config_list_services(
-        cls, query_db: AsyncSession, query_object: ConfigPageQueryModel, is_page: bool = False
+        cls, query_db: AsyncSession, query_object: ConfigPageQueryModel, is_page: bool = False, is_stream: bool = False
     ):
         """
         获取参数配置列表信息service
@@ -26,9 +28,10 @@ class ConfigService:
         :param query_db: orm对象
         :param query_object: 查询参数对象
         :param is_page: 是否开启分页
+        :param is_stream: 是否使用服务端游标分批读取全部数据
         :return: 参数配置列表信息对象
         """
-        config_list_result = await ConfigDao.get_config_list(query_db, query_object, is_page)
+        config_list_result = await ConfigDao.get_config_list(query_db, query_object, is_page, is_stream)
 
         return config_list_result
 
@@ -41,28 +44,28 @@ class ConfigService:
         :param redis: redis对象
         :return:
         """
-        # 获取以sys_config:开头的键列表
-        keys = await redis.keys(f'{RedisInitKeyConfig.SYS_CONFIG.key}:*')
-        # 删除匹配的键
-        if keys:
-            await redis.delete(*keys)
         config_all = await ConfigDao.get_config_list(query_db, ConfigPageQueryModel(**dict()), is_page=False)
-        for config_obj in config_all:
-            await redis.set(
-                f"{RedisInitKeyConfig.SYS_CONFIG.key}:{config_obj.get('configKey')}",
-                config_obj.get('configValue'),
-            )
+        await CacheSwapUtil.swap_namespace(
+            redis,
+            RedisInitKeyConfig.SYS_CONFIG.key,
+            {config_obj.get('configKey'): config_obj.get('configValue') for config_obj in config_all},
+        )
+        await LocalCacheUtil.publish_invalidation(redis, RedisInitKeyConfig.SYS_CONFIG.key)
 
     @classmethod
     async def query_config_list_from_cache_services(cls, redis, config_key: str):
         """
-        从缓存获取参数键名对应值service
+        从缓存获取参数键名对应值service，优先读取进程内缓存
 
         :param redis: redis对象
         :param config_key: 参数键名
         :return: 参数键名对应值
         """
-        result = await redis.get(f'{RedisInitKeyConfig.SYS_CONFIG.key}:{config_key}')
+        result = await LocalCacheUtil.get(
+            RedisInitKeyConfig.SYS_CONFIG.key,
+            config_key,
+            lambda: redis.get(f'{RedisInitKeyConfig.SYS_CONFIG.key}:{config_key}'),
+        )
 
         return result
 
@@ -100,6 +103,9 @@ class ConfigService:
                 await request.app.state.redis.set(
                     f'{RedisInitKeyConfig.SYS_CONFIG.key}:{page_object.config_key}', page_object.config_value
                 )
+                await LocalCacheUtil.publish_invalidation(
+                    request.app.state.redis, RedisInitKeyConfig.SYS_CONFIG.key, [page_object.config_key]
+                )
                 return CrudResponseModel(is_success=True, message='新增成功')
             except Exception as e:
                 await query_db.rollback()
@@ -131,6 +137,11 @@ class ConfigService:
                     await request.app.state.redis.set(
                         f'{RedisInitKeyConfig.SYS_CONFIG.key}:{page_object.config_key}', page_object.config_value
                     )
+                    await LocalCacheUtil.publish_invalidation(
+                        request.app.state.redis,
+                        RedisInitKeyConfig.SYS_CONFIG.key,
+                        list({config_info.config_key, page_object.config_key}),
+                    )
                     return CrudResponseModel(is_success=True, message='更新成功')
                 except Exception as e:
                     await query_db.rollback()
@@ -152,6 +163,7 @@ class ConfigService:
             config_id_list = page_object.config_ids.split(',')
             try:
                 delete_config_key_list = []
+                delete_config_list = []
                 for config_id in config_id_list:
                     config_info = await cls.config_detail_services(query_db, int(config_id))
                     if config_info.config_type == CommonConstant.YES:
@@ -159,9 +171,13 @@ class ConfigService:
                     else:
                         await ConfigDao.delete_config_dao(query_db, ConfigModel(configId=int(config_id)))
                         delete_config_key_list.append(f'{RedisInitKeyConfig.SYS_CONFIG.key}:{config_info.config_key}')
+                        delete_config_list.append(config_info.config_key)
                 await query_db.commit()
                 if delete_config_key_list:
                     await request.app.state.redis.delete(*delete_config_key_list)
+                    await LocalCacheUtil.publish_invalidation(
+                        request.app.state.redis, RedisInitKeyConfig.SYS_CONFIG.key, delete_config_list
+                    )
                 return CrudResponseModel(is_success=True, message='删除成功')
             except Exception as e:
                 await query_db.rollback()
@@ -187,12 +203,15 @@ class ConfigService:
         return result
 
     @staticmethod
-    async def export_config_list_services(config_list: List):
+    async def export_config_list_services(
+        config_list: AsyncIterable[List[Dict]], export_format: Literal['xlsx', 'csv'] = 'xlsx'
+    ):
         """
         导出参数配置信息service
 
-        :param config_list: 参数配置信息列表
-        :return: 参数配置信息对应excel的二进制数据
+        :param config_list: 参数配置信息列表的分批异步迭代器
+        :param export_format: 导出文件格式，xlsx或csv
+        :return: 参数配置信息对应导出文件内容的异步迭代器
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -208,14 +227,14 @@ class ConfigService:
             'remark': '备注',
         }
 
-        for item in config_list:
+        def mapping_row(item: Dict):
             if item.get('configType') == 'Y':
                 item['configType'] = '是'
             else:
                 item['configType'] = '否'
-        binary_data = ExcelUtil.export_list2excel(config_list, mapping_dict)
+            return item
 
-        return binary_data
+        return ExcelUtil.stream_export_list(config_list, mapping_dict, mapping_row, export_format)
 
     @classmethod
     async def refresh_sys_config_services(cls, request: Request, query_db: AsyncSession):
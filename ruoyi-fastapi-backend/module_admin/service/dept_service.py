@@ -1,9 +1,12 @@
+from sqlalchemy import ColumnElement
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Tuple
 from config.constant import CommonConstant
 from exceptions.exception import ServiceException, ServiceWarning
 from module_admin.dao.dept_dao import DeptDao
 from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.dept_vo import DeleteDeptModel, DeptModel
+from module_admin.service.principal_service import PrincipalCacheService
 from utils.common_util import CamelCaseUtil
 
 
@@ -13,13 +16,15 @@ class DeptService:
     """
 
     @classmethod
-    async def get_dept_tree_services(cls, query_db: AsyncSession, page_object: DeptModel, data_scope_sql: str):
+    async def get_dept_tree_services(
+        cls, query_db: AsyncSession, page_object: DeptModel, data_scope_sql: ColumnElement
+    ):
         """
         获取部门树信息service
 
         :param query_db: orm对象
         :param page_object: 查询参数对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_sql: 数据权限对应的查询条件
         :return: 部门树信息对象
         """
         dept_list_result = await DeptDao.get_dept_list_for_tree(query_db, page_object, data_scope_sql)
@@ -29,14 +34,14 @@ class DeptService:
 
     @classmethod
     async def get_dept_for_edit_option_services(
-        cls, query_db: AsyncSession, page_object: DeptModel, data_scope_sql: str
+        cls, query_db: AsyncSession, page_object: DeptModel, data_scope_sql: ColumnElement
     ):
         """
         获取部门编辑部门树信息service
 
         :param query_db: orm对象
         :param page_object: 查询参数对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_sql: 数据权限对应的查询条件
         :return: 部门树信息对象
         """
         dept_list_result = await DeptDao.get_dept_info_for_edit_option(query_db, page_object, data_scope_sql)
@@ -44,13 +49,15 @@ class DeptService:
         return CamelCaseUtil.transform_result(dept_list_result)
 
     @classmethod
-    async def get_dept_list_services(cls, query_db: AsyncSession, page_object: DeptModel, data_scope_sql: str):
+    async def get_dept_list_services(
+        cls, query_db: AsyncSession, page_object: DeptModel, data_scope_sql: ColumnElement
+    ):
         """
         获取部门列表信息service
 
         :param query_db: orm对象
         :param page_object: 分页查询参数对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_sql: 数据权限对应的查询条件
         :return: 部门列表信息对象
         """
         dept_list_result = await DeptDao.get_dept_list(query_db, page_object, data_scope_sql)
@@ -58,13 +65,13 @@ class DeptService:
         return CamelCaseUtil.transform_result(dept_list_result)
 
     @classmethod
-    async def check_dept_data_scope_services(cls, query_db: AsyncSession, dept_id: int, data_scope_sql: str):
+    async def check_dept_data_scope_services(cls, query_db: AsyncSession, dept_id: int, data_scope_sql: ColumnElement):
         """
         校验部门是否有数据权限service
 
         :param query_db: orm对象
         :param dept_id: 部门id
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_sql: 数据权限对应的查询条件
         :return: 校验结果
         """
         depts = await DeptDao.get_dept_list(query_db, DeptModel(deptId=dept_id), data_scope_sql)
@@ -106,8 +113,10 @@ class DeptService:
             raise ServiceException(message=f'部门{parent_info.dept_name}停用，不允许新增')
         page_object.ancestors = f'{parent_info.ancestors},{page_object.parent_id}'
         try:
-            await DeptDao.add_dept_dao(query_db, page_object)
+            add_dept = await DeptDao.add_dept_dao(query_db, page_object)
+            await DeptDao.add_dept_closure_dao(query_db, add_dept.dept_id, page_object.parent_id)
             await query_db.commit()
+            await PrincipalCacheService.bump_global_version()
             return CrudResponseModel(is_success=True, message='新增成功')
         except Exception as e:
             await query_db.rollback()
@@ -139,6 +148,8 @@ class DeptService:
                 old_ancestors = old_dept.ancestors
                 page_object.ancestors = new_ancestors
                 await cls.update_dept_children(query_db, page_object.dept_id, new_ancestors, old_ancestors)
+                if old_dept.parent_id != new_parent_dept.dept_id:
+                    await DeptDao.move_dept_closure_dao(query_db, page_object.dept_id, new_parent_dept.dept_id)
             edit_dept = page_object.model_dump(exclude_unset=True)
             await DeptDao.edit_dept_dao(query_db, edit_dept)
             if (
@@ -148,6 +159,7 @@ class DeptService:
             ):
                 await cls.update_parent_dept_status_normal(query_db, page_object)
             await query_db.commit()
+            await PrincipalCacheService.bump_global_version()
             return CrudResponseModel(is_success=True, message='更新成功')
         except Exception as e:
             await query_db.rollback()
@@ -172,7 +184,9 @@ class DeptService:
                         raise ServiceWarning(message='部门存在用户,不允许删除')
 
                     await DeptDao.delete_dept_dao(query_db, DeptModel(deptId=dept_id))
+                    await DeptDao.delete_dept_closure_dao(query_db, int(dept_id))
                 await query_db.commit()
+                await PrincipalCacheService.bump_global_version()
                 return CrudResponseModel(is_success=True, message='删除成功')
             except Exception as e:
                 await query_db.rollback()
@@ -180,6 +194,69 @@ class DeptService:
         else:
             raise ServiceException(message='传入部门id为空')
 
+    @classmethod
+    async def init_dept_closure_services(cls, query_db: AsyncSession):
+        """
+        应用初始化：部门闭包表为空时根据部门表重建
+
+        :param query_db: orm对象
+        :return:
+        """
+        if not await DeptDao.count_dept_closure_dao(query_db):
+            await cls.rebuild_dept_closure_services(query_db)
+
+    @classmethod
+    async def rebuild_dept_closure_services(cls, query_db: AsyncSession):
+        """
+        根据部门表的父部门关系重建部门闭包表service
+
+        :param query_db: orm对象
+        :return: 重建后的部门闭包关系数量
+        """
+        dept_parent_list = await DeptDao.get_dept_parent_list_dao(query_db)
+        dept_closure_list = cls.generate_dept_closure_list(dept_parent_list)
+        try:
+            await DeptDao.rebuild_dept_closure_dao(query_db, dept_closure_list)
+            await query_db.commit()
+            await PrincipalCacheService.bump_global_version()
+        except Exception as e:
+            await query_db.rollback()
+            raise e
+
+        return len(dept_closure_list)
+
+    @classmethod
+    def generate_dept_closure_list(cls, dept_parent_list: List[Tuple[int, int]]) -> List[Dict]:
+        """
+        工具方法：根据部门id及父部门id生成部门闭包关系列表
+
+        :param dept_parent_list: 部门id及父部门id列表
+        :return: 部门闭包关系列表
+        """
+        children_mapping: Dict[int, List[int]] = {}
+        dept_id_set = {dept_id for dept_id, _ in dept_parent_list}
+        root_id_list = []
+        for dept_id, parent_id in dept_parent_list:
+            if parent_id in dept_id_set and parent_id != dept_id:
+                children_mapping.setdefault(parent_id, []).append(dept_id)
+            else:
+                root_id_list.append(dept_id)
+        dept_closure_list = []
+        visited = set()
+        # 深度优先遍历，栈中保存部门id及从根部门到该部门的路径
+        stack = [(root_id, []) for root_id in root_id_list]
+        while stack:
+            dept_id, path = stack.pop()
+            if dept_id in visited:
+                continue
+            visited.add(dept_id)
+            path = path + [dept_id]
+            for depth, ancestor_id in enumerate(reversed(path)):
+                dept_closure_list.append(dict(ancestor_id=ancestor_id, descendant_id=dept_id, depth=depth))
+            stack.extend((child_id, path) for child_id in children_mapping.get(dept_id, []))
+
+        return dept_closure_list
+
     @classmethod
     async def dept_detail_services(cls, query_db: AsyncSession, dept_id: int):
         """
@@ -1,7 +1,7 @@
 import json
 from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import AsyncIterable, Dict, List, Literal
 from config.constant import CommonConstant
 from config.enums import RedisInitKeyConfig
 from exceptions.exception import ServiceException
@@ -15,8 +15,10 @@ from module_admin.entity.vo.dict_vo import (
     DictTypeModel,
     DictTypePageQueryModel,
 )
+from utils.cache_swap_util import CacheSwapUtil
 from utils.common_util import CamelCaseUtil
 from utils.excel_util import ExcelUtil
+from utils.local_cache_util import LocalCacheUtil
 
 
 class DictTypeService:
@@ -26,7 +28,11 @@ class DictTypeService:
 
     @classmethod
     async def get_dict_type_list_services(
-        cls, query_db: AsyncSession, query_object: DictTypePageQueryModel, is_page: bool = False
+        cls,
+        query_db: AsyncSession,
+        query_object: DictTypePageQueryModel,
+        is_page: bool = False,
+        is_stream: bool = False,
     ):
         """
         获取字典类型列表信息service
@@ -34,9 +40,10 @@ class DictTypeService:
         :param query_db: orm对象
         :param query_object: 查询参数对象
         :param is_page: 是否开启分页
+        :param is_stream: 是否使用服务端游标分批读取全部数据
         :return: 字典类型列表信息对象
         """
-        dict_type_list_result = await DictTypeDao.get_dict_type_list(query_db, query_object, is_page)
+        dict_type_list_result = await DictTypeDao.get_dict_type_list(query_db, query_object, is_page, is_stream)
 
         return dict_type_list_result
 
@@ -74,6 +81,9 @@ class DictTypeService:
                 await DictTypeDao.add_dict_type_dao(query_db, page_object)
                 await query_db.commit()
                 await request.app.state.redis.set(f'{RedisInitKeyConfig.SYS_DICT.key}:{page_object.dict_type}', '')
+                await LocalCacheUtil.publish_invalidation(
+                    request.app.state.redis, RedisInitKeyConfig.SYS_DICT.key, [page_object.dict_type]
+                )
                 result = dict(is_success=True, message='新增成功')
             except Exception as e:
                 await query_db.rollback()
@@ -117,6 +127,11 @@ class DictTypeService:
                             f'{RedisInitKeyConfig.SYS_DICT.key}:{page_object.dict_type}',
                             json.dumps(dict_data, ensure_ascii=False, default=str),
                         )
+                        await LocalCacheUtil.publish_invalidation(
+                            request.app.state.redis,
+                            RedisInitKeyConfig.SYS_DICT.key,
+                            [dict_type_info.dict_type, page_object.dict_type],
+                        )
                     return CrudResponseModel(is_success=True, message='更新成功')
                 except Exception as e:
                     await query_db.rollback()
@@ -140,15 +155,20 @@ class DictTypeService:
             dict_id_list = page_object.dict_ids.split(',')
             try:
                 delete_dict_type_list = []
+                delete_dict_type_name_list = []
                 for dict_id in dict_id_list:
                     dict_type_into = await cls.dict_type_detail_services(query_db, int(dict_id))
                     if (await DictDataDao.count_dict_data_dao(query_db, dict_type_into.dict_type)) > 0:
                         raise ServiceException(message=f'{dict_type_into.dict_name}已分配，不能删除')
                     await DictTypeDao.delete_dict_type_dao(query_db, DictTypeModel(dictId=int(dict_id)))
                     delete_dict_type_list.append(f'{RedisInitKeyConfig.SYS_DICT.key}:{dict_type_into.dict_type}')
+                    delete_dict_type_name_list.append(dict_type_into.dict_type)
                 await query_db.commit()
                 if delete_dict_type_list:
                     await request.app.state.redis.delete(*delete_dict_type_list)
+                    await LocalCacheUtil.publish_invalidation(
+                        request.app.state.redis, RedisInitKeyConfig.SYS_DICT.key, delete_dict_type_name_list
+                    )
                 return CrudResponseModel(is_success=True, message='删除成功')
             except Exception as e:
                 await query_db.rollback()
@@ -174,12 +194,15 @@ class DictTypeService:
         return result
 
     @staticmethod
-    async def export_dict_type_list_services(dict_type_list: List):
+    async def export_dict_type_list_services(
+        dict_type_list: AsyncIterable[List[Dict]], export_format: Literal['xlsx', 'csv'] = 'xlsx'
+    ):
         """
         导出字典类型信息service
 
-        :param dict_type_list: 字典信息列表
-        :return: 字典信息对应excel的二进制数据
+        :param dict_type_list: 字典信息列表的分批异步迭代器
+        :param export_format: 导出文件格式，xlsx或csv
+        :return: 字典信息对应导出文件内容的异步迭代器
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -194,14 +217,14 @@ class DictTypeService:
             'remark': '备注',
         }
 
-        for item in dict_type_list:
+        def mapping_row(item: Dict):
             if item.get('status') == '0':
                 item['status'] = '正常'
             else:
                 item['status'] = '停用'
-        binary_data = ExcelUtil.export_list2excel(dict_type_list, mapping_dict)
+            return item
 
-        return binary_data
+        return ExcelUtil.stream_export_list(dict_type_list, mapping_dict, mapping_row, export_format)
 
     @classmethod
     async def refresh_sys_dict_services(cls, request: Request, query_db: AsyncSession):
@@ -225,7 +248,11 @@ class DictDataService:
 
     @classmethod
     async def get_dict_data_list_services(
-        cls, query_db: AsyncSession, query_object: DictDataPageQueryModel, is_page: bool = False
+        cls,
+        query_db: AsyncSession,
+        query_object: DictDataPageQueryModel,
+        is_page: bool = False,
+        is_stream: bool = False,
     ):
         """
         获取字典数据列表信息service
@@ -233,9 +260,10 @@ class DictDataService:
         :param query_db: orm对象
         :param query_object: 查询参数对象
         :param is_page: 是否开启分页
+        :param is_stream: 是否使用服务端游标分批读取全部数据
         :return: 字典数据列表信息对象
         """
-        dict_data_list_result = await DictDataDao.get_dict_data_list(query_db, query_object, is_page)
+        dict_data_list_result = await DictDataDao.get_dict_data_list(query_db, query_object, is_page, is_stream)
 
         return dict_data_list_result
 
@@ -261,36 +289,41 @@ class DictDataService:
         :param redis: redis对象
         :return:
         """
-        # 获取以sys_dict:开头的键列表
-        keys = await redis.keys(f'{RedisInitKeyConfig.SYS_DICT.key}:*')
-        # 删除匹配的键
-        if keys:
-            await redis.delete(*keys)
-        dict_type_all = await DictTypeDao.get_all_dict_type(query_db)
-        for dict_type_obj in [item for item in dict_type_all if item.status == '0']:
-            dict_type = dict_type_obj.dict_type
-            dict_data_list = await DictDataDao.query_dict_data_list(query_db, dict_type)
-            dict_data = [CamelCaseUtil.transform_result(row) for row in dict_data_list if row]
-            await redis.set(
-                f'{RedisInitKeyConfig.SYS_DICT.key}:{dict_type}',
-                json.dumps(dict_data, ensure_ascii=False, default=str),
-            )
+        # 一次查询获取所有字典数据后在内存中按字典类型分组
+        dict_data_mapping = {}
+        for dict_type, dict_data in await DictDataDao.get_all_enabled_dict_data(query_db):
+            dict_data_list = dict_data_mapping.setdefault(dict_type, [])
+            if dict_data:
+                dict_data_list.append(CamelCaseUtil.transform_result(dict_data))
+        await CacheSwapUtil.swap_namespace(
+            redis,
+            RedisInitKeyConfig.SYS_DICT.key,
+            {
+                dict_type: json.dumps(dict_data_list, ensure_ascii=False, default=str)
+                for dict_type, dict_data_list in dict_data_mapping.items()
+            },
+        )
+        await LocalCacheUtil.publish_invalidation(redis, RedisInitKeyConfig.SYS_DICT.key)
 
     @classmethod
     async def query_dict_data_list_from_cache_services(cls, redis, dict_type: str):
         """
-        从缓存获取字典数据列表信息service
+        从缓存获取字典数据列表信息service，优先读取进程内缓存中已解析的字典数据
 
         :param redis: redis对象
         :param dict_type: 字典类型
-        :return: 字典数据列表信息对象
+        :return: 字典数据列表信息对象，为多个调用方共享的对象，调用方不应修改
         """
-        result = []
-        dict_data_list_result = await redis.get(f'{RedisInitKeyConfig.SYS_DICT.key}:{dict_type}')
-        if dict_data_list_result:
-            result = json.loads(dict_data_list_result)
 
-        return CamelCaseUtil.transform_result(result)
+        async def load_dict_data_list():
+            result = []
+            dict_data_list_result = await redis.get(f'{RedisInitKeyConfig.SYS_DICT.key}:{dict_type}')
+            if dict_data_list_result:
+                result = json.loads(dict_data_list_result)
+
+            return CamelCaseUtil.transform_result(result)
+
+        return await LocalCacheUtil.get(RedisInitKeyConfig.SYS_DICT.key, dict_type, load_dict_data_list)
 
     @classmethod
     async def check_dict_data_unique_services(cls, query_db: AsyncSession, page_object: DictDataModel):
@@ -330,6 +363,9 @@ class DictDataService:
                     f'{RedisInitKeyConfig.SYS_DICT.key}:{page_object.dict_type}',
                     json.dumps(CamelCaseUtil.transform_result(dict_data_list), ensure_ascii=False, default=str),
                 )
+                await LocalCacheUtil.publish_invalidation(
+                    request.app.state.redis, RedisInitKeyConfig.SYS_DICT.key, [page_object.dict_type]
+                )
                 return CrudResponseModel(is_success=True, message='新增成功')
             except Exception as e:
                 await query_db.rollback()
@@ -361,6 +397,9 @@ class DictDataService:
                         f'{RedisInitKeyConfig.SYS_DICT.key}:{page_object.dict_type}',
                         json.dumps(CamelCaseUtil.transform_result(dict_data_list), ensure_ascii=False, default=str),
                     )
+                    await LocalCacheUtil.publish_invalidation(
+                        request.app.state.redis, RedisInitKeyConfig.SYS_DICT.key, [page_object.dict_type]
+                    )
                     return CrudResponseModel(is_success=True, message='更新成功')
                 except Exception as e:
                     await query_db.rollback()
@@ -395,6 +434,9 @@ class DictDataService:
                         f'{RedisInitKeyConfig.SYS_DICT.key}:{dict_type}',
                         json.dumps(CamelCaseUtil.transform_result(dict_data_list), ensure_ascii=False, default=str),
                     )
+                await LocalCacheUtil.publish_invalidation(
+                    request.app.state.redis, RedisInitKeyConfig.SYS_DICT.key, list(set(delete_dict_type_list))
+                )
                 return CrudResponseModel(is_success=True, message='删除成功')
             except Exception as e:
                 await query_db.rollback()
@@ -420,12 +462,15 @@ class DictDataService:
         return result
 
     @staticmethod
-    async def export_dict_data_list_services(dict_data_list: List):
+    async def export_dict_data_list_services(
+        dict_data_list: AsyncIterable[List[Dict]], export_format: Literal['xlsx', 'csv'] = 'xlsx'
+    ):
         """
         导出字典数据信息service
 
-        :param dict_data_list: 字典数据信息列表
-        :return: 字典数据信息对应excel的二进制数据
+        :param dict_data_list: 字典数据信息列表的分批异步迭代器
+        :param export_format: 导出文件格式，xlsx或csv
+        :return: 字典数据信息对应导出文件内容的异步迭代器
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -445,7 +490,7 @@ class DictDataService:
             'remark': '备注',
         }
 
-        for item in dict_data_list:
+        def mapping_row(item: Dict):
             if item.get('status') == '0':
                 item['status'] = '正常'
             else:
@@ -454,6 +499,6 @@ class DictDataService:
                 item['isDefault'] = '是'
             else:
                 item['isDefault'] = '否'
-        binary_data = ExcelUtil.export_list2excel(dict_data_list, mapping_dict)
+            return item
 
-        return binary_data
+        return ExcelUtil.stream_export_list(dict_data_list, mapping_dict, mapping_row, export_format)
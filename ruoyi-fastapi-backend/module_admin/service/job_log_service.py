@@ -1,7 +1,7 @@
 from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import AsyncIterable, Dict, List, Literal
 from module_admin.dao.job_log_dao import JobLogDao
 from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.job_vo import DeleteJobLogModel, JobLogModel, JobLogPageQueryModel
@@ -16,7 +16,7 @@ class JobLogService:
 
     @classmethod
     async def get_job_log_list_services(
-        cls, query_db: AsyncSession, query_object: JobLogPageQueryModel, is_page: bool = False
+        cls, query_db: AsyncSession, query_object: JobLogPageQueryModel, is_page: bool = False, is_stream: bool = False
     ):
         """
         获取定时任务日志列表信息service
@@ -24,9 +24,10 @@ class JobLogService:
         :param query_db: orm对象
         :param query_object: 查询参数对象
         :param is_page: 是否开启分页
+        :param is_stream: 是否使用服务端游标分批读取全部数据
         :return: 定时任务日志列表信息对象
         """
-        job_log_list_result = await JobLogDao.get_job_log_list(query_db, query_object, is_page)
+        job_log_list_result = await JobLogDao.get_job_log_list(query_db, query_object, is_page, is_stream)
 
         return job_log_list_result
 
@@ -91,13 +92,16 @@ class JobLogService:
         return CrudResponseModel(**result)
 
     @staticmethod
-    async def export_job_log_list_services(request: Request, job_log_list: List):
+    async def export_job_log_list_services(
+        request: Request, job_log_list: AsyncIterable[List[Dict]], export_format: Literal['xlsx', 'csv'] = 'xlsx'
+    ):
         """
         导出定时任务日志信息service
 
         :param request: Request对象
-        :param job_log_list: 定时任务日志信息列表
-        :return: 定时任务日志信息对应excel的二进制数据
+        :param job_log_list: 定时任务日志信息列表的分批异步迭代器
+        :param export_format: 导出文件格式，xlsx或csv
+        :return: 定时任务日志信息对应导出文件内容的异步迭代器
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -128,7 +132,7 @@ class JobLogService:
         ]
         job_executor_option_dict = {item.get('value'): item for item in job_executor_option}
 
-        for item in job_log_list:
+        def mapping_row(item: Dict):
             if item.get('status') == '0':
                 item['status'] = '正常'
             else:
@@ -137,6 +141,6 @@ class JobLogService:
                 item['jobGroup'] = job_group_option_dict.get(str(item.get('jobGroup'))).get('label')
             if str(item.get('jobExecutor')) in job_executor_option_dict.keys():
                 item['jobExecutor'] = job_executor_option_dict.get(str(item.get('jobExecutor'))).get('label')
-        binary_data = ExcelUtil.export_list2excel(job_log_list, mapping_dict)
+            return item
 
-        return binary_data
+        return ExcelUtil.stream_export_list(job_log_list, mapping_dict, mapping_row, export_format)
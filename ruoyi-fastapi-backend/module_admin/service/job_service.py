@@ -1,6 +1,6 @@
 from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import AsyncIterable, Dict, List, Literal
 from config.constant import CommonConstant, JobConstant
 from config.get_scheduler import SchedulerUtil
 from exceptions.exception import ServiceException
@@ -21,7 +21,7 @@ class JobService:
 
     @classmethod
     async def get_job_list_services(
-        cls, query_db: AsyncSession, query_object: JobPageQueryModel, is_page: bool = False
+        cls, query_db: AsyncSession, query_object: JobPageQueryModel, is_page: bool = False, is_stream: bool = False
     ):
         """
         获取定时任务列表信息service
@@ -29,9 +29,10 @@ class JobService:
         :param query_db: orm对象
         :param query_object: 查询参数对象
         :param is_page: 是否开启分页
+        :param is_stream: 是否使用服务端游标分批读取全部数据
         :return: 定时任务列表信息对象
         """
-        job_list_result = await JobDao.get_job_list(query_db, query_object, is_page)
+        job_list_result = await JobDao.get_job_list(query_db, query_object, is_page, is_stream)
 
         return job_list_result
 
@@ -200,13 +201,16 @@ class JobService:
         return result
 
     @staticmethod
-    async def export_job_list_services(request: Request, job_list: List):
+    async def export_job_list_services(
+        request: Request, job_list: AsyncIterable[List[Dict]], export_format: Literal['xlsx', 'csv'] = 'xlsx'
+    ):
         """
         导出定时任务信息service
 
         :param request: Request对象
-        :param job_list: 定时任务信息列表
-        :return: 定时任务信息对应excel的二进制数据
+        :param job_list: 定时任务信息列表的分批异步迭代器
+        :param export_format: 导出文件格式，xlsx或csv
+        :return: 定时任务信息对应导出文件内容的异步迭代器
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -241,7 +245,7 @@ class JobService:
         ]
         job_executor_option_dict = {item.get('value'): item for item in job_executor_option}
 
-        for item in job_list:
+        def mapping_row(item: Dict):
             if item.get('status') == '0':
                 item['status'] = '正常'
             else:
@@ -260,6 +264,6 @@ class JobService:
                 item['concurrent'] = '允许'
             else:
                 item['concurrent'] = '禁止'
-        binary_data = ExcelUtil.export_list2excel(job_list, mapping_dict)
+            return item
 
-        return binary_data
+        return ExcelUtil.stream_export_list(job_list, mapping_dict, mapping_row, export_format)
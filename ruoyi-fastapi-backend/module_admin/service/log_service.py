@@ -1,6 +1,6 @@
 from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import AsyncIterable, Dict, List, Literal
 from exceptions.exception import ServiceException
 from module_admin.dao.log_dao import LoginLogDao, OperationLogDao
 from module_admin.entity.vo.common_vo import CrudResponseModel
@@ -24,7 +24,7 @@ class OperationLogService:
 
     @classmethod
     async def get_operation_log_list_services(
-        cls, query_db: AsyncSession, query_object: OperLogPageQueryModel, is_page: bool = False
+        cls, query_db: AsyncSession, query_object: OperLogPageQueryModel, is_page: bool = False, is_stream: bool = False
     ):
         """
         获取操作日志列表信息service
@@ -32,9 +32,12 @@ class OperationLogService:
         :param query_db: orm对象
         :param query_object: 查询参数对象
         :param is_page: 是否开启分页
+        :param is_stream: 是否使用服务端游标分批读取全部数据
         :return: 操作日志列表信息对象
         """
-        operation_log_list_result = await OperationLogDao.get_operation_log_list(query_db, query_object, is_page)
+        operation_log_list_result = await OperationLogDao.get_operation_log_list(
+            query_db, query_object, is_page, is_stream
+        )
 
         return operation_log_list_result
 
@@ -55,6 +58,23 @@ class OperationLogService:
             await query_db.rollback()
             raise e
 
+    @classmethod
+    async def add_operation_log_batch_services(cls, query_db: AsyncSession, page_object_list: List[OperLogModel]):
+        """
+        批量新增操作日志service
+
+        :param query_db: orm对象
+        :param page_object_list: 新增操作日志对象列表
+        :return: 批量新增操作日志校验结果
+        """
+        try:
+            await OperationLogDao.add_operation_log_batch_dao(query_db, page_object_list)
+            await query_db.commit()
+            return CrudResponseModel(is_success=True, message='新增成功')
+        except Exception as e:
+            await query_db.rollback()
+            raise e
+
     @classmethod
     async def delete_operation_log_services(cls, query_db: AsyncSession, page_object: DeleteOperLogModel):
         """
@@ -94,13 +114,19 @@ class OperationLogService:
             raise e
 
     @classmethod
-    async def export_operation_log_list_services(cls, request: Request, operation_log_list: List):
+    async def export_operation_log_list_services(
+        cls,
+        request: Request,
+        operation_log_list: AsyncIterable[List[Dict]],
+        export_format: Literal['xlsx', 'csv'] = 'xlsx',
+    ):
         """
         导出操作日志信息service
 
         :param request: Request对象
-        :param operation_log_list: 操作日志信息列表
-        :return: 操作日志信息对应excel的二进制数据
+        :param operation_log_list: 操作日志信息列表的分批异步迭代器
+        :param export_format: 导出文件格式，xlsx或csv
+        :return: 操作日志信息对应导出文件内容的异步迭代器
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -130,16 +156,16 @@ class OperationLogService:
         ]
         operation_type_option_dict = {item.get('value'): item for item in operation_type_option}
 
-        for item in operation_log_list:
+        def mapping_row(item: Dict):
             if item.get('status') == 0:
                 item['status'] = '成功'
             else:
                 item['status'] = '失败'
             if str(item.get('businessType')) in operation_type_option_dict.keys():
                 item['businessType'] = operation_type_option_dict.get(str(item.get('businessType'))).get('label')
-        binary_data = ExcelUtil.export_list2excel(operation_log_list, mapping_dict)
+            return item
 
-        return binary_data
+        return ExcelUtil.stream_export_list(operation_log_list, mapping_dict, mapping_row, export_format)
 
 
 class LoginLogService:
@@ -149,7 +175,11 @@ class LoginLogService:
 
     @classmethod
     async def get_login_log_list_services(
-        cls, query_db: AsyncSession, query_object: LoginLogPageQueryModel, is_page: bool = False
+        cls,
+        query_db: AsyncSession,
+        query_object: LoginLogPageQueryModel,
+        is_page: bool = False,
+        is_stream: bool = False,
     ):
         """
         获取登录日志列表信息service
@@ -157,9 +187,10 @@ class LoginLogService:
         :param query_db: orm对象
         :param query_object: 查询参数对象
         :param is_page: 是否开启分页
+        :param is_stream: 是否使用服务端游标分批读取全部数据
         :return: 登录日志列表信息对象
         """
-        operation_log_list_result = await LoginLogDao.get_login_log_list(query_db, query_object, is_page)
+        operation_log_list_result = await LoginLogDao.get_login_log_list(query_db, query_object, is_page, is_stream)
 
         return operation_log_list_result
 
@@ -180,6 +211,23 @@ class LoginLogService:
             await query_db.rollback()
             raise e
 
+    @classmethod
+    async def add_login_log_batch_services(cls, query_db: AsyncSession, page_object_list: List[LogininforModel]):
+        """
+        批量新增登录日志service
+
+        :param query_db: orm对象
+        :param page_object_list: 新增登录日志对象列表
+        :return: 批量新增登录日志校验结果
+        """
+        try:
+            await LoginLogDao.add_login_log_batch_dao(query_db, page_object_list)
+            await query_db.commit()
+            return CrudResponseModel(is_success=True, message='新增成功')
+        except Exception as e:
+            await query_db.rollback()
+            raise e
+
     @classmethod
     async def delete_login_log_services(cls, query_db: AsyncSession, page_object: DeleteLoginLogModel):
         """
@@ -228,12 +276,15 @@ class LoginLogService:
             raise ServiceException(message='该用户未锁定')
 
     @staticmethod
-    async def export_login_log_list_services(login_log_list: List):
+    async def export_login_log_list_services(
+        login_log_list: AsyncIterable[List[Dict]], export_format: Literal['xlsx', 'csv'] = 'xlsx'
+    ):
         """
         导出登录日志信息service
 
-        :param login_log_list: 登录日志信息列表
-        :return: 登录日志信息对应excel的二进制数据
+        :param login_log_list: 登录日志信息列表的分批异步迭代器
+        :param export_format: 导出文件格式，xlsx或csv
+        :return: 登录日志信息对应导出文件内容的异步迭代器
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -248,11 +299,11 @@ class LoginLogService:
             'loginTime': '登录日期',
         }
 
-        for item in login_log_list:
+        def mapping_row(item: Dict):
             if item.get('status') == '0':
                 item['status'] = '成功'
             else:
                 item['status'] = '失败'
-        binary_data = ExcelUtil.export_list2excel(login_log_list, mapping_dict)
+            return item
 
-        return binary_data
+        return ExcelUtil.stream_export_list(login_log_list, mapping_dict, mapping_row, export_format)
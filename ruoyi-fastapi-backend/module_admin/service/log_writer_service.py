@@ -0,0 +1,424 @@
+import asyncio
+import json
+import os
+import psutil
+import re
+import threading
+import time
+import uuid
+from sqlalchemy.exc import DataError, IntegrityError
+from typing import Dict, List, Optional, Tuple, Union
+from config.database import AsyncSessionLocal
+from config.env import AppConfig
+from module_admin.entity.vo.log_vo import LogininforModel, OperLogModel
+from module_admin.service.log_service import LoginLogService, OperationLogService
+from utils.ip_location_util import UNKNOWN_IP_LOCATION, IpLocationUtil
+from utils.log_util import logger
+
+
+class LogWriterService:
+    """
+    日志异步批量写入模块服务层
+
+    日志装饰器将日志对象放入有界队列后立即返回，后台任务按批次使用独立的数据库会话以多行INSERT写入，
+    队列已满或写入失败时按配置的策略限时等待、丢弃或写入溢出文件，溢出文件在队列空闲时补写入库；
+    每个工作进程写入独立的溢出文件，数据错误或补写次数达到上限的日志写入死信文件
+    """
+
+    # 关闭时等待后台任务写完剩余日志的最长时间（秒）
+    CLOSE_TIMEOUT = 10
+    # 溢出文件补写失败后再次补写的最短间隔（秒）
+    REPLAY_BACKOFF = 30
+
+    _queue: Optional[asyncio.Queue] = None
+    _worker: Optional[asyncio.Task] = None
+    _stop_signal = object()
+    _spill_lock = threading.Lock()
+    _next_replay_time: float = 0.0
+    _metrics: Dict[str, Union[int, float]] = dict(
+        enqueued=0, written=0, dropped=0, spilled=0, replayed=0, dead_lettered=0, failed_flushes=0, last_flush_ms=0.0
+    )
+
+    @classmethod
+    async def init_log_writer(cls):
+        """
+        应用启动时初始化日志写入队列及后台写入任务
+
+        :return:
+        """
+        cls._queue = asyncio.Queue(maxsize=AppConfig.app_log_queue_max_size)
+        cls._worker = asyncio.create_task(cls.__write_worker())
+        logger.info('日志异步写入任务启动成功')
+
+    @classmethod
+    async def close_log_writer(cls):
+        """
+        应用关闭时写入队列中剩余的日志并停止后台写入任务，超时未写完的日志写入溢出文件
+
+        :return:
+        """
+        if cls._worker is None:
+            return
+        try:
+            await asyncio.wait_for(cls._queue.put(cls._stop_signal), timeout=cls.CLOSE_TIMEOUT)
+            await asyncio.wait_for(asyncio.shield(cls._worker), timeout=cls.CLOSE_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning('日志异步写入任务关闭超时，剩余日志将写入溢出文件')
+            cls._worker.cancel()
+            try:
+                await cls._worker
+            except asyncio.CancelledError:
+                pass
+            await cls.__spill([(log, 0) for log in cls.__drain_queue() if log is not cls._stop_signal], force=True)
+        cls._worker = None
+        cls._queue = None
+        logger.info(f'日志异步写入任务已关闭，统计信息：{cls.get_metrics()}')
+
+    @classmethod
+    async def enqueue(cls, log: Union[OperLogModel, LogininforModel]):
+        """
+        将日志对象放入写入队列，队列已满时按配置的策略处理
+
+        :param log: 操作日志或登录日志对象
+        :return:
+        """
+        if cls._queue is None:
+            # 后台写入任务未启动时（如脚本中调用）直接写入
+            await cls.__write_batch([log])
+            return
+        try:
+            cls._queue.put_nowait(log)
+            cls._metrics['enqueued'] += 1
+            return
+        except asyncio.QueueFull:
+            pass
+        if AppConfig.app_log_overflow_policy == 'block':
+            try:
+                await asyncio.wait_for(cls._queue.put(log), timeout=AppConfig.app_log_flush_interval)
+                cls._metrics['enqueued'] += 1
+                return
+            except asyncio.TimeoutError:
+                pass
+        if AppConfig.app_log_overflow_policy == 'spill':
+            await cls.__spill([(log, 0)])
+        else:
+            cls._metrics['dropped'] += 1
+            logger.warning('日志写入队列已满，丢弃当前日志')
+
+    @classmethod
+    def get_metrics(cls):
+        """
+        获取日志写入统计信息
+
+        :return: 日志写入统计信息
+        """
+        return dict(
+            **cls._metrics,
+            queue_depth=cls._queue.qsize() if cls._queue else 0,
+            queue_max_size=AppConfig.app_log_queue_max_size,
+        )
+
+    @classmethod
+    async def __write_worker(cls):
+        """
+        后台批量写入任务，攒满一批或距本批第一条日志超过刷新间隔时写入
+
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        await cls.__replay_spill()
+        stopped = False
+        while not stopped:
+            try:
+                log = await asyncio.wait_for(cls._queue.get(), timeout=AppConfig.app_log_flush_interval)
+            except asyncio.TimeoutError:
+                # 队列空闲时补写溢出文件中的日志
+                await cls.__replay_spill()
+                continue
+            if log is cls._stop_signal:
+                break
+            log_list = [log]
+            deadline = loop.time() + AppConfig.app_log_flush_interval
+            while len(log_list) < AppConfig.app_log_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    log = await asyncio.wait_for(cls._queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    break
+                if log is cls._stop_signal:
+                    stopped = True
+                    break
+                log_list.append(log)
+            await cls.__flush(log_list)
+        remain_log_list = [log for log in cls.__drain_queue() if log is not cls._stop_signal]
+        for index in range(0, len(remain_log_list), AppConfig.app_log_batch_size):
+            await cls.__flush(remain_log_list[index : index + AppConfig.app_log_batch_size])
+
+    @classmethod
+    async def __flush(cls, log_list: List[Union[OperLogModel, LogininforModel]]):
+        """
+        写入一批日志，整批写入失败时改为逐条写入，仍写入失败的日志按配置的策略写入溢出文件或丢弃
+
+        :param log_list: 日志对象列表
+        :return:
+        """
+        if AppConfig.app_ip_location_query:
+            # 入队时ip归属区域尚未解析完成的日志，在写入前再尝试从缓存中获取一次
+            for log in log_list:
+                if isinstance(log, OperLogModel) and log.oper_location == UNKNOWN_IP_LOCATION:
+                    log.oper_location = await IpLocationUtil.get_ip_location(log.oper_ip)
+                elif isinstance(log, LogininforModel) and log.login_location == UNKNOWN_IP_LOCATION:
+                    log.login_location = await IpLocationUtil.get_ip_location(log.ipaddr)
+        start_time = time.perf_counter()
+        written_count, _ = await cls.__write_logs([(log, 0) for log in log_list])
+        cls._metrics['written'] += written_count
+        cls._metrics['last_flush_ms'] = round((time.perf_counter() - start_time) * 1000, 2)
+
+    @classmethod
+    async def __write_logs(
+        cls, spill_log_list: List[Tuple[Union[OperLogModel, LogininforModel], int]], force: bool = False
+    ):
+        """
+        写入一批日志，整批写入失败时改为逐条写入，避免一条错误数据导致整批日志无法写入；
+        数据本身错误的日志写入死信文件，其余写入失败的日志写入溢出文件，补写次数达到上限后写入死信文件
+
+        :param spill_log_list: 日志对象及已补写次数列表
+        :param force: 是否忽略溢出策略强制写入溢出文件
+        :return: 写入成功的日志数及写入溢出文件的日志数
+        """
+        try:
+            await cls.__write_batch([log for log, _ in spill_log_list])
+            return len(spill_log_list), 0
+        except Exception as e:
+            cls._metrics['failed_flushes'] += 1
+            logger.error(f'日志批量写入失败，改为逐条写入，详细错误信息：{e}')
+        written_count = 0
+        retry_log_list = []
+        dead_log_list = []
+        for index, (log, attempts) in enumerate(spill_log_list):
+            try:
+                await cls.__write_batch([log])
+                written_count += 1
+            except (DataError, IntegrityError) as e:
+                logger.error(f'日志数据错误，写入死信文件，详细错误信息：{e}')
+                dead_log_list.append((log, attempts + 1))
+            except Exception as e:
+                # 数据库不可用等错误，剩余日志不再逐条尝试
+                logger.error(f'日志写入失败，写入溢出文件，详细错误信息：{e}')
+                for retry_log, retry_attempts in spill_log_list[index:]:
+                    if retry_attempts + 1 >= AppConfig.app_log_replay_max_attempts:
+                        dead_log_list.append((retry_log, retry_attempts + 1))
+                    else:
+                        retry_log_list.append((retry_log, retry_attempts + 1))
+                break
+        await cls.__spill(retry_log_list, force=force)
+        await cls.__dead_letter(dead_log_list)
+
+        return written_count, len(retry_log_list)
+
+    @classmethod
+    async def __write_batch(cls, log_list: List[Union[OperLogModel, LogininforModel]]):
+        """
+        使用独立的数据库会话写入一批日志
+
+        :param log_list: 日志对象列表
+        :return:
+        """
+        operation_log_list = [log for log in log_list if isinstance(log, OperLogModel)]
+        login_log_list = [log for log in log_list if isinstance(log, LogininforModel)]
+        async with AsyncSessionLocal() as session:
+            if operation_log_list:
+                await OperationLogService.add_operation_log_batch_services(session, operation_log_list)
+            if login_log_list:
+                await LoginLogService.add_login_log_batch_services(session, login_log_list)
+
+    @classmethod
+    async def __spill(cls, spill_log_list: List[Tuple[Union[OperLogModel, LogininforModel], int]], force: bool = False):
+        """
+        将日志追加写入当前进程的溢出文件
+
+        :param spill_log_list: 日志对象及已补写次数列表
+        :param force: 是否忽略溢出策略强制写入
+        :return:
+        """
+        if not spill_log_list:
+            return
+        if AppConfig.app_log_overflow_policy != 'spill' and not force:
+            cls._metrics['dropped'] += len(spill_log_list)
+            return
+        try:
+            await asyncio.to_thread(
+                cls.__append_file, cls.__get_spill_path(os.getpid()), cls.__dump_logs(spill_log_list)
+            )
+            cls._metrics['spilled'] += len(spill_log_list)
+        except Exception as e:
+            cls._metrics['dropped'] += len(spill_log_list)
+            logger.error(f'日志写入溢出文件失败，详细错误信息：{e}')
+
+    @classmethod
+    async def __dead_letter(cls, spill_log_list: List[Tuple[Union[OperLogModel, LogininforModel], int]]):
+        """
+        将无法写入数据库的日志追加写入死信文件，死信文件不再自动补写，需人工处理
+
+        :param spill_log_list: 日志对象及已补写次数列表
+        :return:
+        """
+        if not spill_log_list:
+            return
+        try:
+            await asyncio.to_thread(
+                cls.__append_file, AppConfig.app_log_dead_letter_path, cls.__dump_logs(spill_log_list)
+            )
+            cls._metrics['dead_lettered'] += len(spill_log_list)
+        except Exception as e:
+            cls._metrics['dropped'] += len(spill_log_list)
+            logger.error(f'日志写入死信文件失败，详细错误信息：{e}')
+
+    @classmethod
+    async def __replay_spill(cls):
+        """
+        将溢出文件中的日志补写入库，补写失败后按补写间隔退避
+
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        if loop.time() < cls._next_replay_time:
+            return
+        try:
+            replay_path_list = await asyncio.to_thread(cls.__claim_spill_files)
+        except OSError as e:
+            logger.error(f'日志溢出文件读取失败，详细错误信息：{e}')
+            return
+        for replay_path in replay_path_list:
+            try:
+                spill_log_list = await asyncio.to_thread(cls.__load_spill_file, replay_path)
+            except OSError as e:
+                logger.error(f'日志溢出文件读取失败，详细错误信息：{e}')
+                continue
+            for index in range(0, len(spill_log_list), AppConfig.app_log_batch_size):
+                batch_log_list = spill_log_list[index : index + AppConfig.app_log_batch_size]
+                written_count, retry_count = await cls.__write_logs(batch_log_list, force=True)
+                cls._metrics['replayed'] += written_count
+                if retry_count:
+                    cls._next_replay_time = loop.time() + cls.REPLAY_BACKOFF
+                    # 数据库恢复前不再逐批尝试，剩余日志直接写回溢出文件
+                    await cls.__spill(spill_log_list[index + AppConfig.app_log_batch_size :], force=True)
+                    return
+
+    @classmethod
+    def __get_spill_path(cls, pid: int):
+        """
+        获取指定进程的溢出文件路径，多个工作进程各自写入独立的溢出文件
+
+        :param pid: 进程id
+        :return: 溢出文件路径
+        """
+        root, ext = os.path.splitext(AppConfig.app_log_spill_path)
+        return f'{root}.{pid}{ext}'
+
+    @classmethod
+    def __claim_spill_files(cls):
+        """
+        以原子重命名的方式认领当前进程及已退出进程遗留的溢出文件，其他进程已认领的文件重命名失败时跳过
+
+        :return: 认领后的补写文件路径列表
+        """
+        spill_dir, spill_name = os.path.split(AppConfig.app_log_spill_path)
+        spill_dir = spill_dir or '.'
+        if not os.path.isdir(spill_dir):
+            return []
+        root, ext = os.path.splitext(spill_name)
+        spill_pattern = re.compile(rf'{re.escape(root)}\.(\d+)(?:{re.escape(ext)}|\.[0-9a-f]{{32}}\.replay)$')
+        current_pid = os.getpid()
+        replay_path_list = []
+        for file_name in os.listdir(spill_dir):
+            match = spill_pattern.match(file_name)
+            if not match:
+                continue
+            pid = int(match.group(1))
+            # 当前进程的补写文件由当前进程在补写时删除，其他存活进程的文件由其自行补写
+            if file_name.endswith('.replay') and pid == current_pid:
+                continue
+            if pid != current_pid and psutil.pid_exists(pid):
+                continue
+            replay_path = os.path.join(spill_dir, f'{root}.{current_pid}.{uuid.uuid4().hex}.replay')
+            with cls._spill_lock:
+                try:
+                    os.replace(os.path.join(spill_dir, file_name), replay_path)
+                except FileNotFoundError:
+                    continue
+            replay_path_list.append(replay_path)
+
+        return replay_path_list
+
+    @classmethod
+    def __load_spill_file(cls, replay_path: str):
+        """
+        读取并删除补写文件
+
+        :param replay_path: 补写文件路径
+        :return: 日志对象及已补写次数列表
+        """
+        spill_log_list = []
+        with open(replay_path, encoding='utf-8') as replay_file:
+            for line in replay_file:
+                try:
+                    spill_log = json.loads(line)
+                    log_model = OperLogModel if spill_log.get('type') == 'operation' else LogininforModel
+                    spill_log_list.append((log_model(**spill_log.get('data')), spill_log.get('attempts', 0)))
+                except Exception:
+                    logger.warning(f'日志溢出文件记录格式错误：{line}')
+        os.remove(replay_path)
+
+        return spill_log_list
+
+    @classmethod
+    def __dump_logs(cls, spill_log_list: List[Tuple[Union[OperLogModel, LogininforModel], int]]):
+        """
+        将日志序列化为溢出文件中的行
+
+        :param spill_log_list: 日志对象及已补写次数列表
+        :return: 溢出文件内容
+        """
+        return ''.join(
+            json.dumps(
+                dict(
+                    type='operation' if isinstance(log, OperLogModel) else 'login',
+                    attempts=attempts,
+                    data=log.model_dump(mode='json', by_alias=True),
+                ),
+                ensure_ascii=False,
+            )
+            + '\n'
+            for log, attempts in spill_log_list
+        )
+
+    @classmethod
+    def __append_file(cls, file_path: str, content: str):
+        """
+        追加写入文件，与溢出文件的认领互斥
+
+        :param file_path: 文件路径
+        :param content: 写入内容
+        :return:
+        """
+        file_dir = os.path.dirname(file_path)
+        if file_dir:
+            os.makedirs(file_dir, exist_ok=True)
+        with cls._spill_lock:
+            with open(file_path, 'a', encoding='utf-8') as f:
+                f.write(content)
+
+    @classmethod
+    def __drain_queue(cls):
+        """
+        取出队列中剩余的全部对象
+
+        :return: 队列中剩余的对象列表
+        """
+        remain_list = []
+        while cls._queue is not None and not cls._queue.empty():
+            remain_list.append(cls._queue.get_nowait())
+        return remain_list
@@ -1,3 +1,4 @@
+import json
 import jwt
 import random
 import uuid
@@ -13,11 +14,16 @@ from config.env import AppConfig, JwtConfig
 from config.get_db import get_db
 from exceptions.exception import LoginException, AuthException, ServiceException
 from module_admin.dao.login_dao import login_by_account
+from module_admin.dao.menu_dao import MenuDao
 from module_admin.dao.user_dao import UserDao
 from module_admin.entity.do.menu_do import SysMenu
 from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.login_vo import MenuTreeModel, MetaModel, RouterModel, SmsCode, UserLogin, UserRegister
 from module_admin.entity.vo.user_vo import AddUserModel, CurrentUserModel, ResetUserModel, TokenData, UserInfoModel
+from module_admin.service.config_service import ConfigService
+from module_admin.service.online_service import OnlineService
+from module_admin.service.principal_service import PrincipalCacheService
+from module_admin.service.router_cache_service import RouterCacheService
 from module_admin.service.user_service import UserService
 from utils.common_util import CamelCaseUtil
 from utils.log_util import logger
@@ -97,7 +103,10 @@ class LoginService:
         if not user:
             logger.warning('用户不存在')
             raise LoginException(data='', message='用户不存在')
-        if not PwdUtil.verify_password(login_user.password, user[0].password):
+        password_verified, password_rehash = await PwdUtil.async_verify_and_update_password(
+            login_user.password, user[0].password
+        )
+        if not password_verified:
             cache_password_error_count = await request.app.state.redis.get(
                 f'{RedisInitKeyConfig.PASSWORD_ERROR_COUNT.key}:{login_user.user_name}'
             )
@@ -126,6 +135,9 @@ class LoginService:
         if user[0].status == '1':
             logger.warning('用户已停用')
             raise LoginException(data='', message='用户已停用')
+        if password_rehash:
+            # 密码加密强度与配置不一致，按当前配置重新加密，随登录成功后更新登录时间一并提交
+            await UserDao.edit_user_dao(query_db, dict(user_id=user[0].user_id, password=password_rehash))
         await request.app.state.redis.delete(f'{RedisInitKeyConfig.PASSWORD_ERROR_COUNT.key}:{login_user.user_name}')
         return user
 
@@ -137,7 +149,9 @@ class LoginService:
         :param request: Request对象
         :return: 校验结果
         """
-        black_ip_value = await request.app.state.redis.get(f'{RedisInitKeyConfig.SYS_CONFIG.key}:sys.login.blackIPList')
+        black_ip_value = await ConfigService.query_config_list_from_cache_services(
+            request.app.state.redis, 'sys.login.blackIPList'
+        )
         black_ip_list = black_ip_value.split(',') if black_ip_value else []
         if request.headers.get('X-Forwarded-For') in black_ip_list:
             logger.warning('当前IP禁止登录')
@@ -209,104 +223,109 @@ class LoginService:
         except InvalidTokenError:
             logger.warning('用户token已失效，请重新登录')
             raise AuthException(data='', message='用户token已失效，请重新登录')
-        query_user = await UserDao.get_user_by_id(query_db, user_id=token_data.user_id)
-        if query_user.get('user_basic_info') is None:
-            logger.warning('用户token不合法')
-            raise AuthException(data='', message='用户token不合法')
         if AppConfig.app_same_time_login:
-            redis_token = await request.app.state.redis.get(f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{session_id}')
+            token_id = session_id
         else:
             # 此方法可实现同一账号同一时间只能登录一次
-            redis_token = await request.app.state.redis.get(
-                f"{RedisInitKeyConfig.ACCESS_TOKEN.key}:{query_user.get('user_basic_info').user_id}"
-            )
-        if token == redis_token:
-            if AppConfig.app_same_time_login:
-                await request.app.state.redis.set(
-                    f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{session_id}',
-                    redis_token,
-                    ex=timedelta(minutes=JwtConfig.jwt_redis_expire_minutes),
-                )
-            else:
-                await request.app.state.redis.set(
-                    f"{RedisInitKeyConfig.ACCESS_TOKEN.key}:{query_user.get('user_basic_info').user_id}",
-                    redis_token,
-                    ex=timedelta(minutes=JwtConfig.jwt_redis_expire_minutes),
-                )
-
-            role_id_list = [item.role_id for item in query_user.get('user_role_info')]
-            if 1 in role_id_list:
-                permissions = ['*:*:*']
-            else:
-                permissions = [row.perms for row in query_user.get('user_menu_info')]
-            post_ids = ','.join([str(row.post_id) for row in query_user.get('user_post_info')])
-            role_ids = ','.join([str(row.role_id) for row in query_user.get('user_role_info')])
-            roles = [row.role_key for row in query_user.get('user_role_info')]
-
-            current_user = CurrentUserModel(
-                permissions=permissions,
-                roles=roles,
-                user=UserInfoModel(
-                    **CamelCaseUtil.transform_result(query_user.get('user_basic_info')),
-                    postIds=post_ids,
-                    roleIds=role_ids,
-                    dept=CamelCaseUtil.transform_result(query_user.get('user_dept_info')),
-                    role=CamelCaseUtil.transform_result(query_user.get('user_role_info')),
-                ),
-            )
-            return current_user
-        else:
+            token_id = str(token_data.user_id)
+        token_key = f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{token_id}'
+        redis_token, token_ttl, version, principal = await PrincipalCacheService.get_session_snapshot(
+            request.app.state.redis, token_key, session_id, token_data.user_id
+        )
+        if token != redis_token:
             logger.warning('用户token已失效，请重新登录')
             raise AuthException(data='', message='用户token已失效，请重新登录')
+        if principal is None:
+            query_user = await UserDao.get_user_by_id(query_db, user_id=token_data.user_id)
+            if query_user.get('user_basic_info') is None:
+                logger.warning('用户token不合法')
+                raise AuthException(data='', message='用户token不合法')
+            principal = cls.__generate_principal(query_user)
+            await PrincipalCacheService.set_principal(request.app.state.redis, session_id, version, principal)
+        await PrincipalCacheService.refresh_session(request.app.state.redis, token_key, token_id, session_id, token_ttl)
+        current_user = CurrentUserModel(
+            permissions=principal.get('permissions'),
+            roles=principal.get('roles'),
+            user=UserInfoModel(
+                **principal.get('user_basic_info'),
+                postIds=principal.get('post_ids'),
+                roleIds=principal.get('role_ids'),
+                dept=principal.get('user_dept_info'),
+                role=principal.get('user_role_info'),
+            ),
+        )
+        # 将当前用户信息及身份信息版本号挂载至请求上下文，供日志装饰器、数据权限等同一请求内的后续逻辑复用
+        request.state.current_user = current_user
+        request.state.principal_version = version
+
+        return current_user
 
     @classmethod
-    async def get_current_user_routers(cls, user_id: int, query_db: AsyncSession):
+    def __generate_principal(cls, query_user: Dict):
         """
-        根据用户id获取当前用户路由信息
+        工具方法：根据用户信息生成可缓存的身份信息
 
-        :param user_id: 用户id
-        :param query_db: orm对象
-        :return: 当前用户路由信息对象
-        """
-        query_user = await UserDao.get_user_by_id(query_db, user_id=user_id)
-        user_router_menu = sorted(
-            [
-                row
-                for row in query_user.get('user_menu_info')
-                if row.menu_type in [MenuConstant.TYPE_DIR, MenuConstant.TYPE_MENU]
-            ],
-            key=lambda x: x.order_num,
+        :param query_user: 用户信息
+        :return: 身份信息
+        """
+        role_id_list = [item.role_id for item in query_user.get('user_role_info')]
+        if 1 in role_id_list:
+            permissions = ['*:*:*']
+        else:
+            permissions = [row.perms for row in query_user.get('user_menu_info')]
+        user_basic_info = CamelCaseUtil.transform_result(query_user.get('user_basic_info'))
+        # 身份信息缓存在Redis中，不缓存密码哈希，需要校验密码时从数据库查询
+        user_basic_info.pop('password', None)
+
+        return dict(
+            permissions=permissions,
+            roles=[row.role_key for row in query_user.get('user_role_info')],
+            user_basic_info=user_basic_info,
+            post_ids=','.join([str(row.post_id) for row in query_user.get('user_post_info')]),
+            role_ids=','.join([str(row.role_id) for row in query_user.get('user_role_info')]),
+            user_dept_info=CamelCaseUtil.transform_result(query_user.get('user_dept_info')),
+            user_role_info=CamelCaseUtil.transform_result(query_user.get('user_role_info')),
         )
-        menus = cls.__generate_menus(0, user_router_menu)
-        user_router = cls.__generate_user_router_menu(menus)
-        return [router.model_dump(exclude_unset=True, by_alias=True) for router in user_router]
 
     @classmethod
-    def __generate_menus(cls, pid: int, permission_list: List[SysMenu]):
+    async def get_current_user_routers(cls, request: Request, current_user: CurrentUserModel, query_db: AsyncSession):
         """
-        工具方法：根据菜单信息生成菜单信息树形嵌套数据
+        获取当前用户路由信息，路由信息只取决于用户的角色集合，按角色集合缓存序列化后的结果
 
-        :param pid: 菜单id
-        :param permission_list: 菜单列表信息
-        :return: 菜单信息树形嵌套数据
+        :param request: Request对象
+        :param current_user: 当前用户对象
+        :param query_db: orm对象
+        :return: 序列化后的当前用户路由信息JSON字符串
         """
-        menu_list: List[MenuTreeModel] = []
-        for permission in permission_list:
-            if permission.parent_id == pid:
-                children = cls.__generate_menus(permission.menu_id, permission_list)
-                menu_list_data = MenuTreeModel(**CamelCaseUtil.transform_result(permission))
-                if children:
-                    menu_list_data.children = children
-                menu_list.append(menu_list_data)
+        role_id_list = [int(role_id) for role_id in (current_user.user.role_ids or '').split(',') if role_id]
 
-        return menu_list
+        async def build_user_routers():
+            user_router_menu = await MenuDao.get_menu_list_by_role_ids(
+                query_db,
+                role_id_list,
+                [MenuConstant.TYPE_DIR, MenuConstant.TYPE_MENU],
+                is_admin=RouterCacheService.ADMIN_ROLE_ID in role_id_list,
+            )
+            # 按父菜单id建立子菜单索引，一次遍历即可生成树形结构，各子菜单列表保持按显示顺序排序
+            children_dict: Dict[int, List[SysMenu]] = {}
+            for menu in user_router_menu:
+                children_dict.setdefault(menu.parent_id, []).append(menu)
+            user_router = cls.__generate_user_router_menu(children_dict.get(0, []), children_dict)
+            return json.dumps(
+                [router.model_dump(exclude_unset=True, by_alias=True) for router in user_router],
+                ensure_ascii=False,
+                separators=(',', ':'),
+            )
+
+        return await RouterCacheService.get_routers(request.app.state.redis, role_id_list, build_user_routers)
 
     @classmethod
-    def __generate_user_router_menu(cls, permission_list: List[MenuTreeModel]):
+    def __generate_user_router_menu(cls, permission_list: List[SysMenu], children_dict: Dict[int, List[SysMenu]]):
         """
-        工具方法：根据菜单树信息生成路由信息树形嵌套数据
+        工具方法：根据菜单信息及子菜单索引生成路由信息树形嵌套数据
 
-        :param permission_list: 菜单树列表信息
+        :param permission_list: 当前层级的菜单列表信息
+        :param children_dict: 父菜单id与子菜单列表的对应关系
         :return: 路由信息树形嵌套数据
         """
         router_list: List[RouterModel] = []
@@ -324,11 +343,11 @@ class LoginService:
                     link=permission.path if RouterUtil.is_http(permission.path) else None,
                 ),
             )
-            c_menus = permission.children
+            c_menus = children_dict.get(permission.menu_id)
             if c_menus and permission.menu_type == MenuConstant.TYPE_DIR:
                 router.always_show = True
                 router.redirect = 'noRedirect'
-                router.children = cls.__generate_user_router_menu(c_menus)
+                router.children = cls.__generate_user_router_menu(c_menus, children_dict)
             elif RouterUtil.is_menu_frame(permission):
                 router.meta = None
                 children_list: List[RouterModel] = []
@@ -380,13 +399,17 @@ class LoginService:
         """
         register_enabled = (
             True
-            if await request.app.state.redis.get(f'{RedisInitKeyConfig.SYS_CONFIG.key}:sys.account.registerUser')
+            if await ConfigService.query_config_list_from_cache_services(
+                request.app.state.redis, 'sys.account.registerUser'
+            )
             == 'true'
             else False
         )
         captcha_enabled = (
             True
-            if await request.app.state.redis.get(f'{RedisInitKeyConfig.SYS_CONFIG.key}:sys.account.captchaEnabled')
+            if await ConfigService.query_config_list_from_cache_services(
+                request.app.state.redis, 'sys.account.captchaEnabled'
+            )
             == 'true'
             else False
         )
@@ -403,7 +426,7 @@ class LoginService:
                 add_user = AddUserModel(
                     userName=user_register.username,
                     nickName=user_register.username,
-                    password=PwdUtil.get_password_hash(user_register.password),
+                    password=await PwdUtil.async_get_password_hash(user_register.password),
                 )
                 result = await UserService.add_user_services(query_db, add_user)
                 return result
@@ -453,7 +476,7 @@ class LoginService:
             f'{RedisInitKeyConfig.SMS_CODE.key}:{forget_user.session_id}'
         )
         if forget_user.sms_code == redis_sms_result:
-            forget_user.password = PwdUtil.get_password_hash(forget_user.password)
+            forget_user.password = await PwdUtil.async_get_password_hash(forget_user.password)
             forget_user.user_id = (await UserDao.get_user_by_name(query_db, forget_user.user_name)).user_id
             edit_result = await UserService.reset_user_services(query_db, forget_user)
             result = edit_result.dict()
@@ -475,6 +498,8 @@ class LoginService:
         :return: 退出登录结果
         """
         await request.app.state.redis.delete(f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{session_id}')
+        await PrincipalCacheService.delete_principal(request.app.state.redis, session_id)
+        await OnlineService.unregister_online_session(request.app.state.redis, session_id)
         # await request.app.state.redis.delete(f'{current_user.user.user_id}_access_token')
         # await request.app.state.redis.delete(f'{current_user.user.user_id}_session_id')
 
@@ -1,18 +1,197 @@
+import json
 import jwt
+import time
 from fastapi import Request
+from redis import asyncio as aioredis
+from typing import Dict, List
 from config.enums import RedisInitKeyConfig
-from config.env import JwtConfig
+from config.env import AppConfig, JwtConfig
 from exceptions.exception import ServiceException
 from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.online_vo import DeleteOnlineModel, OnlineQueryModel
+from module_admin.service.principal_service import PrincipalCacheService
 from utils.common_util import CamelCaseUtil
+from utils.log_util import logger
+from utils.page_util import PageResponseModel
 
 
 class OnlineService:
     """
     在线用户管理模块服务层
+
+    在线会话索引为有序集合，成员为会话编号（令牌缓存键名中的后缀），分值为最后活跃时间戳；
+    在线会话信息为哈希，字段为会话编号，值为登录时从令牌中提取的会话信息，查询在线用户时无需扫描及解析令牌
     """
 
+    # 启动时回填在线会话索引每批读取的令牌数量
+    REGISTRY_BACKFILL_BATCH_SIZE = 500
+
+    @classmethod
+    def get_online_session_index_key(cls):
+        """
+        获取在线会话索引键名
+
+        :return: 在线会话索引键名
+        """
+        return RedisInitKeyConfig.ONLINE_SESSION_INDEX.key
+
+    @classmethod
+    def get_online_session_info_key(cls):
+        """
+        获取在线会话信息键名
+
+        :return: 在线会话信息键名
+        """
+        return RedisInitKeyConfig.ONLINE_SESSION_INFO.key
+
+    @classmethod
+    def generate_online_session_info(cls, token_id: str, payload: Dict):
+        """
+        根据令牌内容生成在线会话信息
+
+        :param token_id: 会话编号
+        :param payload: 令牌内容
+        :return: 在线会话信息
+        """
+        login_info = payload.get('login_info') or {}
+
+        return dict(
+            token_id=token_id,
+            session_id=payload.get('session_id'),
+            user_name=payload.get('user_name'),
+            dept_name=payload.get('dept_name'),
+            ipaddr=login_info.get('ipaddr'),
+            login_location=login_info.get('loginLocation'),
+            browser=login_info.get('browser'),
+            os=login_info.get('os'),
+            login_time=login_info.get('loginTime'),
+        )
+
+    @classmethod
+    async def register_online_session(cls, redis: aioredis.Redis, token_id: str, payload: Dict):
+        """
+        登录成功后将会话写入在线会话索引
+
+        :param redis: redis对象
+        :param token_id: 会话编号
+        :param payload: 令牌内容
+        :return:
+        """
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(cls.get_online_session_index_key(), {token_id: time.time()})
+            pipe.hset(
+                cls.get_online_session_info_key(),
+                token_id,
+                json.dumps(cls.generate_online_session_info(token_id, payload), ensure_ascii=False, default=str),
+            )
+            await pipe.execute()
+
+    @classmethod
+    async def unregister_online_session(cls, redis: aioredis.Redis, token_id: str):
+        """
+        退出登录后将会话移出在线会话索引
+
+        :param redis: redis对象
+        :param token_id: 会话编号
+        :return:
+        """
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.zrem(cls.get_online_session_index_key(), token_id)
+            pipe.hdel(cls.get_online_session_info_key(), token_id)
+            await pipe.execute()
+
+    @classmethod
+    async def init_online_session_registry(cls, redis: aioredis.Redis):
+        """
+        应用启动时在线会话索引不存在则根据现有令牌回填，使升级前登录的会话同样可以被查询及强退
+
+        :param redis: redis对象
+        :return:
+        """
+        if await redis.exists(cls.get_online_session_index_key()):
+            return
+        token_key_list = []
+        registered_count = 0
+        async for token_key in redis.scan_iter(
+            match=f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:*', count=cls.REGISTRY_BACKFILL_BATCH_SIZE
+        ):
+            token_key_list.append(token_key)
+            if len(token_key_list) >= cls.REGISTRY_BACKFILL_BATCH_SIZE:
+                registered_count += await cls.__backfill_online_sessions(redis, token_key_list)
+                token_key_list = []
+        if token_key_list:
+            registered_count += await cls.__backfill_online_sessions(redis, token_key_list)
+        logger.info(f'在线会话索引回填完成，共{registered_count}个会话')
+
+    @classmethod
+    async def __backfill_online_sessions(cls, redis: aioredis.Redis, token_key_list: List[str]):
+        """
+        批量读取令牌并写入在线会话索引，最后活跃时间根据令牌剩余有效期推算
+
+        :param redis: redis对象
+        :param token_key_list: 令牌缓存键名列表
+        :return: 写入的会话数量
+        """
+        async with redis.pipeline(transaction=False) as pipe:
+            for token_key in token_key_list:
+                pipe.get(token_key)
+                pipe.ttl(token_key)
+            result = await pipe.execute()
+        now = time.time()
+        expire_seconds = JwtConfig.jwt_redis_expire_minutes * 60
+        index_mapping = {}
+        info_mapping = {}
+        for token_key, access_token, token_ttl in zip(token_key_list, result[0::2], result[1::2]):
+            if not access_token:
+                continue
+            try:
+                payload = jwt.decode(access_token, JwtConfig.jwt_secret_key, algorithms=[JwtConfig.jwt_algorithm])
+            except jwt.InvalidTokenError:
+                continue
+            token_id = token_key.split(':', 1)[1]
+            index_mapping[token_id] = now - expire_seconds + token_ttl if token_ttl > 0 else now
+            info_mapping[token_id] = json.dumps(
+                cls.generate_online_session_info(token_id, payload), ensure_ascii=False, default=str
+            )
+        if index_mapping:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.zadd(cls.get_online_session_index_key(), index_mapping)
+                pipe.hset(cls.get_online_session_info_key(), mapping=info_mapping)
+                await pipe.execute()
+
+        return len(index_mapping)
+
+    @classmethod
+    async def __clean_expired_online_sessions(cls, redis: aioredis.Redis):
+        """
+        清理最后活跃时间早于令牌有效期的会话，令牌过期后由查询在线用户时惰性清理
+
+        :param redis: redis对象
+        :return:
+        """
+        expire_before = time.time() - JwtConfig.jwt_redis_expire_minutes * 60
+        expired_token_id_list = await redis.zrangebyscore(cls.get_online_session_index_key(), '-inf', expire_before)
+        if expired_token_id_list:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.zremrangebyscore(cls.get_online_session_index_key(), '-inf', expire_before)
+                pipe.hdel(cls.get_online_session_info_key(), *expired_token_id_list)
+                await pipe.execute()
+
+    @classmethod
+    async def __get_online_session_info_list(cls, redis: aioredis.Redis, token_id_list: List[str]):
+        """
+        批量获取在线会话信息，跳过信息已被清理的会话
+
+        :param redis: redis对象
+        :param token_id_list: 会话编号列表
+        :return: 在线会话信息列表
+        """
+        if not token_id_list:
+            return []
+        online_info_list = await redis.hmget(cls.get_online_session_info_key(), token_id_list)
+
+        return [json.loads(online_info) for online_info in online_info_list if online_info]
+
     @classmethod
     async def get_online_list_services(cls, request: Request, query_object: OnlineQueryModel):
         """
@@ -22,41 +201,41 @@ class OnlineService:
         :param query_object: 查询参数对象
         :return: 在线用户列表信息
         """
-        access_token_keys = await request.app.state.redis.keys(f'{RedisInitKeyConfig.ACCESS_TOKEN.key}*')
-        if not access_token_keys:
-            access_token_keys = []
-        access_token_values_list = [await request.app.state.redis.get(key) for key in access_token_keys]
-        online_info_list = []
-        for item in access_token_values_list:
-            payload = jwt.decode(item, JwtConfig.jwt_secret_key, algorithms=[JwtConfig.jwt_algorithm])
-            online_dict = dict(
-                token_id=payload.get('session_id'),
-                user_name=payload.get('user_name'),
-                dept_name=payload.get('dept_name'),
-                ipaddr=payload.get('login_info').get('ipaddr'),
-                login_location=payload.get('login_info').get('loginLocation'),
-                browser=payload.get('login_info').get('browser'),
-                os=payload.get('login_info').get('os'),
-                login_time=payload.get('login_info').get('loginTime'),
-            )
-            if query_object.user_name and not query_object.ipaddr:
-                if query_object.user_name == payload.get('user_name'):
-                    online_info_list = [online_dict]
-                    break
-            elif not query_object.user_name and query_object.ipaddr:
-                if query_object.ipaddr == payload.get('login_info').get('ipaddr'):
-                    online_info_list = [online_dict]
-                    break
-            elif query_object.user_name and query_object.ipaddr:
-                if query_object.user_name == payload.get('user_name') and query_object.ipaddr == payload.get(
-                    'login_info'
-                ).get('ipaddr'):
-                    online_info_list = [online_dict]
-                    break
-            else:
-                online_info_list.append(online_dict)
-
-        return CamelCaseUtil.transform_result(online_info_list)
+        redis = request.app.state.redis
+        await cls.__clean_expired_online_sessions(redis)
+        is_page = bool(query_object.page_num and query_object.page_size)
+        if is_page and not query_object.user_name and not query_object.ipaddr:
+            start = (query_object.page_num - 1) * query_object.page_size
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.zcard(cls.get_online_session_index_key())
+                pipe.zrevrange(cls.get_online_session_index_key(), start, start + query_object.page_size - 1)
+                total, token_id_list = await pipe.execute()
+            online_info_list = await cls.__get_online_session_info_list(redis, token_id_list)
+        else:
+            token_id_list = await redis.zrevrange(cls.get_online_session_index_key(), 0, -1)
+            online_info_list = [
+                online_info
+                for online_info in await cls.__get_online_session_info_list(redis, token_id_list)
+                if (not query_object.user_name or query_object.user_name == online_info.get('user_name'))
+                and (not query_object.ipaddr or query_object.ipaddr == online_info.get('ipaddr'))
+            ]
+            total = len(online_info_list)
+            if is_page:
+                start = (query_object.page_num - 1) * query_object.page_size
+                online_info_list = online_info_list[start : start + query_object.page_size]
+        for online_info in online_info_list:
+            online_info.pop('session_id', None)
+        rows = CamelCaseUtil.transform_result(online_info_list)
+        if not is_page:
+            return PageResponseModel(rows=rows, total=total)
+
+        return PageResponseModel(
+            rows=rows,
+            pageNum=query_object.page_num,
+            pageSize=query_object.page_size,
+            total=total,
+            hasNext=query_object.page_num * query_object.page_size < total,
+        )
 
     @classmethod
     async def delete_online_services(cls, request: Request, page_object: DeleteOnlineModel):
@@ -67,10 +246,24 @@ class OnlineService:
         :param page_object: 强退在线用户对象
         :return: 强退在线用户校验结果
         """
-        if page_object.token_ids:
-            token_id_list = page_object.token_ids.split(',')
-            for token_id in token_id_list:
-                await request.app.state.redis.delete(f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{token_id}')
+        token_id_list = [token_id for token_id in page_object.token_ids.split(',') if token_id]
+        if token_id_list:
+            redis = request.app.state.redis
+            online_info_list = await cls.__get_online_session_info_list(redis, token_id_list)
+            session_id_list = [
+                online_info.get('session_id') for online_info in online_info_list if online_info.get('session_id')
+            ]
+            if AppConfig.app_same_time_login:
+                # 会话编号即为令牌中的会话编号，兼容索引中不存在的会话
+                session_id_list = list(set(session_id_list) | set(token_id_list))
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.delete(
+                    *[f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{token_id}' for token_id in token_id_list],
+                    *[PrincipalCacheService.get_principal_key(session_id) for session_id in session_id_list],
+                )
+                pipe.zrem(cls.get_online_session_index_key(), *token_id_list)
+                pipe.hdel(cls.get_online_session_info_key(), *token_id_list)
+                await pipe.execute()
             return CrudResponseModel(is_success=True, message='强退成功')
         else:
             raise ServiceException(message='传入session_id为空')
@@ -1,5 +1,5 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import AsyncIterable, Dict, List, Literal
 from config.constant import CommonConstant
 from exceptions.exception import ServiceException
 from module_admin.dao.post_dao import PostDao
@@ -16,7 +16,7 @@ class PostService:
 
     @classmethod
     async def get_post_list_services(
-        cls, query_db: AsyncSession, query_object: PostPageQueryModel, is_page: bool = False
+        cls, query_db: AsyncSession, query_object: PostPageQueryModel, is_page: bool = False, is_stream: bool = False
     ):
         """
         获取岗位列表信息service
@@ -24,9 +24,10 @@ class PostService:
         :param query_db: orm对象
         :param query_object: 查询参数对象
         :param is_page: 是否开启分页
+        :param is_stream: 是否使用服务端游标分批读取全部数据
         :return: 岗位列表信息对象
         """
-        post_list_result = await PostDao.get_post_list(query_db, query_object, is_page)
+        post_list_result = await PostDao.get_post_list(query_db, query_object, is_page, is_stream)
 
         return post_list_result
 
@@ -152,12 +153,15 @@ class PostService:
         return result
 
     @staticmethod
-    async def export_post_list_services(post_list: List):
+    async def export_post_list_services(
+        post_list: AsyncIterable[List[Dict]], export_format: Literal['xlsx', 'csv'] = 'xlsx'
+    ):
         """
         导出岗位信息service
 
-        :param post_list: 岗位信息列表
-        :return: 岗位信息对应excel的二进制数据
+        :param post_list: 岗位信息列表的分批异步迭代器
+        :param export_format: 导出文件格式，xlsx或csv
+        :return: 岗位信息对应导出文件内容的异步迭代器
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -173,11 +177,11 @@ class PostService:
             'remark': '备注',
         }
 
-        for item in post_list:
+        def mapping_row(item: Dict):
             if item.get('status') == '0':
                 item['status'] = '正常'
             else:
                 item['status'] = '停用'
-        binary_data = ExcelUtil.export_list2excel(post_list, mapping_dict)
+            return item
 
-        return binary_data
+        return ExcelUtil.stream_export_list(post_list, mapping_dict, mapping_row, export_format)
@@ -0,0 +1,148 @@
+import json
+import time
+from datetime import timedelta
+from redis import asyncio as aioredis
+from typing import Dict, List, Optional, Tuple, Union
+from config.enums import RedisInitKeyConfig
+from config.env import JwtConfig
+from config.get_redis import RedisUtil
+
+
+class PrincipalCacheService:
+    """
+    登录用户身份缓存模块服务层
+
+    以会话编号为键缓存构建当前用户信息所需的数据，缓存内容中记录构建时的版本号，
+    用户、角色、菜单、部门发生变更时递增对应版本号，已缓存的身份信息在下次读取时自动失效
+    """
+
+    # 令牌剩余有效期与完整有效期的差值超过该秒数时才续期，避免每次请求都写入redis
+    TOKEN_REFRESH_INTERVAL = 60
+
+    @classmethod
+    def get_principal_key(cls, session_id: str):
+        """
+        获取身份信息缓存键名
+
+        :param session_id: 会话编号
+        :return: 身份信息缓存键名
+        """
+        return f'{RedisInitKeyConfig.USER_PRINCIPAL.key}:{session_id}'
+
+    @classmethod
+    def get_global_version_key(cls):
+        """
+        获取全局版本号键名，角色、菜单、部门变更时递增
+
+        :return: 全局版本号键名
+        """
+        return f'{RedisInitKeyConfig.PRINCIPAL_VERSION.key}:global'
+
+    @classmethod
+    def get_user_version_key(cls, user_id: Union[int, str]):
+        """
+        获取用户版本号键名，用户自身信息变更时递增
+
+        :param user_id: 用户id
+        :return: 用户版本号键名
+        """
+        return f'{RedisInitKeyConfig.PRINCIPAL_VERSION.key}:user:{user_id}'
+
+    @classmethod
+    async def get_session_snapshot(
+        cls, redis: aioredis.Redis, token_key: str, session_id: str, user_id: Union[int, str]
+    ) -> Tuple[Optional[str], int, str, Optional[Dict]]:
+        """
+        通过一次redis往返获取当前会话的令牌、令牌剩余有效期、当前版本号及已缓存的身份信息
+
+        :param redis: redis对象
+        :param token_key: 令牌缓存键名
+        :param session_id: 会话编号
+        :param user_id: 用户id
+        :return: 令牌、令牌剩余有效期（秒）、当前版本号、版本号一致时的身份信息
+        """
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.get(token_key)
+            pipe.ttl(token_key)
+            pipe.get(cls.get_global_version_key())
+            pipe.get(cls.get_user_version_key(user_id))
+            pipe.get(cls.get_principal_key(session_id))
+            redis_token, token_ttl, global_version, user_version, principal_value = await pipe.execute()
+        version = f'{global_version or 0}:{user_version or 0}'
+        principal = None
+        if principal_value:
+            principal_cache = json.loads(principal_value)
+            if principal_cache.get('version') == version:
+                principal = principal_cache.get('principal')
+
+        return redis_token, token_ttl, version, principal
+
+    @classmethod
+    async def set_principal(cls, redis: aioredis.Redis, session_id: str, version: str, principal: Dict):
+        """
+        缓存当前会话的身份信息
+
+        :param redis: redis对象
+        :param session_id: 会话编号
+        :param version: 构建身份信息时读取到的版本号
+        :param principal: 身份信息
+        :return:
+        """
+        await redis.set(
+            cls.get_principal_key(session_id),
+            json.dumps(dict(version=version, principal=principal), ensure_ascii=False, default=str),
+            ex=timedelta(minutes=JwtConfig.jwt_redis_expire_minutes),
+        )
+
+    @classmethod
+    async def refresh_session(
+        cls, redis: aioredis.Redis, token_key: str, token_id: str, session_id: str, token_ttl: int
+    ):
+        """
+        令牌剩余有效期不足时为令牌及身份信息续期，并更新在线会话索引中的最后活跃时间
+
+        :param redis: redis对象
+        :param token_key: 令牌缓存键名
+        :param token_id: 在线会话索引中的会话编号
+        :param session_id: 会话编号
+        :param token_ttl: 令牌剩余有效期（秒）
+        :return:
+        """
+        expire_seconds = JwtConfig.jwt_redis_expire_minutes * 60
+        if token_ttl < 0 or expire_seconds - token_ttl >= cls.TOKEN_REFRESH_INTERVAL:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.expire(token_key, expire_seconds)
+                pipe.expire(cls.get_principal_key(session_id), expire_seconds)
+                # 仅更新已存在的会话，避免已被强退的会话重新写入索引
+                pipe.zadd(RedisInitKeyConfig.ONLINE_SESSION_INDEX.key, {token_id: time.time()}, xx=True)
+                await pipe.execute()
+
+    @classmethod
+    async def delete_principal(cls, redis: aioredis.Redis, session_id: str):
+        """
+        删除当前会话的身份信息
+
+        :param redis: redis对象
+        :param session_id: 会话编号
+        :return:
+        """
+        await redis.delete(cls.get_principal_key(session_id))
+
+    @classmethod
+    async def bump_global_version(cls):
+        """
+        角色、菜单、部门变更后递增全局版本号，使所有会话的身份信息失效
+
+        :return:
+        """
+        await RedisUtil.incr(cls.get_global_version_key())
+
+    @classmethod
+    async def bump_user_version(cls, user_id_list: List[Union[int, str]]):
+        """
+        用户信息变更后递增对应用户的版本号，使该用户所有会话的身份信息失效
+
+        :param user_id_list: 用户id列表
+        :return:
+        """
+        await RedisUtil.incr_many([cls.get_user_version_key(user_id) for user_id in dict.fromkeys(user_id_list)])
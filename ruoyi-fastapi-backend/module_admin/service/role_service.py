@@ -1,20 +1,21 @@
+from sqlalchemy import ColumnElement
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import AsyncIterable, Dict, List, Literal
 from config.constant import CommonConstant
 from exceptions.exception import ServiceException
 from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.role_vo import (
     AddRoleModel,
     DeleteRoleModel,
-    RoleDeptModel,
     RoleDeptQueryModel,
-    RoleMenuModel,
     RoleModel,
     RolePageQueryModel,
 )
 from module_admin.entity.vo.user_vo import UserInfoModel, UserRolePageQueryModel
 from module_admin.dao.role_dao import RoleDao
 from module_admin.dao.user_dao import UserDao
+from module_admin.service.principal_service import PrincipalCacheService
+from module_admin.service.router_cache_service import RouterCacheService
 from utils.common_util import CamelCaseUtil
 from utils.excel_util import ExcelUtil
 from utils.page_util import PageResponseModel
@@ -55,18 +56,24 @@ class RoleService:
 
     @classmethod
     async def get_role_list_services(
-        cls, query_db: AsyncSession, query_object: RolePageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls,
+        query_db: AsyncSession,
+        query_object: RolePageQueryModel,
+        data_scope_sql: ColumnElement,
+        is_page: bool = False,
+        is_stream: bool = False,
     ):
         """
         获取角色列表信息service
 
         :param query_db: orm对象
         :param query_object: 查询参数对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_sql: 数据权限对应的查询条件
         :param is_page: 是否开启分页
+        :param is_stream: 是否使用服务端游标分批读取全部数据
         :return: 角色列表信息对象
         """
-        role_list_result = await RoleDao.get_role_list(query_db, query_object, data_scope_sql, is_page)
+        role_list_result = await RoleDao.get_role_list(query_db, query_object, data_scope_sql, is_page, is_stream)
 
         return role_list_result
 
@@ -84,13 +91,13 @@ class RoleService:
             return CrudResponseModel(is_success=True, message='校验通过')
 
     @classmethod
-    async def check_role_data_scope_services(cls, query_db: AsyncSession, role_ids: str, data_scope_sql: str):
+    async def check_role_data_scope_services(cls, query_db: AsyncSession, role_ids: str, data_scope_sql: ColumnElement):
         """
         校验角色是否有数据权限service
 
         :param query_db: orm对象
         :param role_ids: 角色id
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_sql: 数据权限对应的查询条件
         :return: 校验结果
         """
         role_id_list = role_ids.split(',') if role_ids else []
@@ -152,9 +159,7 @@ class RoleService:
             try:
                 add_result = await RoleDao.add_role_dao(query_db, add_role)
                 role_id = add_result.role_id
-                if page_object.menu_ids:
-                    for menu in page_object.menu_ids:
-                        await RoleDao.add_role_menu_dao(query_db, RoleMenuModel(roleId=role_id, menuId=menu))
+                await RoleDao.sync_role_menu_dao(query_db, role_id, page_object.menu_ids)
                 await query_db.commit()
                 return CrudResponseModel(is_success=True, message='新增成功')
             except Exception as e:
@@ -185,13 +190,10 @@ class RoleService:
             try:
                 await RoleDao.edit_role_dao(query_db, edit_role)
                 if page_object.type != 'status':
-                    await RoleDao.delete_role_menu_dao(query_db, RoleMenuModel(roleId=page_object.role_id))
-                    if page_object.menu_ids:
-                        for menu in page_object.menu_ids:
-                            await RoleDao.add_role_menu_dao(
-                                query_db, RoleMenuModel(roleId=page_object.role_id, menuId=menu)
-                            )
+                    await RoleDao.sync_role_menu_dao(query_db, page_object.role_id, page_object.menu_ids)
                 await query_db.commit()
+                await PrincipalCacheService.bump_global_version()
+                await RouterCacheService.bump_router_version()
                 return CrudResponseModel(is_success=True, message='更新成功')
             except Exception as e:
                 await query_db.rollback()
@@ -213,13 +215,11 @@ class RoleService:
         if role_info.role_id:
             try:
                 await RoleDao.edit_role_dao(query_db, edit_role)
-                await RoleDao.delete_role_dept_dao(query_db, RoleDeptModel(roleId=page_object.role_id))
-                if page_object.dept_ids and page_object.data_scope == '2':
-                    for dept in page_object.dept_ids:
-                        await RoleDao.add_role_dept_dao(
-                            query_db, RoleDeptModel(roleId=page_object.role_id, deptId=dept)
-                        )
+                await RoleDao.sync_role_dept_dao(
+                    query_db, page_object.role_id, page_object.dept_ids if page_object.data_scope == '2' else []
+                )
                 await query_db.commit()
+                await PrincipalCacheService.bump_global_version()
                 return CrudResponseModel(is_success=True, message='分配成功')
             except Exception as e:
                 await query_db.rollback()
@@ -246,10 +246,12 @@ class RoleService:
                     role_id_dict = dict(
                         roleId=role_id, updateBy=page_object.update_by, updateTime=page_object.update_time
                     )
-                    await RoleDao.delete_role_menu_dao(query_db, RoleMenuModel(**role_id_dict))
-                    await RoleDao.delete_role_dept_dao(query_db, RoleDeptModel(**role_id_dict))
                     await RoleDao.delete_role_dao(query_db, RoleModel(**role_id_dict))
+                await RoleDao.delete_role_menu_by_role_ids_dao(query_db, role_id_list)
+                await RoleDao.delete_role_dept_by_role_ids_dao(query_db, role_id_list)
                 await query_db.commit()
+                await PrincipalCacheService.bump_global_version()
+                await RouterCacheService.bump_router_version()
                 return CrudResponseModel(is_success=True, message='删除成功')
             except Exception as e:
                 await query_db.rollback()
@@ -275,12 +277,15 @@ class RoleService:
         return result
 
     @staticmethod
-    async def export_role_list_services(role_list: List):
+    async def export_role_list_services(
+        role_list: AsyncIterable[List[Dict]], export_format: Literal['xlsx', 'csv'] = 'xlsx'
+    ):
         """
         导出角色列表信息service
 
-        :param role_list: 角色信息列表
-        :return: 角色列表信息对象
+        :param role_list: 角色信息列表的分批异步迭代器
+        :param export_format: 导出文件格式，xlsx或csv
+        :return: 角色信息对应导出文件内容的异步迭代器
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -296,25 +301,29 @@ class RoleService:
             'remark': '备注',
         }
 
-        for item in role_list:
+        def mapping_row(item: Dict):
             if item.get('status') == '0':
                 item['status'] = '正常'
             else:
                 item['status'] = '停用'
-        binary_data = ExcelUtil.export_list2excel(role_list, mapping_dict)
+            return item
 
-        return binary_data
+        return ExcelUtil.stream_export_list(role_list, mapping_dict, mapping_row, export_format)
 
     @classmethod
     async def get_role_user_allocated_list_services(
-        cls, query_db: AsyncSession, page_object: UserRolePageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls,
+        query_db: AsyncSession,
+        page_object: UserRolePageQueryModel,
+        data_scope_sql: ColumnElement,
+        is_page: bool = False,
     ):
         """
         根据角色id获取已分配用户列表
 
         :param query_db: orm对象
         :param page_object: 用户关联角色对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_sql: 数据权限对应的查询条件
         :param is_page: 是否开启分页
         :return: 已分配用户列表
         """
@@ -332,14 +341,18 @@ class RoleService:
 
     @classmethod
     async def get_role_user_unallocated_list_services(
-        cls, query_db: AsyncSession, page_object: UserRolePageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls,
+        query_db: AsyncSession,
+        page_object: UserRolePageQueryModel,
+        data_scope_sql: ColumnElement,
+        is_page: bool = False,
     ):
         """
         根据角色id获取未分配用户列表
 
         :param query_db: orm对象
         :param page_object: 用户关联角色对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_sql: 数据权限对应的查询条件
         :param is_page: 是否开启分页
         :return: 未分配用户列表
         """
@@ -0,0 +1,86 @@
+import time
+from datetime import timedelta
+from redis import asyncio as aioredis
+from typing import Awaitable, Callable, List, Optional, Union
+from config.enums import RedisInitKeyConfig
+from config.get_redis import RedisUtil
+from utils.local_cache_util import LocalCacheUtil
+
+
+class RouterCacheService:
+    """
+    用户路由缓存模块服务层
+
+    路由信息只取决于用户的角色集合，以排序后的角色id集合及路由版本号为键缓存序列化后的路由JSON，
+    拥有相同角色的用户共享同一份缓存；菜单、角色发生变更时递增路由版本号，旧版本的缓存不再被读取并在过期后自动删除
+    """
+
+    ROUTER_EXPIRE = timedelta(days=1)
+    # 超级管理员角色id，拥有全部菜单
+    ADMIN_ROLE_ID = 1
+
+    # 本进程最近读取到的路由版本号，版本号变化时清空进程内缓存中的旧版本路由
+    _version: Optional[str] = None
+
+    @classmethod
+    def get_version_key(cls):
+        """
+        获取路由版本号键名
+
+        :return: 路由版本号键名
+        """
+        return f'{RedisInitKeyConfig.USER_ROUTER.key}:version'
+
+    @classmethod
+    def get_role_set_key(cls, role_id_list: List[Union[int, str]]):
+        """
+        获取角色集合标识，超级管理员拥有全部菜单，统一使用admin标识
+
+        :param role_id_list: 角色id列表
+        :return: 角色集合标识
+        """
+        role_id_set = {int(role_id) for role_id in role_id_list if str(role_id) != ''}
+        if cls.ADMIN_ROLE_ID in role_id_set:
+            return 'admin'
+
+        return ','.join(str(role_id) for role_id in sorted(role_id_set)) or 'none'
+
+    @classmethod
+    async def get_routers(
+        cls, redis: aioredis.Redis, role_id_list: List[Union[int, str]], builder: Callable[[], Awaitable[str]]
+    ):
+        """
+        获取角色集合对应的序列化路由信息，依次读取进程内缓存、redis缓存，均未命中时调用builder生成并写入redis
+
+        :param redis: redis对象
+        :param role_id_list: 角色id列表
+        :param builder: 生成序列化路由信息的函数
+        :return: 序列化后的路由信息JSON字符串
+        """
+        version = await redis.get(cls.get_version_key())
+        if version is None:
+            # 版本号不存在（首次使用或缓存被清除）时以当前毫秒时间戳初始化，避免与清除前的版本号重复而读取到旧缓存
+            await redis.set(cls.get_version_key(), int(time.time() * 1000), nx=True)
+            version = await redis.get(cls.get_version_key())
+        if version != cls._version:
+            LocalCacheUtil.invalidate(RedisInitKeyConfig.USER_ROUTER.key)
+            cls._version = version
+        router_key = f'{version}:{cls.get_role_set_key(role_id_list)}'
+
+        async def load_routers():
+            routers = await redis.get(f'{RedisInitKeyConfig.USER_ROUTER.key}:{router_key}')
+            if routers is None:
+                routers = await builder()
+                await redis.set(f'{RedisInitKeyConfig.USER_ROUTER.key}:{router_key}', routers, ex=cls.ROUTER_EXPIRE)
+            return routers
+
+        return await LocalCacheUtil.get(RedisInitKeyConfig.USER_ROUTER.key, router_key, load_routers)
+
+    @classmethod
+    async def bump_router_version(cls):
+        """
+        菜单、角色变更后递增路由版本号，使所有角色集合的路由缓存失效
+
+        :return:
+        """
+        await RedisUtil.incr(cls.get_version_key())
@@ -3,8 +3,21 @@ import platform
 import psutil
 import socket
 import time
-from module_admin.entity.vo.server_vo import CpuInfo, MemoryInfo, PyInfo, ServerMonitorModel, SysFiles, SysInfo
-from utils.common_util import bytes2human
+from middlewares.compression_middleware import CompressionMiddleware
+from module_admin.entity.vo.server_vo import (
+    CompressionInfo,
+    CpuInfo,
+    LogQueueInfo,
+    MemoryInfo,
+    PyInfo,
+    ServerMonitorModel,
+    SysFiles,
+    SysInfo,
+    UploadInfo,
+)
+from module_admin.service.log_writer_service import LogWriterService
+from module_admin.service.upload_service import UploadService
+from utils.common_util import bytes2human, CamelCaseUtil
 
 
 class ServerService:
@@ -91,6 +104,25 @@ class ServerService:
             )
             sys_files.append(disk_data)
 
-        result = ServerMonitorModel(cpu=cpu, mem=mem, sys=sys, py=py, sysFiles=sys_files)
+        # 日志异步写入队列信息
+        log_queue = LogQueueInfo(**CamelCaseUtil.transform_result(LogWriterService.get_metrics()))
+        # 响应压缩信息
+        compression = [
+            CompressionInfo(**CamelCaseUtil.transform_result(metrics))
+            for metrics in CompressionMiddleware.get_metrics()
+        ]
+        # 文件上传信息
+        upload = UploadInfo(**CamelCaseUtil.transform_result(UploadService.get_metrics()))
+
+        result = ServerMonitorModel(
+            cpu=cpu,
+            mem=mem,
+            sys=sys,
+            py=py,
+            sysFiles=sys_files,
+            logQueue=log_queue,
+            compression=compression,
+            upload=upload,
+        )
 
         return result
@@ -0,0 +1,616 @@
+import asyncio
+import hashlib
+import math
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from fastapi import Request, UploadFile
+from itertools import count
+from redis import asyncio as aioredis
+from typing import Any, Dict, Optional
+from config.enums import RedisInitKeyConfig
+from config.env import AppConfig, UploadConfig
+from exceptions.exception import ServiceException
+from module_admin.entity.vo.common_vo import UploadChunkInitModel, UploadChunkTaskModel, UploadResponseModel
+from module_admin.entity.vo.user_vo import CurrentUserModel
+from utils.log_util import logger
+from utils.upload_util import UploadUtil
+
+
+class UploadService:
+    """
+    文件上传模块服务层
+
+    上传文件按固定大小分块读取，写入及SHA-256计算在线程池中执行，不阻塞事件循环；启用去重时相同内容只存储一份，
+    上传目录中的文件为指向该内容的硬链接，
+    不再被引用的内容由定期清理任务删除；文件名冲突时通过独占创建原子地选择可用的文件名；
+    大文件可分片上传，分片保存在服务端，中断后查询已上传的分片继续上传，全部分片上传后由服务端合并
+    """
+
+    BLOB_DIR = 'blob'
+    CHUNK_DIR = 'chunk'
+    TEMP_DIR = 'tmp'
+    # 单个文件的最大分片数量
+    MAX_CHUNK_COUNT = 10000
+    # 合并分片时每次读取的字节数
+    COPY_BUFFER_SIZE = 1024 * 1024
+    # 清理过期分片及临时文件的最小间隔（秒）
+    CLEANUP_INTERVAL = 3600
+
+    _last_cleanup_time: Optional[float] = None
+    _metrics: Dict[str, float] = dict(
+        upload_count=0,
+        upload_bytes=0,
+        upload_seconds=0.0,
+        chunk_count=0,
+        chunk_bytes=0,
+        chunk_seconds=0.0,
+        merge_count=0,
+        merge_bytes=0,
+        merge_seconds=0.0,
+        dedup_hits=0,
+        dedup_bytes=0,
+        blob_removed=0,
+        blob_removed_bytes=0,
+    )
+
+    @classmethod
+    async def upload_file_services(cls, request: Request, file: UploadFile, overwrite: bool = False):
+        """
+        上传文件service
+
+        :param request: Request对象
+        :param file: 上传文件对象
+        :param overwrite: 是否覆盖同名文件
+        :return: 上传结果
+        """
+        start_time = time.perf_counter()
+        filename = cls.__normalize_filename(file.filename)
+        temp_path = await asyncio.to_thread(cls.__create_temp_path)
+        try:
+            file_hash = hashlib.sha256() if AppConfig.app_upload_dedup_enabled else None
+            file_size = 0
+            temp_file = await asyncio.to_thread(open, temp_path, 'wb')
+            try:
+                while chunk := await file.read(AppConfig.app_upload_chunk_size):
+                    await asyncio.to_thread(cls.__write_data, temp_file, chunk, file_hash)
+                    file_size += len(chunk)
+            finally:
+                await asyncio.to_thread(temp_file.close)
+            relative_path = cls.__get_relative_path()
+            new_filename, dedup_hit = await asyncio.to_thread(
+                cls.__store_file, temp_path, file_hash, relative_path, filename, overwrite
+            )
+        finally:
+            await asyncio.to_thread(cls.__remove_file, temp_path)
+        cls.__record_metrics('upload', file_size, time.perf_counter() - start_time, dedup_hit)
+
+        return cls.__build_upload_result(request, relative_path, new_filename, file.filename)
+
+    @classmethod
+    async def init_chunk_upload_services(
+        cls, redis: aioredis.Redis, chunk_init: UploadChunkInitModel, current_user: CurrentUserModel
+    ):
+        """
+        创建分片上传任务service
+
+        :param redis: redis对象
+        :param chunk_init: 分片上传文件信息
+        :param current_user: 当前用户对象
+        :return: 分片上传任务
+        """
+        filename = cls.__normalize_filename(chunk_init.file_name)
+        if not UploadUtil.check_filename_extension(filename):
+            raise ServiceException(message='文件类型不合法')
+        if chunk_init.file_size <= 0:
+            raise ServiceException(message='文件大小不合法')
+        chunk_size = AppConfig.app_upload_chunk_size
+        chunk_count = math.ceil(chunk_init.file_size / chunk_size)
+        if chunk_count > cls.MAX_CHUNK_COUNT:
+            raise ServiceException(message=f'文件大小不能超过{chunk_size * cls.MAX_CHUNK_COUNT}字节')
+        await cls.__cleanup_expired_files()
+        chunk_task = UploadChunkTaskModel(
+            uploadId=uuid.uuid4().hex,
+            fileName=filename,
+            originalFilename=chunk_init.file_name,
+            fileSize=chunk_init.file_size,
+            chunkSize=chunk_size,
+            chunkCount=chunk_count,
+            uploadedChunks=[],
+        )
+        chunk_key = cls.get_chunk_key(chunk_task.upload_id)
+        await redis.hset(
+            chunk_key,
+            mapping=dict(
+                file_name=filename,
+                original_filename=chunk_init.file_name,
+                file_size=chunk_init.file_size,
+                chunk_size=chunk_size,
+                chunk_count=chunk_count,
+                create_by=current_user.user.user_name,
+            ),
+        )
+        await redis.expire(chunk_key, AppConfig.app_upload_chunk_expire_seconds)
+
+        return chunk_task
+
+    @classmethod
+    async def get_chunk_upload_services(cls, redis: aioredis.Redis, upload_id: str, current_user: CurrentUserModel):
+        """
+        获取分片上传任务service，用于中断后查询已上传的分片继续上传
+
+        :param redis: redis对象
+        :param upload_id: 分片上传任务ID
+        :param current_user: 当前用户对象
+        :return: 分片上传任务
+        """
+        chunk_info = await cls.__get_chunk_info(redis, upload_id, current_user)
+        await redis.expire(cls.get_chunk_key(upload_id), AppConfig.app_upload_chunk_expire_seconds)
+
+        return await cls.__build_chunk_task(upload_id, chunk_info)
+
+    @classmethod
+    async def upload_chunk_services(
+        cls, redis: aioredis.Redis, upload_id: str, index: int, file: UploadFile, current_user: CurrentUserModel
+    ):
+        """
+        上传分片service，同一分片重复上传时覆盖
+
+        :param redis: redis对象
+        :param upload_id: 分片上传任务ID
+        :param index: 分片序号，从0开始
+        :param file: 分片文件对象
+        :param current_user: 当前用户对象
+        :return: 分片上传任务
+        """
+        start_time = time.perf_counter()
+        chunk_info = await cls.__get_chunk_info(redis, upload_id, current_user)
+        chunk_count, chunk_size = int(chunk_info['chunk_count']), int(chunk_info['chunk_size'])
+        if not 0 <= index < chunk_count:
+            raise ServiceException(message='分片序号不合法')
+        expected_size = (
+            chunk_size if index < chunk_count - 1 else int(chunk_info['file_size']) - chunk_size * (chunk_count - 1)
+        )
+        data = await file.read(expected_size + 1)
+        await file.close()
+        if len(data) != expected_size:
+            raise ServiceException(message=f'分片大小不正确，应为{expected_size}字节')
+        await asyncio.to_thread(cls.__write_chunk_file, upload_id, index, data)
+        await redis.expire(cls.get_chunk_key(upload_id), AppConfig.app_upload_chunk_expire_seconds)
+        cls.__record_metrics('chunk', expected_size, time.perf_counter() - start_time)
+
+        return await cls.__build_chunk_task(upload_id, chunk_info)
+
+    @classmethod
+    async def merge_chunk_services(cls, request: Request, upload_id: str, current_user: CurrentUserModel):
+        """
+        合并分片service
+
+        :param request: Request对象
+        :param upload_id: 分片上传任务ID
+        :param current_user: 当前用户对象
+        :return: 上传结果
+        """
+        start_time = time.perf_counter()
+        redis = request.app.state.redis
+        chunk_key = cls.get_chunk_key(upload_id)
+        chunk_info = await cls.__get_chunk_info(redis, upload_id, current_user)
+        if not await redis.hsetnx(chunk_key, 'merging', '1'):
+            raise ServiceException(message='文件正在合并，请勿重复提交')
+        try:
+            chunk_count, file_size = int(chunk_info['chunk_count']), int(chunk_info['file_size'])
+            uploaded_chunk_list = await asyncio.to_thread(cls.__list_uploaded_chunks, upload_id)
+            if len(uploaded_chunk_list) < chunk_count:
+                raise ServiceException(message=f'还有{chunk_count - len(uploaded_chunk_list)}个分片未上传')
+            temp_path = await asyncio.to_thread(cls.__create_temp_path)
+            try:
+                file_hash, merged_size = await asyncio.to_thread(cls.__merge_chunks, upload_id, chunk_count, temp_path)
+                if merged_size != file_size:
+                    raise ServiceException(message='合并后的文件大小不正确')
+                relative_path = cls.__get_relative_path()
+                new_filename, dedup_hit = await asyncio.to_thread(
+                    cls.__store_file, temp_path, file_hash, relative_path, chunk_info['file_name'], False
+                )
+            finally:
+                await asyncio.to_thread(cls.__remove_file, temp_path)
+        except Exception:
+            await redis.hdel(chunk_key, 'merging')
+            raise
+        await asyncio.to_thread(shutil.rmtree, cls.__get_chunk_dir(upload_id), ignore_errors=True)
+        await redis.delete(chunk_key)
+        cls.__record_metrics('merge', file_size, time.perf_counter() - start_time, dedup_hit)
+
+        return cls.__build_upload_result(request, relative_path, new_filename, chunk_info['original_filename'])
+
+    @classmethod
+    def get_chunk_key(cls, upload_id: str):
+        """
+        获取分片上传任务的Redis键名
+
+        :param upload_id: 分片上传任务ID
+        :return: Redis键名
+        """
+        return f'{RedisInitKeyConfig.UPLOAD_CHUNK.key}:{upload_id}'
+
+    @classmethod
+    def get_metrics(cls):
+        """
+        获取当前工作进程的上传统计信息
+
+        :return: 上传统计信息，吞吐量单位为MB/s
+        """
+        metrics = dict(cls._metrics)
+        for kind in ['upload', 'chunk', 'merge']:
+            seconds = metrics.pop(f'{kind}_seconds')
+            metrics[f'{kind}_throughput'] = (
+                round(metrics[f'{kind}_bytes'] / 1024 / 1024 / seconds, 2) if seconds > 0 else None
+            )
+
+        return metrics
+
+    @classmethod
+    async def __get_chunk_info(cls, redis: aioredis.Redis, upload_id: str, current_user: CurrentUserModel):
+        """
+        获取分片上传任务信息并校验权限
+
+        :param redis: redis对象
+        :param upload_id: 分片上传任务ID
+        :param current_user: 当前用户对象
+        :return: 分片上传任务信息
+        """
+        chunk_info = await redis.hgetall(cls.get_chunk_key(upload_id))
+        if not chunk_info:
+            raise ServiceException(message='上传任务不存在或已过期')
+        if not current_user.user.admin and chunk_info.get('create_by') != current_user.user.user_name:
+            raise ServiceException(message='没有权限访问该上传任务')
+
+        return chunk_info
+
+    @classmethod
+    async def __build_chunk_task(cls, upload_id: str, chunk_info: Dict[str, str]):
+        """
+        根据分片上传任务信息及已保存的分片生成分片上传任务
+
+        :param upload_id: 分片上传任务ID
+        :param chunk_info: 分片上传任务信息
+        :return: 分片上传任务
+        """
+        return UploadChunkTaskModel(
+            uploadId=upload_id,
+            fileName=chunk_info['file_name'],
+            originalFilename=chunk_info['original_filename'],
+            fileSize=chunk_info['file_size'],
+            chunkSize=chunk_info['chunk_size'],
+            chunkCount=chunk_info['chunk_count'],
+            uploadedChunks=await asyncio.to_thread(cls.__list_uploaded_chunks, upload_id),
+        )
+
+    @classmethod
+    async def __cleanup_expired_files(cls):
+        """
+        按间隔清理超过分片上传任务有效期的分片及临时文件
+
+        :return:
+        """
+        now = time.monotonic()
+        if cls._last_cleanup_time is not None and now - cls._last_cleanup_time < cls.CLEANUP_INTERVAL:
+            return
+        cls._last_cleanup_time = now
+        await asyncio.to_thread(cls.__remove_expired_files)
+
+    @classmethod
+    def __remove_expired_files(cls):
+        """
+        删除最后修改时间超过分片上传任务有效期的分片目录、临时文件及不再被上传目录中文件引用的去重存储文件
+
+        :return:
+        """
+        expire_time = time.time() - AppConfig.app_upload_chunk_expire_seconds
+        cls.__remove_unreferenced_blobs(expire_time)
+        for dir_name in [cls.CHUNK_DIR, cls.TEMP_DIR]:
+            dir_path = os.path.join(UploadConfig.UPLOAD_PATH, dir_name)
+            if not os.path.isdir(dir_path):
+                continue
+            for entry in os.scandir(dir_path):
+                try:
+                    if entry.stat().st_mtime >= expire_time:
+                        continue
+                    if entry.is_dir():
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                    else:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    continue
+                except OSError as e:
+                    logger.warning(f'清理过期上传文件{entry.path}失败，详细错误信息：{e}')
+
+    @classmethod
+    def __remove_unreferenced_blobs(cls, expire_time: float):
+        """
+        删除硬链接数为1（上传目录中指向该内容的文件均已删除或被覆盖）且最后修改时间早于指定时间的去重存储文件，
+        去重命中时会更新存储文件的修改时间，避免删除即将被引用的存储文件
+
+        :param expire_time: 最后修改时间早于该时间的存储文件才会被删除
+        :return:
+        """
+        blob_path = os.path.join(UploadConfig.UPLOAD_PATH, cls.BLOB_DIR)
+        if not os.path.isdir(blob_path):
+            return
+        for blob_dir in os.scandir(blob_path):
+            if not blob_dir.is_dir():
+                continue
+            for entry in os.scandir(blob_dir.path):
+                try:
+                    blob_stat = entry.stat()
+                    if blob_stat.st_nlink > 1 or blob_stat.st_mtime >= expire_time:
+                        continue
+                    os.remove(entry.path)
+                    cls._metrics['blob_removed'] += 1
+                    cls._metrics['blob_removed_bytes'] += blob_stat.st_size
+                except FileNotFoundError:
+                    continue
+                except OSError as e:
+                    logger.warning(f'清理未引用的去重存储文件{entry.path}失败，详细错误信息：{e}')
+
+    @classmethod
+    def __record_metrics(cls, kind: str, size: int, seconds: float, dedup_hit: bool = False):
+        """
+        记录上传统计信息
+
+        :param kind: 统计类型，upload普通上传，chunk分片上传，merge分片合并
+        :param size: 字节数
+        :param seconds: 耗时（秒）
+        :param dedup_hit: 是否与已存储的文件内容重复
+        :return:
+        """
+        cls._metrics[f'{kind}_count'] += 1
+        cls._metrics[f'{kind}_bytes'] += size
+        cls._metrics[f'{kind}_seconds'] += seconds
+        if dedup_hit:
+            cls._metrics['dedup_hits'] += 1
+            cls._metrics['dedup_bytes'] += size
+        if kind != 'chunk':
+            logger.info(
+                f'文件上传完成，大小{size}字节，耗时{seconds * 1000:.1f}ms，'
+                f'吞吐量{size / 1024 / 1024 / seconds if seconds > 0 else 0:.2f}MB/s'
+                f'{"，内容与已存储的文件重复" if dedup_hit else ""}'
+            )
+
+    @classmethod
+    def __build_upload_result(cls, request: Request, relative_path: str, filename: str, original_filename: str):
+        """
+        生成上传结果
+
+        :param request: Request对象
+        :param relative_path: 文件所在目录相对上传目录的路径
+        :param filename: 保存的文件名称
+        :param original_filename: 原文件名称
+        :return: 上传结果
+        """
+        return UploadResponseModel(
+            fileName=f'{UploadConfig.UPLOAD_PREFIX}/{relative_path}/{filename}',
+            newFileName=filename,
+            originalFilename=original_filename,
+            url=f'{request.base_url}{UploadConfig.UPLOAD_PREFIX[1:]}/{relative_path}/{filename}',
+        )
+
+    @classmethod
+    def __get_relative_path(cls):
+        """
+        获取当天上传文件所在目录相对上传目录的路径
+
+        :return: 相对路径
+        """
+        return f'upload/{datetime.now().strftime("%Y/%m/%d")}'
+
+    @classmethod
+    def __get_chunk_dir(cls, upload_id: str):
+        """
+        获取分片上传任务的分片目录
+
+        :param upload_id: 分片上传任务ID
+        :return: 分片目录
+        """
+        return os.path.join(UploadConfig.UPLOAD_PATH, cls.CHUNK_DIR, upload_id)
+
+    @classmethod
+    def __create_temp_path(cls):
+        """
+        生成临时文件路径，临时文件与上传目录位于同一文件系统，保存时可原子地移动
+
+        :return: 临时文件路径
+        """
+        temp_dir = os.path.join(UploadConfig.UPLOAD_PATH, cls.TEMP_DIR)
+        os.makedirs(temp_dir, exist_ok=True)
+
+        return os.path.join(temp_dir, f'{uuid.uuid4().hex}.tmp')
+
+    @classmethod
+    def __write_chunk_file(cls, upload_id: str, index: int, data: bytes):
+        """
+        写入分片，先写入临时文件再重命名，避免中断时留下不完整的分片
+
+        :param upload_id: 分片上传任务ID
+        :param index: 分片序号
+        :param data: 分片内容
+        :return:
+        """
+        chunk_dir = cls.__get_chunk_dir(upload_id)
+        os.makedirs(chunk_dir, exist_ok=True)
+        temp_path = os.path.join(chunk_dir, f'{index}.{uuid.uuid4().hex}.tmp')
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, os.path.join(chunk_dir, f'{index}.part'))
+
+    @classmethod
+    def __list_uploaded_chunks(cls, upload_id: str):
+        """
+        获取已上传的分片序号
+
+        :param upload_id: 分片上传任务ID
+        :return: 已上传的分片序号列表
+        """
+        chunk_dir = cls.__get_chunk_dir(upload_id)
+        if not os.path.isdir(chunk_dir):
+            return []
+
+        return sorted(int(name[:-5]) for name in os.listdir(chunk_dir) if name.endswith('.part'))
+
+    @classmethod
+    def __merge_chunks(cls, upload_id: str, chunk_count: int, temp_path: str):
+        """
+        按序号合并分片到临时文件
+
+        :param upload_id: 分片上传任务ID
+        :param chunk_count: 分片数量
+        :param temp_path: 临时文件路径
+        :return: SHA-256计算对象（未启用去重时为None）及合并后的字节数
+        """
+        chunk_dir = cls.__get_chunk_dir(upload_id)
+        file_hash = hashlib.sha256() if AppConfig.app_upload_dedup_enabled else None
+        merged_size = 0
+        with open(temp_path, 'wb') as temp_file:
+            for index in range(chunk_count):
+                with open(os.path.join(chunk_dir, f'{index}.part'), 'rb') as chunk_file:
+                    while data := chunk_file.read(cls.COPY_BUFFER_SIZE):
+                        cls.__write_data(temp_file, data, file_hash)
+                        merged_size += len(data)
+
+        return file_hash, merged_size
+
+    @classmethod
+    def __store_file(cls, temp_path: str, file_hash: Optional[Any], relative_path: str, filename: str, overwrite: bool):
+        """
+        将临时文件保存到上传目录，启用去重时按SHA-256存储文件内容，上传目录中的文件为指向该内容的硬链接
+
+        :param temp_path: 临时文件路径
+        :param file_hash: SHA-256计算对象，未启用去重时为None
+        :param relative_path: 文件所在目录相对上传目录的路径
+        :param filename: 文件名称
+        :param overwrite: 是否覆盖同名文件
+        :return: 保存的文件名称及是否与已存储的文件内容重复
+        """
+        dir_path = os.path.join(UploadConfig.UPLOAD_PATH, relative_path)
+        os.makedirs(dir_path, exist_ok=True)
+        if file_hash is None:
+            return cls.__publish_file(temp_path, dir_path, filename, overwrite, link=False), False
+        digest = file_hash.hexdigest()
+        blob_dir = os.path.join(UploadConfig.UPLOAD_PATH, cls.BLOB_DIR, digest[:2])
+        os.makedirs(blob_dir, exist_ok=True)
+        blob_path = os.path.join(blob_dir, digest)
+        try:
+            # 更新修改时间，避免清理任务删除即将被引用的存储文件
+            os.utime(blob_path)
+            dedup_hit = True
+        except FileNotFoundError:
+            os.replace(temp_path, blob_path)
+            dedup_hit = False
+        try:
+            return cls.__publish_file(blob_path, dir_path, filename, overwrite, link=True), dedup_hit
+        except FileNotFoundError:
+            if not dedup_hit:
+                raise
+        # 存储文件在去重命中后被清理任务删除时，使用本次上传的临时文件重新存储
+        os.replace(temp_path, blob_path)
+
+        return cls.__publish_file(blob_path, dir_path, filename, overwrite, link=True), False
+
+    @classmethod
+    def __publish_file(cls, source_path: str, dir_path: str, filename: str, overwrite: bool, link: bool):
+        """
+        将文件放置到上传目录，不覆盖时文件已存在则依次尝试添加计数器的文件名，每次尝试均为独占创建，并发上传同名文件时不会互相覆盖
+
+        :param source_path: 源文件路径
+        :param dir_path: 上传目录
+        :param filename: 文件名称
+        :param overwrite: 是否覆盖同名文件
+        :param link: 是否以硬链接方式放置，否则移动源文件
+        :return: 保存的文件名称
+        """
+        if overwrite:
+            staging_path = os.path.join(dir_path, f'.{uuid.uuid4().hex}.tmp')
+            cls.__place_file(source_path, staging_path, link)
+            os.replace(staging_path, os.path.join(dir_path, filename))
+            return filename
+        name_parts = filename.rsplit('.', 1)
+        for counter in count():
+            if counter == 0:
+                candidate = filename
+            elif len(name_parts) > 1:
+                candidate = f'{name_parts[0]}_{counter}.{name_parts[1]}'
+            else:
+                candidate = f'{name_parts[0]}_{counter}'
+            try:
+                cls.__place_file(source_path, os.path.join(dir_path, candidate), link, exclusive=True)
+                return candidate
+            except FileExistsError:
+                continue
+
+    @classmethod
+    def __place_file(cls, source_path: str, target_path: str, link: bool, exclusive: bool = False):
+        """
+        放置文件，文件系统不支持硬链接时复制文件内容
+
+        :param source_path: 源文件路径
+        :param target_path: 目标文件路径
+        :param link: 是否以硬链接方式放置，否则移动源文件
+        :param exclusive: 目标文件已存在时是否抛出FileExistsError
+        :return:
+        """
+        if link:
+            try:
+                os.link(source_path, target_path)
+                return
+            except (FileExistsError, FileNotFoundError):
+                raise
+            except OSError:
+                pass
+        if exclusive:
+            os.close(os.open(target_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        if link:
+            shutil.copyfile(source_path, target_path)
+        else:
+            os.replace(source_path, target_path)
+
+    @classmethod
+    def __write_data(cls, target_file, data: bytes, file_hash: Optional[Any]):
+        """
+        写入数据并更新SHA-256
+
+        :param target_file: 目标文件对象
+        :param data: 数据
+        :param file_hash: SHA-256计算对象，未启用去重时为None
+        :return:
+        """
+        target_file.write(data)
+        if file_hash is not None:
+            file_hash.update(data)
+
+    @classmethod
+    def __remove_file(cls, filepath: str):
+        """
+        删除文件，文件不存在时忽略
+
+        :param filepath: 文件路径
+        :return:
+        """
+        try:
+            os.remove(filepath)
+        except FileNotFoundError:
+            pass
+
+    @classmethod
+    def __normalize_filename(cls, filename: Optional[str]):
+        """
+        获取不含目录的文件名称，避免文件名称中的路径写入上传目录以外的位置
+
+        :param filename: 客户端提交的文件名称
+        :return: 文件名称
+        """
+        filename = os.path.basename((filename or '').replace('\\', '/'))
+        if filename in ('', '.', '..'):
+            raise ServiceException(message='文件名称不合法')
+
+        return filename
@@ -0,0 +1,525 @@
+import asyncio
+import io
+import json
+import multiprocessing
+import os
+import pandas as pd
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from fastapi import Request, UploadFile
+from itertools import chain
+from pydantic import EmailStr, TypeAdapter, ValidationError
+from pydantic_validation_decorator import Xss
+from redis import asyncio as aioredis
+from sqlalchemy import ColumnElement
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional, Set, Tuple
+from config.database import AsyncSessionLocal
+from config.enums import RedisInitKeyConfig
+from config.env import AppConfig
+from exceptions.exception import ServiceException
+from module_admin.dao.dept_dao import DeptDao
+from module_admin.dao.user_dao import UserDao
+from module_admin.entity.vo.user_vo import CurrentUserModel, UserImportTaskModel
+from module_admin.service.config_service import ConfigService
+from module_admin.service.principal_service import PrincipalCacheService
+from utils.excel_util import ExcelUtil
+from utils.log_util import logger
+from utils.pwd_util import PwdUtil
+
+
+class UserImportService:
+    """
+    用户批量导入模块服务层
+
+    导入文件在请求中解析后提交为后台任务，后台任务使用pandas按列批量校验数据，已存在的用户、部门及数据权限均通过IN查询一次性获取，
+    再按批次以多行INSERT及按主键批量UPDATE写入并逐批提交，初始密码在独立进程池中加密，导入进度及失败信息记录在Redis中供查询
+    """
+
+    HEADER_DICT = {
+        '部门编号': 'dept_id',
+        '登录名称': 'user_name',
+        '用户名称': 'nick_name',
+        '用户邮箱': 'email',
+        '手机号码': 'phonenumber',
+        '用户性别': 'sex',
+        '帐号状态': 'status',
+    }
+    SEX_DICT = {'男': '0', '女': '1', '未知': '2'}
+    STATUS_DICT = {'正常': '0', '停用': '1'}
+    # 单条IN查询携带的最大参数数量
+    LOOKUP_CHUNK_SIZE = 1000
+    # 每次提交到密码加密进程池的密码数量
+    HASH_CHUNK_SIZE = 50
+    # 密码加密子进程的优先级调整值
+    HASH_WORKER_NICE = 10
+    # 查询导入进度时返回的失败信息数量
+    ERROR_PREVIEW_SIZE = 100
+    TASK_EXPIRE = timedelta(days=1)
+
+    _executor: Optional[ProcessPoolExecutor] = None
+    _tasks: Set[asyncio.Task] = set()
+    _email_adapter = TypeAdapter(EmailStr)
+
+    @classmethod
+    async def close_user_import(cls):
+        """
+        应用关闭时中断进行中的导入任务并关闭密码加密进程池
+
+        :return:
+        """
+        for task in list(cls._tasks):
+            task.cancel()
+        await asyncio.gather(*cls._tasks, return_exceptions=True)
+        if cls._executor is not None:
+            executor = cls._executor
+            cls._executor = None
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+        logger.info('用户导入任务已关闭')
+
+    @classmethod
+    async def submit_import_task_services(
+        cls,
+        request: Request,
+        file: UploadFile,
+        update_support: bool,
+        current_user: CurrentUserModel,
+        user_data_scope_sql: ColumnElement,
+        dept_data_scope_sql: ColumnElement,
+    ):
+        """
+        解析用户导入文件并提交后台导入任务service
+
+        :param request: Request对象
+        :param file: 用户导入文件对象
+        :param update_support: 用户存在时是否更新
+        :param current_user: 当前用户对象
+        :param user_data_scope_sql: 用户数据权限sql
+        :param dept_data_scope_sql: 部门数据权限sql
+        :return: 导入任务进度
+        """
+        contents = await file.read()
+        await file.close()
+        df = await asyncio.to_thread(cls.__read_excel, contents)
+        redis = request.app.state.redis
+        init_password = await ConfigService.query_config_list_from_cache_services(redis, 'sys.user.initPassword')
+        import_task = UserImportTaskModel(
+            taskId=uuid.uuid4().hex,
+            status='running',
+            total=len(df),
+            message='导入中',
+            createBy=current_user.user.user_name,
+        )
+        task_key = cls.get_task_key(import_task.task_id)
+        await redis.hset(task_key, mapping=import_task.model_dump(exclude={'task_id', 'error_list'}))
+        await redis.expire(task_key, cls.TASK_EXPIRE)
+        task = asyncio.create_task(
+            cls.__run_import_task(
+                redis,
+                import_task.task_id,
+                df,
+                init_password,
+                update_support,
+                current_user,
+                user_data_scope_sql,
+                dept_data_scope_sql,
+            )
+        )
+        cls._tasks.add(task)
+        task.add_done_callback(cls._tasks.discard)
+
+        return import_task
+
+    @classmethod
+    async def get_import_task_services(cls, redis: aioredis.Redis, task_id: str, current_user: CurrentUserModel):
+        """
+        获取导入任务进度service
+
+        :param redis: redis对象
+        :param task_id: 导入任务ID
+        :param current_user: 当前用户对象
+        :return: 导入任务进度，包含前若干条失败信息
+        """
+        task_info = await redis.hgetall(cls.get_task_key(task_id))
+        if not task_info:
+            raise ServiceException(message='导入任务不存在或已过期')
+        if not current_user.user.admin and task_info.get('create_by') != current_user.user.user_name:
+            raise ServiceException(message='没有权限访问该导入任务')
+        error_list = await redis.lrange(cls.get_error_key(task_id), 0, cls.ERROR_PREVIEW_SIZE - 1)
+
+        return UserImportTaskModel(
+            taskId=task_id,
+            status=task_info.get('status'),
+            total=task_info.get('total'),
+            processed=task_info.get('processed'),
+            addCount=task_info.get('add_count'),
+            updateCount=task_info.get('update_count'),
+            failCount=task_info.get('fail_count'),
+            message=task_info.get('message'),
+            createBy=task_info.get('create_by'),
+            errorList=[cls.__format_error(json.loads(error)) for error in error_list],
+        )
+
+    @classmethod
+    async def export_import_error_services(cls, redis: aioredis.Redis, task_id: str, current_user: CurrentUserModel):
+        """
+        导出导入任务全部失败信息service
+
+        :param redis: redis对象
+        :param task_id: 导入任务ID
+        :param current_user: 当前用户对象
+        :return: 失败信息excel的二进制数据
+        """
+        await cls.get_import_task_services(redis, task_id, current_user)
+        error_list = [json.loads(error) for error in await redis.lrange(cls.get_error_key(task_id), 0, -1)]
+        mapping_dict = {'rowNum': '行号', 'userName': '登录名称', 'message': '失败原因'}
+
+        return ExcelUtil.export_list2excel(error_list, mapping_dict)
+
+    @classmethod
+    def get_task_key(cls, task_id: str):
+        """
+        获取导入任务进度的Redis键名
+
+        :param task_id: 导入任务ID
+        :return: Redis键名
+        """
+        return f'{RedisInitKeyConfig.USER_IMPORT_TASK.key}:{task_id}'
+
+    @classmethod
+    def get_error_key(cls, task_id: str):
+        """
+        获取导入任务失败信息的Redis键名
+
+        :param task_id: 导入任务ID
+        :return: Redis键名
+        """
+        return f'{RedisInitKeyConfig.USER_IMPORT_TASK.key}:{task_id}:errors'
+
+    @classmethod
+    def validate_user_frame(cls, df: pd.DataFrame):
+        """
+        按列批量转换并校验导入数据，校验规则与用户模型的字段校验一致
+
+        :param df: 导入数据
+        :return: 转换后的导入数据，error列为每行的第一条失败原因，校验通过时为空
+        """
+        df = df.copy()
+        df['row_num'] = range(1, len(df) + 1)
+        for column in ['user_name', 'nick_name', 'email', 'phonenumber', 'sex', 'status']:
+            df[column] = df[column].astype('string').str.strip().replace('', pd.NA)
+        df['sex'] = df['sex'].replace(cls.SEX_DICT).fillna('0')
+        df['status'] = df['status'].replace(cls.STATUS_DICT).fillna('0')
+        df['email'] = df['email'].fillna('')
+        df['phonenumber'] = df['phonenumber'].fillna('')
+        dept_id = pd.to_numeric(df['dept_id'], errors='coerce')
+        df['dept_id'] = dept_id.where(dept_id.notna() & (dept_id % 1 == 0)).astype('Int64')
+        df['error'] = pd.Series(pd.NA, index=df.index, dtype='string')
+        xss_pattern = Xss.HTML_PATTERN
+        email_list = df.loc[df['email'] != '', 'email'].drop_duplicates()
+        invalid_email_set = set(email_list[~email_list.map(cls.__is_valid_email)])
+        rule_list = [
+            (df['user_name'].isna(), '用户账号不能为空'),
+            (df['user_name'].str.count(xss_pattern) > 0, '用户账号不能包含脚本字符'),
+            (df['user_name'].str.len() > 30, '用户账号长度不能超过30个字符'),
+            (df['user_name'].notna() & df['user_name'].duplicated(), '用户账号在导入文件中重复'),
+            (df['nick_name'].isna(), '用户昵称不能为空'),
+            (df['nick_name'].str.count(xss_pattern) > 0, '用户昵称不能包含脚本字符'),
+            (df['nick_name'].str.len() > 30, '用户昵称长度不能超过30个字符'),
+            (df['email'].isin(invalid_email_set), '邮箱格式不正确'),
+            (df['email'].str.len() > 50, '邮箱长度不能超过50个字符'),
+            (df['phonenumber'].str.len() > 11, '手机号码长度不能超过11个字符'),
+            (~df['sex'].isin(['0', '1', '2']), '用户性别不正确'),
+            (~df['status'].isin(['0', '1']), '帐号状态不正确'),
+            (df['dept_id'].isna(), '部门编号不能为空且必须为整数'),
+        ]
+        for mask, message in rule_list:
+            cls.__mark_error(df, mask, message)
+
+        return df
+
+    @classmethod
+    def __read_excel(cls, contents: bytes):
+        """
+        读取用户导入文件，全部列按字符串读取，避免手机号码等数字列被转换为浮点数
+
+        :param contents: 文件内容
+        :return: 导入数据
+        """
+        try:
+            df = pd.read_excel(io.BytesIO(contents), dtype=str)
+        except Exception as e:
+            logger.warning(f'用户导入文件解析失败，详细错误信息：{e}')
+            raise ServiceException(message='导入文件格式不正确')
+        df.rename(columns=cls.HEADER_DICT, inplace=True)
+        missing_header_list = [header for header, column in cls.HEADER_DICT.items() if column not in df.columns]
+        if missing_header_list:
+            raise ServiceException(message=f'导入文件缺少列：{"、".join(missing_header_list)}')
+
+        return df[list(cls.HEADER_DICT.values())]
+
+    @classmethod
+    def __is_valid_email(cls, email: str):
+        """
+        校验邮箱格式
+
+        :param email: 邮箱
+        :return: 校验结果
+        """
+        try:
+            cls._email_adapter.validate_python(email)
+            return True
+        except ValidationError:
+            return False
+
+    @staticmethod
+    def __mark_error(df: pd.DataFrame, mask: pd.Series, message: str):
+        """
+        为满足条件且尚无失败原因的行记录失败原因
+
+        :param df: 导入数据
+        :param mask: 失败条件
+        :param message: 失败原因
+        :return:
+        """
+        df.loc[mask.fillna(False).astype(bool) & df['error'].isna(), 'error'] = message
+
+    @staticmethod
+    def __format_error(error: Dict):
+        """
+        格式化失败信息
+
+        :param error: 失败信息
+        :return: 格式化后的失败信息
+        """
+        return f'{error.get("rowNum")}.用户账号{error.get("userName") or ""}导入失败：{error.get("message")}'
+
+    @classmethod
+    async def __run_import_task(
+        cls,
+        redis: aioredis.Redis,
+        task_id: str,
+        df: pd.DataFrame,
+        init_password: str,
+        update_support: bool,
+        current_user: CurrentUserModel,
+        user_data_scope_sql: ColumnElement,
+        dept_data_scope_sql: ColumnElement,
+    ):
+        """
+        后台导入任务，使用独立的数据库会话按批次写入并逐批提交
+
+        :param redis: redis对象
+        :param task_id: 导入任务ID
+        :param df: 导入数据
+        :param init_password: 用户初始密码
+        :param update_support: 用户存在时是否更新
+        :param current_user: 当前用户对象
+        :param user_data_scope_sql: 用户数据权限sql
+        :param dept_data_scope_sql: 部门数据权限sql
+        :return:
+        """
+        task_key = cls.get_task_key(task_id)
+        try:
+            df = await asyncio.to_thread(cls.validate_user_frame, df)
+            async with AsyncSessionLocal() as session:
+                await cls.__validate_existence(
+                    session, df, update_support, current_user, user_data_scope_sql, dept_data_scope_sql
+                )
+                await session.rollback()
+                await cls.__record_errors(redis, task_id, df[df['error'].notna()])
+                valid_df = df[df['error'].isna()]
+                for start in range(0, len(valid_df), AppConfig.app_user_import_batch_size):
+                    batch_df = valid_df.iloc[start : start + AppConfig.app_user_import_batch_size]
+                    await cls.__write_batch(session, redis, task_id, batch_df, init_password, current_user)
+            task_info = await redis.hgetall(task_key)
+            message = (
+                f'导入完成，新增{task_info.get("add_count")}条，更新{task_info.get("update_count")}条，'
+                f'失败{task_info.get("fail_count")}条'
+            )
+            await redis.hset(task_key, mapping=dict(status='success', message=message))
+            logger.info(f'用户导入任务{task_id}{message}')
+        except asyncio.CancelledError:
+            await redis.hset(task_key, mapping=dict(status='failed', message='服务已关闭，导入任务中断'))
+            raise
+        except Exception as e:
+            logger.exception(e)
+            message = e.message if isinstance(e, ServiceException) else '导入任务执行异常'
+            await redis.hset(task_key, mapping=dict(status='failed', message=message))
+
+    @classmethod
+    async def __validate_existence(
+        cls,
+        session: AsyncSession,
+        df: pd.DataFrame,
+        update_support: bool,
+        current_user: CurrentUserModel,
+        user_data_scope_sql: ColumnElement,
+        dept_data_scope_sql: ColumnElement,
+    ):
+        """
+        一次性查询已存在的用户、导入数据涉及的部门及数据权限，并记录对应的失败原因
+
+        :param session: orm对象
+        :param df: 导入数据
+        :param update_support: 用户存在时是否更新
+        :param current_user: 当前用户对象
+        :param user_data_scope_sql: 用户数据权限sql
+        :param dept_data_scope_sql: 部门数据权限sql
+        :return:
+        """
+        user_id_dict = {}
+        user_name_list = df.loc[df['error'].isna(), 'user_name'].tolist()
+        for start in range(0, len(user_name_list), cls.LOOKUP_CHUNK_SIZE):
+            # 同名用户存在多个时与单个查询保持一致，取创建时间最新的用户
+            user_id_dict.update(
+                await UserDao.get_user_id_list_by_user_names(
+                    session, user_name_list[start : start + cls.LOOKUP_CHUNK_SIZE]
+                )
+            )
+        df['user_id'] = df['user_name'].map(user_id_dict).astype('Int64')
+        exist_mask = df['user_id'].notna()
+        if not update_support:
+            cls.__mark_error(df, exist_mask, '用户账号已存在')
+        cls.__mark_error(df, df['user_id'] == 1, '不允许操作超级管理员用户')
+        if not current_user.user.admin:
+            edit_user_id_list = [int(user_id) for user_id in df.loc[df['error'].isna() & exist_mask, 'user_id']]
+            allowed_user_id_set = set()
+            for start in range(0, len(edit_user_id_list), cls.LOOKUP_CHUNK_SIZE):
+                allowed_user_id_set.update(
+                    await UserDao.get_user_id_list_by_data_scope(
+                        session, edit_user_id_list[start : start + cls.LOOKUP_CHUNK_SIZE], user_data_scope_sql
+                    )
+                )
+            cls.__mark_error(df, exist_mask & ~df['user_id'].isin(allowed_user_id_set), '没有权限访问用户数据')
+        dept_id_list = [int(dept_id) for dept_id in df.loc[df['error'].isna(), 'dept_id'].unique()]
+        allowed_dept_id_set = set()
+        for start in range(0, len(dept_id_list), cls.LOOKUP_CHUNK_SIZE):
+            allowed_dept_id_set.update(
+                await DeptDao.get_dept_id_list_by_data_scope(
+                    session, dept_id_list[start : start + cls.LOOKUP_CHUNK_SIZE], dept_data_scope_sql
+                )
+            )
+        cls.__mark_error(df, ~df['dept_id'].isin(allowed_dept_id_set), '部门不存在或没有权限访问部门数据')
+
+    @classmethod
+    async def __write_batch(
+        cls,
+        session: AsyncSession,
+        redis: aioredis.Redis,
+        task_id: str,
+        batch_df: pd.DataFrame,
+        init_password: str,
+        current_user: CurrentUserModel,
+    ):
+        """
+        写入并提交一批导入数据，写入失败时整批记录为失败
+
+        :param session: orm对象
+        :param redis: redis对象
+        :param task_id: 导入任务ID
+        :param batch_df: 一批校验通过的导入数据
+        :param init_password: 用户初始密码
+        :param current_user: 当前用户对象
+        :return:
+        """
+        now = datetime.now()
+        user_name = current_user.user.user_name
+        record_list = (
+            batch_df[['user_id', 'dept_id', 'user_name', 'nick_name', 'email', 'phonenumber', 'sex', 'status']]
+            .astype(object)
+            .where(batch_df.notna(), None)
+            .to_dict('records')
+        )
+        add_user_list = [
+            dict(record, create_by=user_name, create_time=now, update_by=user_name, update_time=now)
+            for record in record_list
+            if record['user_id'] is None
+        ]
+        edit_user_list = [
+            dict(record, update_by=user_name, update_time=now)
+            for record in record_list
+            if record['user_id'] is not None
+        ]
+        try:
+            password_list = await cls.__hash_passwords(init_password, len(add_user_list))
+            for add_user, password in zip(add_user_list, password_list):
+                del add_user['user_id']
+                add_user['password'] = password
+            if add_user_list:
+                await UserDao.add_user_batch_dao(session, add_user_list)
+            if edit_user_list:
+                await UserDao.edit_user_batch_dao(session, edit_user_list)
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            logger.warning(f'用户导入任务{task_id}批量写入失败，详细错误信息：{e}')
+            await cls.__record_errors(redis, task_id, batch_df.assign(error='写入失败'))
+            return
+        task_key = cls.get_task_key(task_id)
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.hincrby(task_key, 'processed', len(batch_df))
+            pipe.hincrby(task_key, 'add_count', len(add_user_list))
+            pipe.hincrby(task_key, 'update_count', len(edit_user_list))
+            await pipe.execute()
+        await PrincipalCacheService.bump_user_version([edit_user['user_id'] for edit_user in edit_user_list])
+
+    @classmethod
+    async def __record_errors(cls, redis: aioredis.Redis, task_id: str, error_df: pd.DataFrame):
+        """
+        记录导入失败的行并更新进度
+
+        :param redis: redis对象
+        :param task_id: 导入任务ID
+        :param error_df: 导入失败的行
+        :return:
+        """
+        if error_df.empty:
+            return
+        error_key = cls.get_error_key(task_id)
+        error_list = [
+            json.dumps(dict(rowNum=int(row_num), userName=None if pd.isna(name) else name, message=error))
+            for row_num, name, error in zip(error_df['row_num'], error_df['user_name'], error_df['error'])
+        ]
+        task_key = cls.get_task_key(task_id)
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.rpush(error_key, *error_list)
+            pipe.expire(error_key, cls.TASK_EXPIRE)
+            pipe.hincrby(task_key, 'processed', len(error_list))
+            pipe.hincrby(task_key, 'fail_count', len(error_list))
+            await pipe.execute()
+
+    @classmethod
+    async def __hash_passwords(cls, init_password: str, count: int) -> List[str]:
+        """
+        在密码加密进程池中为每个新增用户分别加密初始密码，避免大批量导入占用登录使用的密码计算线程池
+
+        :param init_password: 用户初始密码
+        :param count: 新增用户数量
+        :return: 加密后的密码列表
+        """
+        if count == 0:
+            return []
+        if cls._executor is None:
+            # 使用spawn方式创建子进程，避免fork时复制事件循环及线程状态；支持时降低子进程优先级，避免与接口请求争抢CPU
+            cls._executor = ProcessPoolExecutor(
+                max_workers=AppConfig.app_user_import_hash_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=os.nice if hasattr(os, 'nice') else None,
+                initargs=(cls.HASH_WORKER_NICE,),
+            )
+        loop = asyncio.get_running_loop()
+        password_chunks: Tuple[List[str], ...] = await asyncio.gather(
+            *[
+                loop.run_in_executor(
+                    cls._executor,
+                    PwdUtil.get_password_hash_batch,
+                    init_password,
+                    min(cls.HASH_CHUNK_SIZE, count - start),
+                )
+                for start in range(0, count, cls.HASH_CHUNK_SIZE)
+            ]
+        )
+
+        return list(chain.from_iterable(password_chunks))
@@ -1,9 +1,6 @@
-import io
-import pandas as pd
-from datetime import datetime
-from fastapi import Request, UploadFile
+from sqlalchemy import ColumnElement
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Union
+from typing import AsyncIterable, Dict, List, Literal, Union
 from config.constant import CommonConstant
 from exceptions.exception import ServiceException
 from module_admin.dao.user_dao import UserDao
@@ -12,7 +9,6 @@ from module_admin.entity.vo.post_vo import PostPageQueryModel
 from module_admin.entity.vo.user_vo import (
     AddUserModel,
     CrudUserRoleModel,
-    CurrentUserModel,
     DeleteUserModel,
     EditUserModel,
     ResetUserModel,
@@ -21,15 +17,13 @@ from module_admin.entity.vo.user_vo import (
     UserInfoModel,
     UserModel,
     UserPageQueryModel,
-    UserPostModel,
     UserProfileModel,
     UserRoleModel,
     UserRoleQueryModel,
     UserRoleResponseModel,
 )
-from module_admin.service.config_service import ConfigService
-from module_admin.service.dept_service import DeptService
 from module_admin.service.post_service import PostService
+from module_admin.service.principal_service import PrincipalCacheService
 from module_admin.service.role_service import RoleService
 from utils.common_util import CamelCaseUtil
 from utils.excel_util import ExcelUtil
@@ -44,18 +38,24 @@ class UserService:
 
     @classmethod
     async def get_user_list_services(
-        cls, query_db: AsyncSession, query_object: UserPageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls,
+        query_db: AsyncSession,
+        query_object: UserPageQueryModel,
+        data_scope_sql: ColumnElement,
+        is_page: bool = False,
+        is_stream: bool = False,
     ):
         """
         获取用户列表信息service
 
         :param query_db: orm对象
         :param query_object: 查询参数对象
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_sql: 数据权限对应的查询条件
         :param is_page: 是否开启分页
+        :param is_stream: 是否使用服务端游标分批读取全部数据
         :return: 用户列表信息对象
         """
-        query_result = await UserDao.get_user_list(query_db, query_object, data_scope_sql, is_page)
+        query_result = await UserDao.get_user_list(query_db, query_object, data_scope_sql, is_page, is_stream)
         if is_page:
             user_list_result = PageResponseModel(
                 **{
@@ -63,6 +63,8 @@ class UserService:
                     'rows': [{**row[0], 'dept': row[1]} for row in query_result.rows],
                 }
             )
+        elif is_stream:
+            user_list_result = ([{**row[0], 'dept': row[1]} for row in rows] async for rows in query_result)
         else:
             user_list_result = []
             if query_result:
@@ -84,13 +86,13 @@ class UserService:
             return CrudResponseModel(is_success=True, message='校验通过')
 
     @classmethod
-    async def check_user_data_scope_services(cls, query_db: AsyncSession, user_id: int, data_scope_sql: str):
+    async def check_user_data_scope_services(cls, query_db: AsyncSession, user_id: int, data_scope_sql: ColumnElement):
         """
         校验用户数据权限service
 
         :param query_db: orm对象
         :param user_id: 用户id
-        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param data_scope_sql: 数据权限对应的查询条件
         :return: 校验结果
         """
         users = await UserDao.get_user_list(query_db, UserPageQueryModel(userId=user_id), data_scope_sql, is_page=False)
@@ -164,12 +166,8 @@ class UserService:
             try:
                 add_result = await UserDao.add_user_dao(query_db, add_user)
                 user_id = add_result.user_id
-                if page_object.role_ids:
-                    for role in page_object.role_ids:
-                        await UserDao.add_user_role_dao(query_db, UserRoleModel(userId=user_id, roleId=role))
-                if page_object.post_ids:
-                    for post in page_object.post_ids:
-                        await UserDao.add_user_post_dao(query_db, UserPostModel(userId=user_id, postId=post))
+                await UserDao.sync_user_role_dao(query_db, user_id, page_object.role_ids)
+                await UserDao.sync_user_post_dao(query_db, user_id, page_object.post_ids)
                 await query_db.commit()
                 return CrudResponseModel(is_success=True, message='新增成功')
             except Exception as e:
@@ -204,19 +202,10 @@ class UserService:
             try:
                 await UserDao.edit_user_dao(query_db, edit_user)
                 if page_object.type != 'status' and page_object.type != 'avatar' and page_object.type != 'pwd':
-                    await UserDao.delete_user_role_dao(query_db, UserRoleModel(userId=page_object.user_id))
-                    await UserDao.delete_user_post_dao(query_db, UserPostModel(userId=page_object.user_id))
-                    if page_object.role_ids:
-                        for role in page_object.role_ids:
-                            await UserDao.add_user_role_dao(
-                                query_db, UserRoleModel(userId=page_object.user_id, roleId=role)
-                            )
-                    if page_object.post_ids:
-                        for post in page_object.post_ids:
-                            await UserDao.add_user_post_dao(
-                                query_db, UserPostModel(userId=page_object.user_id, postId=post)
-                            )
+                    await UserDao.sync_user_role_dao(query_db, page_object.user_id, page_object.role_ids)
+                    await UserDao.sync_user_post_dao(query_db, page_object.user_id, page_object.post_ids)
                 await query_db.commit()
+                await PrincipalCacheService.bump_user_version([page_object.user_id])
                 return CrudResponseModel(is_success=True, message='更新成功')
             except Exception as e:
                 await query_db.rollback()
@@ -236,14 +225,13 @@ class UserService:
         if page_object.user_ids:
             user_id_list = page_object.user_ids.split(',')
             try:
-                for user_id in user_id_list:
-                    user_id_dict = dict(
-                        userId=user_id, updateBy=page_object.update_by, updateTime=page_object.update_time
-                    )
-                    await UserDao.delete_user_role_dao(query_db, UserRoleModel(**user_id_dict))
-                    await UserDao.delete_user_post_dao(query_db, UserPostModel(**user_id_dict))
-                    await UserDao.delete_user_dao(query_db, UserModel(**user_id_dict))
+                await UserDao.delete_user_role_by_user_ids_dao(query_db, user_id_list)
+                await UserDao.delete_user_post_by_user_ids_dao(query_db, user_id_list)
+                await UserDao.delete_user_batch_dao(
+                    query_db, user_id_list, page_object.update_by, page_object.update_time
+                )
                 await query_db.commit()
+                await PrincipalCacheService.bump_user_version(user_id_list)
                 return CrudResponseModel(is_success=True, message='删除成功')
             except Exception as e:
                 await query_db.rollback()
@@ -324,9 +312,9 @@ class UserService:
         reset_user = page_object.model_dump(exclude_unset=True, exclude={'admin'})
         if page_object.old_password:
             user = (await UserDao.get_user_detail_by_id(query_db, user_id=page_object.user_id)).get('user_basic_info')
-            if not PwdUtil.verify_password(page_object.old_password, user.password):
+            if not await PwdUtil.async_verify_password(page_object.old_password, user.password):
                 raise ServiceException(message='修改密码失败，旧密码错误')
-            elif PwdUtil.verify_password(page_object.password, user.password):
+            elif await PwdUtil.async_verify_password(page_object.password, user.password):
                 raise ServiceException(message='新密码不能与旧密码相同')
             else:
                 del reset_user['old_password']
@@ -334,124 +322,15 @@ class UserService:
             del reset_user['sms_code']
             del reset_user['session_id']
         try:
-            reset_user['password'] = PwdUtil.get_password_hash(page_object.password)
+            reset_user['password'] = await PwdUtil.async_get_password_hash(page_object.password)
             await UserDao.edit_user_dao(query_db, reset_user)
             await query_db.commit()
+            await PrincipalCacheService.bump_user_version([page_object.user_id])
             return CrudResponseModel(is_success=True, message='重置成功')
         except Exception as e:
             await query_db.rollback()
             raise e
 
-    @classmethod
-    async def batch_import_user_services(
-        cls,
-        request: Request,
-        query_db: AsyncSession,
-        file: UploadFile,
-        update_support: bool,
-        current_user: CurrentUserModel,
-        user_data_scope_sql: str,
-        dept_data_scope_sql: str,
-    ):
-        """
-        批量导入用户service
-
-        :param request: Request对象
-        :param query_db: orm对象
-        :param file: 用户导入文件对象
-        :param update_support: 用户存在时是否更新
-        :param current_user: 当前用户对象
-        :param user_data_scope_sql: 用户数据权限sql
-        :param dept_data_scope_sql: 部门数据权限sql
-        :return: 批量导入用户结果
-        """
-        header_dict = {
-            '部门编号': 'dept_id',
-            '登录名称': 'user_name',
-            '用户名称': 'nick_name',
-            '用户邮箱': 'email',
-            '手机号码': 'phonenumber',
-            '用户性别': 'sex',
-            '帐号状态': 'status',
-        }
-        contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
-        await file.close()
-        df.rename(columns=header_dict, inplace=True)
-        add_error_result = []
-        count = 0
-        try:
-            for index, row in df.iterrows():
-                count = count + 1
-                if row['sex'] == '男':
-                    row['sex'] = '0'
-                if row['sex'] == '女':
-                    row['sex'] = '1'
-                if row['sex'] == '未知':
-                    row['sex'] = '2'
-                if row['status'] == '正常':
-                    row['status'] = '0'
-                if row['status'] == '停用':
-                    row['status'] = '1'
-                add_user = UserModel(
-                    deptId=row['dept_id'],
-                    userName=row['user_name'],
-                    password=PwdUtil.get_password_hash(
-                        await ConfigService.query_config_list_from_cache_services(
-                            request.app.state.redis, 'sys.user.initPassword'
-                        )
-                    ),
-                    nickName=row['nick_name'],
-                    email=row['email'],
-                    phonenumber=str(row['phonenumber']),
-                    sex=row['sex'],
-                    status=row['status'],
-                    createBy=current_user.user.user_name,
-                    createTime=datetime.now(),
-                    updateBy=current_user.user.user_name,
-                    updateTime=datetime.now(),
-                )
-                user_info = await UserDao.get_user_by_info(query_db, UserModel(userName=row['user_name']))
-                if user_info:
-                    if update_support:
-                        edit_user_model = UserModel(
-                            userId=user_info.user_id,
-                            deptId=row['dept_id'],
-                            userName=row['user_name'],
-                            nickName=row['nick_name'],
-                            email=row['email'],
-                            phonenumber=str(row['phonenumber']),
-                            sex=row['sex'],
-                            status=row['status'],
-                            updateBy=current_user.user.user_name,
-                            updateTime=datetime.now(),
-                        )
-                        edit_user_model.validate_fields()
-                        await cls.check_user_allowed_services(edit_user_model)
-                        if not current_user.user.admin:
-                            await cls.check_user_data_scope_services(
-                                query_db, edit_user_model.user_id, user_data_scope_sql
-                            )
-                            await DeptService.check_dept_data_scope_services(
-                                query_db, edit_user_model.dept_id, dept_data_scope_sql
-                            )
-                        edit_user = edit_user_model.model_dump(exclude_unset=True)
-                        await UserDao.edit_user_dao(query_db, edit_user)
-                    else:
-                        add_error_result.append(f"{count}.用户账号{row['user_name']}已存在")
-                else:
-                    add_user.validate_fields()
-                    if not current_user.user.admin:
-                        await DeptService.check_dept_data_scope_services(
-                            query_db, add_user.dept_id, dept_data_scope_sql
-                        )
-                    await UserDao.add_user_dao(query_db, add_user)
-            await query_db.commit()
-            return CrudResponseModel(is_success=True, message='\n'.join(add_error_result))
-        except Exception as e:
-            await query_db.rollback()
-            raise e
-
     @staticmethod
     async def get_user_import_template_services():
         """
@@ -469,12 +348,15 @@ class UserService:
         return binary_data
 
     @staticmethod
-    async def export_user_list_services(user_list: List):
+    async def export_user_list_services(
+        user_list: AsyncIterable[List[Dict]], export_format: Literal['xlsx', 'csv'] = 'xlsx'
+    ):
         """
         导出用户信息service
 
-        :param user_list: 用户信息列表
-        :return: 用户信息对应excel的二进制数据
+        :param user_list: 用户信息列表的分批异步迭代器
+        :param export_format: 导出文件格式，xlsx或csv
+        :return: 用户信息对应导出文件内容的异步迭代器
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -493,8 +375,8 @@ class UserService:
             'remark': '备注',
         }
 
-        for item in user_list:
-            item['deptName'] = item.get('dept').get('deptName')
+        def mapping_row(item: Dict):
+            item['deptName'] = (item.get('dept') or {}).get('deptName')
             if item.get('status') == '0':
                 item['status'] = '正常'
             else:
@@ -505,9 +387,9 @@ class UserService:
                 item['sex'] = '女'
             else:
                 item['sex'] = '未知'
-        binary_data = ExcelUtil.export_list2excel(user_list, mapping_dict)
+            return item
 
-        return binary_data
+        return ExcelUtil.stream_export_list(user_list, mapping_dict, mapping_row, export_format)
 
     @classmethod
     async def get_user_role_allocated_list_services(cls, query_db: AsyncSession, page_object: UserRoleQueryModel):
@@ -551,10 +433,9 @@ class UserService:
         if page_object.user_id and page_object.role_ids:
             role_id_list = page_object.role_ids.split(',')
             try:
-                await UserDao.delete_user_role_by_user_and_role_dao(query_db, UserRoleModel(userId=page_object.user_id))
-                for role_id in role_id_list:
-                    await UserDao.add_user_role_dao(query_db, UserRoleModel(userId=page_object.user_id, roleId=role_id))
+                await UserDao.sync_user_role_dao(query_db, page_object.user_id, role_id_list)
                 await query_db.commit()
+                await PrincipalCacheService.bump_user_version([page_object.user_id])
                 return CrudResponseModel(is_success=True, message='分配成功')
             except Exception as e:
                 await query_db.rollback()
@@ -563,6 +444,7 @@ class UserService:
             try:
                 await UserDao.delete_user_role_by_user_and_role_dao(query_db, UserRoleModel(userId=page_object.user_id))
                 await query_db.commit()
+                await PrincipalCacheService.bump_user_version([page_object.user_id])
                 return CrudResponseModel(is_success=True, message='分配成功')
             except Exception as e:
                 await query_db.rollback()
@@ -570,17 +452,9 @@ class UserService:
         elif page_object.user_ids and page_object.role_id:
             user_id_list = page_object.user_ids.split(',')
             try:
-                for user_id in user_id_list:
-                    user_role = await cls.detail_user_role_services(
-                        query_db, UserRoleModel(userId=user_id, roleId=page_object.role_id)
-                    )
-                    if user_role:
-                        continue
-                    else:
-                        await UserDao.add_user_role_dao(
-                            query_db, UserRoleModel(userId=user_id, roleId=page_object.role_id)
-                        )
+                await UserDao.add_role_user_batch_dao(query_db, page_object.role_id, user_id_list)
                 await query_db.commit()
+                await PrincipalCacheService.bump_user_version(user_id_list)
                 return CrudResponseModel(is_success=True, message='新增成功')
             except Exception as e:
                 await query_db.rollback()
@@ -604,6 +478,7 @@ class UserService:
                         query_db, UserRoleModel(userId=page_object.user_id, roleId=page_object.role_id)
                     )
                     await query_db.commit()
+                    await PrincipalCacheService.bump_user_version([page_object.user_id])
                     return CrudResponseModel(is_success=True, message='删除成功')
                 except Exception as e:
                     await query_db.rollback()
@@ -611,11 +486,9 @@ class UserService:
             elif page_object.user_ids and page_object.role_id:
                 user_id_list = page_object.user_ids.split(',')
                 try:
-                    for user_id in user_id_list:
-                        await UserDao.delete_user_role_by_user_and_role_dao(
-                            query_db, UserRoleModel(userId=user_id, roleId=page_object.role_id)
-                        )
+                    await UserDao.delete_user_role_by_user_ids_dao(query_db, user_id_list, page_object.role_id)
                     await query_db.commit()
+                    await PrincipalCacheService.bump_user_version(user_id_list)
                     return CrudResponseModel(is_success=True, message='删除成功')
                 except Exception as e:
                     await query_db.rollback()
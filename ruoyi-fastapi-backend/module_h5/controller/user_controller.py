@@ -11,6 +11,7 @@ from module_h5.entity.vo.user_vo import (
     H5UserPageQueryModel, H5UserModel, H5UserDetailModel,
     ChangeH5UserStatusModel, DeleteH5UserModel
 )
+from module_h5.service.checkin_service import H5CheckinService
 from module_h5.service.user_service import H5UserService
 from utils.page_util import PageResponseModel
 from utils.response_util import ResponseUtil
@@ -132,13 +133,45 @@ async def change_user_status(
 
 @userController.post("/checkin/{user_id}", summary="用户签到")
 async def user_checkin(
+    request: Request,
     user_id: str = Path(..., description="用户ID"),
     current_user: CurrentUserModel = Depends(CheckUserInterfaceAuth("h5:user:checkin")),
     db: AsyncSession = Depends(get_db)
 ):
     """用户签到"""
     try:
-        result = await H5UserService.user_checkin(user_id, db)
+        result = await H5CheckinService.user_checkin(user_id, db, request.app.state.redis)
+        return ResponseUtil.success(data=result)
+    except HTTPException as e:
+        return ResponseUtil.error(e.detail)
+
+
+@userController.get("/checkin/streak/{user_id}", summary="获取用户签到统计")
+async def get_checkin_streak(
+    request: Request,
+    user_id: str = Path(..., description="用户ID"),
+    current_user: CurrentUserModel = Depends(CheckUserInterfaceAuth("h5:user:checkin")),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取用户签到统计"""
+    try:
+        result = await H5CheckinService.get_checkin_streak(user_id, db, request.app.state.redis)
+        return ResponseUtil.success(data=result)
+    except HTTPException as e:
+        return ResponseUtil.error(e.detail)
+
+
+@userController.get("/checkin/calendar/{user_id}", summary="获取用户签到日历")
+async def get_checkin_calendar(
+    request: Request,
+    user_id: str = Path(..., description="用户ID"),
+    month: Optional[str] = Query(None, description="月份（YYYY-MM），默认当月"),
+    current_user: CurrentUserModel = Depends(CheckUserInterfaceAuth("h5:user:checkin")),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取用户签到日历"""
+    try:
+        result = await H5CheckinService.get_checkin_calendar(user_id, month, db, request.app.state.redis)
         return ResponseUtil.success(data=result)
     except HTTPException as e:
         return ResponseUtil.error(e.detail)
@@ -32,7 +32,9 @@ class SysCarousel(Base):
     update_time = Column(DateTime, nullable=True, onupdate=datetime.now, comment="更新时间")
     
     # 关联媒体
-    media_list = relationship("SysCarouselMedia", back_populates="carousel", cascade="all, delete-orphan")
+    media_list = relationship(
+        "SysCarouselMedia", back_populates="carousel", cascade="all, delete-orphan", order_by="SysCarouselMedia.sort"
+    )
 
 
 class SysCarouselMedia(Base):
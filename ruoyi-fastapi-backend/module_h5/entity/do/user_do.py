@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, DateTime, Integer, String, Text, ForeignKey
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text, ForeignKey
 from config.database import Base
 
 
@@ -9,8 +9,10 @@ class H5User(Base):
     """
 
     __tablename__ = 'h5_user'
+    __table_args__ = (Index('uk_h5_user_string_id', 'string_id', unique=True),)
 
     user_id = Column(Integer, primary_key=True, autoincrement=True, comment='用户ID')
+    string_id = Column(String(30), comment='字符串用户ID')
     username = Column(String(50), nullable=False, unique=True, comment='登录名')
     nickname = Column(String(50), nullable=False, comment='用户昵称')
     password = Column(String(100), nullable=False, comment='密码')
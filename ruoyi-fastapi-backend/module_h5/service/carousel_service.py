@@ -4,12 +4,15 @@
 轮播图服务
 """
 from datetime import datetime
+from operator import itemgetter
 from sqlalchemy import select, func, and_, or_, delete
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List, Optional, Dict, Any, Tuple
 
 from module_h5.entity.do.carousel_do import SysCarousel, SysCarouselMedia
 from module_h5.entity.vo.carousel_vo import CarouselModel, CarouselMediaModel, CarouselPageQueryModel
+from utils.common_util import CamelCaseUtil
 from utils.page_util import PageResponseModel, PageUtil
 import os
 import requests
@@ -21,6 +24,16 @@ from utils.upload_util import UploadUtil
 class CarouselService:
     """轮播图服务类"""
     
+    # 轮播图列表及媒体返回的字段，取值方法在类定义时生成一次，避免逐行逐字段判断类型
+    CAROUSEL_LIST_FIELDS = (
+        "id", "title", "type", "category", "position", "url", "sort", "status",
+        "startTime", "endTime", "createTime", "createBy", "updateTime", "updateBy", "remark"
+    )
+    CAROUSEL_MEDIA_FIELDS = ("id", "carouselId", "name", "type", "url", "externalLink", "sort")
+    VIDEO_EXTENSIONS = frozenset(["mp4", "avi", "mov", "wmv", "flv", "mkv", "webm"])
+    _get_carousel_list_values = itemgetter(*CAROUSEL_LIST_FIELDS)
+    _get_carousel_media_values = itemgetter(*CAROUSEL_MEDIA_FIELDS)
+    
     @classmethod
     async def get_carousel_list_services(
         cls,
@@ -71,8 +84,8 @@ class CarouselService:
                 # 如果日期格式不正确，忽略这个条件
                 pass
         
-        # 构建查询语句
-        query = select(SysCarousel)
+        # 构建查询语句，媒体列表通过selectinload在同一次查询中以一条IN语句批量加载
+        query = select(SysCarousel).options(selectinload(SysCarousel.media_list))
         if where_list:
             query = query.where(and_(*where_list))
         
@@ -82,69 +95,16 @@ class CarouselService:
         # 使用与角色管理相同的分页方法
         result = await PageUtil.paginate(db, query, carousel_query.page_num, carousel_query.page_size, is_page)
         
-        # 查询媒体信息
-        carousel_models = []
-        
         # 判断是否有分页结果
         if is_page and hasattr(result, 'rows'):
             carousel_list = result.rows
         else:
             carousel_list = result  # 如果没有分页，直接使用结果
-            
+        
+        carousel_models = []
         for carousel in carousel_list:
-            # 创建轮播图模型
-            carousel_dict = {
-                "id": carousel["id"] if isinstance(carousel, dict) else carousel.id,
-                "title": carousel["title"] if isinstance(carousel, dict) else carousel.title,
-                "type": carousel["type"] if isinstance(carousel, dict) else carousel.type,
-                "category": carousel["category"] if isinstance(carousel, dict) else carousel.category,
-                "position": carousel["position"] if isinstance(carousel, dict) else carousel.position,
-                "url": carousel["url"] if isinstance(carousel, dict) else carousel.url,
-                "sort": carousel["sort"] if isinstance(carousel, dict) else carousel.sort,
-                "status": carousel["status"] if isinstance(carousel, dict) else carousel.status,
-                "startTime": carousel["startTime"] if isinstance(carousel, dict) else (carousel.start_time.strftime('%Y-%m-%d %H:%M:%S') if carousel.start_time else None),
-                "endTime": carousel["endTime"] if isinstance(carousel, dict) else (carousel.end_time.strftime('%Y-%m-%d %H:%M:%S') if carousel.end_time else None),
-                "createTime": carousel["createTime"] if isinstance(carousel, dict) else (carousel.create_time.strftime('%Y-%m-%d %H:%M:%S') if carousel.create_time else None),
-                "createBy": carousel["createBy"] if isinstance(carousel, dict) else carousel.create_by,
-                "updateTime": carousel["updateTime"] if isinstance(carousel, dict) else (carousel.update_time.strftime('%Y-%m-%d %H:%M:%S') if carousel.update_time else None),
-                "updateBy": carousel["updateBy"] if isinstance(carousel, dict) else carousel.update_by,
-                "remark": carousel["remark"] if isinstance(carousel, dict) else carousel.remark,
-                "mediaList": []
-            }
-            
-            # 查询媒体信息
-            carousel_id = carousel["id"] if isinstance(carousel, dict) else carousel.id
-            media_stmt = select(SysCarouselMedia).where(SysCarouselMedia.carousel_id == carousel_id).order_by(SysCarouselMedia.sort)
-            media_result = await db.execute(media_stmt)
-            media_list = media_result.scalars().all()
-            
-            # 创建媒体模型列表
-            media_models = []
-            for media in media_list:
-                # 根据文件名后缀判断媒体类型
-                media_type = "image"  # 默认为图片类型
-                if media.name:
-                    file_ext = media.name.lower().split('.')[-1] if '.' in media.name else ''
-                    if file_ext in ['mp4', 'avi', 'mov', 'wmv', 'flv', 'mkv', 'webm']:
-                        media_type = "video"
-                    elif file_ext in ['jpg', 'jpeg', 'png', 'gif', 'bmp', 'webp', 'svg']:
-                        media_type = "image"
-                
-                media_dict = {
-                    "id": media.id,
-                    "carouselId": media.carousel_id,
-                    "name": media.name,
-                    "type": media.type if media.type else media_type,  # 如果数据库中有类型则使用，否则使用根据后缀判断的类型
-                    "url": media.url,
-                    "externalLink": media.external_link,
-                    "sort": media.sort
-                }
-                media_models.append(media_dict)
-            
-            # 添加媒体列表
-            carousel_dict["mediaList"] = media_models
-            
-            # 添加到轮播图模型列表
+            carousel_dict = dict(zip(cls.CAROUSEL_LIST_FIELDS, cls._get_carousel_list_values(carousel)))
+            carousel_dict["mediaList"] = [cls.to_media_dict(media) for media in carousel.get("mediaList", [])]
             carousel_models.append(carousel_dict)
         
         # 返回分页数据
@@ -167,66 +127,36 @@ class CarouselService:
         """
         获取轮播图详情
         """
-        # 查询轮播图
-        stmt = select(SysCarousel).where(SysCarousel.id == carousel_id)
+        # 查询轮播图及其媒体列表
+        stmt = (
+            select(SysCarousel)
+            .options(selectinload(SysCarousel.media_list))
+            .where(SysCarousel.id == carousel_id)
+        )
         result = await db.execute(stmt)
         carousel = result.scalars().first()
         
         if not carousel:
             return None
         
-        # 创建轮播图模型
-        carousel_dict = {
-            "id": carousel.id,
-            "title": carousel.title,
-            "type": carousel.type,
-            "category": carousel.category,
-            "position": carousel.position,
-            "isExternalLink": carousel.is_external_link,
-            "url": carousel.url,
-            "sort": carousel.sort,
-            "startTime": carousel.start_time,
-            "endTime": carousel.end_time,
-            "desc": carousel.desc,
-            "remark": carousel.remark,
-            "status": carousel.status,
-            "mediaList": []
-        }
-        
-        # 查询媒体列表
-        media_stmt = select(SysCarouselMedia).where(SysCarouselMedia.carousel_id == carousel_id)
-        media_result = await db.execute(media_stmt)
-        media_list = media_result.scalars().all()
-        
-        # 转换为媒体模型列表
-        media_models = []
-        for media in media_list:
-            # 根据文件名后缀判断媒体类型
-            media_type = "image"  # 默认为图片类型
-            if media.name:
-                file_ext = media.name.lower().split('.')[-1] if '.' in media.name else ''
-                if file_ext in ['mp4', 'avi', 'mov', 'wmv', 'flv', 'mkv', 'webm']:
-                    media_type = "video"
-                elif file_ext in ['jpg', 'jpeg', 'png', 'gif', 'bmp', 'webp', 'svg']:
-                    media_type = "image"
-            
-            media_dict = {
-                "id": media.id,
-                "carouselId": media.carousel_id,
-                "name": media.name,
-                "type": media.type if media.type else media_type,  # 如果数据库中有类型则使用，否则使用根据后缀判断的类型
-                "url": media.url,
-                "externalLink": media.external_link,
-                "sort": media.sort
-            }
-            media_models.append(media_dict)
-        
-        # 添加媒体列表
-        carousel_dict["mediaList"] = media_models
+        carousel_dict = CamelCaseUtil.transform_result(carousel)
+        carousel_dict["mediaList"] = [cls.to_media_dict(media) for media in carousel_dict.get("mediaList", [])]
         
         # 创建并返回轮播图模型
         return CarouselModel(**carousel_dict)
     
+    @classmethod
+    def to_media_dict(cls, media: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        将媒体数据转换为返回的媒体字典，数据库中没有媒体类型时根据文件名后缀判断
+        """
+        media_dict = dict(zip(cls.CAROUSEL_MEDIA_FIELDS, cls._get_carousel_media_values(media)))
+        if not media_dict["type"]:
+            name = media_dict["name"] or ""
+            file_ext = name.lower().rsplit('.', 1)[-1] if '.' in name else ''
+            media_dict["type"] = "video" if file_ext in cls.VIDEO_EXTENSIONS else "image"
+        return media_dict
+    
     @classmethod
     async def add_carousel_services(
         cls,
@@ -0,0 +1,239 @@
+import calendar
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+from redis import asyncio as aioredis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from module_h5.entity.do.user_do import H5User, H5UserCheckin
+from module_h5.service.checkin_writer_service import H5CheckinWriterService
+from module_h5.service.user_service import H5UserService
+
+
+class H5CheckinService:
+    """
+    H5用户签到服务
+
+    签到记录保存在Redis位图中，每个用户一个键，每天对应一位；
+    签到占位、连续签到天数及经验值由Lua脚本在Redis中原子计算，并在同一脚本中追加到Redis待写入列表，数据库由后台任务批量写入
+    """
+
+    # Redis键前缀
+    REDIS_CHECKIN_BITMAP_KEY = 'h5:user:checkin:bitmap:'
+    REDIS_CHECKIN_STATS_KEY = 'h5:user:checkin:stats:'
+
+    # 位图第0位对应的日期
+    BITMAP_EPOCH = date(2020, 1, 1)
+    # 每次签到获得的经验值
+    EXP_PER_CHECKIN = 10
+
+    # KEYS[1]: 签到位图 KEYS[2]: 签到统计哈希 KEYS[3]: 签到数据待写入列表
+    # ARGV[1]: 签到日期对应的位 ARGV[2]: 获得的经验值
+    # ARGV[3]-ARGV[6]: 统计哈希不存在时用于初始化的签到天数、连续签到天数、最后签到日期对应的位、经验值
+    # ARGV[7]-ARGV[9]: 写入待写入列表的用户id、签到时间及签到前的等级
+    CHECKIN_SCRIPT = """
+local offset = tonumber(ARGV[1])
+if redis.call('SETBIT', KEYS[1], offset, 1) == 1 then
+    return {0}
+end
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    redis.call('HSET', KEYS[2], 'total', ARGV[3], 'streak', ARGV[4], 'last_offset', ARGV[5], 'exp', ARGV[6])
+end
+local last_offset = tonumber(redis.call('HGET', KEYS[2], 'last_offset'))
+local streak = 1
+if last_offset == offset - 1 then
+    streak = tonumber(redis.call('HGET', KEYS[2], 'streak')) + 1
+end
+local total = redis.call('HINCRBY', KEYS[2], 'total', 1)
+local exp = redis.call('HINCRBY', KEYS[2], 'exp', ARGV[2])
+if offset > last_offset then
+    redis.call('HSET', KEYS[2], 'streak', streak, 'last_offset', offset)
+end
+redis.call('RPUSH', KEYS[3], '{"user_id":' .. ARGV[7] .. ',"checkin_time":"' .. ARGV[8] .. '","exp_gained":' .. ARGV[2]
+    .. ',"checkin_days":' .. total .. ',"continuous_checkin_days":' .. streak .. ',"exp_points":' .. exp
+    .. ',"level":' .. ARGV[9] .. '}')
+return {1, total, streak, exp}
+"""
+
+    @classmethod
+    def date_to_offset(cls, checkin_date: date) -> int:
+        """
+        获取日期在签到位图中对应的位
+        """
+        return (checkin_date - cls.BITMAP_EPOCH).days
+
+    @classmethod
+    async def claim_checkin(
+        cls,
+        redis: aioredis.Redis,
+        user_id: int,
+        checkin_date: date,
+        seed: Dict[str, int],
+        exp_gained: int = EXP_PER_CHECKIN,
+        checkin_time: Optional[datetime] = None,
+        level: int = 1,
+    ) -> Optional[Dict[str, int]]:
+        """
+        在Redis中原子地完成签到，当天已签到时返回None；签到成功时同时将签到数据追加到待写入列表，由后台任务写入数据库
+
+        seed为统计哈希不存在（首次签到或Redis数据丢失）时用于初始化的数据库统计值，
+        包含checkin_days、continuous_checkin_days、last_checkin_offset、exp_points；
+        checkin_time为写入数据库的签到时间，默认为签到日期的零点，level为签到前的等级
+        """
+        checkin_time = checkin_time or datetime.combine(checkin_date, datetime.min.time())
+        result = await redis.register_script(cls.CHECKIN_SCRIPT)(
+            keys=[
+                f'{cls.REDIS_CHECKIN_BITMAP_KEY}{user_id}',
+                f'{cls.REDIS_CHECKIN_STATS_KEY}{user_id}',
+                H5CheckinWriterService.REDIS_PENDING_KEY,
+            ],
+            args=[
+                cls.date_to_offset(checkin_date),
+                exp_gained,
+                seed.get('checkin_days', 0),
+                seed.get('continuous_checkin_days', 0),
+                seed.get('last_checkin_offset', -1),
+                seed.get('exp_points', 0),
+                user_id,
+                checkin_time.isoformat(),
+                level,
+            ],
+        )
+        if not int(result[0]):
+            return None
+
+        return {'checkin_days': int(result[1]), 'continuous_checkin_days': int(result[2]), 'total_exp': int(result[3])}
+
+    @classmethod
+    async def user_checkin(cls, user_id: str, db: AsyncSession, redis: aioredis.Redis) -> Dict[str, Any]:
+        """
+        用户签到
+        """
+        user = await cls.__get_user(user_id, db)
+        await cls.__ensure_bitmap(user, db, redis)
+
+        checkin_time = datetime.now()
+        checkin_result = await cls.claim_checkin(
+            redis,
+            user.user_id,
+            checkin_time.date(),
+            {
+                'checkin_days': user.checkin_days or 0,
+                'continuous_checkin_days': user.continuous_checkin_days or 0,
+                'last_checkin_offset': (
+                    cls.date_to_offset(user.last_checkin_date.date()) if user.last_checkin_date else -1
+                ),
+                'exp_points': user.exp_points or 0,
+            },
+            checkin_time=checkin_time,
+            level=user.level or 1,
+        )
+        if not checkin_result:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='今天已经签到过了')
+
+        # 等级只升不降
+        level = max(H5UserService.calculate_level(checkin_result['total_exp']), user.level or 1)
+        level_name = H5UserService.LEVEL_CONFIG[level]['name']
+
+        return {
+            'checkin_days': checkin_result['checkin_days'],
+            'continuous_checkin_days': checkin_result['continuous_checkin_days'],
+            'exp_gained': cls.EXP_PER_CHECKIN,
+            'total_exp': checkin_result['total_exp'],
+            'level': level,
+            'level_name': level_name,
+        }
+
+    @classmethod
+    async def get_checkin_streak(cls, user_id: str, db: AsyncSession, redis: aioredis.Redis) -> Dict[str, Any]:
+        """
+        获取用户签到统计，包括累计签到天数、当前连续签到天数、今天是否已签到及首次签到日期
+        """
+        user = await cls.__get_user(user_id, db)
+        await cls.__ensure_bitmap(user, db, redis)
+
+        bitmap_key = f'{cls.REDIS_CHECKIN_BITMAP_KEY}{user.user_id}'
+        stats = await redis.hgetall(f'{cls.REDIS_CHECKIN_STATS_KEY}{user.user_id}')
+        today_offset = cls.date_to_offset(datetime.now().date())
+        if stats:
+            checkin_days = int(stats['total'])
+            streak = int(stats['streak'])
+            last_offset = int(stats['last_offset'])
+        else:
+            checkin_days = user.checkin_days or 0
+            streak = user.continuous_checkin_days or 0
+            last_offset = cls.date_to_offset(user.last_checkin_date.date()) if user.last_checkin_date else -1
+        first_offset = await redis.bitpos(bitmap_key, 1)
+
+        return {
+            'checkin_days': checkin_days,
+            # 最后一次签到早于昨天时连续签到已中断
+            'continuous_checkin_days': streak if last_offset >= today_offset - 1 else 0,
+            'checked_in_today': bool(await redis.getbit(bitmap_key, today_offset)),
+            'first_checkin_date': (
+                (cls.BITMAP_EPOCH + timedelta(days=first_offset)).isoformat() if first_offset >= 0 else None
+            ),
+        }
+
+    @classmethod
+    async def get_checkin_calendar(
+        cls, user_id: str, month: Optional[str], db: AsyncSession, redis: aioredis.Redis
+    ) -> Dict[str, Any]:
+        """
+        获取用户指定月份（格式为YYYY-MM，默认当月）的签到日历
+        """
+        try:
+            first_day = datetime.strptime(month, '%Y-%m').date() if month else datetime.now().date().replace(day=1)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='月份格式错误，应为YYYY-MM')
+        user = await cls.__get_user(user_id, db)
+        await cls.__ensure_bitmap(user, db, redis)
+
+        days_in_month = calendar.monthrange(first_day.year, first_day.month)[1]
+        first_offset = cls.date_to_offset(first_day)
+        checkin_days = []
+        if first_offset >= 0:
+            # 以一个无符号整数一次读取整月的签到位，最高位对应当月1日
+            month_bits = (
+                await redis.bitfield(f'{cls.REDIS_CHECKIN_BITMAP_KEY}{user.user_id}')
+                .get(f'u{days_in_month}', first_offset)
+                .execute()
+            )[0]
+            checkin_days = [day for day in range(1, days_in_month + 1) if month_bits >> (days_in_month - day) & 1]
+
+        return {'month': first_day.strftime('%Y-%m'), 'checkin_days': checkin_days, 'checkin_count': len(checkin_days)}
+
+    @classmethod
+    async def __get_user(cls, user_id: str, db: AsyncSession) -> H5User:
+        """
+        根据整数ID或字符串ID获取用户，用户不存在时抛出异常
+        """
+        try:
+            user = await db.get(H5User, int(user_id))
+        except ValueError:
+            user = await H5UserService.find_user_by_string_id(user_id, db)
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='用户不存在')
+
+        return user
+
+    @classmethod
+    async def __ensure_bitmap(cls, user: H5User, db: AsyncSession, redis: aioredis.Redis):
+        """
+        签到统计哈希不存在时（首次使用位图或Redis数据丢失），根据数据库签到记录恢复签到位图
+        """
+        if await redis.exists(f'{cls.REDIS_CHECKIN_STATS_KEY}{user.user_id}'):
+            return
+        stmt = select(H5UserCheckin.checkin_date).where(H5UserCheckin.user_id == user.user_id)
+        checkin_dates = (await db.execute(stmt)).scalars().all()
+        offsets = {cls.date_to_offset(checkin_date.date()) for checkin_date in checkin_dates}
+        offsets = [offset for offset in offsets if offset >= 0]
+        if not offsets:
+            return
+        # SETBIT幂等，并发恢复不会产生重复数据
+        pipeline = redis.pipeline(transaction=False)
+        for offset in offsets:
+            pipeline.setbit(f'{cls.REDIS_CHECKIN_BITMAP_KEY}{user.user_id}', offset, 1)
+        await pipeline.execute()
@@ -0,0 +1,205 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, List, Optional
+
+from redis import asyncio as aioredis
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import DataError, IntegrityError
+
+from config.database import AsyncSessionLocal
+from module_h5.entity.do.user_do import H5User, H5UserCheckin
+from module_h5.service.user_service import H5UserService
+from utils.log_util import logger
+
+
+class H5CheckinWriterService:
+    """
+    H5用户签到数据批量写入服务
+
+    签到结果以Redis为准，签到脚本在占位的同时将签到数据追加到Redis待写入列表，
+    后台任务持有Redis锁按批次读取列表写入数据库，写入成功后才从列表中移除，进程崩溃或关闭时未写入的数据保留在列表中；
+    写入按用户及签到日期跳过已存在的签到记录，重复写入同一批次不会产生重复数据，同一批次中同一用户的统计只按最新值更新一次
+    """
+
+    # Redis键：待写入列表、无法写入的死信列表及批量写入锁
+    REDIS_PENDING_KEY = 'h5:user:checkin:pending'
+    REDIS_DEAD_KEY = 'h5:user:checkin:dead'
+    REDIS_LOCK_KEY = 'h5:user:checkin:pending:lock'
+    BATCH_SIZE = 200
+    # 待写入列表为空或写入失败时的轮询间隔（秒）
+    FLUSH_INTERVAL = 1.0
+    # 批量写入锁的过期时间（秒），持有锁的进程崩溃后由其他进程接管
+    LOCK_EXPIRE_SECONDS = 60
+    # 关闭时等待后台任务写完当前批次的最长时间（秒）
+    CLOSE_TIMEOUT = 10
+
+    # 只释放自己持有的锁
+    RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+    _redis: Optional[aioredis.Redis] = None
+    _worker: Optional[asyncio.Task] = None
+    _stop_event: Optional[asyncio.Event] = None
+
+    @classmethod
+    async def init_checkin_writer(cls, redis: aioredis.Redis):
+        """
+        应用启动时启动签到数据后台写入任务
+        """
+        cls._redis = redis
+        cls._stop_event = asyncio.Event()
+        cls._worker = asyncio.create_task(cls.__write_worker())
+        logger.info('H5签到数据批量写入任务启动成功')
+
+    @classmethod
+    async def close_checkin_writer(cls):
+        """
+        应用关闭时停止后台写入任务，未写入的签到数据保留在Redis待写入列表中，由下次启动或其他进程写入
+        """
+        if cls._worker is None:
+            return
+        cls._stop_event.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(cls._worker), timeout=cls.CLOSE_TIMEOUT)
+        except asyncio.TimeoutError:
+            cls._worker.cancel()
+            try:
+                await cls._worker
+            except asyncio.CancelledError:
+                pass
+        pending_count = await cls._redis.llen(cls.REDIS_PENDING_KEY)
+        if pending_count:
+            logger.warning(f'H5签到数据批量写入任务已关闭，{pending_count}条签到数据保留在Redis待写入列表中')
+        cls._worker = None
+        cls._stop_event = None
+        cls._redis = None
+        logger.info('H5签到数据批量写入任务已关闭')
+
+    @classmethod
+    async def flush_pending(cls, redis: aioredis.Redis) -> int:
+        """
+        持有Redis锁时从待写入列表头部读取一批签到数据写入数据库，写入成功后从列表中移除
+
+        整批写入失败时改为逐条写入，数据错误的签到数据移入死信列表，数据库不可用时保留剩余数据等待下次写入；
+        返回本次从列表中移除的签到数据条数，未获取到锁时返回0
+        """
+        token = uuid.uuid4().hex
+        if not await redis.set(cls.REDIS_LOCK_KEY, token, nx=True, ex=cls.LOCK_EXPIRE_SECONDS):
+            return 0
+        try:
+            raw_list = await redis.lrange(cls.REDIS_PENDING_KEY, 0, cls.BATCH_SIZE - 1)
+            if not raw_list:
+                return 0
+            checkin_list = [cls.__load_checkin(raw) for raw in raw_list]
+            try:
+                await cls.__write_batch(checkin_list)
+                processed_count = len(raw_list)
+            except Exception as e:
+                logger.error(f'H5签到数据批量写入失败，改为逐条写入，详细错误信息：{e}')
+                processed_count = 0
+                for raw, checkin in zip(raw_list, checkin_list):
+                    try:
+                        await cls.__write_batch([checkin])
+                    except (DataError, IntegrityError) as e:
+                        logger.error(f'H5签到数据错误，移入死信列表{cls.REDIS_DEAD_KEY}，详细错误信息：{e}')
+                        await redis.rpush(cls.REDIS_DEAD_KEY, raw)
+                    except Exception as e:
+                        logger.error(f'H5签到数据写入数据库失败，等待下次写入，详细错误信息：{e}')
+                        break
+                    processed_count += 1
+            if processed_count:
+                await redis.ltrim(cls.REDIS_PENDING_KEY, processed_count, -1)
+
+            return processed_count
+        finally:
+            await redis.register_script(cls.RELEASE_LOCK_SCRIPT)(keys=[cls.REDIS_LOCK_KEY], args=[token])
+
+    @classmethod
+    async def __write_worker(cls):
+        """
+        后台批量写入任务，待写入列表中不足一批或写入失败时按刷新间隔轮询
+        """
+        while not cls._stop_event.is_set():
+            try:
+                processed_count = await cls.flush_pending(cls._redis)
+            except Exception as e:
+                logger.exception(e)
+                processed_count = 0
+            if processed_count < cls.BATCH_SIZE:
+                try:
+                    await asyncio.wait_for(cls._stop_event.wait(), timeout=cls.FLUSH_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+
+    @classmethod
+    def __load_checkin(cls, raw: str) -> Dict[str, Any]:
+        """
+        解析签到脚本写入待写入列表的签到数据
+        """
+        checkin = json.loads(raw)
+        checkin['checkin_time'] = datetime.fromisoformat(checkin['checkin_time'])
+
+        return checkin
+
+    @classmethod
+    async def __write_batch(cls, checkin_list: List[Dict[str, Any]]):
+        """
+        使用独立的数据库会话以多行INSERT写入数据库中尚不存在的签到记录，并按主键批量更新用户签到统计
+        """
+        latest_checkin_mapping = {}
+        for checkin in checkin_list:
+            latest_checkin = latest_checkin_mapping.get(checkin['user_id'])
+            if latest_checkin is None or checkin['checkin_days'] > latest_checkin['checkin_days']:
+                latest_checkin_mapping[checkin['user_id']] = checkin
+        checkin_dates = [checkin['checkin_time'].date() for checkin in checkin_list]
+        now = datetime.now()
+        async with AsyncSessionLocal() as session:
+            # 上次写入后未能从待写入列表中移除的签到数据会被再次读取，按用户及签到日期跳过已写入的签到记录
+            existing_stmt = select(H5UserCheckin.user_id, H5UserCheckin.checkin_date).where(
+                H5UserCheckin.user_id.in_(list(latest_checkin_mapping.keys())),
+                H5UserCheckin.checkin_date >= datetime.combine(min(checkin_dates), time.min),
+                H5UserCheckin.checkin_date < datetime.combine(max(checkin_dates) + timedelta(days=1), time.min),
+            )
+            checkin_keys = {
+                (user_id, checkin_date.date()) for user_id, checkin_date in (await session.execute(existing_stmt)).all()
+            }
+            insert_values = []
+            for checkin in checkin_list:
+                checkin_key = (checkin['user_id'], checkin['checkin_time'].date())
+                if checkin_key in checkin_keys:
+                    continue
+                checkin_keys.add(checkin_key)
+                insert_values.append(
+                    dict(
+                        user_id=checkin['user_id'],
+                        checkin_date=checkin['checkin_time'],
+                        exp_gained=checkin['exp_gained'],
+                        create_time=now,
+                    )
+                )
+            if insert_values:
+                await session.execute(insert(H5UserCheckin), insert_values)
+            update_values = []
+            for checkin in latest_checkin_mapping.values():
+                # 等级只升不降，签到数据中的等级为签到前的等级
+                level = max(H5UserService.calculate_level(checkin['exp_points']), checkin['level'])
+                update_values.append(
+                    dict(
+                        user_id=checkin['user_id'],
+                        checkin_days=checkin['checkin_days'],
+                        continuous_checkin_days=checkin['continuous_checkin_days'],
+                        last_checkin_date=checkin['checkin_time'],
+                        exp_points=checkin['exp_points'],
+                        level=level,
+                        level_name=H5UserService.LEVEL_CONFIG[level]['name'],
+                        update_time=now,
+                    )
+                )
+            await session.execute(update(H5User), update_values)
+            await session.commit()
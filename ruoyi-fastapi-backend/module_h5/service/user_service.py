@@ -5,15 +5,16 @@ from datetime import datetime, timedelta
 from typing import List, Optional, Tuple, Dict, Any
 
 from fastapi import Depends, HTTPException, status, Request
-from sqlalchemy import select, func, and_, or_, desc
+from sqlalchemy import select, func, and_, or_, desc, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from config.get_db import get_db
 from config.get_redis import RedisUtil
-from module_h5.entity.do.user_do import H5User, H5UserCheckin, H5UserMood, H5UserMoodComment, H5UserThirdParty, H5UserPayment
+from module_h5.entity.do.user_do import H5User, H5UserMood, H5UserMoodComment, H5UserThirdParty, H5UserPayment
 from module_h5.entity.vo.user_vo import H5UserModel, H5UserPageQueryModel, H5UserDetailModel, H5UserRegisterModel
 from utils.page_util import PageResponseModel, PageUtil
+from utils.pwd_util import PwdUtil
 
 class H5UserService:
     """H5用户服务"""
@@ -30,10 +31,17 @@ class H5UserService:
     }
     
     # Redis键前缀
-    REDIS_CHECKIN_KEY = "h5:user:checkin:"
     REDIS_VERIFY_CODE_KEY = "h5:user:verify_code:"
     REDIS_EMAIL_CODE_KEY = "h5:user:email_code:"
     REDIS_PAYMENT_KEY = "h5:user:payment:"
+    REDIS_STRING_ID_KEY = "h5:user:string_id:"
+    
+    # 字符串ID与整数ID映射缓存的过期时间（秒），映射关系创建后不会变化
+    STRING_ID_CACHE_EXPIRE = 86400
+    # 回填字符串ID时每批处理的用户数
+    STRING_ID_BACKFILL_BATCH_SIZE = 1000
+    # 早期add_string_id.sql脚本以'USER'加补零的整数ID填充字符串ID，与应用层生成的字符串ID不一致，需要重新回填
+    LEGACY_STRING_ID_PREFIX = "USER"
     
     @staticmethod
     def generate_string_id() -> str:
@@ -258,7 +266,7 @@ class H5UserService:
         new_user = H5User(
             username=user.username,
             nickname=user.nickname,
-            password=user.password,  # 实际应用中需要加密
+            password=await PwdUtil.async_get_password_hash(user.password) if user.password else user.password,
             email=user.email,
             phone=user.phone,
             avatar=user.avatar,
@@ -278,6 +286,9 @@ class H5UserService:
         )
         
         db.add(new_user)
+        # 先flush获取自增ID，再生成字符串ID随用户一同提交
+        await db.flush()
+        new_user.string_id = cls.generate_string_id_from_int(new_user.user_id)
         await db.commit()
         await db.refresh(new_user)
         
@@ -422,25 +433,24 @@ class H5UserService:
         """
         根据字符串ID查找用户
         
-        由于我们在应用层使用字符串ID，但在数据库中使用整数ID，
-        这个方法会查询所有用户并在内存中匹配字符串ID。
-        
-        注意：这不是一个高效的方法，仅作为临时解决方案。
-        长期解决方案应该是在数据库中添加字符串ID字段。
+        先从Redis缓存中获取字符串ID对应的整数ID并按主键查询，
+        缓存未命中时通过h5_user.string_id唯一索引查询并写入缓存。
         """
-        # 查询所有用户
-        stmt = select(H5User)
+        redis_key = f"{cls.REDIS_STRING_ID_KEY}{string_id}"
+        cached_user_id = await RedisUtil.get(redis_key)
+        if cached_user_id:
+            user = await db.get(H5User, int(cached_user_id))
+            if user:
+                return user
+        
+        stmt = select(H5User).where(H5User.string_id == string_id)
         result = await db.execute(stmt)
-        users = result.scalars().all()
+        user = result.scalars().first()
         
-        # 在内存中匹配字符串ID
-        for user in users:
-            # 生成该用户的字符串ID
-            user_string_id = cls.generate_string_id_from_int(user.user_id)
-            if user_string_id == string_id:
-                return user
+        if user:
+            await RedisUtil.set(redis_key, user.user_id, cls.STRING_ID_CACHE_EXPIRE)
         
-        return None
+        return user
     
     @classmethod
     def generate_string_id_from_int(cls, user_id: int) -> str:
@@ -449,12 +459,50 @@ class H5UserService:
         
         注意：这个方法应该与 generate_string_id 方法生成的ID格式一致
         """
-        # 使用固定的种子值，确保每次为同一个整数ID生成相同的字符串ID
-        random.seed(user_id)
-        string_id = ''.join(random.choices(string.ascii_letters + string.digits, k=30))
-        # 重置随机数生成器
-        random.seed()
-        return string_id
+        # 使用以整数ID为种子的独立随机数生成器，确保每次为同一个整数ID生成相同的字符串ID，且不影响全局random模块
+        return ''.join(random.Random(user_id).choices(string.ascii_letters + string.digits, k=30))
+    
+    @classmethod
+    async def backfill_string_id(
+        cls,
+        db: AsyncSession,
+        batch_size: int = STRING_ID_BACKFILL_BATCH_SIZE
+    ) -> int:
+        """
+        分批为尚未保存字符串ID或保存的是早期脚本填充的字符串ID的存量用户回填字符串ID，每批单独提交
+        
+        回填的值与 generate_string_id_from_int 生成的值一致，已下发给前端的字符串ID保持有效
+        """
+        backfill_count = 0
+        last_user_id = 0
+        while True:
+            stmt = (
+                select(H5User.user_id)
+                .where(
+                    H5User.user_id > last_user_id,
+                    or_(
+                        H5User.string_id.is_(None),
+                        H5User.string_id.like(f"{cls.LEGACY_STRING_ID_PREFIX}%")
+                    )
+                )
+                .order_by(H5User.user_id)
+                .limit(batch_size)
+            )
+            user_ids = (await db.execute(stmt)).scalars().all()
+            if not user_ids:
+                break
+            await db.execute(
+                update(H5User),
+                [
+                    {"user_id": user_id, "string_id": cls.generate_string_id_from_int(user_id)}
+                    for user_id in user_ids
+                ]
+            )
+            await db.commit()
+            backfill_count += len(user_ids)
+            last_user_id = user_ids[-1]
+        
+        return backfill_count
     
     @classmethod
     async def change_user_status(
@@ -486,102 +534,6 @@ class H5UserService:
         await db.commit()
         return True
     
-    @classmethod
-    async def user_checkin(
-        cls,
-        user_id: str,
-        db: AsyncSession = Depends(get_db)
-    ) -> Dict[str, Any]:
-        """
-        用户签到
-        """
-        # 尝试将用户ID转换为整数
-        try:
-            user_id_int = int(user_id)
-            # 如果成功转换为整数，则使用整数ID查询
-            stmt = select(H5User).where(H5User.user_id == user_id_int)
-        except ValueError:
-            # 如果无法转换为整数，则使用字符串ID查询
-            db_user = await cls.find_user_by_string_id(user_id, db)
-            if db_user:
-                user_id_int = db_user.user_id
-                stmt = select(H5User).where(H5User.user_id == user_id_int)
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="用户不存在"
-                )
-        
-        result = await db.execute(stmt)
-        user = result.scalars().first()
-        
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="用户不存在"
-            )
-        
-        # 检查今天是否已签到
-        today = datetime.now().date()
-        redis_key = f"{cls.REDIS_CHECKIN_KEY}{user_id_int}:{today}"
-        
-        # 检查Redis中是否已签到
-        if await RedisUtil.exists(redis_key):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="今天已经签到过了"
-            )
-        
-        # 检查是否需要重置连续签到天数
-        reset_continuous = False
-        if user.last_checkin_date:
-            yesterday = today - timedelta(days=1)
-            if user.last_checkin_date.date() < yesterday:
-                reset_continuous = True
-        
-        # 更新签到信息
-        exp_gained = 10  # 每次签到获得10点经验值
-        
-        if reset_continuous:
-            user.continuous_checkin_days = 1
-        else:
-            user.continuous_checkin_days += 1
-        
-        user.checkin_days += 1
-        user.last_checkin_date = datetime.now()
-        user.exp_points += exp_gained
-        
-        # 更新用户等级
-        new_level = cls.calculate_level(user.exp_points)
-        if new_level > user.level:
-            user.level = new_level
-            user.level_name = cls.LEVEL_CONFIG[new_level]["name"]
-        
-        # 记录签到信息到Redis
-        await RedisUtil.set(redis_key, "1", 86400)  # 24小时过期
-        
-        # 记录签到信息到数据库
-        checkin_record = H5UserCheckin(
-            user_id=user_id_int,
-            checkin_date=datetime.now(),
-            exp_gained=exp_gained,
-            create_time=datetime.now()
-        )
-        db.add(checkin_record)
-        
-        await db.commit()
-        await db.refresh(user)
-        
-        # 返回签到结果
-        return {
-            "checkin_days": user.checkin_days,
-            "continuous_checkin_days": user.continuous_checkin_days,
-            "exp_gained": exp_gained,
-            "total_exp": user.exp_points,
-            "level": user.level,
-            "level_name": user.level_name
-        }
-    
     @classmethod
     def calculate_level(cls, exp_points: int) -> int:
         """
@@ -917,7 +869,7 @@ class H5UserService:
         new_user = H5User(
             username=user.username,
             nickname=user.nickname,
-            password=user.password,  # 实际应用中需要加密
+            password=await PwdUtil.async_get_password_hash(user.password),
             email=user.email,
             phone=user.phone,
             avatar=user.avatar,
@@ -937,6 +889,9 @@ class H5UserService:
         )
         
         db.add(new_user)
+        # 先flush获取自增ID，再生成字符串ID随用户一同提交
+        await db.flush()
+        new_user.string_id = cls.generate_string_id_from_int(new_user.user_id)
         await db.commit()
         await db.refresh(new_user)
         
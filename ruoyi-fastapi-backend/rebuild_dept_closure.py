@@ -0,0 +1,31 @@
+"""
+根据部门表的父部门关系重建部门闭包表
+
+在ruoyi-fastapi-backend目录下执行：python rebuild_dept_closure.py --env=dev
+"""
+
+import asyncio
+from config.database import AsyncSessionLocal
+from config.get_redis import RedisUtil
+from module_admin.service.dept_service import DeptService
+from server import app
+from utils.log_util import logger
+
+
+async def rebuild_dept_closure():
+    """
+    重建部门闭包表，完成后递增身份信息版本号使已缓存的数据权限失效
+
+    :return:
+    """
+    app.state.redis = await RedisUtil.create_redis_pool()
+    try:
+        async with AsyncSessionLocal() as session:
+            dept_closure_count = await DeptService.rebuild_dept_closure_services(session)
+        logger.info(f'部门闭包表重建成功，共写入{dept_closure_count}条闭包关系')
+    finally:
+        await RedisUtil.close_redis_pool(app)
+
+
+if __name__ == '__main__':
+    asyncio.run(rebuild_dept_closure())
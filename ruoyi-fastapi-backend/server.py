@@ -1,7 +1,7 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from config.env import AppConfig
-from config.get_db import init_create_table
+from config.get_db import init_create_table, init_dept_closure
 from config.get_redis import RedisUtil
 from config.get_scheduler import SchedulerUtil
 from exceptions.handle import handle_exception
@@ -22,12 +22,20 @@ from module_admin.controller.post_controler import postController
 from module_admin.controller.role_controller import roleController
 from module_admin.controller.server_controller import serverController
 from module_admin.controller.user_controller import userController
+from module_admin.service.captcha_service import CaptchaService
+from module_admin.service.log_writer_service import LogWriterService
+from module_admin.service.online_service import OnlineService
+from module_admin.service.user_import_service import UserImportService
 from module_generator.controller.gen_controller import genController
 from module_h5.controller.carousel_controller import carouselController
 from module_h5.controller.user_controller import userController as h5UserController
+from module_h5.service.checkin_writer_service import H5CheckinWriterService
 from sub_applications.handle import handle_sub_applications
 from utils.common_util import worship
+from utils.ip_location_util import IpLocationUtil
+from utils.local_cache_util import LocalCacheUtil
 from utils.log_util import logger
+from utils.pwd_util import PwdUtil
 
 
 # 生命周期事件
@@ -37,11 +45,26 @@ async def lifespan(app: FastAPI):
     worship()
     await init_create_table()
     app.state.redis = await RedisUtil.create_redis_pool()
+    await init_dept_closure()
     await RedisUtil.init_sys_dict(app.state.redis)
     await RedisUtil.init_sys_config(app.state.redis)
+    await OnlineService.init_online_session_registry(app.state.redis)
+    await LocalCacheUtil.init_local_cache(app.state.redis)
+    await PwdUtil.init_pwd_executor()
+    await CaptchaService.init_captcha_pool()
     await SchedulerUtil.init_system_scheduler()
+    await IpLocationUtil.init_ip_location(app.state.redis)
+    await LogWriterService.init_log_writer()
+    await H5CheckinWriterService.init_checkin_writer(app.state.redis)
     logger.info(f'{AppConfig.app_name}启动成功')
     yield
+    await UserImportService.close_user_import()
+    await H5CheckinWriterService.close_checkin_writer()
+    await LogWriterService.close_log_writer()
+    await IpLocationUtil.close_ip_location()
+    await CaptchaService.close_captcha_pool()
+    await PwdUtil.close_pwd_executor()
+    await LocalCacheUtil.close_local_cache()
     await RedisUtil.close_redis_pool(app)
     await SchedulerUtil.close_system_scheduler()
 
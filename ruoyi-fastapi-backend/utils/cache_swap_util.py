@@ -0,0 +1,60 @@
+import uuid
+from redis import asyncio as aioredis
+from typing import Dict
+
+
+class CacheSwapUtil:
+    """
+    缓存整体替换工具类
+
+    新数据先通过管道写入带代次前缀的临时键，再在一个事务中将临时键重命名为正式键并删除已不存在的旧键，
+    替换过程中读取方读到的始终是完整的旧数据或新数据，不会读到空缓存；多个工作进程同时替换时代次互不覆盖
+    """
+
+    # 临时键有效期（秒），替换中断时由redis自动清理
+    STAGING_EXPIRE_SECONDS = 300
+    SCAN_COUNT = 1000
+
+    @classmethod
+    def get_staging_prefix(cls, namespace: str, generation: str):
+        """
+        获取临时键前缀
+
+        :param namespace: 缓存名称
+        :param generation: 代次
+        :return: 临时键前缀
+        """
+        return f'{namespace}_staging:{generation}:'
+
+    @classmethod
+    async def swap_namespace(cls, redis: aioredis.Redis, namespace: str, mapping: Dict[str, str]):
+        """
+        使用mapping整体替换缓存名称下的键值，键名为'缓存名称:键'
+
+        :param redis: redis对象
+        :param namespace: 缓存名称
+        :param mapping: 键与值组成的字典
+        :return: 删除的旧键数量
+        """
+        staging_prefix = cls.get_staging_prefix(namespace, uuid.uuid4().hex)
+        if mapping:
+            async with redis.pipeline(transaction=False) as pipe:
+                for key, value in mapping.items():
+                    pipe.set(f'{staging_prefix}{key}', value, ex=cls.STAGING_EXPIRE_SECONDS)
+                await pipe.execute()
+        stale_keys = [
+            key
+            async for key in redis.scan_iter(match=f'{namespace}:*', count=cls.SCAN_COUNT)
+            if key.split(':', 1)[1] not in mapping
+        ]
+        async with redis.pipeline(transaction=True) as pipe:
+            for key in mapping.keys():
+                pipe.rename(f'{staging_prefix}{key}', f'{namespace}:{key}')
+                # 重命名会保留临时键的有效期
+                pipe.persist(f'{namespace}:{key}')
+            if stale_keys:
+                pipe.unlink(*stale_keys)
+            if len(pipe):
+                await pipe.execute()
+
+        return len(stale_keys)
@@ -6,9 +6,10 @@ from openpyxl import Workbook
 from openpyxl.styles import Alignment, PatternFill
 from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.datavalidation import DataValidation
+from sqlalchemy import inspect
 from sqlalchemy.engine.row import Row
 from sqlalchemy.orm.collections import InstrumentedList
-from typing import Any, Dict, List, Literal, Union
+from typing import Any, Callable, Dict, List, Literal, Tuple, Union
 from config.database import Base
 from config.env import CachePathConfig
 
@@ -45,6 +46,15 @@ class SqlalchemyUtil:
     sqlalchemy工具类
     """
 
+    # 键名转换结果缓存的最大数量，避免任意字典键名导致缓存无限增长
+    KEY_CACHE_MAX_SIZE = 10000
+    # 键名转换结果缓存，键为(原键名, 转换形式)
+    __key_cache: Dict[Tuple[str, str], str] = {}
+    # 模型序列化方法缓存，键为(模型类, 转换形式)
+    __base_serializer_cache: Dict[Tuple[type, str], Callable[[Base], Dict]] = {}
+    # Row结果转换后键名缓存，键为(Row字段名元组, 转换形式)
+    __row_keys_cache: Dict[Tuple[Tuple[str, ...], str], Tuple[str, ...]] = {}
+
     @classmethod
     def base_to_dict(
         cls, obj: Union[Base, Dict], transform_case: Literal['no_case', 'snake_to_camel', 'camel_to_snake'] = 'no_case'
@@ -57,19 +67,12 @@ class SqlalchemyUtil:
         :return: 字典结果
         """
         if isinstance(obj, Base):
-            base_dict = obj.__dict__.copy()
-            base_dict.pop('_sa_instance_state', None)
-            for name, value in base_dict.items():
-                if isinstance(value, InstrumentedList):
-                    base_dict[name] = cls.serialize_result(value, 'snake_to_camel')
-        elif isinstance(obj, dict):
-            base_dict = obj.copy()
-        if transform_case == 'snake_to_camel':
-            return {CamelCaseUtil.snake_to_camel(k): v for k, v in base_dict.items()}
-        elif transform_case == 'camel_to_snake':
-            return {SnakeCaseUtil.camel_to_snake(k): v for k, v in base_dict.items()}
+            return cls.__get_base_serializer(type(obj), transform_case)(obj)
+        if transform_case == 'no_case':
+            return obj.copy()
+        transform_key = cls.__transform_key
 
-        return base_dict
+        return {transform_key(k, transform_case): v for k, v in obj.items()}
 
     @classmethod
     def serialize_result(
@@ -82,24 +85,101 @@ class SqlalchemyUtil:
         :param transform_case: 转换得到的结果形式，可选的有'no_case'(不转换)、'snake_to_camel'(下划线转小驼峰)、'camel_to_snake'(小驼峰转下划线)，默认为'no_case'
         :return: 序列化结果
         """
-        if isinstance(result, (Base, dict)):
-            return cls.base_to_dict(result, transform_case)
-        elif isinstance(result, list):
+        if isinstance(result, list):
+            if result and isinstance(result[0], Base):
+                # 同一查询结果中的模型对象通常为同一模型类，复用同一序列化方法
+                model = type(result[0])
+                serializer = cls.__get_base_serializer(model, transform_case)
+                return [
+                    serializer(row) if type(row) is model else cls.serialize_result(row, transform_case)
+                    for row in result
+                ]
             return [cls.serialize_result(row, transform_case) for row in result]
+        elif isinstance(result, (Base, dict)):
+            return cls.base_to_dict(result, transform_case)
         elif isinstance(result, Row):
-            if all([isinstance(row, Base) for row in result]):
-                return [cls.base_to_dict(row, transform_case) for row in result]
-            elif any([isinstance(row, Base) for row in result]):
+            if any(isinstance(row, Base) for row in result):
                 return [cls.serialize_result(row, transform_case) for row in result]
-            else:
-                result_dict = result._asdict()
-                if transform_case == 'snake_to_camel':
-                    return {CamelCaseUtil.snake_to_camel(k): v for k, v in result_dict.items()}
-                elif transform_case == 'camel_to_snake':
-                    return {SnakeCaseUtil.camel_to_snake(k): v for k, v in result_dict.items()}
-                return result_dict
+            return dict(zip(cls.__get_row_keys(result._fields, transform_case), result))
         return result
 
+    @classmethod
+    def __transform_key(cls, key: str, transform_case: str):
+        """
+        转换键名，转换结果会被缓存
+
+        :param key: 原键名
+        :param transform_case: 转换形式
+        :return: 转换后的键名
+        """
+        cache_key = (key, transform_case)
+        transformed_key = cls.__key_cache.get(cache_key)
+        if transformed_key is None:
+            if transform_case == 'snake_to_camel':
+                transformed_key = CamelCaseUtil.snake_to_camel(key)
+            elif transform_case == 'camel_to_snake':
+                transformed_key = SnakeCaseUtil.camel_to_snake(key)
+            else:
+                transformed_key = key
+            if len(cls.__key_cache) < cls.KEY_CACHE_MAX_SIZE:
+                cls.__key_cache[cache_key] = transformed_key
+
+        return transformed_key
+
+    @classmethod
+    def __get_row_keys(cls, fields: Tuple[str, ...], transform_case: str):
+        """
+        获取Row结果转换后的键名，同一字段组合的Row结果只转换一次
+
+        :param fields: Row结果的字段名元组
+        :param transform_case: 转换形式
+        :return: 转换后的键名元组
+        """
+        cache_key = (fields, transform_case)
+        row_keys = cls.__row_keys_cache.get(cache_key)
+        if row_keys is None:
+            row_keys = tuple(cls.__transform_key(field, transform_case) for field in fields)
+            if len(cls.__row_keys_cache) < cls.KEY_CACHE_MAX_SIZE:
+                cls.__row_keys_cache[cache_key] = row_keys
+
+        return row_keys
+
+    @classmethod
+    def __get_base_serializer(cls, model: type, transform_case: str):
+        """
+        获取模型类的序列化方法，首次获取时根据模型映射预先生成字段名与转换后键名的对应关系
+
+        :param model: sqlalchemy模型类
+        :param transform_case: 转换形式
+        :return: 将该模型对象转换为字典的方法
+        """
+        cache_key = (model, transform_case)
+        serializer = cls.__base_serializer_cache.get(cache_key)
+        if serializer is not None:
+            return serializer
+
+        mapper = inspect(model)
+        key_map = {attr.key: cls.__transform_key(attr.key, transform_case) for attr in mapper.attrs}
+        key_map['_sa_instance_state'] = '_sa_instance_state'
+        list_key_list = [key_map[relationship.key] for relationship in mapper.relationships if relationship.uselist]
+        transform_key = cls.__transform_key
+
+        def serializer(obj: Base):
+            # 与直接复制obj.__dict__一致，仅包含已加载的属性，未映射的动态属性按原方式转换键名
+            base_dict = {
+                key_map.get(name) or transform_key(name, transform_case): value for name, value in obj.__dict__.items()
+            }
+            base_dict.pop('_sa_instance_state', None)
+            for list_key in list_key_list:
+                value = base_dict.get(list_key)
+                if isinstance(value, InstrumentedList):
+                    base_dict[list_key] = cls.serialize_result(value, 'snake_to_camel')
+            return base_dict
+
+        cls.__base_serializer_cache[cache_key] = serializer
+
+        return serializer
+
 
 class CamelCaseUtil:
     """
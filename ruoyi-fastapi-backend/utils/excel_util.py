@@ -1,10 +1,14 @@
+import asyncio
+import csv
 import io
 import pandas as pd
+import tempfile
 from openpyxl import Workbook
-from openpyxl.styles import Alignment, PatternFill
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill
 from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.datavalidation import DataValidation
-from typing import Dict, List
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, List, Literal, Optional
 
 
 class ExcelUtil:
@@ -12,6 +16,13 @@ class ExcelUtil:
     Excel操作类
     """
 
+    EXPORT_MEDIA_TYPE = {
+        'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        'csv': 'text/csv; charset=utf-8',
+    }
+    # 流式导出时每次读取的文件块大小
+    STREAM_READ_SIZE = 64 * 1024
+
     @classmethod
     def __mapping_list(cls, list_data: List, mapping_dict: Dict):
         """
@@ -42,6 +53,119 @@ class ExcelUtil:
 
         return binary_data
 
+    @classmethod
+    def get_export_media_type(cls, export_format: Literal['xlsx', 'csv'] = 'xlsx'):
+        """
+        工具方法：获取导出文件格式对应的媒体类型
+
+        :param export_format: 导出文件格式
+        :return: 媒体类型
+        """
+        return cls.EXPORT_MEDIA_TYPE.get(export_format)
+
+    @classmethod
+    async def stream_export_list(
+        cls,
+        data_chunks: AsyncIterable[List[Dict]],
+        mapping_dict: Dict,
+        row_mapper: Optional[Callable[[Dict], Dict]] = None,
+        export_format: Literal['xlsx', 'csv'] = 'xlsx',
+    ) -> AsyncIterator[bytes]:
+        """
+        工具方法：将分批读取的数据逐批转化为excel或csv文件，返回文件内容的异步迭代器，内存占用与数据总量无关
+
+        :param data_chunks: 分批数据列表的异步迭代器
+        :param mapping_dict: 映射字典
+        :param row_mapper: 可选，导出前对每行数据进行转换（如字典值转换为字典标签）的方法
+        :param export_format: 导出文件格式，xlsx或csv
+        :return: 文件内容的异步迭代器
+        """
+        if export_format == 'csv':
+            stream = cls.__stream_csv(data_chunks, mapping_dict, row_mapper)
+        else:
+            stream = cls.__stream_xlsx(data_chunks, mapping_dict, row_mapper)
+        async for content in stream:
+            yield content
+
+    @classmethod
+    def __mapping_rows(cls, list_data: List[Dict], mapping_dict: Dict, row_mapper: Optional[Callable[[Dict], Dict]]):
+        """
+        工具方法：将一批数据转换为按映射字典顺序排列的行数据
+
+        :param list_data: 数据列表
+        :param mapping_dict: 映射字典
+        :param row_mapper: 每行数据的转换方法
+        :return: 行数据列表
+        """
+        if row_mapper:
+            list_data = [row_mapper(item) for item in list_data]
+
+        return [[item.get(key) for key in mapping_dict] for item in list_data]
+
+    @classmethod
+    async def __stream_csv(
+        cls, data_chunks: AsyncIterable[List[Dict]], mapping_dict: Dict, row_mapper: Optional[Callable[[Dict], Dict]]
+    ):
+        """
+        工具方法：逐批生成csv文件内容，文件以utf-8 BOM开头以便excel正确识别中文
+
+        :param data_chunks: 分批数据列表的异步迭代器
+        :param mapping_dict: 映射字典
+        :param row_mapper: 每行数据的转换方法
+        :return: csv文件内容的异步迭代器
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(mapping_dict.values())
+        yield ('\ufeff' + buffer.getvalue()).encode('utf-8')
+        async for list_data in data_chunks:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(cls.__mapping_rows(list_data, mapping_dict, row_mapper))
+            yield buffer.getvalue().encode('utf-8')
+
+    @classmethod
+    async def __stream_xlsx(
+        cls, data_chunks: AsyncIterable[List[Dict]], mapping_dict: Dict, row_mapper: Optional[Callable[[Dict], Dict]]
+    ):
+        """
+        工具方法：使用openpyxl只写模式逐批写入工作表（行数据暂存于临时文件），全部写入后分块读取生成的xlsx文件内容
+
+        :param data_chunks: 分批数据列表的异步迭代器
+        :param mapping_dict: 映射字典
+        :param row_mapper: 每行数据的转换方法
+        :return: xlsx文件内容的异步迭代器
+        """
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        header_font = Font(bold=True)
+        header_cells = []
+        for header in mapping_dict.values():
+            cell = WriteOnlyCell(ws, value=header)
+            cell.font = header_font
+            header_cells.append(cell)
+        ws.append(header_cells)
+        async for list_data in data_chunks:
+            rows = cls.__mapping_rows(list_data, mapping_dict, row_mapper)
+            await asyncio.to_thread(cls.__append_rows, ws, rows)
+        with tempfile.TemporaryFile() as file:
+            await asyncio.to_thread(wb.save, file)
+            file.seek(0)
+            while content := await asyncio.to_thread(file.read, cls.STREAM_READ_SIZE):
+                yield content
+
+    @staticmethod
+    def __append_rows(ws, rows: List[List]):
+        """
+        工具方法：将行数据写入工作表
+
+        :param ws: 工作表
+        :param rows: 行数据列表
+        :return:
+        """
+        for row in rows:
+            ws.append(row)
+
     @classmethod
     def get_excel_template(cls, header_list: List, selector_header_list: List, option_list: List[Dict]):
         """
@@ -0,0 +1,277 @@
+import asyncio
+import httpx
+import ipaddress
+import os
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from redis import asyncio as aioredis
+from typing import Dict, List, Optional, Set, Tuple
+from config.enums import RedisInitKeyConfig
+from config.env import AppConfig
+from utils.log_util import logger
+
+
+INNER_IP_LOCATION = '内网IP'
+UNKNOWN_IP_LOCATION = '未知'
+
+
+class IpLocationOfflineDb:
+    """
+    IP归属区域离线库
+
+    离线库文件每行一条记录，支持'起始IP,结束IP,归属区域'与'CIDR,归属区域'两种格式，以#开头的行为注释
+    """
+
+    def __init__(self, db_path: str):
+        """
+        加载离线库文件并按起始地址排序
+
+        :param db_path: 离线库文件路径
+        """
+        ranges: Dict[int, List[Tuple[int, int, str]]] = {4: [], 6: []}
+        with open(db_path, encoding='utf-8') as db_file:
+            for line in db_file:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                fields = [field.strip() for field in line.split(',')]
+                try:
+                    if '/' in fields[0]:
+                        network = ipaddress.ip_network(fields[0], strict=False)
+                        start, end, location = network[0], network[-1], fields[1]
+                    else:
+                        start, end = ipaddress.ip_address(fields[0]), ipaddress.ip_address(fields[1])
+                        location = fields[2]
+                except (ValueError, IndexError):
+                    logger.warning(f'IP归属区域离线库记录格式错误：{line}')
+                    continue
+                ranges[start.version].append((int(start), int(end), location))
+        self.ranges = {version: sorted(items) for version, items in ranges.items()}
+        self.starts = {version: [item[0] for item in items] for version, items in self.ranges.items()}
+
+    def lookup(self, ip: str) -> Optional[str]:
+        """
+        二分查找ip所在区间
+
+        :param ip: 需要查询的ip
+        :return: ip归属区域，未命中时返回None
+        """
+        ip_obj = ipaddress.ip_address(ip)
+        index = bisect_right(self.starts[ip_obj.version], int(ip_obj)) - 1
+        if index >= 0:
+            start, end, location = self.ranges[ip_obj.version][index]
+            if start <= int(ip_obj) <= end:
+                return location
+        return None
+
+
+class IpLocationUtil:
+    """
+    IP归属区域查询工具类
+
+    查询顺序为进程内缓存、离线库、redis缓存，均未命中时提交至后台队列批量解析，请求链路不等待外部接口
+    """
+
+    batch_size = 50
+    concurrency = 8
+    queue_max_size = 1000
+
+    _redis: Optional[aioredis.Redis] = None
+    _client: Optional[httpx.AsyncClient] = None
+    _offline_db: Optional[IpLocationOfflineDb] = None
+    _queue: Optional[asyncio.Queue] = None
+    _worker: Optional[asyncio.Task] = None
+    _pending: Set[str] = set()
+    _local_cache: 'OrderedDict[str, Tuple[float, str]]' = OrderedDict()
+
+    @classmethod
+    async def init_ip_location(cls, redis: aioredis.Redis):
+        """
+        应用启动时初始化IP归属区域查询
+
+        :param redis: redis对象
+        :return:
+        """
+        cls._redis = redis
+        if AppConfig.app_ip_location_offline_db:
+            if os.path.exists(AppConfig.app_ip_location_offline_db):
+                cls._offline_db = IpLocationOfflineDb(AppConfig.app_ip_location_offline_db)
+                logger.info('IP归属区域离线库加载成功')
+            else:
+                logger.warning(f'IP归属区域离线库{AppConfig.app_ip_location_offline_db}不存在')
+        if AppConfig.app_ip_location_query:
+            cls._client = httpx.AsyncClient(timeout=AppConfig.app_ip_location_timeout)
+            cls._queue = asyncio.Queue(maxsize=cls.queue_max_size)
+            cls._worker = asyncio.create_task(cls.__resolve_worker())
+
+    @classmethod
+    async def close_ip_location(cls):
+        """
+        应用关闭时停止后台解析任务
+
+        :return:
+        """
+        if cls._worker:
+            cls._worker.cancel()
+            try:
+                await cls._worker
+            except asyncio.CancelledError:
+                pass
+            cls._worker = None
+        if cls._client:
+            await cls._client.aclose()
+            cls._client = None
+        cls._queue = None
+        cls._pending.clear()
+
+    @classmethod
+    async def get_ip_location(cls, ip: Optional[str]) -> str:
+        """
+        查询ip归属区域，缓存及离线库均未命中时提交后台解析并返回未知
+
+        :param ip: 需要查询的ip
+        :return: ip归属区域
+        """
+        location = cls.__get_static_location(ip)
+        if location is None and cls._redis is not None:
+            try:
+                location = await cls._redis.get(cls.__get_cache_key(ip))
+            except Exception as e:
+                logger.warning(f'IP归属区域缓存读取失败，详细错误信息：{e}')
+            if location is not None:
+                cls.__set_local_cache(ip, location)
+        if location is None:
+            cls.submit(ip)
+            location = UNKNOWN_IP_LOCATION
+
+        return location
+
+    @classmethod
+    def submit(cls, ip: str):
+        """
+        提交ip至后台解析队列，队列已满时直接丢弃
+
+        :param ip: 需要解析的ip
+        :return:
+        """
+        if cls._queue is None or ip in cls._pending:
+            return
+        try:
+            cls._queue.put_nowait(ip)
+            cls._pending.add(ip)
+        except asyncio.QueueFull:
+            logger.warning(f'IP归属区域解析队列已满，丢弃{ip}')
+
+    @classmethod
+    async def __resolve_worker(cls):
+        """
+        后台批量解析任务
+
+        :return:
+        """
+        semaphore = asyncio.Semaphore(cls.concurrency)
+
+        async def resolve(ip: str):
+            async with semaphore:
+                return ip, await cls.__query_remote(ip)
+
+        while True:
+            ip_list = [await cls._queue.get()]
+            while len(ip_list) < cls.batch_size and not cls._queue.empty():
+                ip_list.append(cls._queue.get_nowait())
+            try:
+                results = await asyncio.gather(*[resolve(ip) for ip in dict.fromkeys(ip_list)])
+                async with cls._redis.pipeline(transaction=False) as pipe:
+                    for ip, location in results:
+                        # 查询失败的ip不写入缓存，后续请求会重新提交解析
+                        if location is not None:
+                            cls.__set_local_cache(ip, location)
+                            pipe.set(
+                                cls.__get_cache_key(ip), location, ex=AppConfig.app_ip_location_cache_expire_seconds
+                            )
+                    await pipe.execute()
+            except Exception as e:
+                logger.exception(e)
+            finally:
+                cls._pending.difference_update(ip_list)
+
+    @classmethod
+    async def __query_remote(cls, ip: str) -> Optional[str]:
+        """
+        调用外部接口查询ip归属区域
+
+        :param ip: 需要查询的ip
+        :return: ip归属区域，查询失败时返回None
+        """
+        if cls._client is None:
+            return None
+        try:
+            ip_result = await cls._client.get(AppConfig.app_ip_location_api_url.format(ip=ip))
+            if ip_result.status_code == 200:
+                data = ip_result.json().get('data') or {}
+                prov = data.get('prov')
+                city = data.get('city')
+                if prov or city:
+                    return f'{prov}-{city}'
+                return UNKNOWN_IP_LOCATION
+        except Exception as e:
+            logger.warning(f'IP归属区域查询失败，ip：{ip}，详细错误信息：{e}')
+        return None
+
+    @classmethod
+    def __get_static_location(cls, ip: Optional[str]) -> Optional[str]:
+        """
+        查询无需访问redis及外部接口即可确定的ip归属区域
+
+        :param ip: 需要查询的ip
+        :return: ip归属区域，无法确定时返回None
+        """
+        if not ip:
+            return UNKNOWN_IP_LOCATION
+        if ip == 'localhost':
+            return INNER_IP_LOCATION
+        try:
+            ip_obj = ipaddress.ip_address(ip)
+        except ValueError:
+            return UNKNOWN_IP_LOCATION
+        if ip_obj.is_private or ip_obj.is_loopback:
+            return INNER_IP_LOCATION
+        cache_item = cls._local_cache.get(ip)
+        if cache_item:
+            expire_time, location = cache_item
+            if expire_time > time.monotonic():
+                cls._local_cache.move_to_end(ip)
+                return location
+            cls._local_cache.pop(ip, None)
+        if cls._offline_db:
+            location = cls._offline_db.lookup(ip)
+            if location:
+                return location
+        if not AppConfig.app_ip_location_query:
+            return UNKNOWN_IP_LOCATION
+        return None
+
+    @classmethod
+    def __set_local_cache(cls, ip: str, location: str):
+        """
+        写入进程内缓存，超出容量时淘汰最久未使用的条目
+
+        :param ip: ip
+        :param location: ip归属区域
+        :return:
+        """
+        cls._local_cache[ip] = (time.monotonic() + AppConfig.app_ip_location_cache_expire_seconds, location)
+        cls._local_cache.move_to_end(ip)
+        while len(cls._local_cache) > AppConfig.app_ip_location_local_cache_size:
+            cls._local_cache.popitem(last=False)
+
+    @classmethod
+    def __get_cache_key(cls, ip: str):
+        """
+        获取ip归属区域缓存键名
+
+        :param ip: ip
+        :return: 缓存键名
+        """
+        return f'{RedisInitKeyConfig.IP_LOCATION.key}:{ip}'
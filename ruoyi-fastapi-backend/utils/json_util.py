@@ -0,0 +1,58 @@
+import datetime
+import orjson
+from collections import deque
+from decimal import Decimal
+from fastapi.encoders import decimal_encoder, jsonable_encoder
+from pathlib import PurePath
+from pydantic import BaseModel
+from sqlalchemy.engine.row import Row, RowMapping
+from types import GeneratorType
+from typing import Any
+
+
+class JsonUtil:
+    """
+    JSON序列化工具类
+
+    使用orjson一次遍历直接序列化响应数据，datetime、date、time、UUID、Enum、dataclass由orjson原生处理，
+    pydantic模型、SQLAlchemy行数据及orjson不支持的类型在default中按jsonable_encoder的规则转换，输出与jsonable_encoder加json.dumps一致
+    """
+
+    OPTION = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    @classmethod
+    def dumps(cls, content: Any) -> bytes:
+        """
+        序列化为JSON
+
+        :param content: 需要序列化的数据
+        :return: UTF-8编码的JSON
+        """
+        return orjson.dumps(content, default=cls.default, option=cls.OPTION)
+
+    @staticmethod
+    def default(obj: Any):
+        """
+        orjson无法直接序列化的类型的转换方法，返回值会再次交由orjson序列化
+
+        :param obj: orjson无法直接序列化的对象
+        :return: 可被orjson序列化的对象
+        """
+        if isinstance(obj, BaseModel):
+            return obj.model_dump(mode='json', by_alias=True)
+        if isinstance(obj, RowMapping):
+            return dict(obj)
+        if isinstance(obj, Row):
+            return obj._asdict()
+        if isinstance(obj, Decimal):
+            return decimal_encoder(obj)
+        if isinstance(obj, (set, frozenset, deque, GeneratorType)):
+            return list(obj)
+        if isinstance(obj, datetime.timedelta):
+            return obj.total_seconds()
+        if isinstance(obj, bytes):
+            return obj.decode()
+        if isinstance(obj, PurePath):
+            return str(obj)
+
+        return jsonable_encoder(obj)
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import time
+from redis import asyncio as aioredis
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from config.enums import RedisInitKeyConfig
+from config.env import AppConfig
+from utils.log_util import logger
+
+
+class LocalCacheUtil:
+    """
+    进程内一级缓存工具类
+
+    缓存从redis读取并解析后的数据，按命名空间（如sys_config、sys_dict）分组；
+    数据变更时通过redis发布订阅通道通知所有工作进程失效对应缓存，消息中携带命名空间版本号，
+    版本号不连续说明有消息丢失，此时清空该命名空间；缓存条目同时设置有效期，作为通知失效时的兜底
+    """
+
+    INVALIDATION_CHANNEL = 'local_cache_invalidation'
+    # 订阅连接异常后的重连间隔（秒）
+    RECONNECT_INTERVAL = 1.0
+
+    _redis: Optional[aioredis.Redis] = None
+    _listener: Optional[asyncio.Task] = None
+    # 命名空间 -> {键: (值, 过期时间)}
+    _entries: Dict[str, Dict[str, Tuple[Any, float]]] = {}
+    # 命名空间本地失效次数，加载期间发生失效时不写入加载结果
+    _generations: Dict[str, int] = {}
+    # 命名空间最近收到的失效版本号
+    _versions: Dict[str, int] = {}
+    # 命名空间 -> {'hits': 命中次数, 'misses': 未命中次数, 'invalidations': 失效次数}
+    _stats: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    async def init_local_cache(cls, redis: aioredis.Redis):
+        """
+        应用启动时订阅缓存失效通道
+
+        :param redis: redis对象
+        :return:
+        """
+        if not AppConfig.app_local_cache_enabled:
+            return
+        cls._redis = redis
+        cls._listener = asyncio.create_task(cls.__listen())
+        logger.info('进程内缓存失效通知订阅成功')
+
+    @classmethod
+    async def close_local_cache(cls):
+        """
+        应用关闭时取消订阅并清空缓存
+
+        :return:
+        """
+        if cls._listener is None:
+            return
+        cls._listener.cancel()
+        try:
+            await cls._listener
+        except asyncio.CancelledError:
+            pass
+        cls._listener = None
+        cls._redis = None
+        cls.clear()
+        logger.info('进程内缓存已关闭')
+
+    @classmethod
+    async def get(cls, namespace: str, key: str, loader: Callable[[], Awaitable[Any]]):
+        """
+        获取缓存数据，未命中时调用loader加载并缓存；未订阅失效通知时（如脚本中调用）不使用进程内缓存
+
+        :param namespace: 命名空间
+        :param key: 键名
+        :param loader: 未命中时的加载函数
+        :return: 缓存数据，为多个调用方共享的对象，调用方不应修改
+        """
+        if cls._listener is None:
+            return await loader()
+        stats = cls._stats.setdefault(namespace, dict(hits=0, misses=0, invalidations=0))
+        entry = cls._entries.get(namespace, {}).get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            stats['hits'] += 1
+            return entry[0]
+        stats['misses'] += 1
+        generation = cls._generations.get(namespace, 0)
+        value = await loader()
+        if cls._generations.get(namespace, 0) == generation:
+            cls._entries.setdefault(namespace, {})[key] = (
+                value,
+                time.monotonic() + AppConfig.app_local_cache_expire_seconds,
+            )
+
+        return value
+
+    @classmethod
+    async def publish_invalidation(cls, redis: aioredis.Redis, namespace: str, keys: Optional[List[str]] = None):
+        """
+        失效本进程缓存并通知其他工作进程
+
+        :param redis: redis对象
+        :param namespace: 命名空间
+        :param keys: 需要失效的键名列表，为空时失效整个命名空间
+        :return:
+        """
+        cls.invalidate(namespace, keys)
+        version = await redis.incr(f'{RedisInitKeyConfig.LOCAL_CACHE_VERSION.key}:{namespace}')
+        await redis.publish(cls.INVALIDATION_CHANNEL, json.dumps(dict(namespace=namespace, keys=keys, version=version)))
+
+    @classmethod
+    def invalidate(cls, namespace: str, keys: Optional[List[str]] = None):
+        """
+        失效本进程缓存
+
+        :param namespace: 命名空间
+        :param keys: 需要失效的键名列表，为空时失效整个命名空间
+        :return:
+        """
+        cls._generations[namespace] = cls._generations.get(namespace, 0) + 1
+        cls._stats.setdefault(namespace, dict(hits=0, misses=0, invalidations=0))['invalidations'] += 1
+        if keys is None:
+            cls._entries.pop(namespace, None)
+        else:
+            namespace_entries = cls._entries.get(namespace, {})
+            for key in keys:
+                namespace_entries.pop(key, None)
+
+    @classmethod
+    def clear(cls):
+        """
+        清空本进程所有缓存
+
+        :return:
+        """
+        for namespace in set(cls._entries) | set(cls._generations):
+            cls.invalidate(namespace)
+        cls._versions.clear()
+
+    @classmethod
+    def get_stats(cls):
+        """
+        获取本进程缓存统计信息
+
+        :return: 各命名空间的命中次数、未命中次数、失效次数及缓存条目数
+        """
+        return {
+            namespace: dict(**stats, size=len(cls._entries.get(namespace, {})))
+            for namespace, stats in cls._stats.items()
+        }
+
+    @classmethod
+    def __handle_message(cls, data: str):
+        """
+        处理缓存失效通知
+
+        :param data: 通知内容
+        :return:
+        """
+        message = json.loads(data)
+        namespace, version = message.get('namespace'), message.get('version')
+        last_version = cls._versions.get(namespace)
+        if last_version is not None and version > last_version + 1:
+            # 版本号不连续，期间的失效通知已丢失（或多个进程同时发布导致乱序到达）
+            cls.invalidate(namespace)
+        else:
+            cls.invalidate(namespace, message.get('keys'))
+        cls._versions[namespace] = max(version, last_version or 0)
+
+    @classmethod
+    async def __listen(cls):
+        """
+        后台订阅任务，订阅建立或重建时清空缓存，以免使用订阅中断期间错过失效通知的数据
+
+        :return:
+        """
+        while True:
+            pubsub = cls._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(cls.INVALIDATION_CHANNEL)
+                cls.clear()
+                async for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        cls.__handle_message(message.get('data'))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f'进程内缓存失效通知订阅中断，{cls.RECONNECT_INTERVAL}秒后重试，详细错误信息：{e}')
+                cls.clear()
+                await asyncio.sleep(cls.RECONNECT_INTERVAL)
+            finally:
+                await pubsub.aclose()
@@ -1,9 +1,15 @@
+import base64
+import json
 import math
+from datetime import date, datetime
 from pydantic import BaseModel, ConfigDict
 from pydantic.alias_generators import to_camel
-from sqlalchemy import func, select, Select
+from sqlalchemy import and_, false, func, or_, select, Select, Table, text
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional, List
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import ColumnElement, True_, UnaryExpression
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Tuple, Union
+from exceptions.exception import ServiceException
 from utils.common_util import CamelCaseUtil
 
 
@@ -21,6 +27,16 @@ class PageResponseModel(BaseModel):
     has_next: Optional[bool] = None
 
 
+class CursorPageResponseModel(PageResponseModel):
+    """
+    游标分页查询返回模型
+    """
+
+    total: Optional[int] = None
+    total_estimated: Optional[bool] = None
+    next_cursor: Optional[str] = None
+
+
 class PageUtil:
     """
     分页工具类
@@ -66,12 +82,12 @@ class PageUtil:
             # 计算总数
             count_query = select(func.count()).select_from(query.subquery())
             total = await db.scalar(count_query)
-            
+
             # 分页查询
             paginated_query = query.offset((page_num - 1) * page_size).limit(page_size)
             query_result = await db.execute(paginated_query)
             paginated_data = query_result.scalars().all()
-            
+
             # 计算是否有下一页
             has_next = math.ceil(total / page_size) > page_num
             result = PageResponseModel(
@@ -128,3 +144,230 @@ class PageUtil:
             result = CamelCaseUtil.transform_result(no_paginated_data)
 
         return result
+
+    @classmethod
+    async def stream(cls, db: AsyncSession, query: Select, chunk_size: int = 1000) -> AsyncIterator[List[Dict]]:
+        """
+        输入查询语句，使用服务端游标分批读取全部数据，每批转换为小驼峰形式后返回，内存占用与数据总量无关；
+        流式响应在请求依赖关闭数据库会话后才开始读取数据，因此在同一数据库引擎上使用独立的数据库会话
+
+        :param db: orm对象，用于获取数据库引擎
+        :param query: sqlalchemy查询语句
+        :param chunk_size: 每批读取的数据量
+        :return: 分批数据列表的异步迭代器
+        """
+        async with AsyncSession(bind=db.bind, autoflush=False) as session:
+            query_result = await session.stream(query.execution_options(yield_per=chunk_size))
+            async for partition in query_result.partitions(chunk_size):
+                chunk_data = []
+                for row in partition:
+                    if row and len(row) == 1:
+                        chunk_data.append(row[0])
+                    else:
+                        chunk_data.append(row)
+                yield CamelCaseUtil.transform_result(chunk_data)
+
+    @classmethod
+    async def keyset_paginate(
+        cls,
+        db: AsyncSession,
+        query: Select,
+        order_by_list: List[Union[UnaryExpression, ColumnElement]],
+        page_size: int,
+        cursor: Optional[str] = None,
+        count_mode: Literal['exact', 'estimated', 'none'] = 'exact',
+    ):
+        """
+        输入查询语句和排序键，使用游标（keyset）方式返回分页数据列表结果，翻页耗时与页码深度无关
+
+        :param db: orm对象
+        :param query: sqlalchemy查询语句，原有排序条件会被order_by_list替换；
+                      不能使用DISTINCT，PostgreSQL要求DISTINCT查询的排序表达式出现在查询列中
+        :param order_by_list: 排序键列表，最后一项须为唯一键（如主键）以保证游标位置唯一；
+                              可为空的排序键中空值视为最大值，即正序时排在最后、倒序时排在最前
+        :param page_size: 当前页面数据量
+        :param cursor: 上一页返回的游标，为空时查询第一页
+        :param count_mode: 总数统计方式（exact精确统计 estimated根据数据库统计信息估算 none不统计）
+        :return: 游标分页数据对象
+        """
+        sort_key_list = [cls.__get_sort_key(order_by) for order_by in order_by_list]
+        total, total_estimated = None, None
+        if count_mode == 'exact':
+            total = (await db.execute(select(func.count('*')).select_from(query.subquery()))).scalar()
+        elif count_mode == 'estimated':
+            total, total_estimated = await cls.__get_estimated_total(db, query), True
+            if total is None:
+                total, total_estimated = (
+                    (await db.execute(select(func.count('*')).select_from(query.subquery()))).scalar(),
+                    False,
+                )
+        seek_query = query.order_by(None).order_by(*cls.__get_order_by_list(sort_key_list))
+        if cursor:
+            seek_query = seek_query.where(
+                cls.__get_seek_condition(sort_key_list, cls.decode_cursor(cursor, sort_key_list))
+            )
+        query_result = await db.execute(seek_query.limit(page_size + 1))
+        paginated_data = []
+        for row in query_result:
+            if row and len(row) == 1:
+                paginated_data.append(row[0])
+            else:
+                paginated_data.append(row)
+        has_next = len(paginated_data) > page_size
+        paginated_data = paginated_data[:page_size]
+        next_cursor = cls.encode_cursor(paginated_data[-1], sort_key_list) if has_next else None
+
+        return CursorPageResponseModel(
+            rows=CamelCaseUtil.transform_result(paginated_data),
+            pageSize=page_size,
+            total=total,
+            totalEstimated=total_estimated,
+            hasNext=has_next,
+            nextCursor=next_cursor,
+        )
+
+    @classmethod
+    def encode_cursor(cls, row: Any, sort_key_list: List[Tuple[ColumnElement, bool]]) -> str:
+        """
+        根据当前页最后一行数据的排序键值生成不透明游标
+
+        :param row: 当前页最后一行数据
+        :param sort_key_list: 排序键列表
+        :return: 游标
+        """
+        value_list = []
+        for column, _ in sort_key_list:
+            value = getattr(row, column.key)
+            value_list.append(value.isoformat() if isinstance(value, (date, datetime)) else value)
+
+        return base64.urlsafe_b64encode(json.dumps(value_list, ensure_ascii=False).encode('utf-8')).decode('ascii')
+
+    @classmethod
+    def decode_cursor(cls, cursor: str, sort_key_list: List[Tuple[ColumnElement, bool]]) -> List[Any]:
+        """
+        解析游标中的排序键值
+
+        :param cursor: 游标
+        :param sort_key_list: 排序键列表
+        :return: 排序键值列表
+        """
+        try:
+            value_list = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            if not isinstance(value_list, list) or len(value_list) != len(sort_key_list):
+                raise ValueError(cursor)
+            result = []
+            for (column, _), value in zip(sort_key_list, value_list):
+                python_type = column.type.python_type
+                if value is not None and python_type in (date, datetime):
+                    value = python_type.fromisoformat(value)
+                result.append(value)
+        except Exception:
+            raise ServiceException(message='分页游标无效，请从第一页重新查询')
+
+        return result
+
+    @classmethod
+    def __get_sort_key(cls, order_by: Union[UnaryExpression, ColumnElement]) -> Tuple[ColumnElement, bool]:
+        """
+        解析排序条件对应的列及是否倒序
+
+        :param order_by: 排序条件
+        :return: 排序列及是否倒序
+        """
+        if isinstance(order_by, UnaryExpression) and order_by.modifier in (operators.desc_op, operators.asc_op):
+            return order_by.element, order_by.modifier is operators.desc_op
+        return order_by, False
+
+    @classmethod
+    def __get_order_by_list(cls, sort_key_list: List[Tuple[ColumnElement, bool]]) -> List[UnaryExpression]:
+        """
+        生成与游标定位条件一致的排序条件，可为空的排序键先按是否为空排序，使各数据库中空值的排序位置相同
+
+        :param sort_key_list: 排序键列表
+        :return: 排序条件列表
+        """
+        order_by_list = []
+        for column, is_desc in sort_key_list:
+            if cls.__is_nullable(column):
+                order_by_list.append(column.is_(None).desc() if is_desc else column.is_(None).asc())
+            order_by_list.append(column.desc() if is_desc else column.asc())
+
+        return order_by_list
+
+    @classmethod
+    def __get_seek_condition(cls, sort_key_list: List[Tuple[ColumnElement, bool]], value_list: List[Any]):
+        """
+        生成定位到游标之后数据的查询条件，即(k1 > v1) or (k1 = v1 and k2 > v2) or ...，倒序时比较方向相反；
+        可为空的排序键中空值视为最大值，比较及相等条件中单独处理空值，避免比较结果为NULL导致数据被遗漏
+
+        :param sort_key_list: 排序键列表
+        :param value_list: 游标中的排序键值列表
+        :return: 查询条件
+        """
+        condition_list = []
+        for index, (column, is_desc) in enumerate(sort_key_list):
+            equal_condition_list = [
+                sort_key_list[i][0].is_(None) if value_list[i] is None else sort_key_list[i][0] == value_list[i]
+                for i in range(index)
+            ]
+            value = value_list[index]
+            if value is None:
+                # 空值为最大值，正序时其后没有数据，倒序时其后为全部非空值
+                if not is_desc:
+                    continue
+                compare_condition = column.is_not(None)
+            elif is_desc:
+                compare_condition = column < value
+            elif cls.__is_nullable(column):
+                compare_condition = or_(column > value, column.is_(None))
+            else:
+                compare_condition = column > value
+            condition_list.append(and_(*equal_condition_list, compare_condition))
+
+        return or_(false(), *condition_list)
+
+    @classmethod
+    def __is_nullable(cls, column: ColumnElement) -> bool:
+        """
+        判断排序键是否可能为空，无法判断时视为可为空
+
+        :param column: 排序键
+        :return: 是否可能为空
+        """
+        return getattr(column, 'nullable', True)
+
+    @classmethod
+    async def __get_estimated_total(cls, db: AsyncSession, query: Select) -> Optional[int]:
+        """
+        查询语句不包含过滤条件时，根据数据库统计信息估算总数，无法估算时返回None
+
+        :param db: orm对象
+        :param query: sqlalchemy查询语句
+        :return: 估算的总数
+        """
+        where_clause = query.whereclause
+        if where_clause is not None and not isinstance(getattr(where_clause, 'element', where_clause), True_):
+            return None
+        from_list = query.get_final_froms()
+        if len(from_list) != 1 or not isinstance(from_list[0], Table):
+            return None
+        dialect_name = db.bind.dialect.name
+        if dialect_name == 'mysql':
+            estimated_total = await db.scalar(
+                text(
+                    'select table_rows from information_schema.tables '
+                    'where table_schema = database() and table_name = :table_name'
+                ),
+                {'table_name': from_list[0].name},
+            )
+        elif dialect_name == 'postgresql':
+            estimated_total = await db.scalar(
+                text('select reltuples::bigint from pg_class where relname = :table_name'),
+                {'table_name': from_list[0].name},
+            )
+        else:
+            return None
+        if estimated_total is None or estimated_total < 0:
+            return None
+
+        return int(estimated_total)
@@ -1,13 +1,60 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
+from typing import Callable, List, Optional, Tuple
+from config.env import AppConfig
+from exceptions.exception import ServiceException
+from utils.log_util import logger
 
-pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+# 加密强度与配置不一致的密码在校验通过后需要重新加密
+pwd_context = CryptContext(
+    schemes=['bcrypt'],
+    deprecated='auto',
+    bcrypt__default_rounds=AppConfig.app_password_bcrypt_rounds,
+    bcrypt__min_desired_rounds=AppConfig.app_password_bcrypt_rounds,
+    bcrypt__max_desired_rounds=AppConfig.app_password_bcrypt_rounds,
+)
 
 
 class PwdUtil:
     """
     密码工具类
+
+    bcrypt计算耗时较长，异步方法在独立线程池中执行（bcrypt计算时释放GIL），并限制同时计算的数量，
+    排队超过等待时间的请求直接提示系统繁忙，避免登录高峰时阻塞事件循环或请求无限堆积
     """
 
+    _executor: Optional[ThreadPoolExecutor] = None
+    _semaphore: Optional[asyncio.Semaphore] = None
+
+    @classmethod
+    async def init_pwd_executor(cls):
+        """
+        应用启动时初始化密码计算线程池
+
+        :return:
+        """
+        cls._executor = ThreadPoolExecutor(
+            max_workers=AppConfig.app_password_hash_workers, thread_name_prefix='pwd-hash'
+        )
+        cls._semaphore = asyncio.Semaphore(AppConfig.app_password_hash_workers)
+        logger.info('密码计算线程池初始化成功')
+
+    @classmethod
+    async def close_pwd_executor(cls):
+        """
+        应用关闭时关闭密码计算线程池
+
+        :return:
+        """
+        if cls._executor is None:
+            return
+        executor = cls._executor
+        cls._executor = None
+        cls._semaphore = None
+        await asyncio.to_thread(executor.shutdown, wait=True)
+        logger.info('密码计算线程池已关闭')
+
     @classmethod
     def verify_password(cls, plain_password, hashed_password):
         """
@@ -28,3 +75,79 @@ class PwdUtil:
         :return: 加密成功的密码
         """
         return pwd_context.hash(input_password)
+
+    @classmethod
+    def get_password_hash_batch(cls, input_password, count: int) -> List[str]:
+        """
+        工具方法：使用不同的盐值对同一密码多次加密，用于批量创建用户时在进程池中执行
+
+        :param input_password: 输入的密码
+        :param count: 加密次数
+        :return: 加密成功的密码列表
+        """
+        return [pwd_context.hash(input_password) for _ in range(count)]
+
+    @classmethod
+    def verify_and_update_password(cls, plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+        """
+        工具方法：校验密码，校验通过且数据库存储的密码加密强度与配置不一致时返回重新加密的密码
+
+        :param plain_password: 当前输入的密码
+        :param hashed_password: 数据库存储的密码
+        :return: 校验结果及重新加密的密码（无需重新加密时为None）
+        """
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+
+    @classmethod
+    async def async_verify_password(cls, plain_password, hashed_password):
+        """
+        工具方法：在密码计算线程池中校验密码
+
+        :param plain_password: 当前输入的密码
+        :param hashed_password: 数据库存储的密码
+        :return: 校验结果
+        """
+        return await cls.__run(cls.verify_password, plain_password, hashed_password)
+
+    @classmethod
+    async def async_get_password_hash(cls, input_password):
+        """
+        工具方法：在密码计算线程池中加密密码
+
+        :param input_password: 输入的密码
+        :return: 加密成功的密码
+        """
+        return await cls.__run(cls.get_password_hash, input_password)
+
+    @classmethod
+    async def async_verify_and_update_password(cls, plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+        """
+        工具方法：在密码计算线程池中校验密码，并在加密强度与配置不一致时重新加密
+
+        :param plain_password: 当前输入的密码
+        :param hashed_password: 数据库存储的密码
+        :return: 校验结果及重新加密的密码（无需重新加密时为None）
+        """
+        return await cls.__run(cls.verify_and_update_password, plain_password, hashed_password)
+
+    @classmethod
+    async def __run(cls, func: Callable, *args):
+        """
+        在密码计算线程池中执行，线程池未初始化时（如脚本中调用）直接执行
+
+        :param func: 需要执行的方法
+        :param args: 方法参数
+        :return: 方法执行结果
+        """
+        if cls._executor is None:
+            return func(*args)
+        semaphore = cls._semaphore
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=AppConfig.app_password_hash_queue_timeout)
+        except asyncio.TimeoutError:
+            logger.warning('密码计算排队超时')
+            raise ServiceException(message='系统繁忙，请稍后再试')
+        try:
+            return await asyncio.get_running_loop().run_in_executor(cls._executor, func, *args)
+        finally:
+            semaphore.release()
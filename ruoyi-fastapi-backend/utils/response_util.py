@@ -1,11 +1,26 @@
+import os
 from datetime import datetime
 from fastapi import status
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from starlette.background import BackgroundTask
-from typing import Any, Dict, Mapping, Optional
+from starlette.requests import Request
+from typing import Any, Dict, Mapping, Optional, Union
 from config.constant import HttpStatusConstant
+from config.env import AppConfig
+from utils.json_util import JsonUtil
+
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    使用JsonUtil直接序列化的JSON响应，content为bytes时视为已序列化的JSON直接返回
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return JsonUtil.dumps(content)
 
 
 class ResponseUtil:
@@ -21,9 +36,11 @@ class ResponseUtil:
         rows: Optional[Any] = None,
         dict_content: Optional[Dict] = None,
         model_content: Optional[BaseModel] = None,
+        serialized_data: Optional[str] = None,
         headers: Optional[Mapping[str, str]] = None,
         media_type: Optional[str] = None,
         background: Optional[BackgroundTask] = None,
+        fast_encode: Optional[bool] = None,
     ) -> Response:
         """
         成功响应方法
@@ -33,9 +50,11 @@ class ResponseUtil:
         :param rows: 可选，成功响应结果中属性为rows的值
         :param dict_content: 可选，dict类型，成功响应结果中自定义属性的值
         :param model_content: 可选，BaseModel类型，成功响应结果中自定义属性的值
+        :param serialized_data: 可选，已序列化为JSON字符串的data值，直接拼接到响应结果中，不再重复序列化
         :param headers: 可选，响应头信息
         :param media_type: 可选，响应结果媒体类型
         :param background: 可选，响应返回后执行的后台任务
+        :param fast_encode: 可选，是否使用orjson直接序列化响应结果，默认读取应用配置app_response_orjson_enabled
         :return: 成功响应结果
         """
         result = {'code': HttpStatusConstant.SUCCESS, 'msg': msg}
@@ -51,13 +70,16 @@ class ResponseUtil:
 
         result.update({'success': True, 'time': datetime.now()})
 
-        return JSONResponse(
-            status_code=status.HTTP_200_OK,
-            content=jsonable_encoder(result),
-            headers=headers,
-            media_type=media_type,
-            background=background,
-        )
+        if serialized_data is not None:
+            return cls.__render(
+                JsonUtil.dumps(result)[:-1] + b',"data":' + serialized_data.encode('utf-8') + b'}',
+                headers,
+                media_type,
+                background,
+                True,
+            )
+
+        return cls.__render(result, headers, media_type, background, fast_encode)
 
     @classmethod
     def failure(
@@ -70,6 +92,7 @@ class ResponseUtil:
         headers: Optional[Mapping[str, str]] = None,
         media_type: Optional[str] = None,
         background: Optional[BackgroundTask] = None,
+        fast_encode: Optional[bool] = None,
     ) -> Response:
         """
         失败响应方法
@@ -82,6 +105,7 @@ class ResponseUtil:
         :param headers: 可选，响应头信息
         :param media_type: 可选，响应结果媒体类型
         :param background: 可选，响应返回后执行的后台任务
+        :param fast_encode: 可选，是否使用orjson直接序列化响应结果，默认读取应用配置app_response_orjson_enabled
         :return: 失败响应结果
         """
         result = {'code': HttpStatusConstant.WARN, 'msg': msg}
@@ -97,13 +121,7 @@ class ResponseUtil:
 
         result.update({'success': False, 'time': datetime.now()})
 
-        return JSONResponse(
-            status_code=status.HTTP_200_OK,
-            content=jsonable_encoder(result),
-            headers=headers,
-            media_type=media_type,
-            background=background,
-        )
+        return cls.__render(result, headers, media_type, background, fast_encode)
 
     @classmethod
     def unauthorized(
@@ -116,6 +134,7 @@ class ResponseUtil:
         headers: Optional[Mapping[str, str]] = None,
         media_type: Optional[str] = None,
         background: Optional[BackgroundTask] = None,
+        fast_encode: Optional[bool] = None,
     ) -> Response:
         """
         未认证响应方法
@@ -128,6 +147,7 @@ class ResponseUtil:
         :param headers: 可选，响应头信息
         :param media_type: 可选，响应结果媒体类型
         :param background: 可选，响应返回后执行的后台任务
+        :param fast_encode: 可选，是否使用orjson直接序列化响应结果，默认读取应用配置app_response_orjson_enabled
         :return: 未认证响应结果
         """
         result = {'code': HttpStatusConstant.UNAUTHORIZED, 'msg': msg}
@@ -143,13 +163,7 @@ class ResponseUtil:
 
         result.update({'success': False, 'time': datetime.now()})
 
-        return JSONResponse(
-            status_code=status.HTTP_200_OK,
-            content=jsonable_encoder(result),
-            headers=headers,
-            media_type=media_type,
-            background=background,
-        )
+        return cls.__render(result, headers, media_type, background, fast_encode)
 
     @classmethod
     def forbidden(
@@ -162,6 +176,7 @@ class ResponseUtil:
         headers: Optional[Mapping[str, str]] = None,
         media_type: Optional[str] = None,
         background: Optional[BackgroundTask] = None,
+        fast_encode: Optional[bool] = None,
     ) -> Response:
         """
         未授权响应方法
@@ -174,6 +189,7 @@ class ResponseUtil:
         :param headers: 可选，响应头信息
         :param media_type: 可选，响应结果媒体类型
         :param background: 可选，响应返回后执行的后台任务
+        :param fast_encode: 可选，是否使用orjson直接序列化响应结果，默认读取应用配置app_response_orjson_enabled
         :return: 未授权响应结果
         """
         result = {'code': HttpStatusConstant.FORBIDDEN, 'msg': msg}
@@ -189,13 +205,7 @@ class ResponseUtil:
 
         result.update({'success': False, 'time': datetime.now()})
 
-        return JSONResponse(
-            status_code=status.HTTP_200_OK,
-            content=jsonable_encoder(result),
-            headers=headers,
-            media_type=media_type,
-            background=background,
-        )
+        return cls.__render(result, headers, media_type, background, fast_encode)
 
     @classmethod
     def error(
@@ -208,6 +218,7 @@ class ResponseUtil:
         headers: Optional[Mapping[str, str]] = None,
         media_type: Optional[str] = None,
         background: Optional[BackgroundTask] = None,
+        fast_encode: Optional[bool] = None,
     ) -> Response:
         """
         错误响应方法
@@ -220,6 +231,7 @@ class ResponseUtil:
         :param headers: 可选，响应头信息
         :param media_type: 可选，响应结果媒体类型
         :param background: 可选，响应返回后执行的后台任务
+        :param fast_encode: 可选，是否使用orjson直接序列化响应结果，默认读取应用配置app_response_orjson_enabled
         :return: 错误响应结果
         """
         result = {'code': HttpStatusConstant.ERROR, 'msg': msg}
@@ -235,13 +247,7 @@ class ResponseUtil:
 
         result.update({'success': False, 'time': datetime.now()})
 
-        return JSONResponse(
-            status_code=status.HTTP_200_OK,
-            content=jsonable_encoder(result),
-            headers=headers,
-            media_type=media_type,
-            background=background,
-        )
+        return cls.__render(result, headers, media_type, background, fast_encode)
 
     @classmethod
     def streaming(
@@ -264,3 +270,103 @@ class ResponseUtil:
         return StreamingResponse(
             status_code=status.HTTP_200_OK, content=data, headers=headers, media_type=media_type, background=background
         )
+
+    @classmethod
+    def file(
+        cls,
+        *,
+        path: str,
+        request: Optional[Request] = None,
+        filename: Optional[str] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+        background: Optional[BackgroundTask] = None,
+    ) -> Response:
+        """
+        文件响应方法，按固定大小分块读取文件，响应头包含Content-Length、ETag及Last-Modified，支持Range及If-Range断点续传，
+        传入request时支持If-None-Match协商缓存
+
+        :param path: 文件路径
+        :param request: 可选，Request对象，用于判断请求头If-None-Match
+        :param filename: 可选，下载的文件名称，用于Content-Disposition及推断媒体类型
+        :param headers: 可选，响应头信息
+        :param media_type: 可选，响应结果媒体类型，默认根据文件名称推断
+        :param background: 可选，响应返回后执行的后台任务
+        :return: 文件响应结果
+        """
+        response = FileResponse(
+            path=path,
+            headers=headers,
+            media_type=media_type,
+            background=background,
+            filename=filename,
+            stat_result=os.stat(path),
+        )
+        if_none_match = request.headers.get('if-none-match') if request is not None else None
+        if cls.__is_not_modified(if_none_match, response.headers['etag']):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={
+                    key: value
+                    for key, value in response.headers.items()
+                    if key in ('etag', 'last-modified', 'cache-control', 'content-location', 'expires', 'vary')
+                },
+                background=background,
+            )
+
+        return response
+
+    @classmethod
+    def __render(
+        cls,
+        result: Union[Dict, bytes],
+        headers: Optional[Mapping[str, str]],
+        media_type: Optional[str],
+        background: Optional[BackgroundTask],
+        fast_encode: Optional[bool],
+    ) -> Response:
+        """
+        工具方法：将响应结果序列化为JSON响应
+
+        :param result: 响应结果，为bytes时视为已序列化的JSON
+        :param headers: 响应头信息
+        :param media_type: 响应结果媒体类型
+        :param background: 响应返回后执行的后台任务
+        :param fast_encode: 是否使用orjson直接序列化，为None时读取应用配置
+        :return: JSON响应
+        """
+        if fast_encode is None:
+            fast_encode = AppConfig.app_response_orjson_enabled
+        if fast_encode or isinstance(result, bytes):
+            return FastJSONResponse(
+                status_code=status.HTTP_200_OK,
+                content=result,
+                headers=headers,
+                media_type=media_type,
+                background=background,
+            )
+
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content=jsonable_encoder(result),
+            headers=headers,
+            media_type=media_type,
+            background=background,
+        )
+
+    @staticmethod
+    def __is_not_modified(if_none_match: Optional[str], etag: str):
+        """
+        工具方法：判断请求头If-None-Match是否与ETag匹配，按弱比较规则忽略W/前缀
+
+        :param if_none_match: 请求头If-None-Match
+        :param etag: 响应的ETag
+        :return: 是否未修改
+        """
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        etag = etag.removeprefix('W/')
+
+        return any(tag.strip().removeprefix('W/') == etag for tag in if_none_match.split(','))
@@ -39,7 +39,17 @@ class UploadUtil:
         :param file: 文件对象
         :return: 校验结果
         """
-        file_extension = file.filename.rsplit('.', 1)[-1]
+        return cls.check_filename_extension(file.filename)
+
+    @classmethod
+    def check_filename_extension(cls, filename: str):
+        """
+        检查文件名称后缀是否合法
+
+        :param filename: 文件名称
+        :return: 校验结果
+        """
+        file_extension = filename.rsplit('.', 1)[-1]
         if file_extension in UploadConfig.DEFAULT_ALLOWED_EXTENSION:
             return True
         return False
@@ -85,15 +95,17 @@ class UploadUtil:
         return False
 
     @classmethod
-    def generate_file(cls, filepath: str):
+    def generate_file(cls, filepath: str, chunk_size: int = 64 * 1024):
         """
-        根据文件生成二进制数据
+        根据文件生成二进制数据，按固定大小分块读取
 
         :param filepath: 文件路径
+        :param chunk_size: 每块的字节数
         :yield: 二进制数据
         """
         with open(filepath, 'rb') as response_file:
-            yield from response_file
+            while chunk := response_file.read(chunk_size):
+                yield chunk
 
     @classmethod
     def delete_file(cls, filepath: str):
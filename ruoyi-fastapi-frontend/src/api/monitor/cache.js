@@ -24,6 +24,15 @@ export function listCacheKey(cacheName) {
   })
 }
 
+// 游标分页查询缓存键名列表
+export function listCacheKeyPage(cacheName, query) {
+  return request({
+    url: '/monitor/cache/getKeyPage/' + cacheName,
+    method: 'get',
+    params: query
+  })
+}
+
 // 查询缓存内容
 export function getCacheValue(cacheName, cacheKey) {
   return request({
@@ -127,6 +127,14 @@ export function updateAuthRole(data) {
   })
 }
 
+// 查询用户导入任务进度
+export function getImportTask(taskId) {
+  return request({
+    url: '/system/user/importData/' + taskId,
+    method: 'get'
+  })
+}
+
 // 查询部门下拉树结构
 export function deptTreeSelect() {
   return request({